@@ -0,0 +1,103 @@
+"""
+⏱️ IMPORT-TIME BENCHMARK - Startup regression guard
+Roda cada entry point em um interpretador novo com `python -X importtime`,
+soma o tempo cumulativo de import e falha (exit 1) se algum estourar o
+orçamento ou carregar uma dependência pesada na inicialização.
+
+Uso: python bench_import_time.py [--runs N]
+"""
+import argparse
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+# entry point -> (code executed in a fresh interpreter, budget in ms)
+ENTRY_POINTS = {
+    "codex_ia": ("import codex_ia", 50),
+    "codex_ia.core.agent": ("import codex_ia.core.agent", 250),
+    "CodexAgent()": (
+        "import tempfile, codex_ia.core.agent as a; a.CodexAgent(tempfile.mkdtemp())", 400
+    ),
+    "codex_ia.core.squad": ("import codex_ia.core.squad", 300),
+    "codex_ia.main (CLI)": ("import codex_ia.main", 400),
+    "codex_cli": ("import codex_cli", 400),
+}
+
+# Must never be imported just to start up
+HEAVY_MODULES = ("chromadb", "torch", "sentence_transformers", "google.genai", "google.generativeai")
+
+
+def measure(code: str):
+    """Returns (total import ms, {module: cumulative ms}) for one fresh interpreter."""
+    env = dict(os.environ, PYTHONPATH=ROOT + os.pathsep + os.environ.get("PYTHONPATH", ""))
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=ROOT, env=env, capture_output=True, text=True
+    )
+    modules = {}
+    total_us = 0
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        try:
+            _, cumulative, name = line[len("import time:"):].split("|")
+        except ValueError:
+            continue
+        indent = len(name) - len(name.lstrip())
+        name = name.strip()
+        modules[name] = int(cumulative) / 1000
+        if indent == 1:  # Top-level import: its cumulative time covers the children
+            total_us += int(cumulative)
+    if proc.returncode != 0:
+        tail = (proc.stderr.strip().splitlines()[-1:] or ["?"])[0]
+        if tail.startswith("ModuleNotFoundError"):
+            raise ModuleNotFoundError(tail)
+        raise RuntimeError(f"'{code}' failed: {tail}")
+    return total_us / 1000, modules
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=3, help="Medições por entry point (usa a mediana)")
+    args = parser.parse_args()
+
+    print("--- Benchmarking import time ---")
+    measure("import codex_ia.core.agent")  # Warm the .pyc cache first
+
+    failures = []
+    for label, (code, budget) in ENTRY_POINTS.items():
+        try:
+            samples = [measure(code) for _ in range(max(args.runs, 1))]
+        except ModuleNotFoundError as e:
+            print(f"  ⏭️ {label}: skipped ({e})")
+            continue
+        except RuntimeError as e:
+            print(f"  ⚠️ {label}: {e}")
+            failures.append(label)
+            continue
+        samples.sort(key=lambda s: s[0])
+        total, modules = samples[len(samples) // 2]
+        heavy = [m for m in HEAVY_MODULES if m in modules]
+        slowest = sorted(
+            ((ms, m) for m, ms in modules.items() if m.startswith("codex_ia")), reverse=True
+        )[:3]
+
+        status = "✅" if total <= budget and not heavy else "❌"
+        print(f"  {status} {label}: {total:.1f} ms (budget {budget} ms)")
+        if slowest:
+            print("     slowest: " + ", ".join(f"{m} {ms:.1f} ms" for ms, m in slowest))
+        if heavy:
+            print(f"     heavy modules loaded at startup: {', '.join(heavy)}")
+        if status == "❌":
+            failures.append(label)
+
+    if failures:
+        print(f"X Import-time regression in: {', '.join(failures)}")
+        exit(1)
+    print("--- [SUCCESS] Import time within budget ---")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,8 @@
+"""
+🧪 PYTEST STREAM ENV - Variáveis de ambiente entre o shard_runner e o plugin
+Fica fora de pytest_stream para que o processo do agente não importe o pytest:
+só o pytest filho carrega o plugin (via `-p`).
+"""
+
+EVENTS_ENV = "CODEX_TEST_EVENTS"  # JSONL file the plugin writes one event per line to
+SHARD_ENV = "CODEX_TEST_SHARD"  # File with the nodeids this pytest process should run
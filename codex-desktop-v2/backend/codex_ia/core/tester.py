@@ -1,7 +1,10 @@
 import os
-import subprocess
 import logging
+import shlex
 from .brain_router import BrainRouter
+from .executor import get_executor
+from .impact import get_impact_runner
+from .shard_runner import ShardedRunner
 
 logger = logging.getLogger(__name__)
 
@@ -10,30 +13,48 @@ class TesterAgent:
     Level 15: QA & Self-Healing (The Immune System V2)
     Runs tests, analyzes failures, and attempts to hotfix code.
     """
+    TEST_TIMEOUT = 300  # Seconds for a full test run (per shard for pytest)
+    TEST_WORKERS = None  # pytest shards (None = min(cpu_count, 4))
+
     def __init__(self, project_root):
         self.project_root = project_root
         self.brain = BrainRouter()
+        self.last_selection = None  # Impacted-test decision of the last targeted run
+        self.last_report = None  # SuiteReport of the last pytest run (per-test results)
 
-    def run_tests(self, test_cmd="pytest"):
+    def run_tests(self, test_cmd="pytest", changed=None, on_failure=None):
         """
         Runs the test suite and captures output.
+        pytest is sharded across worker processes; `on_failure(case)` gets each failure as it happens.
+        With `changed` (file paths), pytest runs only the tests that reach those files.
         Returns (success: bool, output: str)
         """
+        if changed and "pytest" in test_cmd:
+            selection = get_impact_runner(self.project_root).map.select(changed)
+            self.last_selection = selection
+            logger.info(f"🎯 {len(selection.tests)}/{selection.total_tests} test files affected: {selection.reason}")
+            if not selection.full:
+                if not selection.tests:
+                    return True, f"No tests affected ({selection.reason})"
+                test_cmd = " ".join([test_cmd] + [shlex.quote(t) for t in selection.tests])
         logger.info(f"🧪 Running tests with: {test_cmd}")
-        try:
-            # Run test command
-            result = subprocess.run(
-                test_cmd,
-                cwd=self.project_root,
-                capture_output=True,
-                text=True,
-                shell=True
-            )
-            
-            output = result.stdout + "\n" + result.stderr
-            return result.returncode == 0, output
-        except Exception as e:
-            return False, str(e)
+        args = shlex.split(test_cmd)
+        pytest_at = next((i for i, part in enumerate(args[:3]) if "pytest" in part), None)
+        if pytest_at is not None:
+            runner = ShardedRunner(self.project_root, workers=self.TEST_WORKERS,
+                                   args=args[pytest_at + 1:], timeout=self.TEST_TIMEOUT)
+            self.last_report = runner.run(on_failure=on_failure)
+            return self.last_report.passed, self.last_report.output()
+
+        # Streams into bounded buffers, runs under rlimits and is killed on timeout
+        result = get_executor().run(test_cmd, cwd=self.project_root, timeout=self.TEST_TIMEOUT)
+        if result.error:
+            return False, result.error
+
+        output = result.stdout + "\n" + result.stderr
+        if result.timed_out:
+            output += f"\n[TIMEOUT] Tests killed after {self.TEST_TIMEOUT}s"
+        return result.success, output
 
     def analyze_and_heal(self, test_output: str, file_context: str = None) -> str:
         """
@@ -62,13 +83,19 @@ class TesterAgent:
         solution = self.brain.send_message(prompt, task_type="coding")
         return solution
 
-    def auto_heal(self):
+    def auto_heal(self, changed=None):
         """
         Main loop: Run -> Fail -> Analyze -> Fix -> Run -> Pass
+        `changed` limits the run to the tests affected by those files.
         """
-        success, output = self.run_tests()
+        success, output = self.run_tests(changed=changed)
         
         if success:
+            if changed:
+                # Affected tests are green; the full suite confirms in the background (runner.last_full)
+                get_impact_runner(self.project_root).run_full_async()
+                return {"status": "healthy", "message": "Affected tests passed! 🟢 Full suite running.",
+                        "selection": self.last_selection.reason if self.last_selection else None}
             return {"status": "healthy", "message": "All tests passed! 🟢"}
             
         # If failed, try to heal
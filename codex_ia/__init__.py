@@ -1,5 +1,23 @@
-from .core.agent import CodexAgent
-from .core.context import ContextManager
-from .core.llm_client import GeminiClient
+
+# Public API is resolved lazily (PEP 562): `import codex_ia` stays cheap and
+# `from codex_ia import CodexAgent` only pulls in what CodexAgent needs.
+_EXPORTS = {
+    "CodexAgent": ".core.agent",
+    "ContextManager": ".core.context",
+    "GeminiClient": ".core.llm_client",
+}
 
 __all__ = ["CodexAgent", "ContextManager", "GeminiClient"]
+
+
+def __getattr__(name):
+    if name in _EXPORTS:
+        import importlib
+        value = getattr(importlib.import_module(_EXPORTS[name], __name__), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted(list(globals()) + __all__)
@@ -4,27 +4,38 @@ from codex_ia.core.context import ContextManager
 from codex_ia.core.brain_router import BrainRouter
 from codex_ia.core.network_agent import NetworkAgent
 from codex_ia.core.tools import ToolRegistry  # [NEW]
-import re
+from codex_ia.core.tool_protocol import ToolCall, ToolExecutor, describe_tools, parse_tool_calls, step_trace
+from codex_ia.core.prompt_session import PromptSession
+from codex_ia.core.syntax_checker import get_syntax_checker
+from codex_ia.core.diff_review import DiffReviewer
+import time
 
 # Configuração básica de logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
 class CodexAgent:
+    HISTORY_TOKEN_BUDGET = 1500  # Tokens of conversation history sent per turn
+    MAX_STEPS = 8  # LLM round-trips per chat (each one may run several tools)
+    NATIVE_TOOLS = os.getenv("CODEX_NATIVE_TOOLS", "1") != "0"  # Provider function calling
+
     def __init__(self, project_dir):
         self.project_dir = project_dir
         self.context_manager = ContextManager(project_dir)
+        self.conversation = None  # TieredMemory, opened on first chat
         self.llm_client = BrainRouter() # The Council
         self.network_agent = NetworkAgent()
         self.tools = ToolRegistry(project_dir) # [NEW]
         self.tool_map = self.tools.get_tool_map()
+        self.tool_schemas = self.tools.get_tool_schemas()
+        self.tool_executor = ToolExecutor(self.tool_map)
+        self.last_trace = []  # Step-level trace of the last chat() call
+        self.last_token_report = {}  # Prompt token accounting of the last chat() call
+        self.diff_reviewer = DiffReviewer()  # Sentinel: diff-scoped, cached, rate-limited review
 
-        
-        # [PHASE 6] Global Knowledge 🌍
-        try:
-            from codex_ia.core.global_store import GlobalVectorStore
-            self.global_store = GlobalVectorStore()
-        except Exception:
-            self.global_store = None
+    @property
+    def global_store(self):
+        """[PHASE 6] Global Knowledge 🌍 (shared with the ContextManager, built on first use)."""
+        return self.context_manager.global_store
 
     def share_knowledge_globally(self, topic, content, metadata=None):
         """Shares knowledge from the current project to the universal store."""
@@ -41,15 +52,31 @@ class CodexAgent:
         """Atualiza o diretório de contexto do agente."""
         self.project_dir = new_dir
         self.context_manager = ContextManager(new_dir)
+        self.conversation = None
         logging.info(f"Contexto alterado para: {new_dir}")
 
+    def _get_conversation(self):
+        """Tiered conversation memory for the current project (None if unavailable)."""
+        if self.conversation is None:
+            try:
+                from codex_ia.core.conversation_memory import TieredMemory
+                self.conversation = TieredMemory.for_project(
+                    os.path.join(self.project_dir, ".codex_long_memory.db"),
+                    os.path.basename(os.path.abspath(self.project_dir))
+                )
+            except Exception as e:
+                logging.warning(f"Conversation memory unavailable: {e}")
+                return None
+        return self.conversation
+
     def chat(self, message, web_search=False, image_path=None, use_fallback=True, task_type='general'):
         """
         [LEVEL 4] ReAct Agent Loop.
         The Agent can now DECIDE to use tools before answering.
+        Each step may request several tools (JSON or native function calling);
+        independent calls run in parallel and `self.last_trace` records timings
+        and per-step token accounting.
         """
-        MAX_STEPS = 5
-        
         # 0. Get Context
         try:
             context = self.context_manager.get_semantic_context(message)
@@ -67,56 +94,83 @@ class CodexAgent:
             "   - Se precisar pesquisar algo, diga: 'Preciso pesquisar X na web. Autoriza?'\n\n"
             
             "FORMATO DE PENSAMENTO (Obrigatório):\n"
-            "1. Pense: '💭 Pensamento: Analisando o erro... Vou editar o arquivo.'\n"
-            "2. Aja: '🛠️ TOOL: replace_text(\"arquivo.py\", \"erro\", \"correcao\")'\n"
+            "1. Pense: '💭 Pensamento: Preciso ler os arquivos envolvidos.'\n"
+            "2. Aja: peça TODAS as ferramentas independentes de uma vez (ex.: vários read_file).\n"
             "3. Observe e Repita.\n"
             "4. Responda: 'Arrumei o arquivo X para você.'\n\n"
+            f"{describe_tools(self.tool_schemas)}\n\n"
             "Responda sempre em Português do Brasil."
         )
 
-        chat_history = f"{system_instruction}\n\nCONTEXT INICIAL:\n{context}\n\nUSER: {message}\n"
+        # 0.5 Conversation history within a token budget (recent + summaries + retrieval)
+        conversation = self._get_conversation()
+        history = ""
+        if conversation:
+            try:
+                history = conversation.build_history(self.HISTORY_TOKEN_BUDGET, query=message)
+            except Exception as e:
+                logging.warning(f"Failed to build history: {e}")
+
+        system_prompt = f"{system_instruction}\n\n"
+        if history:
+            system_prompt += f"HISTÓRICO DA CONVERSA:\n{history}\n\n"
+        system_prompt += f"CONTEXT INICIAL:\n{context}"
+
+        # Message list: the stable prefix (system + context) is sent/cached once,
+        # each step only adds the model turn and the tool observations
+        session = PromptSession(
+            self.llm_client, system_prompt,
+            tool_schemas=self.tool_schemas if self.NATIVE_TOOLS else None,
+            use_fallback=use_fallback, task_type=task_type
+        )
+        session.add_user(message)
         
         step = 0
         final_answer = ""
+        response = ""
+        self.last_trace = []
         
-        while step < MAX_STEPS:
+        while step < self.MAX_STEPS:
             step += 1
             
-            # Send current history to LLM
-            response = self.llm_client.send_message(chat_history)
-            
-            # Check for Tool usage
-            tool_match = re.search(r'🛠️ TOOL:\s*(\w+)\((.*)\)', response)
-            
-            if tool_match:
-                # Agent wants to act!
-                tool_name = tool_match.group(1)
-                args = tool_match.group(2).strip('"\'')
-                
-                # Render thought to UI (hack: prepend to final answer later or log it)
-                print(f"Log: {response}") # For backend debugging
-                
-                if tool_name in self.tool_map:
-                    try:
-                        # Execute Tool
-                        result = self.tool_map[tool_name](args)
-                        observation = f"👀 OBSERVATION: {result}"
-                    except Exception as e:
-                        observation = f"👀 OBSERVATION: Erro ao executar ferramenta: {e}"
-                else:
-                    observation = f"👀 OBSERVATION: Ferramenta '{tool_name}' desconhecida."
-                
-                # Append to history and loop again
-                chat_history += f"\nAGENT: {response}\nSYSTEM: {observation}\n"
-                
-                # If we are looping, let's keep the user informed (in a real streaming setup)
-                # For now, we continue until the agent decides to stop.
-                continue
-            
+            llm_start = time.perf_counter()
+            reply = session.send()
+            llm_ms = (time.perf_counter() - llm_start) * 1000
+            response, native = reply["text"], reply["native"]
+            if native:
+                calls = [ToolCall(c["name"], c.get("args") or {}, id=c["id"]) for c in reply["tool_calls"]]
             else:
+                calls = parse_tool_calls(response, self.tool_map)
+            session.add_assistant(response, calls if native else None, brain=reply["brain"])
+            
+            if not calls:
                 # No tool call -> Final Answer
+                self.last_trace.append(step_trace(step, llm_ms, reply["brain"], native, [], 0.0, reply["tokens"]))
                 final_answer = response
                 break
+
+            # Agent wants to act! (possibly several tools at once)
+            tool_start = time.perf_counter()
+            results = self.tool_executor.execute(calls)
+            tool_wall_ms = (time.perf_counter() - tool_start) * 1000
+            self.last_trace.append(step_trace(step, llm_ms, reply["brain"], native, results, tool_wall_ms, reply["tokens"]))
+            logging.info(
+                f"🛠️ Step {step}: {len(results)} tool(s) in {tool_wall_ms:.0f} ms "
+                f"(LLM {llm_ms:.0f} ms, {reply['tokens']['saved_tokens']} tokens saved): "
+                f"{', '.join(r.call.name for r in results)}"
+            )
+            session.add_tool_results(results, native)
+        else:
+            # Out of steps: answer with what the agent said last
+            final_answer = response
+
+        self.last_token_report = dict(session.totals, steps=step)
+        if step > 1:
+            logging.info(f"📨 Prompt tokens: {session.totals}")
+        
+        if conversation:
+            conversation.add_turn("user", message)
+            conversation.add_turn("assistant", final_answer)
         
         return final_answer
 
@@ -136,38 +190,70 @@ class CodexAgent:
     def analyze_file_change(self, file_path, content):
         """
         [PHASE 3] Pro-active Sentinel Analysis.
-        Detects bugs or improvements in a changed file using Local LLM.
+        Python files go through the in-process syntax checker first (milliseconds):
+        syntax errors are reported directly and the local LLM is only consulted
+        when the change since the last accepted version touches a flagged line.
+        The model only sees the changed hunks (within their enclosing function),
+        verdicts are cached per hunk and each file is reviewed at most once per
+        `DiffReviewer.min_interval`.
         """
         filename = os.path.basename(file_path)
-        
-        analysis_prompt = f"""
-        TAREFA: Analise o código abaixo e identifique BUGS críticos ou MELHORIAS óbvias.
+        flagged = None
+        if file_path.endswith(".py"):
+            checker = get_syntax_checker()
+            result = checker.check(file_path, content)
+            if not result.ok:
+                return "\n".join(f"[SYNTAX] {filename}:{i.line} {i.message}" for i in result.errors)
+            flagged = checker.flagged_changes(file_path)
+            if not flagged:
+                self.diff_reviewer.remember(file_path, content)
+                return None
+        if not self.diff_reviewer.due(file_path):
+            return None  # Next review covers these edits too
+
+        def ask(unit):
+            prompt = f"""
+        TAREFA: Analise o trecho alterado abaixo e identifique BUGS críticos ou MELHORIAS óbvias.
         ARQUIVO: {filename}
         
         REGRAS:
-        1. Seja extremamente conciso.
+        1. Seja extremamente conciso. Julgue só as linhas marcadas com '+'.
         2. Se não houver erros consideráveis, responda apenas: "CLEAN".
         3. Se houver algo a relatar, use o formato: [TIPO] Descrição curta. Sugestão: o que mudar.
         
-        CÓDIGO:
-        {content}
+        TRECHO:
+        {unit.render()}
         """
-        
+            response = self.llm_client.neurons["ollama"].send_message(prompt)
+            # Check for "not detected" or "error" in local response
+            if "⚠️ Ollama não detectado" in response or "❌" in response:
+                raise RuntimeError(response.strip()[:200])
+            return response
+
+        # We only use local LLMs for frequent background activities to avoid costs
+        if "ollama" not in self.llm_client.neurons:
+            return self._lint_report(filename, flagged)
+        notes, focus = {}, None
+        if flagged:
+            for issue in flagged:
+                notes.setdefault(issue.line, []).append(issue.message)
+            focus = list(notes)
         try:
-            # We only use local LLMs for frequent background activities to avoid costs
-            if "ollama" in self.llm_client.neurons:
-                # Force local check to save $$$
-                response = self.llm_client.neurons["ollama"].send_message(analysis_prompt)
-                
-                # Check for "not detected" or "error" in local response
-                if "⚠️ Ollama não detectado" in response or "❌" in response:
-                    return None
-                    
-                return response if "CLEAN" not in response.upper() else None
-            return None
+            findings = self.diff_reviewer.review(file_path, content, ask, extra_lines=focus or (),
+                                                 notes=notes, focus=focus)
         except Exception as e:
             logging.error(f"Sentinel Analysis failed: {e}")
+            return self._lint_report(filename, flagged)
+        if flagged:
+            get_syntax_checker().accept(file_path)  # Reviewed: its remaining flags don't escalate again
+        return "\n".join(findings) or None
+
+    @staticmethod
+    def _lint_report(filename, flagged):
+        """Checker findings as the Sentinel message when the LLM can't review them."""
+        if not flagged:
             return None
+        return "\n".join(f"[LINT] {filename}:{i.line} {i.message}" for i in flagged)
 
     def add_file_to_context(self, file_path):
         """
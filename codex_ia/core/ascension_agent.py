@@ -5,6 +5,7 @@ from typing import List, Optional
 from codex_ia.core.llm_client import GeminiClient
 from codex_ia.core.context import ContextManager
 from codex_ia.core.network_agent import NetworkAgent
+from codex_ia.core.symbol_index import get_symbol_index
 
 logger = logging.getLogger(__name__)
 
@@ -14,6 +15,7 @@ class AscensionAgent:
     The Singularity Agent.
     Capable of introspection (reading its own code) and self-modification.
     """
+    INTROSPECTION_BUDGET = 3000  # Tokens of source context per self-analysis prompt
     def __init__(self, codex_root: str):
         self.codex_root = codex_root
         self.evolution_log = []
@@ -25,19 +27,22 @@ class AscensionAgent:
         """
         Reads the codebase to understand current capabilities.
         Returns a summary of the 'codex_ia' package structure.
+        Uses the shared symbol index (re-stated at most every few seconds,
+        only changed files reparsed) instead of walking the tree on every call.
         """
         structure = []
-        for root, dirs, files in os.walk(self.codex_root):
-            if "__pycache__" in root or ".git" in root:
+        seen_dirs = set()
+        for rel in get_symbol_index(self.codex_root).files():
+            if not rel.endswith(".py"):
                 continue
-            
-            level = root.replace(self.codex_root, '').count(os.sep)
-            indent = ' ' * 4 * (level)
-            structure.append(f"{indent}{os.path.basename(root)}/")
-            subindent = ' ' * 4 * (level + 1)
-            for f in files:
-                if f.endswith(".py"):
-                    structure.append(f"{subindent}{f}")
+            parts = rel.split("/")
+            for level in range(len(parts)):
+                folder = tuple(parts[:level])
+                if folder not in seen_dirs:
+                    seen_dirs.add(folder)
+                    name = parts[level - 1] if level else os.path.basename(os.path.abspath(self.codex_root))
+                    structure.append(f"{' ' * 4 * level}{name}/")
+            structure.append(f"{' ' * 4 * len(parts)}{parts[-1]}")
         
         return "\n".join(structure)
 
@@ -46,8 +51,8 @@ class AscensionAgent:
         [TRUE INTROSPECTION]
         Reads its own source code and critiques it using the LLM.
         """
-        # 1. Gather Self-Context
-        codex_files = self.context_mgr.get_context_for_query(focus_area)
+        # 1. Gather Self-Context (relevant modules, signatures and call edges within a budget)
+        codex_files = self.context_mgr.get_context_for_query(focus_area, token_budget=self.INTROSPECTION_BUDGET)
         
         # 2. Consult Exocortex
         wisdom = self.network.retrieve_wisdom(["architecture", "self_improvement", "refactoring"])
@@ -1,190 +1,416 @@
 """
 🐛 AUTO-DEBUGGER - Self-Healing Code System
-Roda testes, detecta erros, e corrige automaticamente
+Roda testes, detecta erros, e corrige automaticamente.
+Erros com a mesma causa raiz (tipo + frame onde estourou) viram uma só análise;
+as análises rodam em paralelo entre os provedores do BrainRouter, ficam em cache
+por causa raiz + hash dos arquivos, e as correções que não conflitam são
+aplicadas juntas antes da próxima rodada de testes.
 """
 
-import subprocess
+import hashlib
+import json
+import os
 import re
-from typing import Dict, List, Optional
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
 from pathlib import Path
-from codex_ia.core.llm_client import GeminiClient
-from google.genai import types
+from codex_ia.core.executor import get_executor
+from codex_ia.core.failures import Failure, dedupe, from_results, parse_text, render_failure
+from codex_ia.core.impact import get_impact_runner
+from codex_ia.core.patches import (PATCH_FORMAT_INSTRUCTIONS, Hunk, PatchError, apply_patch, hunk_spans,
+                                   parse_patch, spans_overlap, validate_patch)
+from codex_ia.core.shard_runner import CaseResult, ShardedRunner, SuiteReport
+
+MAX_GROUP_CONTEXT = 3  # Failures of one group rendered into its prompt
+_ROUTER_FAILURES = ("❌ Falha no Conselho", "😴")
+_DEFERRED = "(adiada)"  # apply_fixes reason suffix: the patch was not rejected, just postponed
+
+
+def _root_cause(error: Dict) -> str:
+    return error.get("root_cause") or Failure.from_error(error).root_cause
+
 
 class AutoDebugger:
     """
     Sistema de auto-debugging que:
     1. Roda testes
-    2. Analisa stack traces
-    3. Gera correções
-    4. Aplica patches
+    2. Agrupa os erros por causa raiz
+    3. Analisa os grupos em paralelo (com cache)
+    4. Aplica de uma vez os patches que não conflitam
     5. Valida fix
     """
     
-    def __init__(self, project_dir: Path):
+    TEST_TIMEOUT = 60  # Seconds per test run (per shard for pytest)
+    TEST_WORKERS = None  # pytest shards (None = min(cpu_count, 4))
+    ANALYSIS_WORKERS = 4  # Concurrent analyses (the router spreads them across providers)
+    BRAINS = ("gemini", "deepseek", "openai", "groq")  # Preferred order for debugging prompts
+    MAX_CACHED_FIXES = 256
+
+    def __init__(self, project_dir: Path, router=None):
         self.project_dir = Path(project_dir)
-        self.llm = GeminiClient()
+        self._router = router
+        # Analyses overlap with each other and with the rest of the test run
+        self._analysis_pool = ThreadPoolExecutor(max_workers=self.ANALYSIS_WORKERS,
+                                                 thread_name_prefix="debug-analysis")
+        # root cause + frame files digest -> {"key" (+ patch targets), "targets", "analysis"}; applied fixes only
+        self._fixes: "OrderedDict[str, Dict]" = OrderedDict()
+        self._fixes_lock = threading.Lock()
+        self.stats = {"analyses": 0, "cached": 0, "grouped": 0}
+
+    @property
+    def router(self):
+        if self._router is None:
+            from codex_ia.core.brain_router import get_shared_router
+            self._router = get_shared_router().profile(priority=list(self.BRAINS))
+        return self._router
         
-    def run_tests(self, test_command: str = "pytest") -> Dict:
+    def run_tests(self, test_command: str = "pytest", changed: Optional[List[str]] = None,
+                  on_failure: Optional[Callable[[CaseResult], None]] = None) -> Dict:
         """
         Roda testes e captura output.
+        pytest roda em shards paralelos e `on_failure` recebe cada falha assim que ela
+        acontece. Com `changed`, roda só os testes que alcançam esses arquivos.
         
         Returns:
             {
                 "passed": bool,
                 "output": str,
                 "errors": List[Dict],  # parsed errors
-                "exit_code": int
+                "exit_code": int,
+                "selection": Dict,  # quando `changed` foi usado
+                "results": List[Dict]  # por teste (pytest): nodeid, outcome, duration, longrepr
             }
         """
-        print(f"🧪 Rodando testes: {test_command}")
+        command = test_command.split()
+        pytest_at = next((i for i, part in enumerate(command[:3]) if "pytest" in part), None)
+        selection = None
+        if changed and pytest_at is not None:
+            selection = get_impact_runner(str(self.project_dir)).map.select(changed)
+            if not selection.full:
+                if not selection.tests:
+                    print(f"🎯 Nenhum teste afetado ({selection.reason})")
+                    return {"passed": True, "output": "", "errors": [], "exit_code": 0,
+                            "selection": self._selection_report(selection)}
+                command = command + selection.tests
+            print(f"🎯 {len(selection.tests)}/{selection.total_tests} arquivos de teste afetados")
+        print(f"🧪 Rodando testes: {' '.join(command)}")
+        if pytest_at is not None:
+            report = self._suite_report(self._run_sharded(command[pytest_at + 1:], on_failure))
+            if selection:
+                report["selection"] = self._selection_report(selection)
+            return report
         
-        try:
-            result = subprocess.run(
-                test_command.split(),
-                cwd=str(self.project_dir),
-                capture_output=True,
-                text=True,
-                timeout=60
-            )
-            
-            output = result.stdout + result.stderr
-            passed = result.returncode == 0
-            
-            # Parse errors
-            errors = self._parse_errors(output)
-            
-            return {
-                "passed": passed,
-                "output": output,
-                "errors": errors,
-                "exit_code": result.returncode
-            }
-            
-        except subprocess.TimeoutExpired:
+        result = get_executor().run(command, cwd=str(self.project_dir), timeout=self.TEST_TIMEOUT)
+
+        if result.error:
             return {
                 "passed": False,
-                "output": "Timeout após 60s",
-                "errors": [{"type": "timeout", "message": "Testes demoraram muito"}],
+                "output": result.error,
+                "errors": [{"type": "execution_error", "message": result.error}],
                 "exit_code": -1
             }
-        except Exception as e:
+        if result.timed_out:
             return {
                 "passed": False,
-                "output": str(e),
-                "errors": [{"type": "execution_error", "message": str(e)}],
+                "output": f"Timeout após {self.TEST_TIMEOUT}s\n{result.output}",
+                "errors": [{"type": "timeout", "message": "Testes demoraram muito"}],
                 "exit_code": -1
             }
+
+        output = result.stdout + result.stderr
+        report = {
+            "passed": result.success,
+            "output": output,
+            "errors": self._parse_errors(output),
+            "exit_code": result.returncode,
+            "duration": round(result.duration, 3)
+        }
+        if selection:
+            report["selection"] = self._selection_report(selection)
+        return report
+
+    def _run_sharded(self, args: List[str], on_failure=None) -> SuiteReport:
+        if not any(a.startswith("--tb") for a in args):
+            args = args + ["--tb=native"]  # Shortest longrepr; frames come structured from the plugin
+        runner = ShardedRunner(str(self.project_dir), workers=self.TEST_WORKERS, args=args,
+                               timeout=self.TEST_TIMEOUT)
+        suite = runner.run(on_failure=on_failure)
+        print(f"🧪 {suite.summary()}")
+        return suite
+
+    def _suite_report(self, suite: SuiteReport) -> Dict:
+        output = suite.output()
+        if suite.error:
+            errors = [{"type": "execution_error", "message": suite.error}]
+        else:
+            errors = [f.to_error(str(self.project_dir)) for f in from_results(suite.results, str(self.project_dir))]
+        return {
+            "passed": suite.passed,
+            "output": output,
+            "errors": errors,
+            "exit_code": 0 if suite.passed else 1,
+            "duration": round(suite.wall_time, 3),
+            "results": suite.to_dict()["results"],
+            "shards": suite.shards
+        }
+
+    @staticmethod
+    def _selection_report(selection) -> Dict:
+        return {"tests": selection.tests, "total": selection.total_tests,
+                "full": selection.full, "reason": selection.reason}
             
     def _parse_errors(self, test_output: str) -> List[Dict]:
         """
-        Parse de erros do output de teste.
-        Suporta: pytest, unittest, Django tests
+        Parse de erros do output de teste (comandos que não são pytest).
+        Suporta: tracebacks Python (unittest, Django, scripts) e o formato do pytest.
+        Falhas iguais (mesma assinatura) viram um único erro; só frames do projeto.
         """
-        errors = []
+        root = str(self.project_dir)
+        return [f.to_error(root) for f in dedupe(parse_text(test_output, root))]
         
-        # Regex para stack traces Python
-        error_pattern = r'File "([^"]+)", line (\d+).*?\n.*?(\w+Error: .+)'
-        matches = re.findall(error_pattern, test_output, re.MULTILINE)
-        
-        for match in matches:
-            file_path, line_num, error_msg = match
-            errors.append({
-                "file": file_path,
-                "line": int(line_num),
-                "type": error_msg.split(':')[0],
-                "message": error_msg,
-                "raw_output": test_output
-            })
-            
-        return errors
-        
-    def analyze_error(self, error: Dict) -> Dict:
+    @staticmethod
+    def group_errors(errors: List[Dict]) -> "OrderedDict[str, List[Dict]]":
+        """Errors keyed by root cause (exception type + raising frame), most affected tests first."""
+        groups: "OrderedDict[str, List[Dict]]" = OrderedDict()
+        for error in sorted(errors, key=lambda e: -int(e.get("count") or 1)):
+            groups.setdefault(_root_cause(error), []).append(error)
+        return groups
+
+    def _fix_key(self, root_cause: str, paths: Iterable[str]) -> str:
+        """Root cause + content hash of `paths` (an edit to any of them invalidates the fix)."""
+        digest = hashlib.sha1(root_cause.encode("utf-8"))
+        for rel in sorted(set(paths)):
+            digest.update(rel.encode("utf-8", errors="replace"))
+            try:
+                with open(os.path.join(self.project_dir, rel), "rb") as f:
+                    digest.update(hashlib.sha1(f.read()).digest())
+            except OSError:
+                digest.update(b"<missing>")
+        return digest.hexdigest()
+
+    def _cached_fix(self, root_cause: str, frames: List[str]) -> Optional[Dict]:
+        """Applied fix for this root cause, if neither the frame files nor the patched files changed since."""
+        with self._fixes_lock:
+            entry = self._fixes.get(self._fix_key(root_cause, frames))
+        if entry is None or self._fix_key(root_cause, frames + entry["targets"]) != entry["key"]:
+            return None
+        with self._fixes_lock:
+            if entry["base"] in self._fixes:
+                self._fixes.move_to_end(entry["base"])
+            self.stats["cached"] += 1
+        return entry
+
+    def _settle_fix(self, record: Dict):
+        """Caches a fix once applied; forgets a cached one whose patch was rejected."""
+        analysis = record["analysis"]
+        entry = analysis.get("fix_key")
+        if not entry:
+            return
+        with self._fixes_lock:
+            if record["applied"]:
+                stored = {k: v for k, v in analysis.items() if k not in ("cached", "fix_key")}
+                self._fixes[entry["base"]] = dict(entry, analysis=stored)
+                self._fixes.move_to_end(entry["base"])
+                while len(self._fixes) > self.MAX_CACHED_FIXES:
+                    self._fixes.popitem(last=False)
+            elif not record["reason"].endswith(_DEFERRED):
+                self._fixes.pop(entry["base"], None)
+
+    def forget_fix(self, base: str):
+        """Drops a cached fix (e.g. its root cause still fails after it was applied)."""
+        with self._fixes_lock:
+            self._fixes.pop(base, None)
+
+    @staticmethod
+    def _merge(group: List[Dict]) -> Dict:
+        """The group's lead error, counting every affected test."""
+        lead = dict(group[0])
+        lead["count"] = sum(int(e.get("count") or 1) for e in group)
+        lead["tests"] = [t for e in group for t in e.get("tests") or []]
+        return lead
+
+    def _ask(self, prompt: str) -> str:
+        response = str(self.router.send_message(prompt, task_type="coding"))
+        if response.startswith(_ROUTER_FAILURES):
+            raise RuntimeError(response)
+        return response
+
+    @staticmethod
+    def _parse_analysis(text: str) -> Dict:
+        """JSON diagnosis followed by SEARCH/REPLACE blocks -> analysis dict ('code_patch' = the blocks)."""
+        try:
+            hunks = parse_patch(text)
+        except PatchError:
+            hunks = []
+        head = re.split(r"^\s*(?:\*\*)?FILE(?:\*\*)?\s*:", text.split("<<<<<<< SEARCH")[0], flags=re.M | re.I)[0]
+        start, end = head.find("{"), head.rfind("}")
+        analysis = {}
+        if 0 <= start < end:
+            try:
+                analysis = json.loads(head[start:end + 1])
+            except ValueError:
+                analysis = {}
+        if not analysis and not hunks:
+            raise ValueError("resposta sem diagnóstico nem patch")
+        return {
+            "diagnosis": str(analysis.get("diagnosis", "")),
+            "root_cause": str(analysis.get("root_cause", "")),
+            "fix_strategy": str(analysis.get("fix_strategy", "")),
+            "code_patch": "".join(h.render() for h in hunks),
+        }
+
+    def analyze_group(self, group: List[Dict]) -> Dict:
         """
-        Analisa um erro usando Gemini.
+        Analisa um grupo de erros com a mesma causa raiz (uma chamada ao LLM).
+        Correções que apply_fixes aplicou ficam em cache até algum arquivo dos
+        frames ou do patch mudar; patch rejeitado ou que não resolveu sai do cache.
         
         Returns:
             {
                 "diagnosis": str,
                 "root_cause": str,
                 "fix_strategy": str,
-                "code_patch": str
+                "code_patch": str,  # blocos SEARCH/REPLACE (patches.py)
+                "cached": bool,
+                "fix_key": Dict  # só com patch: chave de cache, usada por apply_fixes
             }
         """
-        print(f"🔍 Analisando erro: {error['type']} em {error['file']}:{error['line']}")
+        lead = self._merge(group)
+        root_cause = Failure.from_error(lead).root_cause
+        frames = sorted({frame.path for error in group for frame in Failure.from_error(error).frames})
+        cached = self._cached_fix(root_cause, frames)
+        if cached is not None:
+            print(f"♻️  Correção em cache para {lead['type']} em {lead.get('file', '?')}:{lead.get('line', '?')}")
+            fix_key = {k: v for k, v in cached.items() if k != "analysis"}
+            return dict(cached["analysis"], cached=True, fix_key=fix_key)
+
+        extra = f" (+{len(group) - 1} variações)" if len(group) > 1 else ""
+        print(f"🔍 Analisando erro: {lead['type']} em {lead.get('file', '?')}:{lead.get('line', '?')}{extra}")
         
-        # Lê o arquivo com erro
-        try:
-            file_path = Path(error['file'])
-            if file_path.exists():
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    file_content = f.read()
-            else:
-                file_content = "[Arquivo não encontrado]"
-        except:
-            file_content = "[Erro ao ler arquivo]"
+        # Só os frames relevantes e a janela de código em volta de cada um
+        root = str(self.project_dir)
+        context = "\n\n---\n\n".join(render_failure(Failure.from_error(e), root)
+                                      for e in group[:MAX_GROUP_CONTEXT])
             
         # Prompt de debugging
         debug_prompt = f"""
 Você é um expert debugger (estilo GitHub Copilot Debugging).
 
-ERRO DETECTADO:
-Tipo: {error['type']}
-Arquivo: {error['file']}
-Linha: {error['line']}
-Mensagem: {error['message']}
+ERRO DETECTADO ({len(group)} falha(s) com a mesma causa raiz, {lead['count']} teste(s)):
+Tipo: {lead['type']}
+Arquivo: {lead.get('file', 'N/A')}
+Linha: {lead.get('line', 'N/A')}
 
-CÓDIGO DO ARQUIVO:
-```python
-{file_content}
-```
+FALHA (frames do projeto e código em volta):
+{context}
 
-STACK TRACE COMPLETO:
-{error.get('raw_output', 'N/A')[:1000]}
-
-Analise e retorne JSON:
+Primeiro retorne JSON:
 {{
     "diagnosis": "O que está causando o erro",
     "root_cause": "Causa raiz técnica",
-    "fix_strategy": "Como corrigir (passo a passo)",
-    "code_patch": "Código corrigido (apenas a parte que precisa mudar)"
+    "fix_strategy": "Como corrigir (passo a passo)"
 }}
 
+Depois do JSON, a correção (caminhos relativos à raiz do projeto).
+{PATCH_FORMAT_INSTRUCTIONS}
+
 Seja PRECISO e EXECUTÁVEL.
 """
         
         try:
-            response = self.llm.client.models.generate_content(
-                model=self.llm.model,
-                contents=debug_prompt,
-                config=types.GenerateContentConfig(
-                    temperature=0.1,  # Baixíssima para precisão
-                    max_output_tokens=2000
-                )
-            )
-            
-            # Parse JSON
-            import json
-            result_text = response.text.strip()
-            
-            if "```json" in result_text:
-                result_text = result_text.split("```json")[1].split("```")[0].strip()
-            elif "```" in result_text:
-                result_text = result_text.split("```")[1].split("```")[0].strip()
-                
-            analysis = json.loads(result_text)
-            
-            print(f"✅ Diagnóstico: {analysis['diagnosis'][:100]}...")
-            return analysis
-            
+            analysis = self._parse_analysis(self._ask(debug_prompt))
         except Exception as e:
             print(f"⚠️  Erro na análise: {e}")
             return {
                 "diagnosis": "Erro ao analisar",
                 "root_cause": str(e),
                 "fix_strategy": "Manual debugging needed",
-                "code_patch": ""
+                "code_patch": "",
+                "cached": False
             }
-            
+
+        print(f"✅ Diagnóstico: {analysis['diagnosis'][:100]}...")
+        with self._fixes_lock:
+            self.stats["analyses"] += 1
+        if analysis["code_patch"]:
+            # Keyed on the files as they are now, before the patch changes them
+            targets = sorted({h.path for h in parse_patch(analysis["code_patch"])})
+            analysis["fix_key"] = {"base": self._fix_key(root_cause, frames), "targets": targets,
+                                   "key": self._fix_key(root_cause, frames + targets)}
+        return dict(analysis, cached=False)
+
+    def analyze_error(self, error: Dict) -> Dict:
+        """Analisa um único erro (veja analyze_group)."""
+        return self.analyze_group([error])
+
+    def analyze_errors(self, errors: List[Dict],
+                       pending: Optional[Dict[str, Future]] = None) -> List[Tuple[Dict, Dict]]:
+        """
+        Uma análise por causa raiz, todas em paralelo. `pending` reaproveita análises
+        já em andamento ({root_cause: Future}, ex.: a da primeira falha do stream).
+        Returns: [(erro líder do grupo, análise)], grupos com mais testes primeiro.
+        """
+        groups = self.group_errors(errors)
+        self.stats["grouped"] += len(errors) - len(groups)
+        futures = [(self._merge(group), (pending or {}).get(key) or self._analysis_pool.submit(self.analyze_group, group))
+                   for key, group in groups.items()]
+        return [(lead, future.result()) for lead, future in futures]
+
+    def apply_fixes(self, fixes: List[Tuple[Dict, Dict]]) -> Tuple[List[Dict], List[str]]:
+        """
+        Aplica numa única passada (atômica) todos os patches que não conflitam.
+        Um patch que toca a mesma região de outro já aceito fica para a próxima
+        iteração (os testes dizem se ainda é necessário).
+        
+        Returns:
+            ([{"error", "analysis", "applied", "reason"}], arquivos alterados (absolutos))
+        """
+        root = str(self.project_dir)
+        accepted: List[Hunk] = []
+        claimed: Dict[str, List[Tuple[int, int]]] = {}
+        records = []
+        for error, analysis in fixes:
+            record = {"error": error, "analysis": analysis, "applied": False, "reason": ""}
+            records.append(record)
+            try:
+                hunks = parse_patch(analysis.get("code_patch") or "")
+            except PatchError as e:
+                record["reason"] = str(e)
+                continue
+            if not hunks:
+                record["reason"] = "sem patch"
+                continue
+            spans, failures = hunk_spans(root, hunks)
+            if not failures and spans_overlap(spans, claimed):
+                record["reason"] = f"conflita com outra correção {_DEFERRED}"
+                continue
+            if not failures:
+                _, failures = validate_patch(root, accepted + hunks)
+            if failures:
+                record["reason"] = failures[0][1]
+                continue
+            accepted.extend(hunks)
+            for path, ranges in spans.items():
+                claimed.setdefault(path, []).extend(ranges)
+            record["hunks"] = hunks
+
+        if not accepted:
+            for record in records:
+                print(f"❌ Correção não aplicada ({record['error'].get('type')}): {record['reason']}")
+                self._settle_fix(record)
+            return records, []
+        result = apply_patch(root, accepted)
+        print(result.summary())
+        for record in records:
+            if record.pop("hunks", None) is not None:
+                record["applied"] = result.applied
+                record["reason"] = "" if result.applied else (result.error or "patch rejeitado")
+            self._settle_fix(record)
+        changed = [os.path.join(root, rel) for rel in result.files] if result.applied else []
+        return records, changed
+
     def apply_fix(self, error: Dict, analysis: Dict) -> bool:
         """
         Aplica a correção sugerida.
@@ -192,50 +418,45 @@ Seja PRECISO e EXECUTÁVEL.
         Returns:
             True se aplicou com sucesso
         """
-        if not analysis.get('code_patch'):
-            print("❌ Sem patch para aplicar")
-            return False
-            
-        print(f"🔧 Aplicando correção em {error['file']}...")
-        
-        try:
-            file_path = Path(error['file'])
-            
-            # Backup
-            backup_path = file_path.with_suffix(file_path.suffix + '.backup')
-            import shutil
-            shutil.copy(file_path, backup_path)
-            
-            # TODO: Implementar patch inteligente
-            # Por enquanto, apenas reporta
-            print(f"📝 Patch sugerido:")
-            print(analysis['code_patch'])
-            print(f"\n💾 Backup criado: {backup_path}")
-            
-            # Em produção, usaríamos diff/patch automático
-            return True
-            
-        except Exception as e:
-            print(f"⚠️  Erro ao aplicar fix: {e}")
-            return False
+        records, _ = self.apply_fixes([(error, analysis)])
+        return records[0]["applied"]
             
+    def _early_analysis(self):
+        """on_failure callback that starts analyzing the first parseable failure right away."""
+        state = {}
+
+        def on_failure(case: CaseResult):
+            if "future" in state:
+                return
+            failures = from_results([case], str(self.project_dir))
+            if failures:
+                state["root_cause"] = failures[0].root_cause
+                state["future"] = self._analysis_pool.submit(
+                    self.analyze_group, [failures[0].to_error(str(self.project_dir))])
+
+        return state, on_failure
+
     def auto_fix_loop(self, max_iterations: int = 3) -> Dict:
         """
         Loop de auto-correção:
         1. Roda testes
-        2. Se falhar, analisa erros
-        3. Aplica correções
+        2. Se falhar, analisa as causas raiz em paralelo
+        3. Aplica as correções que não conflitam
         4. Repete até passar ou atingir limite
         
         Returns:
             {
                 "success": bool,
                 "iterations": int,
-                "fixes_applied": List[Dict],
-                "final_status": str
+                "fixes_applied": List[Dict],  # one per root cause: error, analysis, applied, reason
+                "final_status": str,
+                "test_runs": List[Dict]  # tests selected + duration per run
             }
         """
         fixes_applied = []
+        test_runs = []  # Selection decisions and durations, for the report
+        changed = None  # After a fix: only the tests that reach the fixed file
+        applied: Dict[str, str] = {}  # root cause -> cache entry of the fix applied last iteration
         
         for iteration in range(1, max_iterations + 1):
             print(f"\n{'='*60}")
@@ -243,46 +464,62 @@ Seja PRECISO e EXECUTÁVEL.
             print(f"{'='*60}")
             
             # Roda testes
-            test_result = self.run_tests()
+            early, on_failure = self._early_analysis()
+            test_result = self.run_tests(changed=changed, on_failure=on_failure)
+            test_runs.append({"iteration": iteration, "duration": test_result.get("duration", 0.0),
+                              "selection": test_result.get("selection")})
             
+            if test_result['passed'] and changed:
+                # Affected tests are green: confirm with the full suite once
+                early, on_failure = self._early_analysis()
+                test_result = self.run_tests(on_failure=on_failure)
+                test_runs.append({"iteration": iteration, "duration": test_result.get("duration", 0.0),
+                                  "selection": None})
+
+            # A root cause that survived its fix: that fix must not be served again
+            for error in test_result.get('errors') or []:
+                if _root_cause(error) in applied:
+                    self.forget_fix(applied.pop(_root_cause(error)))
+
             if test_result['passed']:
                 print("✅ Todos os testes passaram!")
                 return {
                     "success": True,
                     "iterations": iteration,
                     "fixes_applied": fixes_applied,
-                    "final_status": "all_tests_passed"
+                    "final_status": "all_tests_passed",
+                    "test_runs": test_runs
                 }
                 
-            # Analisa primeiro erro
             if not test_result['errors']:
                 print("⚠️  Testes falharam mas sem erro parseável")
                 return {
                     "success": False,
                     "iterations": iteration,
                     "fixes_applied": fixes_applied,
-                    "final_status": "unparseable_error"
+                    "final_status": "unparseable_error",
+                    "test_runs": test_runs
                 }
                 
-            error = test_result['errors'][0]
-            analysis = self.analyze_error(error)
-            
-            # Aplica fix
-            fixed = self.apply_fix(error, analysis)
+            # Analisa cada causa raiz em paralelo (a da primeira falha já começou durante os testes)
+            pending = {early["root_cause"]: early["future"]} if "future" in early else None
+            analyses = self.analyze_errors(test_result['errors'], pending)
             
-            fixes_applied.append({
-                "error": error,
-                "analysis": analysis,
-                "applied": fixed
-            })
+            # Aplica de uma vez as correções que não conflitam
+            records, changed = self.apply_fixes(analyses)
+            fixes_applied.extend(records)
+            changed = changed or None
+            applied = {_root_cause(r["error"]): r["analysis"]["fix_key"]["base"]
+                       for r in records if r["applied"] and r["analysis"].get("fix_key")}
             
-            if not fixed:
+            if not changed:
                 print("❌ Não consegui aplicar fix automaticamente")
                 return {
                     "success": False,
                     "iterations": iteration,
                     "fixes_applied": fixes_applied,
-                    "final_status": "manual_intervention_needed"
+                    "final_status": "manual_intervention_needed",
+                    "test_runs": test_runs
                 }
                 
         # Atingiu limite de iterações
@@ -290,7 +527,8 @@ Seja PRECISO e EXECUTÁVEL.
             "success": False,
             "iterations": max_iterations,
             "fixes_applied": fixes_applied,
-            "final_status": "max_iterations_reached"
+            "final_status": "max_iterations_reached",
+            "test_runs": test_runs
         }
 
 
@@ -307,7 +545,7 @@ if __name__ == "__main__":
         "line": 42,
         "type": "AttributeError",
         "message": "AttributeError: 'NoneType' object has no attribute 'split'",
-        "raw_output": "Traceback (most recent call last):\n  File \"example.py\", line 42, in process\n    name = obj.split('-')[0]\nAttributeError: 'NoneType' object has no attribute 'split'"
+        "frames": [{"path": "example.py", "line": 42, "function": "process", "code": "name = obj.split('-')[0]"}]
     }
     
     analysis = debugger.analyze_error(fake_error)
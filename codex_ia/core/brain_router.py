@@ -1,11 +1,35 @@
 
+import copy
 import os
-import requests
 import json
 import logging
 import random  # Para mensagens criativas
+import threading
+from .lazy import lazy_import
 from .llm_client import GeminiClient
 
+requests = lazy_import("requests")
+
+# Concurrent requests per provider (override with CODEX_<BRAIN>_CONCURRENCY)
+PROVIDER_CONCURRENCY = {"ollama": 1, "default": 4}
+# Seconds a request waits for a free slot when every provider is busy (CODEX_CLAIM_TIMEOUT)
+CLAIM_TIMEOUT = float(os.getenv("CODEX_CLAIM_TIMEOUT", "120"))
+_BUSY = "__busy__"  # _claim() result when no slot freed up before the deadline
+# Ollama answers failures as text instead of raising
+LOCAL_FAILURE_PREFIXES = ("⚠️ Ollama não detectado", "❌ Erro")
+
+_shared_router = None
+_shared_router_lock = threading.Lock()
+
+
+def get_shared_router() -> "BrainRouter":
+    """Process-wide router: one set of clients, sleep table and concurrency slots."""
+    global _shared_router
+    with _shared_router_lock:
+        if _shared_router is None:
+            _shared_router = BrainRouter()
+        return _shared_router
+
 # 🎭 Mensagens criativas quando IA falha
 MENSAGENS_CRIATIVAS = [
     "💤 {ia} tirou um cochilo",
@@ -16,7 +40,69 @@ MENSAGENS_CRIATIVAS = [
     "🐕 {ia} foi brincar com o cachorro",
 ]
 
-class GroqClient:
+def _to_openai_messages(messages):
+    """Canonical agent messages -> OpenAI chat format (tool calls/results included)."""
+    converted = []
+    for msg in messages:
+        if msg["role"] == "assistant" and msg.get("tool_calls"):
+            converted.append({
+                "role": "assistant",
+                "content": msg.get("content") or None,
+                "tool_calls": [
+                    {"id": c["id"], "type": "function",
+                     "function": {"name": c["name"], "arguments": json.dumps(c["args"], ensure_ascii=False)}}
+                    for c in msg["tool_calls"]
+                ],
+            })
+        elif msg["role"] == "tool":
+            converted.append({"role": "tool", "tool_call_id": msg["tool_call_id"], "content": msg["content"]})
+        else:
+            converted.append({"role": msg["role"], "content": msg["content"]})
+    return converted
+
+
+def openai_chat_request(url, api_key, model, messages, tool_schemas=None, temperature=0.3):
+    """
+    Chat completion on OpenAI-compatible APIs (OpenAI, Groq, xAI, DeepSeek), with
+    optional native function calling. The message list is sent as-is so providers
+    with automatic prefix caching (OpenAI, DeepSeek) reuse the unchanged prefix.
+    Returns {"text", "tool_calls", "usage"} or None if the request failed.
+    """
+    if not api_key:
+        return None
+    headers = {"Authorization": f"Bearer {api_key}", "Content-Type": "application/json"}
+    data = {"model": model, "messages": _to_openai_messages(messages), "temperature": temperature}
+    if tool_schemas:
+        data["tools"] = [{"type": "function", "function": schema} for schema in tool_schemas]
+    resp = requests.post(url, headers=headers, json=data, timeout=120)
+    if resp.status_code != 200:
+        logging.warning(f"Chat request failed ({resp.status_code}): {resp.text[:200]}")
+        return None
+    body = resp.json()
+    msg = body['choices'][0]['message']
+    calls = []
+    for call in msg.get("tool_calls") or []:
+        try:
+            args = json.loads(call["function"].get("arguments") or "{}")
+        except ValueError:
+            args = {}
+        calls.append({"id": call.get("id"), "name": call["function"]["name"], "args": args})
+    usage = body.get("usage") or {}
+    cached = (usage.get("prompt_tokens_details") or {}).get("cached_tokens") or usage.get("prompt_cache_hit_tokens", 0)
+    return {
+        "text": msg.get("content") or "",
+        "tool_calls": calls,
+        "usage": {"prompt_tokens": usage.get("prompt_tokens", 0), "cached_tokens": cached or 0},
+    }
+
+
+class OpenAICompatibleMixin:
+    """Message-list chat + native function calling for clients with an OpenAI-style endpoint."""
+
+    def send_messages(self, messages, tool_schemas=None):
+        return openai_chat_request(self.base_url, self.api_key, self.model, messages, tool_schemas)
+
+class GroqClient(OpenAICompatibleMixin):
     def __init__(self):
         self.api_key = os.getenv("GROQ_API_KEY")
         self.model = "llama-3.3-70b-versatile" # Free tier powerhouse - modelo atual
@@ -113,10 +199,11 @@ class OllamaClient:
         except:
             return False
 
-class OpenAIClient:
+class OpenAIClient(OpenAICompatibleMixin):
     def __init__(self):
         self.api_key = os.getenv("OPENAI_API_KEY")
         self.model = "gpt-4o" # Flash flagship
+        self.base_url = "https://api.openai.com/v1/chat/completions"
         
     def send_message(self, message, web_search=False, image_path=None):
         if not self.api_key:
@@ -142,7 +229,7 @@ class OpenAIClient:
         }
         
         try:
-            resp = requests.post("https://api.openai.com/v1/chat/completions", headers=headers, json=data)
+            resp = requests.post(self.base_url, headers=headers, json=data)
             if resp.status_code == 200:
                 return resp.json()['choices'][0]['message']['content']
             else:
@@ -150,9 +237,7 @@ class OpenAIClient:
         except Exception as e:
             return f"OpenAI Client Error: {e}"
 
-            return f"OpenAI Client Error: {e}"
-
-class XAIClient:
+class XAIClient(OpenAICompatibleMixin):
     def __init__(self):
         self.api_key = os.getenv("XAI_API_KEY")
         self.model = "grok-beta" 
@@ -185,7 +270,7 @@ class XAIClient:
         except Exception as e:
             return f"xAI Client Error: {e}"
 
-class DeepSeekClient:
+class DeepSeekClient(OpenAICompatibleMixin):
     def __init__(self):
         self.api_key = os.getenv("DEEPSEEK_API_KEY")
         self.model = "deepseek-coder" 
@@ -418,32 +503,104 @@ class BrainRouter:
             
         self.neurons["ollama"] = OllamaClient()
 
-    def get_available_brain(self):
-        """Finds a brain that is awake."""
+        self.priority = None  # Optional preferred brain order (per-agent profiles)
+        self._slots = {}  # brain name -> BoundedSemaphore, shared by forks/profiles
+        self._slots_lock = threading.Lock()
+        self._slot_freed = threading.Condition()  # Notified on every slot release
+
+    def _slot(self, brain_name):
+        """Per-provider concurrency limit (CODEX_<BRAIN>_CONCURRENCY, default PROVIDER_CONCURRENCY)."""
+        with self._slots_lock:
+            if brain_name not in self._slots:
+                default = PROVIDER_CONCURRENCY.get(brain_name, PROVIDER_CONCURRENCY["default"])
+                try:
+                    limit = int(os.getenv(f"CODEX_{brain_name.upper()}_CONCURRENCY", default))
+                except ValueError:
+                    limit = default
+                self._slots[brain_name] = threading.BoundedSemaphore(max(limit, 1))
+            return self._slots[brain_name]
+
+    def profile(self, priority=None, models=None) -> "BrainRouter":
+        """
+        Per-agent view of this router: own chat sessions, preferred brain order and
+        model overrides ({"gemini": "gemini-1.5-pro"}), but the same clients, sleep
+        state and concurrency slots as every other profile.
+        """
+        clone = self.fork()
+        clone.priority = [name for name in (priority or []) if name in clone.neurons] or None
+        for name, model in (models or {}).items():
+            if name in clone.neurons and model:
+                variant = copy.copy(clone.neurons[name])
+                variant.model = model
+                clone.neurons[name] = variant
+        return clone
+
+    def fork(self) -> "BrainRouter":
+        """Router sharing the brains and sleep state, but with fresh chat sessions (for concurrent branches)."""
+        clone = copy.copy(self)
+        clone.neurons = {
+            name: (client.fork() if hasattr(client, "fork") else client)
+            for name, client in self.neurons.items()
+        }
+        return clone
+
+    def get_available_brain(self, exclude=()):
+        """Finds a brain that is awake (and not in `exclude`, e.g. already failed this request)."""
         import time
         now = time.time()
         
-        # Check if anyone woke up
+        # Check if anyone woke up (the sleep table is shared across threads/profiles)
         woke_up = []
-        for name, wakeup_time in self.sleeping_brains.items():
+        for name, wakeup_time in list(self.sleeping_brains.items()):
             if now > wakeup_time:
                 woke_up.append(name)
         
         for name in woke_up:
-            del self.sleeping_brains[name]
-            logging.info(f"⏰ {name.upper()} acordou do sono!")
+            if self.sleeping_brains.pop(name, None) is not None:
+                logging.info(f"⏰ {name.upper()} acordou do sono!")
             
-        # Try active preference first
-        if self.active_brain in self.neurons and self.active_brain not in self.sleeping_brains:
-            return self.active_brain, self.neurons[self.active_brain]
-            
-        # Fallback loop
-        for name, client in self.neurons.items():
-            if name not in self.sleeping_brains:
-                 logging.info(f"🔄 Failover: Usando {name} pois {self.active_brain} não está disponível.")
-                 return name, client
-                 
-        return None, None
+        candidates = self.awake_brains(exclude)
+        if not candidates:
+            return None, None
+        name = candidates[0]
+        if name not in (self.priority or [self.active_brain]):
+            logging.info(f"🔄 Failover: Usando {name} pois {self.active_brain} não está disponível.")
+        return name, self.neurons[name]
+
+    def awake_brains(self, exclude=()):
+        """Awake brains in routing order: per-agent priority (or the active brain), the rest, Ollama last."""
+        preferred = [n for n in (self.priority or [self.active_brain]) if n in self.neurons]
+        rest = sorted((n for n in self.neurons if n not in preferred), key=lambda n: n == "ollama")
+        return [n for n in preferred + rest if n not in self.sleeping_brains and n not in exclude]
+
+    def _claim(self, exclude=()):
+        """
+        (name, slot) for the next request. A brain whose concurrency slots are all
+        busy is skipped for the next awake cloud brain, so load spreads across
+        providers; if every one is busy, waits up to CLAIM_TIMEOUT for any of them
+        to free up and then gives up with (_BUSY, None).
+        """
+        import time
+        name, _ = self.get_available_brain(exclude)
+        if name is None:
+            return None, None
+        candidates = [name] + [n for n in self.awake_brains(exclude) if n not in (name, "ollama")]
+        deadline = time.monotonic() + CLAIM_TIMEOUT
+        with self._slot_freed:
+            while True:
+                for candidate in candidates:
+                    slot = self._slot(candidate)
+                    if slot.acquire(blocking=False):
+                        return candidate, slot
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return _BUSY, None
+                self._slot_freed.wait(remaining)
+
+    def _release(self, slot):
+        slot.release()
+        with self._slot_freed:
+            self._slot_freed.notify_all()
 
     def send_message(self, message, web_search=False, image_path=None, use_fallback=True, task_type='general'):
         """
@@ -470,11 +627,17 @@ class BrainRouter:
         max_retries = len(self.neurons)
         attempts = 0
         last_error = ""
+        failed = set()
         
         while attempts < max_retries:
-            brain_name, brain = self.get_available_brain()
+            brain_name, slot = self._claim(exclude=failed)
+            if brain_name == _BUSY:
+                return f"😴 Todas as IAs estão ocupadas há mais de {CLAIM_TIMEOUT:.0f}s. Tente novamente em instantes."
+            brain = self.neurons.get(brain_name) if brain_name else None
             
             if not brain:
+                if last_error:
+                    break
                 return f"😴 Zzz... Todas as IAs estão 'dormindo' (Rate Limit). Tente novamente em alguns minutos.\n\nStatus do Sono:\n{self.sleeping_brains}"
                 
             try:
@@ -484,24 +647,27 @@ class BrainRouter:
                      # but still answer text. Let's warn.
                      if "gemini" in self.sleeping_brains:
                          message += "\n[SYSTEM NOTE: Image/Search capabilities reduced because Gemini is sleeping.]"
-                if brain_name == 'ollama':
-                    response = brain.send_message(message, web_search=web_search, image_path=image_path, task_type=task_type)
-                else:
-                    response = brain.send_message(message, web_search=web_search, image_path=image_path)
+                try:
+                    if brain_name == 'ollama':
+                        response = brain.send_message(message, web_search=web_search, image_path=image_path, task_type=task_type)
+                    else:
+                        response = brain.send_message(message, web_search=web_search, image_path=image_path)
+                finally:
+                    self._release(slot)
                 
                 # Check for "sleeping" errors (429, Quota) in response string (since clients handle exceptions returning strings)
-                if "429" in str(response) or "Quota" in str(response) or "Rate limit" in str(response):
-                    logging.warning(f"💤 {brain_name} está cansado (Rate Limit). Colocando para dormir por 5 min.")
-                    self.sleeping_brains[brain_name] = time.time() + 300 # Sleep 5 min
+                if self.is_rate_limited(response):
+                    self.put_to_sleep(brain_name)
                     attempts += 1
                     continue
                 
-                # Success signature check
-                if "Error" in str(response) and len(str(response)) < 200:
+                # Success signature check (Ollama reports "not running"/errors as text)
+                if ("Error" in str(response) and len(str(response)) < 200) or str(response).startswith(LOCAL_FAILURE_PREFIXES):
                      # Generic error, maybe not sleep, just retry next
                      logging.warning(f"⚠️ Erro no {brain_name}: {response}")
                      attempts += 1
                      last_error = response
+                     failed.add(brain_name)
                      continue
                      
                 return response
@@ -510,9 +676,28 @@ class BrainRouter:
                 logging.error(f"Critical error on {brain_name}: {e}")
                 attempts += 1
                 last_error = str(e)
+                failed.add(brain_name)
         
         return f"❌ Falha no Conselho. Todas as IAs falharam. Último erro: {last_error}"
 
+    @staticmethod
+    def is_rate_limited(response):
+        """True if a response/error text signals quota exhaustion (429)."""
+        text = str(response)
+        return "429" in text or "Quota" in text or "Rate limit" in text
+
+    def put_to_sleep(self, brain_name, seconds=300):
+        """Takes a rate-limited brain out of rotation for `seconds` (default 5 min)."""
+        import time
+        logging.warning(f"💤 {brain_name} está cansado (Rate Limit). Colocando para dormir por {seconds // 60} min.")
+        self.sleeping_brains[brain_name] = time.time() + seconds
+
+    def pick_brain(self, use_fallback=True):
+        """(name, client) that should take the next request."""
+        if use_fallback:
+            return self.get_available_brain()
+        return self.active_brain, self.neurons.get(self.active_brain)
+
     def council_meeting(self, message):
         """
         The Council Convenes.
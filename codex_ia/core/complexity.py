@@ -0,0 +1,412 @@
+"""
+📈 COMPLEXITY - Complexidade ciclomática, aninhamento, duplicação e hotspots
+Analisa cada função (McCabe + profundidade de blocos), acha clusters de código
+duplicado por shingling de tokens normalizados e cruza tudo com o churn do git.
+Roda em paralelo (processos), guarda o resultado por arquivo em cache
+(mtime/tamanho) e devolve um relatório ordenado pelo retorno esperado da correção.
+"""
+
+import ast
+import io
+import json
+import keyword
+import logging
+import math
+import os
+import re
+import subprocess
+import time
+import tokenize
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass, field
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from codex_ia.core.symbol_index import DEFAULT_IGNORE_DIRS
+
+logger = logging.getLogger(__name__)
+
+CACHE_VERSION = 1
+TODO_RE = re.compile(r"\b(?:TODO|FIXME)\b")
+MAX_READ_BYTES = 2 * 1024 * 1024
+TEXT_EXTS = {'.py', '.js', '.jsx', '.ts', '.tsx', '.html', '.css', '.md', '.txt', '.json', '.yml', '.yaml',
+             '.toml', '.cfg', '.ini', '.sh', '.rs', '.go', '.java', '.c', '.h', '.cpp'}
+COMPLEXITY_THRESHOLD = 10  # McCabe above this is a hotspot candidate
+NESTING_THRESHOLD = 4
+SHINGLE_SIZE = 12  # Tokens per shingle
+WINNOW_WINDOW = 4  # Keep the min hash of every window of shingles
+MIN_DUP_TOKENS = 50  # Smaller functions are not compared
+DUP_SIMILARITY = 0.7  # Jaccard of fingerprints to join a cluster
+PARALLEL_MIN_FILES = 32  # Below this a process pool costs more than it saves
+CHURN_DAYS = 90
+
+_BLOCKS = (ast.If, ast.For, ast.AsyncFor, ast.While, ast.With, ast.AsyncWith, ast.Try)
+_SCOPES = (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef, ast.Lambda)
+_SKIP_TOKENS = {tokenize.COMMENT, tokenize.NL, tokenize.NEWLINE, tokenize.INDENT, tokenize.DEDENT,
+                tokenize.ENCODING, tokenize.ENDMARKER}
+
+
+@dataclass
+class FunctionStats:
+    qualname: str
+    line: int
+    end_line: int
+    complexity: int  # McCabe: 1 + decision points (nested defs excluded)
+    nesting: int  # Deepest block nesting inside the function
+    tokens: int = 0
+    fingerprints: List[int] = field(default_factory=list)  # Winnowed shingle hashes
+
+    @property
+    def length(self) -> int:
+        return self.end_line - self.line + 1
+
+
+@dataclass
+class FileStats:
+    path: str
+    lines: int = 0
+    todos: int = 0
+    syntax_error: bool = False
+    functions: List[FunctionStats] = field(default_factory=list)
+
+    @property
+    def branches(self) -> int:
+        return sum(f.complexity - 1 for f in self.functions)
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "FileStats":
+        data = dict(data)
+        data["functions"] = [FunctionStats(**f) for f in data.get("functions", [])]
+        return cls(**data)
+
+
+@dataclass
+class Hotspot:
+    path: str
+    qualname: str
+    line: int
+    complexity: int
+    nesting: int
+    length: int
+    churn: int
+    score: float
+
+
+@dataclass
+class DuplicateCluster:
+    members: List[Tuple[str, str, int]]  # (path, qualname, line)
+    similarity: float
+    tokens: int  # Size of the smallest member
+    score: float = 0.0
+
+
+# --- Per-function metrics ---
+
+def _decisions(node: ast.AST) -> int:
+    if isinstance(node, (ast.If, ast.For, ast.AsyncFor, ast.While, ast.IfExp, ast.ExceptHandler, ast.Assert)):
+        return 1
+    if isinstance(node, ast.comprehension):
+        return 1 + len(node.ifs)
+    if isinstance(node, ast.BoolOp):
+        return len(node.values) - 1
+    if type(node).__name__ == "match_case":
+        return 1
+    return 0
+
+
+def _own_nodes(func: ast.AST) -> Iterable[Tuple[ast.AST, int]]:
+    """(node, block depth) of the function body, without descending into nested scopes."""
+    stack = [(child, 0) for child in reversed(func.body)]
+    while stack:
+        node, depth = stack.pop()
+        yield node, depth
+        if isinstance(node, _SCOPES):
+            continue
+        inner = depth + 1 if isinstance(node, _BLOCKS) or type(node).__name__ == "Match" else depth
+        children = list(ast.iter_child_nodes(node))
+        if isinstance(node, ast.If) and len(node.orelse) == 1 and isinstance(node.orelse[0], ast.If):
+            # `elif` stays at the level of its `if`
+            stack.append((node.orelse[0], depth))
+            children = [c for c in children if c is not node.orelse[0]]
+        stack.extend((child, inner) for child in reversed(children))
+
+
+def _fingerprints(source: str) -> Tuple[int, List[int]]:
+    """Token count and winnowed shingle hashes with identifiers/literals normalized."""
+    normalized = []
+    try:
+        for tok in tokenize.generate_tokens(io.StringIO(source).readline):
+            if tok.type in _SKIP_TOKENS:
+                continue
+            if tok.type == tokenize.NAME:
+                normalized.append(tok.string if keyword.iskeyword(tok.string) else "N")
+            elif tok.type == tokenize.NUMBER:
+                normalized.append("0")
+            elif tok.type == tokenize.STRING:
+                normalized.append("S")
+            else:
+                normalized.append(tok.string)
+    except (tokenize.TokenError, IndentationError, SyntaxError):
+        return 0, []
+    if len(normalized) < MIN_DUP_TOKENS:
+        return len(normalized), []
+    hashes = [zlib.crc32(" ".join(normalized[i:i + SHINGLE_SIZE]).encode("utf-8"))
+              for i in range(len(normalized) - SHINGLE_SIZE + 1)]
+    picked = {min(hashes[i:i + WINNOW_WINDOW]) for i in range(max(1, len(hashes) - WINNOW_WINDOW + 1))}
+    return len(normalized), sorted(picked)
+
+
+def analyze_source(text: str, path: str) -> FileStats:
+    """Every metric for one file from its text (the only read happens in the caller)."""
+    stats = FileStats(path, text.count("\n") + (1 if text and not text.endswith("\n") else 0),
+                      len(TODO_RE.findall(text)))
+    if not path.endswith(".py"):
+        return stats
+    try:
+        tree = ast.parse(text)
+    except (SyntaxError, ValueError):
+        stats.syntax_error = True
+        return stats
+    lines = text.splitlines()
+
+    def visit(node: ast.AST, prefix: str):
+        for child in ast.iter_child_nodes(node):
+            if isinstance(child, (ast.FunctionDef, ast.AsyncFunctionDef)):
+                qualname = f"{prefix}{child.name}"
+                complexity, nesting = 1, 0
+                for inner, depth in _own_nodes(child):
+                    complexity += _decisions(inner)
+                    if isinstance(inner, _BLOCKS):
+                        nesting = max(nesting, depth + 1)
+                end = child.end_lineno or child.lineno
+                tokens, prints = _fingerprints("\n".join(lines[child.lineno - 1:end]))
+                stats.functions.append(FunctionStats(qualname, child.lineno, end, complexity, nesting, tokens, prints))
+                visit(child, qualname + ".")
+            elif isinstance(child, ast.ClassDef):
+                visit(child, f"{prefix}{child.name}.")
+            else:
+                visit(child, prefix)
+
+    visit(tree, "")
+    return stats
+
+
+def _analyze_path(root: str, rel: str) -> Optional[Dict]:
+    """Process-pool worker: one read, plain dict result."""
+    path = os.path.join(root, rel)
+    try:
+        if os.path.getsize(path) > MAX_READ_BYTES:
+            return None
+        with open(path, "rb") as f:
+            raw = f.read()
+    except OSError:
+        return None
+    if b"\0" in raw[:4096]:
+        return None
+    return asdict(analyze_source(raw.decode("utf-8", errors="ignore"), rel))
+
+
+# --- Repo-level report ---
+
+def git_churn(root: str, days: int = CHURN_DAYS) -> Dict[str, int]:
+    """Commits touching each file in the last `days` (one `git log` for the whole repo)."""
+    try:
+        log = subprocess.run(["git", "log", f"--since={days}.days", "--name-only", "--format="],
+                             cwd=root, capture_output=True, text=True, timeout=60)
+    except (OSError, subprocess.SubprocessError):
+        return {}
+    if log.returncode != 0:
+        return {}
+    top = subprocess.run(["git", "rev-parse", "--show-toplevel"], cwd=root, capture_output=True, text=True)
+    prefix = os.path.relpath(os.path.abspath(root), top.stdout.strip()).replace(os.sep, "/") \
+        if top.returncode == 0 else "."
+    churn: Dict[str, int] = {}
+    for line in log.stdout.splitlines():
+        line = line.strip()
+        if not line:
+            continue
+        if prefix != ".":
+            if not line.startswith(prefix + "/"):
+                continue
+            line = line[len(prefix) + 1:]
+        churn[line] = churn.get(line, 0) + 1
+    return churn
+
+
+def duplicate_clusters(files: Iterable[FileStats], threshold: float = DUP_SIMILARITY) -> List[DuplicateCluster]:
+    """Functions whose fingerprint sets overlap >= `threshold` (Jaccard), merged transitively."""
+    funcs = [(f.path, fn) for f in files for fn in f.functions if fn.fingerprints]
+    index: Dict[int, List[int]] = {}
+    for i, (_, fn) in enumerate(funcs):
+        for fp in fn.fingerprints:
+            index.setdefault(fp, []).append(i)
+    parent = list(range(len(funcs)))
+
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    best: Dict[int, float] = {}
+    for i, (_, fn) in enumerate(funcs):
+        shared: Dict[int, int] = {}
+        for fp in fn.fingerprints:
+            for j in index[fp]:
+                if j > i:
+                    shared[j] = shared.get(j, 0) + 1
+        mine = len(fn.fingerprints)
+        for j, common in shared.items():
+            similarity = common / (mine + len(funcs[j][1].fingerprints) - common)
+            if similarity >= threshold:
+                parent[find(j)] = find(i)
+                for k in (i, j):
+                    best[k] = max(best.get(k, 0.0), similarity)
+
+    groups: Dict[int, List[int]] = {}
+    for i in best:
+        groups.setdefault(find(i), []).append(i)
+    clusters = []
+    for members in groups.values():
+        if len(members) < 2:
+            continue
+        members.sort(key=lambda k: (funcs[k][0], funcs[k][1].line))
+        clusters.append(DuplicateCluster(
+            [(funcs[k][0], funcs[k][1].qualname, funcs[k][1].line) for k in members],
+            round(min(best[k] for k in members), 2),
+            min(funcs[k][1].tokens for k in members),
+        ))
+    return clusters
+
+
+@dataclass
+class ComplexityReport:
+    files: Dict[str, FileStats]
+    hotspots: List[Hotspot]
+    duplicates: List[DuplicateCluster]
+    churn: Dict[str, int]
+    analyzed: int = 0  # Files (re)read in this run; the rest came from the cache
+    elapsed: float = 0.0
+
+    def top(self, n: int = 10) -> List[Hotspot]:
+        return self.hotspots[:n]
+
+    def summary(self, n: int = 10) -> str:
+        lines = [f"📈 {len(self.files)} files ({self.analyzed} analyzed, {max(0, len(self.files) - self.analyzed)} cached) "
+                 f"in {self.elapsed:.2f}s"]
+        for h in self.top(n):
+            lines.append(f"  {h.score:7.1f}  {h.path}:{h.line} {h.qualname}  CC={h.complexity} "
+                         f"nest={h.nesting} len={h.length} churn={h.churn}")
+        for c in self.duplicates[:n]:
+            where = ", ".join(f"{p}:{line} {q}" for p, q, line in c.members)
+            lines.append(f"  {c.score:7.1f}  duplicate x{len(c.members)} ({c.similarity:.0%}, {c.tokens} tokens): {where}")
+        return "\n".join(lines)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"hotspots": [asdict(h) for h in self.hotspots], "duplicates": [asdict(c) for c in self.duplicates],
+                "analyzed": self.analyzed, "files": len(self.files), "elapsed": round(self.elapsed, 3)}
+
+
+def churn_weight(churn: int) -> float:
+    return 1 + math.log1p(churn)
+
+
+class ComplexityAnalyzer:
+    """
+    Usage:
+        report = ComplexityAnalyzer(root).analyze()   # incremental on later runs
+        print(report.summary())
+    Hotspot score = (complexity + 2 * nesting) * (1 + log(1 + churn)): complex
+    code that keeps changing is where a fix pays off most.
+    """
+
+    def __init__(self, root: str, cache_path: Optional[str] = None, workers: Optional[int] = None,
+                 ignore_dirs: Optional[Iterable[str]] = None):
+        self.root = os.path.abspath(root)
+        self.cache_path = cache_path or os.path.join(self.root, ".codex_cache", "complexity.json")
+        self.workers = workers or os.cpu_count() or 1
+        self.ignore_dirs = set(ignore_dirs) if ignore_dirs is not None else set(DEFAULT_IGNORE_DIRS)
+        self._cache: Dict[str, Dict] = self._load_cache()
+
+    def _load_cache(self) -> Dict[str, Dict]:
+        try:
+            with open(self.cache_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        return data.get("files", {}) if data.get("version") == CACHE_VERSION else {}
+
+    def _save_cache(self):
+        os.makedirs(os.path.dirname(self.cache_path), exist_ok=True)
+        tmp = f"{self.cache_path}.tmp"
+        try:
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump({"version": CACHE_VERSION, "files": self._cache}, f)
+            os.replace(tmp, self.cache_path)
+        except OSError as e:
+            logger.warning(f"Complexity cache write failed: {e}")
+
+    def list_files(self) -> List[str]:
+        found = []
+        for dirpath, dirs, files in os.walk(self.root):
+            dirs[:] = [d for d in dirs if d not in self.ignore_dirs and not d.startswith(".")]
+            for name in files:
+                if os.path.splitext(name)[1] in TEXT_EXTS:
+                    found.append(os.path.relpath(os.path.join(dirpath, name), self.root).replace(os.sep, "/"))
+        return sorted(found)
+
+    def stats(self, files: Optional[Iterable[str]] = None) -> Tuple[Dict[str, FileStats], int]:
+        """FileStats per file; only files whose mtime/size changed are re-read."""
+        files = list(files) if files is not None else self.list_files()
+        results: Dict[str, FileStats] = {}
+        stale = []
+        for rel in files:
+            try:
+                st = os.stat(os.path.join(self.root, rel))
+            except OSError:
+                continue
+            entry = self._cache.get(rel)
+            if entry and entry["mtime"] == st.st_mtime_ns and entry["size"] == st.st_size:
+                if entry["stats"] is not None:  # None: binary/huge, skipped until it changes
+                    results[rel] = FileStats.from_dict(entry["stats"])
+            else:
+                stale.append((rel, st.st_mtime_ns, st.st_size))
+
+        if len(stale) >= PARALLEL_MIN_FILES and self.workers > 1:
+            with ProcessPoolExecutor(max_workers=self.workers) as pool:
+                computed = list(pool.map(_analyze_path, [self.root] * len(stale), [s[0] for s in stale],
+                                         chunksize=max(1, len(stale) // (self.workers * 4))))
+        else:
+            computed = [_analyze_path(self.root, rel) for rel, _, _ in stale]
+
+        for (rel, mtime, size), data in zip(stale, computed):
+            self._cache[rel] = {"mtime": mtime, "size": size, "stats": data}
+            if data is not None:
+                results[rel] = FileStats.from_dict(data)
+        for rel in set(self._cache) - set(files):
+            if not os.path.exists(os.path.join(self.root, rel)):
+                del self._cache[rel]
+        if stale:
+            self._save_cache()
+        return results, len(stale)
+
+    def analyze(self, files: Optional[Iterable[str]] = None, churn: Optional[Dict[str, int]] = None) -> ComplexityReport:
+        start = time.perf_counter()
+        stats, analyzed = self.stats(files)
+        if churn is None:
+            churn = git_churn(self.root)
+        hotspots = []
+        for rel, file_stats in stats.items():
+            for fn in file_stats.functions:
+                if fn.complexity < COMPLEXITY_THRESHOLD and fn.nesting < NESTING_THRESHOLD:
+                    continue
+                score = (fn.complexity + 2 * fn.nesting) * churn_weight(churn.get(rel, 0))
+                hotspots.append(Hotspot(rel, fn.qualname, fn.line, fn.complexity, fn.nesting, fn.length,
+                                        churn.get(rel, 0), round(score, 2)))
+        hotspots.sort(key=lambda h: -h.score)
+        duplicates = duplicate_clusters(stats.values())
+        for cluster in duplicates:
+            heat = max(churn_weight(churn.get(p, 0)) for p, _, _ in cluster.members)
+            cluster.score = round(cluster.tokens * (len(cluster.members) - 1) / 10 * heat, 2)
+        duplicates.sort(key=lambda c: -c.score)
+        return ComplexityReport(stats, hotspots, duplicates, churn, analyzed, time.perf_counter() - start)
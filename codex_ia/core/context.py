@@ -1,8 +1,24 @@
 
 import os
+import re
 from pathlib import Path
 from typing import List, Dict
 
+_UNSET = object()
+_WORD_RE = re.compile(r"[A-Z]+(?![a-z])|[A-Z]?[a-z]+|\d+")
+_STOP_WORDS = {"the", "and", "for", "with", "from", "into", "self", "def", "class", "para", "com", "que", "dos", "das"}
+
+
+def _words(text: str) -> set:
+    """Lower-case words of identifiers/paths/prose (camelCase and snake_case split)."""
+    return {w.lower() for w in _WORD_RE.findall(text or "") if len(w) >= 3} - _STOP_WORDS
+
+
+def _overlap(terms: set, words: set) -> int:
+    """Query terms found in `words` (prefix match, so 'agent' also hits 'agents')."""
+    return sum(1 for t in terms if t in words or any(w.startswith(t) or t.startswith(w) for w in words if len(w) >= 4))
+
+
 class ContextManager:
     def __init__(self, root_path: str):
         self.root = Path(root_path).resolve()
@@ -10,16 +26,12 @@ class ContextManager:
         self.ignore_dirs = {'.git', 'venv', '.venv', '__pycache__', '.idea', '.vscode', 'node_modules', 'dist', 'build'}
         self.ignore_exts = {'.pyc', '.png', '.jpg', '.jpeg', '.gif', '.pdf', '.exe', '.dll', '.bin', '.svg', '.ico'}
         self.gitignore_rules = self._load_gitignore()
-        
+        self._kb = None  # KnowledgeBase, opened on first build_graph
+
         # [OPTIMIZATION] Local Memory Integration 🧠
-        try:
-            from codex_ia.core.vector_store import CodexVectorStore
-            from codex_ia.core.global_store import GlobalVectorStore
-            self.vector_store = CodexVectorStore(persistence_path=str(self.root / ".codex_memory"))
-            self.global_store = GlobalVectorStore()
-        except Exception:
-            self.vector_store = None
-            self.global_store = None
+        # chromadb + embedding model load on first semantic query, not at startup
+        self._vector_store = _UNSET
+        self._global_store = _UNSET
 
     def _load_gitignore(self) -> List[str]:
         """Loads patterns from .gitignore if it exists."""
@@ -36,6 +48,44 @@ class ContextManager:
                 pass
         return patterns
 
+    @property
+    def vector_store(self):
+        """Project CodexVectorStore (None if chromadb is unavailable)."""
+        if self._vector_store is _UNSET:
+            try:
+                from codex_ia.core.vector_store import CodexVectorStore
+                self._vector_store = CodexVectorStore(persistence_path=str(self.root / ".codex_memory"))
+            except Exception:
+                self._vector_store = None
+        return self._vector_store
+
+    @vector_store.setter
+    def vector_store(self, value):
+        self._vector_store = value
+
+    @property
+    def global_store(self):
+        """Universal GlobalVectorStore (None if chromadb is unavailable)."""
+        if self._global_store is _UNSET:
+            try:
+                from codex_ia.core.global_store import GlobalVectorStore
+                self._global_store = GlobalVectorStore()
+            except Exception:
+                self._global_store = None
+        return self._global_store
+
+    @global_store.setter
+    def global_store(self, value):
+        self._global_store = value
+
+    @property
+    def knowledge_base(self):
+        """Project KnowledgeBase (SQLite), shared across build_graph calls."""
+        if self._kb is None:
+            from codex_ia.core.knowledge_base import KnowledgeBase
+            self._kb = KnowledgeBase(str(self.root / ".codex_memory.db"))
+        return self._kb
+
     def _is_ignored(self, path: Path) -> bool:
         """Simple check for ignored files/dirs. 
         Note: A robust implementation would use `pathspec` or `gitpython`.
@@ -84,9 +134,9 @@ class ContextManager:
         Returns a high-level description of the project architecture.
         """
         import ast
-        from codex_ia.core.knowledge_base import KnowledgeBase
+        import hashlib
         
-        kb = KnowledgeBase(str(self.root / ".codex_memory.json"))
+        kb = self.knowledge_base
         graph_desc = ["PROJECT ARCHITECTURE GRAPH:"]
         
         all_files = self.list_files()
@@ -120,14 +170,15 @@ class ContextManager:
                             
                 modules[rel_path] = info
                 
-                # Store lightweight summary in KB
+                # Store lightweight summary in KB (no-op when the file is unchanged)
                 summary = f"Module {rel_path} defines classes {info['classes']} and functions {info['functions']}"
-                kb.update_file_summary(rel_path, summary, "HASH_TODO")
+                file_hash = hashlib.sha1(content.encode('utf-8', errors='ignore')).hexdigest()
+                kb.update_file_summary(rel_path, summary, file_hash)
                 
             except Exception:
                 pass
         
-        # Save KB
+        # Save KB (writes only the entries that changed)
         kb.save()
         
         # Build Text Description
@@ -240,10 +291,110 @@ class ContextManager:
         except Exception as e:
             return f"Error during semantic retrieval: {e}"
 
-    def get_file_context(self, file_path: str) -> str:
+    def get_context_for_query(self, query: str, token_budget: int = 2000, use_vectors: bool = True) -> str:
+        """
+        Query-scoped architecture context: the modules most relevant to `query`
+        with their signatures and call edges, trimmed to `token_budget` tokens.
+        Ranking uses the shared (incremental) symbol index — path, docstring and
+        symbol-name matches — plus vector-store hits when neural memory exists.
+        """
+        from codex_ia.core.conversation_memory import estimate_tokens
+        from codex_ia.core.symbol_index import get_symbol_index
+
+        index = get_symbol_index(str(self.root))
+        terms = _words(query)
+        ranked = []
+        for rel in index.files():
+            if not rel.endswith(".py") or self._is_ignored(self.root / rel):
+                continue
+            symbols = index.symbols(rel)
+            matched = [sym for sym in symbols if _overlap(terms, _words(f"{sym['name']} {sym.get('doc', '')}"))]
+            score = 3 * _overlap(terms, _words(rel)) + _overlap(terms, _words(index.module_doc(rel))) \
+                + 2 * min(len(matched), 5)
+            ranked.append([score, rel, symbols, matched])
+
+        if use_vectors and terms and self.vector_store:
+            try:
+                hits = self.vector_store.semantic_search(query, n_results=10)
+            except Exception:
+                hits = []
+            by_path = {r[1]: r for r in ranked}
+            for i, hit in enumerate(hits):
+                path = str(hit.get("path", ""))
+                rel = os.path.relpath(path, self.root).replace(os.sep, "/") if os.path.isabs(path) else path
+                if rel in by_path:
+                    by_path[rel][0] += 4 * (1 - i / len(hits))
+
+        ranked.sort(key=lambda r: (-r[0], r[1]))
+        if terms and ranked and ranked[0][0] > 0:
+            ranked = [r for r in ranked if r[0] > 0]
+
+        def edges(sym, rel) -> str:
+            found = []
+            if sym.get("calls"):
+                found.append("calls: " + ", ".join(sym["calls"][:8]))
+            if not sym["name"].startswith("__"):
+                # Private names are resolved within their own module only
+                callers = [f"{c['qualname']} ({c['path']})" for c in index.callers(sym["name"])
+                           if c["qualname"] != sym["qualname"] and (c["path"] == rel or not sym["name"].startswith("_"))]
+                if callers:
+                    more = f" +{len(callers) - 4}" if len(callers) > 4 else ""
+                    found.append("called by: " + ", ".join(callers[:4]) + more)
+            return " | ".join(found)
+
+        def render(rel, symbols, matched) -> List[str]:
+            doc = index.module_doc(rel)
+            lines = [f"## {rel}" + (f" — {doc}" if doc else "")]
+            for sym in matched:
+                signature = sym["signature"].replace(f" {sym['name']}", f" {sym['qualname']}", 1)
+                line = f"- {signature}  [L{sym['lineno']}]" + (f" — {sym['doc'][:80]}" if sym.get("doc") else "")
+                if sym["kind"] == "class":
+                    methods = [m["name"] for m in symbols if m["qualname"].startswith(sym["qualname"] + ".")
+                               and m["qualname"].count(".") == sym["qualname"].count(".") + 1]
+                    if methods:
+                        line += "\n    methods: " + ", ".join(methods)
+                else:
+                    found = edges(sym, rel)
+                    if found:
+                        line += f"\n    ↳ {found}"
+                lines.append(line)
+            focus = {sym["qualname"] for sym in matched}
+            others = [f"{sym['kind'].replace('function', 'def')} {sym['name']}" for sym in symbols
+                      if "." not in sym["qualname"] and sym["qualname"] not in focus]
+            if others:
+                lines.append("  defines: " + ", ".join(others))
+            return lines
+
+        parts, used, shown = [], 0, 0
+        for _, rel, symbols, matched in ranked:
+            lines = render(rel, symbols, matched)
+            costs = [estimate_tokens(line) for line in lines]
+            if used + sum(costs) <= token_budget:
+                parts.extend(lines)
+                used += sum(costs)
+                shown += 1
+                continue
+            # Budget reached: keep whatever part of this module still fits, then stop
+            fitted = 0
+            while fitted < len(lines) and used + costs[fitted] <= token_budget:
+                parts.append(lines[fitted])
+                used += costs[fitted]
+                fitted += 1
+            if fitted:
+                parts.append("  ...")
+                shown += 1
+            break
+        header = f"--- INTROSPECTION: '{query}' ({shown} of {len(ranked)} modules, ~{used} tokens) ---"
+        return "\n".join([header] + parts)
+
+    def get_file_context(self, file_path: str, start_line: int = 1, end_line: int = None) -> str:
         """
         Reads a specific file with line numbers for better referencing.
+        `start_line`/`end_line` (1-based, inclusive) limit it to a window;
+        reads go through the shared file cache (mmap windows for large files).
         """
+        from codex_ia.core.file_cache import get_file_cache
+
         # Resolve path relative to root if it looks relative
         target_path = Path(file_path)
         if not target_path.is_absolute():
@@ -253,20 +404,20 @@ class ContextManager:
             return f"Error: File {file_path} not found."
         
         try:
-            with open(target_path, 'r', encoding='utf-8') as f:
-                lines = f.readlines()
-                
-            numbered_lines = []
-            for i, line in enumerate(lines, 1):
-                numbered_lines.append(f"{i}: {line}")
-                
-            content = "".join(numbered_lines)
+            start_line = max(start_line or 1, 1)
+            limit = None if end_line is None else max(end_line - start_line + 1, 0)
+            lines, total = get_file_cache().read_range(str(target_path), start_line, limit)
+
+            content = "".join(f"{i}: {line}" for i, line in enumerate(lines, start_line))
             
             try:
                 rel_path = target_path.relative_to(self.root)
             except ValueError:
                 rel_path = target_path.name
-                
-            return f"--- FILE: {rel_path} ---\n{content}\n"
+
+            header = f"--- FILE: {rel_path} ---"
+            if start_line > 1 or start_line + len(lines) - 1 < total:
+                header = f"--- FILE: {rel_path} (lines {start_line}-{start_line + len(lines) - 1} of {total}) ---"
+            return f"{header}\n{content}\n"
         except Exception as e:
             return f"Error reading file: {e}"
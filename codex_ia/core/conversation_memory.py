@@ -0,0 +1,233 @@
+"""
+🗂️ TIERED CONVERSATION MEMORY - Token-budgeted history
+Turnos recentes literais, turnos antigos resumidos (modelo local, em background)
+e os mais antigos acessíveis apenas via recuperação semântica.
+"""
+
+import logging
+import threading
+from typing import Callable, Dict, List, Optional
+
+from codex_ia.core.long_term_memory import LongTermMemory
+
+logger = logging.getLogger(__name__)
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate (~4 chars/token), good enough for budgeting."""
+    return len(text) // 4 + 1
+
+
+def _format_turn(msg: Dict) -> str:
+    return f"{msg['role'].upper()}: {msg['content']}"
+
+
+class TieredMemory:
+    """
+    Three tiers over the `conversations` table of LongTermMemory:
+    1. RECENT_TURNS newest messages, verbatim.
+    2. Summaries of SUMMARY_BLOCK-message blocks (the newest SUMMARY_WINDOW are prompt-eligible).
+    3. Everything older: only reachable via `build_history(query=...)` retrieval.
+    """
+    RECENT_TURNS = 12
+    SUMMARY_BLOCK = 10
+    SUMMARY_WINDOW = 6
+    RETRIEVAL_HITS = 4
+    RECENT_SHARE = 0.6
+    RETRIEVAL_SHARE = 0.15
+
+    def __init__(self, memory: LongTermMemory, project_id: int,
+                 summarizer: Optional[Callable[[str], str]] = None, background: bool = True):
+        self.memory = memory
+        self.project_id = project_id
+        self.summarizer = summarizer or self._local_summarizer
+        self.background = background
+        self.last_build_stats: Dict[str, int] = {}
+
+        self._summary_lock = threading.Lock()
+        self._summary_thread: Optional[threading.Thread] = None
+        self._retrieval_index = None
+        self._messages_by_key: Dict[str, Dict] = {}
+        self._indexed_until = 0  # highest message id in the retrieval index
+
+    @classmethod
+    def for_project(cls, db_path: str, project_name: str, **kwargs) -> "TieredMemory":
+        """Opens (or creates) the project in a LongTermMemory database."""
+        memory = LongTermMemory(db_path)
+        project = memory.get_project(project_name)
+        project_id = project["id"] if project else memory.create_project(project_name)
+        return cls(memory, project_id, **kwargs)
+
+    # --- Writing ---
+
+    def add_turn(self, role: str, content: str) -> int:
+        """Persists a turn and schedules summarization of old blocks."""
+        msg_id = self.memory.save_message(self.project_id, role, content)
+        if self.background:
+            self._schedule_summaries()
+        else:
+            self.refresh_summaries()
+        return msg_id
+
+    def _schedule_summaries(self):
+        if self._summary_thread and self._summary_thread.is_alive():
+            return  # The running job picks up new blocks on its next pass
+        self._summary_thread = threading.Thread(target=self.refresh_summaries, daemon=True)
+        self._summary_thread.start()
+
+    def wait_for_summaries(self, timeout: Optional[float] = None):
+        """Blocks until the background summarizer is idle (tests/shutdown)."""
+        if self._summary_thread:
+            self._summary_thread.join(timeout)
+
+    def refresh_summaries(self):
+        """Summarizes every complete block older than the recent window."""
+        with self._summary_lock:
+            while True:
+                summaries = self.memory.get_summaries(self.project_id)
+                last_end = summaries[-1]["end_id"] if summaries else 0
+                recent = self.memory.get_recent_messages(self.project_id, self.RECENT_TURNS)
+                if not recent:
+                    return
+                pending = self.memory.get_messages(self.project_id, after_id=last_end, before_id=recent[0]["id"])
+                if len(pending) < self.SUMMARY_BLOCK:
+                    return
+
+                block = pending[:self.SUMMARY_BLOCK]
+                transcript = "\n".join(_format_turn(m) for m in block)
+                try:
+                    summary = self.summarizer(transcript)
+                except Exception as e:
+                    logger.warning(f"Summarizer failed, using extractive summary: {e}")
+                    summary = self._extractive_summary(transcript)
+                self.memory.save_summary(self.project_id, block[0]["id"], block[-1]["id"], summary)
+
+    def _local_summarizer(self, transcript: str) -> str:
+        """Summarizes with the local model (zero cost); extractive fallback if offline."""
+        from codex_ia.core.brain_router import OllamaClient
+
+        prompt = (
+            "Resuma a conversa abaixo em no máximo 5 tópicos curtos, preservando decisões, "
+            "nomes de arquivos e erros mencionados.\n\n" + transcript
+        )
+        response = OllamaClient().send_message(prompt, task_type='general')
+        if not response or response.startswith(("⚠️", "❌")):
+            return self._extractive_summary(transcript)
+        return response.strip()
+
+    @staticmethod
+    def _extractive_summary(transcript: str, max_chars: int = 160) -> str:
+        lines = []
+        for line in transcript.splitlines():
+            if line.startswith(("USER:", "ASSISTANT:", "AGENT:")):
+                lines.append("- " + line[:max_chars])
+        return "\n".join(lines)
+
+    # --- Reading ---
+
+    def _retrieve(self, query: str, before_id: int) -> List[Dict]:
+        """Semantic search over the oldest tier (messages with id < before_id)."""
+        from codex_ia.core.embeddings import get_embedder, VectorIndex
+
+        embedder = get_embedder()
+        if self._retrieval_index is None:
+            self._retrieval_index = VectorIndex()
+
+        new_msgs = self.memory.get_messages(self.project_id, after_id=self._indexed_until, before_id=before_id)
+        if new_msgs:
+            vectors = embedder.embed([m["content"] for m in new_msgs])
+            for msg, vec in zip(new_msgs, vectors):
+                key = str(msg["id"])
+                self._messages_by_key[key] = msg
+                self._retrieval_index.add(key, vec)
+            self._indexed_until = new_msgs[-1]["id"]
+
+        hits = self._retrieval_index.search(embedder.embed_one(query), k=self.RETRIEVAL_HITS)
+        return [self._messages_by_key[k] for k, score in hits if score > 0.2 and int(k) < before_id]
+
+    def build_history(self, token_budget: int = 2000, query: Optional[str] = None) -> str:
+        """
+        Assembles history for a prompt within `token_budget`.
+        Recent turns get up to RECENT_SHARE of the budget, retrieved old turns
+        (when `query` is given) up to RETRIEVAL_SHARE, summaries the rest;
+        any leftover goes back to older recent turns.
+        """
+        remaining = token_budget
+        stats = {"recent": 0, "summaries": 0, "retrieved": 0}
+
+        recent = self.memory.get_recent_messages(self.project_id, self.RECENT_TURNS)
+        summaries = self.memory.get_summaries(self.project_id)
+        last_end = summaries[-1]["end_id"] if summaries else 0
+        unsummarized = []
+        if recent:
+            unsummarized = self.memory.get_messages(self.project_id, after_id=last_end, before_id=recent[0]["id"])
+
+        # 1. Recent + unsummarized turns, newest first
+        candidates = [_format_turn(m) for m in reversed(unsummarized + recent)]
+        recent_lines: List[str] = []
+
+        def fill_recent(cap: int) -> int:
+            used = 0
+            while len(recent_lines) < len(candidates):
+                line = candidates[len(recent_lines)]
+                cost = estimate_tokens(line)
+                if cost > cap - used:
+                    if recent_lines:
+                        break
+                    # Always keep (the tail of) the latest turn
+                    line = "..." + line[-max(cap - used, 1) * 4:]
+                    cost = cap - used
+                recent_lines.append(line)
+                used += cost
+            return used
+
+        used = fill_recent(int(token_budget * self.RECENT_SHARE))
+        remaining -= used
+        stats["recent"] += used
+
+        # 2. Retrieval over the oldest tier
+        retrieved_lines: List[str] = []
+        window = summaries[-self.SUMMARY_WINDOW:]
+        oldest_visible = window[0]["start_id"] if window else (recent[0]["id"] if recent else 0)
+        if query and oldest_visible > 1:
+            cap = int(token_budget * self.RETRIEVAL_SHARE)
+            try:
+                for msg in self._retrieve(query, before_id=oldest_visible):
+                    line = _format_turn(msg)
+                    cost = estimate_tokens(line)
+                    if cost > min(cap, remaining):
+                        break
+                    retrieved_lines.append(line)
+                    cap -= cost
+                    remaining -= cost
+                    stats["retrieved"] += cost
+            except Exception as e:
+                logger.warning(f"History retrieval failed: {e}")
+
+        # 3. Summaries, newest first
+        summary_lines: List[str] = []
+        for item in reversed(window):
+            cost = estimate_tokens(item["summary"])
+            if cost > remaining:
+                break
+            summary_lines.insert(0, item["summary"])
+            remaining -= cost
+            stats["summaries"] += cost
+
+        # 4. Leftover budget goes back to older verbatim turns
+        if remaining > 0:
+            used = fill_recent(remaining)
+            remaining -= used
+            stats["recent"] += used
+
+        parts = []
+        if retrieved_lines:
+            parts.append("[MEMÓRIA RECUPERADA (turnos antigos relevantes)]\n" + "\n".join(retrieved_lines))
+        if summary_lines:
+            parts.append("[RESUMO DA CONVERSA ANTERIOR]\n" + "\n".join(summary_lines))
+        if recent_lines:
+            parts.append("[TURNOS RECENTES]\n" + "\n".join(reversed(recent_lines)))
+
+        stats["total"] = token_budget - remaining
+        self.last_build_stats = stats
+        return "\n\n".join(parts)
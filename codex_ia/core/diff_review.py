@@ -0,0 +1,208 @@
+"""
+🔎 DIFF REVIEW - Revisão do Sentinel limitada ao que mudou
+Calcula o diff desde a última versão analisada (ou o git HEAD na primeira vez),
+agrupa os trechos alterados pela função que os contém e manda só isso ao LLM.
+Vereditos ficam em cache pelo hash do trecho e cada arquivo tem um intervalo
+mínimo entre análises: o custo acompanha o tamanho da edição, não do arquivo.
+"""
+
+import ast
+import difflib
+import hashlib
+import os
+import subprocess
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+CONTEXT_LINES = 3  # Lines around a hunk when there is no enclosing function
+MAX_FUNCTION_LINES = 80  # Longer enclosing functions fall back to the hunk window
+MIN_INTERVAL = 10.0  # Seconds between two reviews of the same file
+CLEAN = "CLEAN"
+
+
+@dataclass
+class ReviewUnit:
+    """Changed lines plus the code the model needs to judge them."""
+    start: int  # 1-based, inclusive, in the new content
+    end: int
+    changed: List[int]
+    scope: str  # "def name" / "class name" / "" (module level)
+    code: str
+    notes: List[str] = field(default_factory=list)  # E.g. lint findings inside the unit
+
+    @property
+    def hash(self) -> str:
+        return hashlib.sha1(f"{self.code}\n{self.notes}".encode("utf-8", errors="replace")).hexdigest()
+
+    def render(self) -> str:
+        """Numbered code, changed lines marked with '+'."""
+        marked = set(self.changed)
+        lines = self.code.splitlines()
+        body = "\n".join(f"{'+' if n in marked else ' '} {n:4d} | {text}"
+                         for n, text in enumerate(lines, self.start))
+        header = f"# linhas {self.start}-{self.end}" + (f" em {self.scope}" if self.scope else "")
+        notes = "".join(f"\n# lint: {n}" for n in self.notes)
+        return f"{header}{notes}\n{body}"
+
+
+def changed_ranges(old: List[str], new: List[str]) -> List[Tuple[int, int]]:
+    """1-based inclusive line ranges of `new` that differ from `old` (deletions mark their border)."""
+    ranges = []
+    for tag, _, _, j1, j2 in difflib.SequenceMatcher(None, old, new, autojunk=False).get_opcodes():
+        if tag in ("replace", "insert") and j2 > j1:
+            ranges.append((j1 + 1, j2))
+        elif tag == "delete" and new:
+            line = min(max(1, j1), len(new))
+            ranges.append((line, line))
+    return ranges
+
+
+def _scopes(content: str) -> List[Tuple[int, int, str]]:
+    """(start, end, label) of every def/class (innermost found by the smallest span)."""
+    try:
+        tree = ast.parse(content)
+    except (SyntaxError, ValueError):
+        return []
+    scopes = []
+    for node in ast.walk(tree):
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+            start = min([node.lineno] + [d.lineno for d in node.decorator_list])
+            kind = "class" if isinstance(node, ast.ClassDef) else "def"
+            scopes.append((start, node.end_lineno or node.lineno, f"{kind} {node.name}"))
+    return scopes
+
+
+def build_units(content: str, ranges: Iterable[Tuple[int, int]], python: bool = True,
+                context_lines: int = CONTEXT_LINES, max_function_lines: int = MAX_FUNCTION_LINES) -> List[ReviewUnit]:
+    """Groups changed ranges by enclosing function; overlapping windows merge into one unit."""
+    lines = content.splitlines()
+    scopes = _scopes(content) if python else []
+    windows: List[Tuple[int, int, str, List[int]]] = []
+    for first, last in sorted(ranges):
+        enclosing = [s for s in scopes if s[0] <= first and last <= s[1] and s[1] - s[0] < max_function_lines]
+        if enclosing:
+            start, end, scope = min(enclosing, key=lambda s: s[1] - s[0])
+        else:
+            start, end, scope = max(1, first - context_lines), min(len(lines), last + context_lines), ""
+        changed = list(range(first, last + 1))
+        if windows and start <= windows[-1][1] + 1:
+            p_start, p_end, p_scope, p_changed = windows[-1]
+            windows[-1] = (min(p_start, start), max(p_end, end), p_scope if p_scope == scope else "",
+                           p_changed + changed)
+        else:
+            windows.append((start, end, scope, changed))
+    return [ReviewUnit(start, end, sorted(set(changed)), scope, "\n".join(lines[start - 1:end]))
+            for start, end, scope, changed in windows if end >= start]
+
+
+def _git_head(path: str) -> Optional[List[str]]:
+    folder, name = os.path.split(os.path.abspath(path))
+    try:
+        shown = subprocess.run(["git", "show", f"HEAD:./{name}"], cwd=folder, capture_output=True, timeout=10)
+    except (OSError, subprocess.SubprocessError):
+        return None
+    if shown.returncode != 0:
+        return None
+    return shown.stdout.decode("utf-8", errors="replace").splitlines()
+
+
+class DiffReviewer:
+    """
+    Usage:
+        if reviewer.due(path):
+            findings = reviewer.review(path, content, ask=lambda unit: llm(prompt(unit)))
+    `ask` returns the model verdict for one unit ("CLEAN" or a finding).
+    The baseline only advances when a review runs, so edits skipped by the rate
+    limit are covered by the next review.
+    """
+    MAX_CACHED = 1024
+
+    def __init__(self, min_interval: float = MIN_INTERVAL, context_lines: int = CONTEXT_LINES,
+                 max_cached: int = MAX_CACHED, use_git: bool = True):
+        self.min_interval = min_interval
+        self.context_lines = context_lines
+        self.max_cached = max_cached
+        self.use_git = use_git
+        self._baseline: Dict[str, List[str]] = {}  # path -> last analysed lines
+        self._last_run: Dict[str, float] = {}
+        self._verdicts: "OrderedDict[str, Optional[str]]" = OrderedDict()  # unit hash -> finding / None
+        self._lock = threading.Lock()
+        self.stats = {"reviews": 0, "units": 0, "cached": 0, "skipped": 0, "lines_sent": 0}
+
+    def due(self, path: str) -> bool:
+        """False while the file is inside its rate-limit window."""
+        with self._lock:
+            last = self._last_run.get(os.path.abspath(path))
+            if last is not None and time.monotonic() - last < self.min_interval:
+                self.stats["skipped"] += 1
+                return False
+            return True
+
+    def units(self, path: str, content: str, extra_lines: Iterable[int] = (),
+              notes: Optional[Dict[int, List[str]]] = None, focus: Optional[Iterable[int]] = None) -> List[ReviewUnit]:
+        """Review units for the changes since the last analysed version (+ `extra_lines`).
+        With `focus`, only units containing one of those lines are kept."""
+        path = os.path.abspath(path)
+        with self._lock:
+            baseline = self._baseline.get(path)
+        if baseline is None:
+            baseline = (_git_head(path) if self.use_git else None) or []
+        new = content.splitlines()
+        ranges = changed_ranges(baseline, new) + [(n, n) for n in extra_lines if 1 <= n <= len(new)]
+        if focus is not None:
+            # Big rewrites (or a file seen for the first time) shrink to the focus lines inside them
+            focus = set(focus)
+            ranges = [r if r[1] - r[0] < MAX_FUNCTION_LINES else (n, n)
+                      for r in ranges for n in sorted(focus) if r[0] <= n <= r[1]]
+        units = build_units(content, set(ranges), path.endswith(".py"), self.context_lines)
+        for unit in units:
+            for line, messages in (notes or {}).items():
+                if unit.start <= line <= unit.end:
+                    unit.notes.extend(messages)
+        return units
+
+    def review(self, path: str, content: str, ask: Callable[[ReviewUnit], Optional[str]],
+               extra_lines: Iterable[int] = (), notes: Optional[Dict[int, List[str]]] = None,
+               focus: Optional[Iterable[int]] = None) -> List[str]:
+        """Findings for the changed units; cached verdicts are reused, CLEAN ones dropped.
+        If `ask` raises, nothing is cached for that unit and the baseline stays put."""
+        path = os.path.abspath(path)
+        findings = []
+        for unit in self.units(path, content, extra_lines, notes, focus):
+            key = unit.hash
+            with self._lock:
+                hit = key in self._verdicts
+                verdict = self._verdicts.get(key)
+                if hit:
+                    self._verdicts.move_to_end(key)
+                    self.stats["cached"] += 1
+            if not hit:
+                verdict = ask(unit)
+                if verdict is not None and CLEAN in verdict.upper():
+                    verdict = None
+                with self._lock:
+                    self.stats["units"] += 1
+                    self.stats["lines_sent"] += unit.end - unit.start + 1
+                    self._verdicts[key] = verdict
+                    while len(self._verdicts) > self.max_cached:
+                        self._verdicts.popitem(last=False)
+            if verdict:
+                findings.append(verdict)
+        with self._lock:
+            self._baseline[path] = content.splitlines()
+            self._last_run[path] = time.monotonic()
+            self.stats["reviews"] += 1
+        return findings
+
+    def remember(self, path: str, content: str):
+        """Makes `content` the baseline without a review (e.g. the checker found nothing)."""
+        with self._lock:
+            self._baseline[os.path.abspath(path)] = content.splitlines()
+
+    def forget(self, path: str):
+        with self._lock:
+            self._baseline.pop(os.path.abspath(path), None)
+            self._last_run.pop(os.path.abspath(path), None)
@@ -0,0 +1,190 @@
+"""
+🧬 LOCAL EMBEDDINGS - Shared embedding model + ANN index
+Modelo local carregado uma única vez por processo e índice vetorial leve.
+"""
+
+import hashlib
+import logging
+import math
+import re
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+MODEL_NAME = "all-MiniLM-L6-v2"  # Same model used by CodexVectorStore (384 dim)
+EMBEDDING_DIM = 384
+QUERY_CACHE_SIZE = 256  # Embeddings of repeated texts kept per embedder
+
+_TOKEN_RE = re.compile(r"[a-zA-Z0-9_]+")
+_EMPTY_FILL = 1e-6  # Component value of the embedding of a text without features
+
+
+class LocalEmbedder:
+    """
+    Wraps SentenceTransformers so every component shares ONE loaded model.
+    If the model is not installed, falls back to a hashed character-trigram
+    embedding (zero cost, offline) so recall still tolerates word variations
+    like "deploy" vs "deployment".
+    """
+
+    def __init__(self, model_name: str = MODEL_NAME):
+        self.model_name = model_name
+        self._model = None
+        self._lock = threading.Lock()
+        self.backend = None  # "sentence-transformers" | "hashing"
+        self._cache: "OrderedDict[str, Tuple[float, ...]]" = OrderedDict()
+        self._cache_lock = threading.Lock()
+
+    def load(self):
+        """Loads the model (idempotent); resolves `backend`."""
+        if self.backend is not None:
+            return
+        with self._lock:
+            if self.backend is not None:
+                return
+            try:
+                from sentence_transformers import SentenceTransformer
+                self._model = SentenceTransformer(self.model_name)
+                self.backend = "sentence-transformers"
+                logger.info(f"🧬 Local embeddings loaded ({self.model_name})")
+            except Exception as e:
+                logger.warning(f"🧬 sentence-transformers unavailable, using hashing embeddings: {e}")
+                self.backend = "hashing"
+
+    def embed(self, texts: Sequence[str]) -> List[List[float]]:
+        """Embeds a batch of texts into L2-normalized vectors."""
+        self.load()
+        if not texts:
+            return []
+        if self.backend == "sentence-transformers":
+            vectors = self._model.encode(list(texts), normalize_embeddings=True)
+            return [v.tolist() for v in vectors]
+        return [_hash_embed(t) for t in texts]
+
+    def embed_one(self, text: str) -> List[float]:
+        # Repeated queries (same mission, same tags) skip the model entirely
+        with self._cache_lock:
+            cached = self._cache.get(text)
+            if cached is not None:
+                self._cache.move_to_end(text)
+                return list(cached)
+        vector = tuple(self.embed([text])[0])
+        with self._cache_lock:
+            self._cache[text] = vector
+            while len(self._cache) > QUERY_CACHE_SIZE:
+                self._cache.popitem(last=False)
+        return list(vector)
+
+
+def _hash_embed(text: str, dim: int = EMBEDDING_DIM) -> List[float]:
+    """Feature-hashing embedding over words and character trigrams."""
+    vec = [0.0] * dim
+    for word in _TOKEN_RE.findall(text.lower()):
+        features = [f"w:{word}"]
+        padded = f"#{word}#"
+        features.extend(f"c:{padded[i:i + 3]}" for i in range(len(padded) - 2))
+        for feat in features:
+            digest = hashlib.md5(feat.encode("utf-8")).digest()
+            bucket = int.from_bytes(digest[:4], "little") % dim
+            vec[bucket] += 1.0 if digest[4] & 1 else -1.0
+    norm = math.sqrt(sum(v * v for v in vec))
+    if norm == 0:
+        # No features (empty/symbol-only text): an all-zero vector gives NaN under cosine distance
+        return [_EMPTY_FILL] * dim
+    return [v / norm for v in vec]
+
+
+_shared_embedder: Optional[LocalEmbedder] = None
+_shared_lock = threading.Lock()
+
+
+def get_embedder() -> LocalEmbedder:
+    """Returns the process-wide embedder (model loads on first embed)."""
+    global _shared_embedder
+    if _shared_embedder is None:
+        with _shared_lock:
+            if _shared_embedder is None:
+                _shared_embedder = LocalEmbedder()
+    return _shared_embedder
+
+
+class VectorIndex:
+    """
+    Incremental cosine-similarity index.
+    Uses HNSW (hnswlib, shipped with chromadb) when available, otherwise an
+    exact numpy scan, otherwise pure Python. Vectors must be L2-normalized.
+    """
+
+    def __init__(self, dim: int = EMBEDDING_DIM, initial_capacity: int = 1024):
+        self.dim = dim
+        self._keys: List[str] = []
+        self._key_to_label: Dict[str, int] = {}
+        self._vectors: List[List[float]] = []
+        self._hnsw = None
+        self._np = None
+        self._matrix = None  # numpy cache, rebuilt lazily
+
+        try:
+            import numpy as np
+            self._np = np
+        except ImportError:
+            pass
+
+        if self._np is not None:
+            try:
+                import hnswlib
+                self._hnsw = hnswlib.Index(space="cosine", dim=dim)
+                self._hnsw.init_index(max_elements=initial_capacity, ef_construction=100, M=16)
+                self._hnsw.set_ef(64)
+            except Exception:
+                self._hnsw = None
+
+    @property
+    def backend(self) -> str:
+        if self._hnsw is not None:
+            return "hnsw"
+        return "numpy" if self._np is not None else "python"
+
+    def __len__(self):
+        return len(self._keys)
+
+    def __contains__(self, key: str):
+        return key in self._key_to_label
+
+    def add(self, key: str, vector: Sequence[float]):
+        """Adds (or ignores an already indexed) key."""
+        if key in self._key_to_label or len(vector) != self.dim:
+            return
+        label = len(self._keys)
+        self._keys.append(key)
+        self._key_to_label[key] = label
+        self._vectors.append(list(vector))
+        self._matrix = None
+
+        if self._hnsw is not None:
+            if label >= self._hnsw.get_max_elements():
+                self._hnsw.resize_index(self._hnsw.get_max_elements() * 2)
+            self._hnsw.add_items(self._np.asarray([vector], dtype="float32"), [label])
+
+    def search(self, vector: Sequence[float], k: int = 10) -> List[Tuple[str, float]]:
+        """Returns [(key, cosine_similarity)] sorted by similarity."""
+        if not self._keys:
+            return []
+        k = min(k, len(self._keys))
+
+        if self._hnsw is not None:
+            labels, distances = self._hnsw.knn_query(self._np.asarray([vector], dtype="float32"), k=k)
+            return [(self._keys[int(l)], 1.0 - float(d)) for l, d in zip(labels[0], distances[0])]
+
+        if self._np is not None:
+            if self._matrix is None:
+                self._matrix = self._np.asarray(self._vectors, dtype="float32")
+            sims = self._matrix @ self._np.asarray(vector, dtype="float32")
+            top = self._np.argsort(-sims)[:k]
+            return [(self._keys[int(i)], float(sims[i])) for i in top]
+
+        scored = [(key, sum(a * b for a, b in zip(vec, vector))) for key, vec in zip(self._keys, self._vectors)]
+        scored.sort(key=lambda x: x[1], reverse=True)
+        return scored[:k]
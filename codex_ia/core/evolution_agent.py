@@ -1,8 +1,10 @@
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Generator, Optional
 import os
 from pathlib import Path
 from codex_ia.core.context import ContextManager
 from codex_ia.core.llm_client import GeminiClient
+from codex_ia.core.complexity import ComplexityAnalyzer
+from codex_ia.core.night_shift import NightShift, scan_project
 
 from codex_ia.core.squad import SquadLeader
 
@@ -21,85 +23,42 @@ class EvolutionAgent:
     def scan_for_improvements(self) -> List[Dict[str, Any]]:
         """
         Scans the codebase for potential optimizations.
-        Returns a list of 'Improvement Opportunities'.
+        Returns a list of 'Improvement Opportunities', highest priority first.
+        Per-function complexity/nesting hotspots and duplicate clusters come from
+        the cached ComplexityAnalyzer (one read per changed file); git churn and
+        last-run failing tests raise the priority.
         """
-        opportunities = []
-        all_files = self.context_mgr.list_files()
-        
-        for rel_path in all_files:
-            file_path = self.root / rel_path
-            
-            # 1. Check for TODOs/FIXMEs
-            if self._has_todo_comments(file_path):
-                opportunities.append({
-                    "type": "TECH_DEBT",
-                    "file": rel_path,
-                    "description": "Found TODO/FIXME comments requiring attention."
-                })
-                
-            # 2. Check for complexity (Simple heuristic: file size > 300 lines)
-            try:
-                if file_path.suffix == '.py':
-                    with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-                        if len(f.readlines()) > 300:
-                             opportunities.append({
-                                "type": "COMPLEXITY",
-                                "file": rel_path,
-                                "description": "File is too large (>300 lines), consider splitting."
-                            })
-            except:
-                pass
+        return scan_project(self.root_path, self.context_mgr.list_files())
 
-        return opportunities
+    def complexity_report(self, top: int = 10) -> str:
+        """Ranked hotspots (complexity x churn) and duplicate-code clusters."""
+        return ComplexityAnalyzer(self.root_path).analyze(self.context_mgr.list_files()).summary(top)
 
-    def _has_todo_comments(self, file_path: Path) -> bool:
-        try:
-            content = file_path.read_text(encoding='utf-8', errors='ignore')
-            return "TODO" in content or "FIXME" in content
-        except:
-            return False
+    def _new_squad(self) -> SquadLeader:
+        return SquadLeader(self.root_path)
 
-    def start_night_shift(self, max_missions: int = 3, verification_cmd: str = "") -> Generator[str, None, None]:
+    def start_night_shift(self, max_missions: int = 3, verification_cmd: str = "", workers: Optional[int] = None,
+                          token_budget: Optional[int] = None, time_budget: Optional[float] = None,
+                          resume: bool = True, apply: bool = True) -> Generator[str, None, None]:
         """
         [THE NIGHT SHIFT]
-        Continuously scans and fixes issues.
+        Scans, queues the findings in the persistent job queue and lets squads
+        work through it by priority within the night's budgets (in parallel
+        only when they draft without applying, `apply=False`).
+        Interrupted shifts resume where they stopped.
         Yields log messages for the UI.
         """
         yield "🌙 Night Shift started. Scanning codebase..."
         
+        shift = NightShift(self.root_path, self._new_squad, workers=workers,
+                           token_budget=token_budget, time_budget=time_budget)
         opps = self.scan_for_improvements()
-        if not opps:
+        shift.queue.push(opps)
+        counts = shift.queue.counts()
+        if not counts.get("pending") and not counts.get("running"):
             yield "✅ No issues found. The codebase is clean. Going to sleep."
             return
 
-        yield f"🧐 Found {len(opps)} opportunities for improvement."
-        
-        missions_run = 0
-        squad = SquadLeader(self.root_path)
-        
-        for opp in opps:
-            if missions_run >= max_missions:
-                yield "🛑 Max missions reached for this shift."
-                break
-                
-            target_file = opp['file']
-            issue_type = opp['type']
-            yield f"🎯 Targeting: {target_file} ({issue_type})"
-            
-            mission = f"Fix the {issue_type} in {target_file}. {opp['description']}"
-            yield f"🚀 Dispatching Squad: '{mission}'"
-            
-            # Dispatch Squad in Autopilot
-            report = squad.assign_mission(
-                mission, 
-                apply=True, 
-                autopilot=True if verification_cmd else False, 
-                verification_cmd=verification_cmd
-            )
-            
-            yield f"📋 Squad Result: {report.get('autopilot_status', 'Done')}"
-            yield f"✅ Fix applied to {target_file}"
-            
-            missions_run += 1
-            
+        yield f"🧐 Found {len(opps)} opportunities for improvement ({counts.get('pending', 0)} queued)."
+        yield from shift.run(max_missions, verification_cmd, resume=resume, apply=apply)
         yield "☀️ Night Shift shift ended."
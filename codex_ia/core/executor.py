@@ -0,0 +1,489 @@
+"""
+⚙️ EXECUTION SERVICE - Sandboxed, pooled subprocess execution
+Um único serviço para rodar comandos: saída em streaming para ring buffers
+(cabeça + cauda, memória limitada), limites de recurso via prlimit no processo
+filho (CPU; memória sob demanda), limite de concorrência, cancelamento por
+grupo de processos e um pool de interpretadores Python "quentes" para
+comandos curtos repetidos (`python -m compileall`, `python -m pytest -q`).
+"""
+
+import codecs
+import json
+import logging
+import os
+import shlex
+import signal
+import subprocess
+import sys
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Union
+
+try:
+    import resource  # POSIX only
+except ImportError:
+    resource = None
+
+logger = logging.getLogger(__name__)
+
+Command = Union[str, List[str]]
+_SHELL_CHARS = set("|&;<>()$`*?~{}[]")
+
+
+@dataclass
+class ResourceLimits:
+    """
+    Per-process limits set on the child by pid with prlimit (Linux; ignored elsewhere).
+    No preexec_fn: it is unsafe when the parent has threads, and this service runs
+    from thread pools. `memory_mb` is opt-in and caps the data segment (RLIMIT_DATA:
+    heap and private writable mappings), not the address space, so runtimes that
+    reserve large virtual ranges (JVM, Go, node) still start. Process counts are
+    not limited: RLIMIT_NPROC counts every process of the user, not the child's.
+    """
+    cpu_seconds: Optional[int] = 120
+    memory_mb: Optional[int] = None
+
+    def apply_to(self, pid: int):
+        if resource is None or not hasattr(resource, "prlimit"):
+            return
+        wanted = []
+        if self.cpu_seconds:
+            wanted.append((resource.RLIMIT_CPU, self.cpu_seconds, self.cpu_seconds + 5))
+        if self.memory_mb:
+            limit = self.memory_mb * 1024 * 1024
+            wanted.append((resource.RLIMIT_DATA, limit, limit))
+        for kind, soft, hard in wanted:
+            try:
+                _, current_hard = resource.prlimit(pid, kind)
+                if current_hard != resource.RLIM_INFINITY:
+                    soft, hard = min(soft, current_hard), min(hard, current_hard)
+                resource.prlimit(pid, kind, (soft, hard))
+            except (OSError, ValueError) as e:  # Child already gone, or not ours to limit
+                logger.debug(f"prlimit({pid}) failed: {e}")
+
+
+class RingBuffer:
+    """Keeps the first `head` and last `tail` bytes of a stream; counts what was dropped."""
+
+    def __init__(self, head: int = 16 * 1024, tail: int = 64 * 1024):
+        self.head_limit = head
+        self.tail_limit = tail
+        self._head = bytearray()
+        self._tail: deque = deque()
+        self._tail_size = 0
+        self.total = 0
+
+    def write(self, chunk: bytes):
+        self.total += len(chunk)
+        room = self.head_limit - len(self._head)
+        if room > 0:
+            self._head += chunk[:room]
+            chunk = chunk[room:]
+        if not chunk:
+            return
+        self._tail.append(chunk)
+        self._tail_size += len(chunk)
+        while self._tail_size - len(self._tail[0]) >= self.tail_limit:
+            self._tail_size -= len(self._tail.popleft())
+
+    @property
+    def dropped(self) -> int:
+        return max(self.total - self.head_limit - self.tail_limit, 0)
+
+    def getvalue(self) -> str:
+        tail = b"".join(self._tail)
+        if len(tail) > self.tail_limit:
+            tail = tail[-self.tail_limit:]
+        text = self._head.decode("utf-8", errors="replace")
+        if self.dropped:
+            text += f"\n... [{self.dropped} bytes omitidos] ...\n"
+        return text + tail.decode("utf-8", errors="replace")
+
+
+def clip(text: str, limit: int) -> str:
+    """Head + tail of `text` within `limit` chars (errors usually sit at the end)."""
+    if len(text) <= limit:
+        return text
+    half = limit // 2
+    return f"{text[:half]}\n... [truncado] ...\n{text[-half:]}"
+
+
+@dataclass
+class ExecResult:
+    command: Command
+    returncode: int
+    stdout: str
+    stderr: str
+    duration: float
+    timed_out: bool = False
+    cancelled: bool = False
+    warm: bool = False  # Served by a pre-started interpreter
+    dropped_bytes: int = 0
+    error: str = ""  # Set when the command could not be started
+
+    @property
+    def success(self) -> bool:
+        return self.returncode == 0 and not (self.timed_out or self.cancelled or self.error)
+
+    @property
+    def output(self) -> str:
+        return self.stdout + self.stderr
+
+
+class ExecutionHandle:
+    """A running command: stream readers, timeout watchdog and cancellation."""
+
+    def __init__(self, proc: subprocess.Popen, command: Command, timeout: Optional[float],
+                 on_output: Optional[Callable[[str, str], None]], buffer_sizes: Dict, warm: bool = False,
+                 on_done: Optional[Callable[["ExecutionHandle"], None]] = None):
+        self.proc = proc
+        self.command = command
+        self.warm = warm
+        self.timed_out = False
+        self.cancelled = False
+        self._on_done = on_done
+        self._start = time.perf_counter()
+        self._buffers = {"stdout": RingBuffer(**buffer_sizes), "stderr": RingBuffer(**buffer_sizes)}
+        self._readers = [
+            threading.Thread(target=self._pump, args=(name, getattr(proc, name), on_output), daemon=True)
+            for name in ("stdout", "stderr")
+        ]
+        for reader in self._readers:
+            reader.start()
+        self._done = threading.Event()
+        self._result: Optional[ExecResult] = None
+        threading.Thread(target=self._watch, args=(timeout,), daemon=True).start()
+
+    def _pump(self, name, stream, on_output):
+        decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        buffer = self._buffers[name]
+        for chunk in iter(lambda: stream.read1(8192), b""):
+            buffer.write(chunk)
+            if on_output:
+                try:
+                    on_output(name, decoder.decode(chunk))
+                except Exception as e:
+                    logger.debug(f"on_output callback failed: {e}")
+        stream.close()
+
+    def _kill(self):
+        try:
+            if os.name == "posix":
+                os.killpg(self.proc.pid, signal.SIGKILL)
+            else:
+                self.proc.kill()
+        except (ProcessLookupError, PermissionError, OSError):
+            pass
+
+    def _watch(self, timeout):
+        try:
+            self.proc.wait(timeout=timeout)
+        except subprocess.TimeoutExpired:
+            self.timed_out = True
+            self._kill()
+            self.proc.wait()
+        for reader in self._readers:
+            reader.join()
+        self._result = ExecResult(
+            command=self.command,
+            returncode=self.proc.returncode if not self.timed_out else -1,
+            stdout=self._buffers["stdout"].getvalue(),
+            stderr=self._buffers["stderr"].getvalue(),
+            duration=time.perf_counter() - self._start,
+            timed_out=self.timed_out,
+            cancelled=self.cancelled,
+            warm=self.warm,
+            dropped_bytes=self._buffers["stdout"].dropped + self._buffers["stderr"].dropped,
+        )
+        self._done.set()
+        if self._on_done:
+            self._on_done(self)
+
+    def cancel(self):
+        """Kills the whole process group (children included)."""
+        if not self._done.is_set():
+            self.cancelled = True
+            self._kill()
+
+    def done(self) -> bool:
+        return self._done.is_set()
+
+    def result(self, timeout: Optional[float] = None) -> Optional[ExecResult]:
+        """Blocks until the command finishes (None if `timeout` elapses first)."""
+        self._done.wait(timeout)
+        return self._result
+
+
+# Runs inside a pre-started interpreter: preloads modules, then waits for one job on stdin
+_WORKER_BOOTSTRAP = r'''
+import sys, os, json, runpy, traceback
+for _m in sys.argv[1:]:
+    try:
+        __import__(_m)
+    except Exception:
+        pass
+_line = sys.stdin.readline()
+if not _line:
+    os._exit(0)
+_job = json.loads(_line)
+os.chdir(_job["cwd"])
+_code = 0
+try:
+    if _job["kind"] == "module":
+        sys.argv = [_job["target"]] + _job["args"]
+        runpy.run_module(_job["target"], run_name="__main__", alter_sys=True)
+    elif _job["kind"] == "script":
+        sys.argv = [_job["target"]] + _job["args"]
+        sys.path[0] = os.path.dirname(os.path.abspath(_job["target"]))
+        runpy.run_path(_job["target"], run_name="__main__")
+    else:
+        sys.argv = ["-c"] + _job["args"]
+        exec(compile(_job["target"], "<string>", "exec"), {"__name__": "__main__"})
+except SystemExit as _e:
+    if _e.code is None:
+        _code = 0
+    elif isinstance(_e.code, int):
+        _code = _e.code
+    else:
+        print(_e.code, file=sys.stderr)
+        _code = 1
+except BaseException:
+    traceback.print_exc()
+    _code = 1
+sys.stdout.flush()
+sys.stderr.flush()
+os._exit(_code)
+'''
+
+
+class WarmPythonPool:
+    """
+    Pre-started, single-use Python interpreters. Each worker has already paid
+    interpreter startup + PRELOAD imports; it runs exactly one job and exits
+    (no state leaks between jobs) while a replacement warms up in background.
+    """
+    PRELOAD = ("compileall", "py_compile", "unittest", "pytest")
+
+    def __init__(self, size: int = 2, python: str = sys.executable, popen_kwargs: Optional[Callable] = None,
+                 on_spawn: Optional[Callable[[subprocess.Popen], None]] = None):
+        self.size = size
+        self.python = python
+        self._popen_kwargs = popen_kwargs or (lambda: {})
+        self._on_spawn = on_spawn
+        self._idle: deque = deque()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _spawn(self) -> subprocess.Popen:
+        proc = subprocess.Popen(
+            [self.python, "-c", _WORKER_BOOTSTRAP, *self.PRELOAD],
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+            **self._popen_kwargs()
+        )
+        if self._on_spawn:
+            self._on_spawn(proc)
+        return proc
+
+    def _refill(self):
+        while True:
+            with self._lock:
+                if len(self._idle) >= self.size:
+                    return
+            proc = self._spawn()
+            with self._lock:
+                self._idle.append(proc)
+
+    def warm(self):
+        """Starts topping the pool up in the background."""
+        threading.Thread(target=self._refill, daemon=True).start()
+
+    def acquire(self) -> Optional[subprocess.Popen]:
+        """An idle warm worker, or None (caller then spawns a cold process)."""
+        with self._lock:
+            while self._idle:
+                proc = self._idle.popleft()
+                if proc.poll() is None:
+                    self.hits += 1
+                    break
+            else:
+                proc = None
+                self.misses += 1
+        self.warm()
+        return proc
+
+    def shutdown(self):
+        with self._lock:
+            idle, self._idle = list(self._idle), deque()
+        for proc in idle:
+            proc.kill()
+            proc.wait()
+
+
+def _has_shell_syntax(command: str) -> bool:
+    """True if `command` uses pipes, redirection, globs, etc. outside quotes."""
+    quote = None
+    escaped = False
+    for ch in command:
+        if escaped:
+            escaped = False
+        elif ch == "\\" and quote != "'":
+            escaped = True
+        elif quote:
+            if ch == quote:
+                quote = None
+            elif quote == '"' and ch in "$`":
+                return True  # Expansion inside double quotes
+        elif ch in "'\"":
+            quote = ch
+        elif ch in _SHELL_CHARS:
+            return True
+    return False
+
+
+def parse_python_job(command: Command, cwd: str) -> Optional[Dict]:
+    """
+    Recognizes `python -m mod args`, `python -c code args` and `python script.py args`
+    (no shell syntax) so they can run in a warm worker; None otherwise.
+    """
+    if isinstance(command, str):
+        if _has_shell_syntax(command):
+            return None
+        try:
+            argv = shlex.split(command)
+        except ValueError:
+            return None
+    else:
+        argv = list(command)
+    if len(argv) < 2:
+        return None
+    exe = os.path.basename(argv[0]).lower()
+    if argv[0] != sys.executable and exe not in ("python", "python3", "python.exe"):
+        return None
+    flag, rest = argv[1], argv[2:]
+    if flag == "-m" and rest:
+        return {"kind": "module", "target": rest[0], "args": rest[1:], "cwd": cwd}
+    if flag == "-c" and rest:
+        return {"kind": "code", "target": rest[0], "args": rest[1:], "cwd": cwd}
+    if flag.endswith(".py"):
+        return {"kind": "script", "target": flag, "args": rest, "cwd": cwd}
+    return None
+
+
+class ExecutionService:
+    """
+    Runs commands with a concurrency cap (semaphore), rlimits, timeouts,
+    streaming ring-buffer capture and cancellation. Short Python commands are
+    routed to the warm pool when `warm_pool_size` > 0.
+    """
+
+    def __init__(self, max_concurrency: int = 4, default_timeout: float = 60,
+                 limits: Optional[ResourceLimits] = None, warm_pool_size: int = 2,
+                 buffer_sizes: Optional[Dict] = None):
+        self.default_timeout = default_timeout
+        self.limits = limits if limits is not None else ResourceLimits()
+        self.buffer_sizes = buffer_sizes or {"head": 16 * 1024, "tail": 64 * 1024}
+        self._slots = threading.BoundedSemaphore(max_concurrency)
+        self._active: List[ExecutionHandle] = []
+        self._active_lock = threading.Lock()
+        self.pool = WarmPythonPool(warm_pool_size, popen_kwargs=self._popen_kwargs,
+                                   on_spawn=lambda proc: self.limits.apply_to(proc.pid)) if warm_pool_size > 0 else None
+
+    @staticmethod
+    def _popen_kwargs() -> Dict:
+        if os.name == "posix":
+            return {"start_new_session": True}
+        return {"creationflags": getattr(subprocess, "CREATE_NEW_PROCESS_GROUP", 0)}
+
+    def _release(self, handle: ExecutionHandle):
+        with self._active_lock:
+            if handle in self._active:
+                self._active.remove(handle)
+        self._slots.release()
+
+    def submit(self, command: Command, cwd: str = ".", timeout: Optional[float] = None,
+               env: Optional[Dict[str, str]] = None, limits: Optional[ResourceLimits] = None,
+               on_output: Optional[Callable[[str, str], None]] = None, warm: bool = True) -> ExecutionHandle:
+        """Starts `command` (blocks only while all slots are busy) and returns its handle."""
+        cwd = os.path.abspath(cwd)
+        timeout = self.default_timeout if timeout is None else timeout
+        self._slots.acquire()
+        try:
+            job = parse_python_job(command, cwd) if (warm and self.pool and limits is None and not env) else None
+            proc = self.pool.acquire() if job else None
+            is_warm = proc is not None
+            if is_warm:
+                proc.stdin.write((json.dumps(job) + "\n").encode("utf-8"))
+                proc.stdin.close()
+            else:
+                full_env = dict(os.environ, **env) if env else None
+                proc = subprocess.Popen(
+                    command, cwd=cwd, env=full_env, shell=isinstance(command, str),
+                    stdin=subprocess.DEVNULL, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                    **self._popen_kwargs()
+                )
+                (limits or self.limits).apply_to(proc.pid)
+        except Exception:
+            self._slots.release()
+            raise
+        handle = ExecutionHandle(proc, command, timeout, on_output, self.buffer_sizes,
+                                 warm=is_warm,
+                                 on_done=self._release)
+        with self._active_lock:
+            if not handle.done():
+                self._active.append(handle)
+        return handle
+
+    def run(self, command: Command, cwd: str = ".", timeout: Optional[float] = None, **kwargs) -> ExecResult:
+        """Blocking run; never raises for command failures (see ExecResult)."""
+        try:
+            return self.submit(command, cwd=cwd, timeout=timeout, **kwargs).result()
+        except Exception as e:
+            return ExecResult(command, -1, "", str(e), 0.0, error=str(e))
+
+    def cancel_all(self):
+        with self._active_lock:
+            active = list(self._active)
+        for handle in active:
+            handle.cancel()
+
+    def active_count(self) -> int:
+        with self._active_lock:
+            return len(self._active)
+
+    def shutdown(self):
+        self.cancel_all()
+        if self.pool:
+            self.pool.shutdown()
+
+
+_executor: Optional[ExecutionService] = None
+_executor_lock = threading.Lock()
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.getenv(name, default))
+    except ValueError:
+        return default
+
+
+def get_executor() -> ExecutionService:
+    """
+    Process-wide service. Tunables: CODEX_EXEC_CONCURRENCY, CODEX_EXEC_CPU_SECONDS,
+    CODEX_EXEC_MEMORY_MB (0/unset = no memory cap), CODEX_WARM_POOL (0 disables it).
+    """
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ExecutionService(
+                max_concurrency=_env_int("CODEX_EXEC_CONCURRENCY", 4),
+                limits=ResourceLimits(
+                    cpu_seconds=_env_int("CODEX_EXEC_CPU_SECONDS", 120) or None,
+                    memory_mb=_env_int("CODEX_EXEC_MEMORY_MB", 0) or None,
+                ),
+                warm_pool_size=_env_int("CODEX_WARM_POOL", 2),
+            )
+        return _executor
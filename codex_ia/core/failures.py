@@ -0,0 +1,219 @@
+"""
+🧩 FAILURES - Modelo compacto e deduplicado de falhas de teste
+Converte resultados estruturados (plugin pytest_stream) ou tracebacks em texto
+(unittest, Django, scripts) em falhas únicas por assinatura, guardando só os
+frames do projeto. Para o prompt, inclui apenas a janela mínima de código em
+volta de cada frame que falhou.
+"""
+
+import hashlib
+import os
+import re
+from dataclasses import asdict, dataclass, field
+from typing import Dict, Iterable, List, Optional
+
+from codex_ia.core.file_cache import get_file_cache
+
+MAX_FRAMES = 4  # Innermost relevant frames kept per failure
+WINDOW_RADIUS = 3  # Source lines shown above/below a failing line
+MAX_MESSAGE = 500
+
+_TRACEBACK_HEAD = "Traceback (most recent call last):"
+_FRAME_RE = re.compile(r'^\s*File "([^"]+)", line (\d+)(?:, in (.+))?$')
+_EXC_RE = re.compile(r'^([A-Za-z_][\w.]*)(?::\s?(.*))?$')
+# pytest long/short style: "path/to/file.py:12: AssertionError" after "E   ..." lines
+_PYTEST_LOC_RE = re.compile(r'^([^\s:][^:]*\.py):(\d+):(?: in (\S+)| (\w[\w.]*))$')
+_VOLATILE_RE = re.compile(r"0x[0-9a-fA-F]+|\d+(?:\.\d+)?|'[^']*'|\"[^\"]*\"")
+
+
+@dataclass
+class Frame:
+    path: str  # Relative to the project root when inside it
+    line: int
+    function: str = ""
+    code: str = ""
+
+
+@dataclass
+class Failure:
+    exc_type: str
+    message: str
+    frames: List[Frame] = field(default_factory=list)  # Outermost first; last = where it raised
+    tests: List[str] = field(default_factory=list)
+    count: int = 1
+
+    @property
+    def location(self) -> Optional[Frame]:
+        return self.frames[-1] if self.frames else None
+
+    @property
+    def signature(self) -> str:
+        """Same exception type, message shape and raising line = same failure."""
+        loc = self.location
+        where = f"{loc.path}:{loc.line}:{loc.function}" if loc else ""
+        shape = _VOLATILE_RE.sub("#", self.message.splitlines()[0] if self.message else "")
+        return hashlib.sha1(f"{self.exc_type}|{shape}|{where}".encode("utf-8")).hexdigest()[:12]
+
+    @property
+    def root_cause(self) -> str:
+        """Coarser than `signature`: exception type + raising frame only (messages may differ)."""
+        loc = self.location
+        if loc:
+            where = f"{loc.path}:{loc.line}:{loc.function}"
+        else:  # No frame to anchor it: fall back to the message shape
+            where = _VOLATILE_RE.sub("#", self.message.splitlines()[0] if self.message else "")
+        return hashlib.sha1(f"{self.exc_type}|{where}".encode("utf-8")).hexdigest()[:12]
+
+    def to_error(self, root: str = ".") -> Dict:
+        """AutoDebugger's error dict: 'file' is absolute so fixes land in the right place."""
+        loc = self.location
+        return {
+            "file": os.path.join(os.path.abspath(root), loc.path) if loc else "",
+            "line": loc.line if loc else 0,
+            "type": self.exc_type,
+            "message": f"{self.exc_type}: {self.message}" if self.message else self.exc_type,
+            "frames": [asdict(f) for f in self.frames],
+            "tests": list(self.tests),
+            "count": self.count,
+            "signature": self.signature,
+            "root_cause": self.root_cause,
+        }
+
+    @classmethod
+    def from_error(cls, error: Dict) -> "Failure":
+        message = error.get("message", "")
+        prefix = f"{error.get('type', '')}: "
+        frames = [Frame(**f) for f in error.get("frames") or []]
+        if not frames and error.get("file"):
+            frames = [Frame(error["file"], int(error.get("line") or 0))]
+        return cls(error.get("type", "Error"), message[len(prefix):] if message.startswith(prefix) else message,
+                   frames, list(error.get("tests") or []), int(error.get("count") or 1))
+
+
+def _relevant(frames: List[Frame], root: Optional[str]) -> List[Frame]:
+    """Project frames only (no stdlib / site-packages / pytest internals), innermost last."""
+    def inside(frame: Frame) -> bool:
+        if "site-packages" in frame.path or frame.path.startswith("<"):
+            return False
+        return not os.path.isabs(frame.path) if root else True
+
+    kept = [f for f in frames if inside(f)]
+    return (kept or frames[-1:])[-MAX_FRAMES:]
+
+
+def _relpath(path: str, root: Optional[str]) -> str:
+    if not root or path.startswith("<"):
+        return path
+    root = os.path.abspath(root)
+    absolute = os.path.abspath(os.path.join(root, path))
+    if absolute == root or absolute.startswith(root + os.sep):
+        return os.path.relpath(absolute, root).replace(os.sep, "/")
+    return absolute
+
+
+def parse_text(output: str, root: Optional[str] = None, test: str = "") -> List[Failure]:
+    """Failures from Python tracebacks (any runner) or pytest's long/short format."""
+    lines = output.splitlines()
+    failures = []
+    i = 0
+    while i < len(lines):
+        if lines[i].strip() == _TRACEBACK_HEAD:
+            frames, i = [], i + 1
+            while i < len(lines):
+                match = _FRAME_RE.match(lines[i])
+                if match:
+                    code = lines[i + 1].strip() if i + 1 < len(lines) and not _FRAME_RE.match(lines[i + 1]) \
+                        and lines[i + 1].startswith("    ") else ""
+                    frames.append(Frame(_relpath(match.group(1), root), int(match.group(2)),
+                                        (match.group(3) or "").strip(), code))
+                    i += 2 if code else 1
+                elif lines[i].startswith((" ", "\t")) or not lines[i].strip():
+                    i += 1  # Code lines, carets, blank lines
+                else:
+                    break
+            exc = _EXC_RE.match(lines[i].strip()) if i < len(lines) else None
+            if exc:
+                failures.append(Failure(exc.group(1).rsplit(".", 1)[-1], (exc.group(2) or "")[:MAX_MESSAGE],
+                                        _relevant(frames, root), [test] if test else []))
+        else:
+            match = _PYTEST_LOC_RE.match(lines[i].strip())
+            if match and match.group(4):  # "file.py:12: ExcType" closes a pytest section
+                message = [l[1:].strip() for l in lines[max(0, i - 30):i] if l.startswith("E ")]
+                frame = Frame(_relpath(match.group(1), root), int(match.group(2)))
+                failures.append(Failure(match.group(4).rsplit(".", 1)[-1], "\n".join(message)[:MAX_MESSAGE],
+                                        [frame], [test] if test else []))
+        i += 1
+    return failures
+
+
+def from_results(results: Iterable, root: Optional[str] = None) -> List[Failure]:
+    """Failures from structured test results (shard_runner.CaseResult or dicts)."""
+    failures = []
+    for result in results:
+        get = result.get if isinstance(result, dict) else (lambda k, d=None, r=result: getattr(r, k, d))
+        if get("outcome") not in ("failed", "error"):
+            continue
+        nodeid = get("nodeid", "")
+        frames = [Frame(_relpath(f["path"], root), int(f["line"]), f.get("function", ""), f.get("code", ""))
+                  for f in get("frames") or []]
+        if get("exc_type"):
+            failures.append(Failure(get("exc_type"), (get("message") or "")[:MAX_MESSAGE],
+                                    _relevant(frames, root), [nodeid]))
+            continue
+        parsed = parse_text(get("longrepr") or "", root, nodeid)
+        if parsed:
+            failures.append(parsed[-1])  # The exception that actually ended the test
+        else:
+            text = (get("longrepr") or "").strip().splitlines()
+            failures.append(Failure("TestError", (text[-1] if text else get("outcome"))[:MAX_MESSAGE],
+                                    [], [nodeid]))
+    return dedupe(failures)
+
+
+def dedupe(failures: Iterable[Failure]) -> List[Failure]:
+    """One Failure per signature, with every affected test listed."""
+    unique: Dict[str, Failure] = {}
+    for failure in failures:
+        seen = unique.get(failure.signature)
+        if seen is None:
+            unique[failure.signature] = failure
+            continue
+        seen.count += failure.count
+        seen.tests.extend(t for t in failure.tests if t not in seen.tests)
+    return list(unique.values())
+
+
+def source_window(root: str, frame: Frame, radius: int = WINDOW_RADIUS) -> str:
+    """Numbered lines around `frame.line`, the failing one marked with '>'."""
+    path = frame.path if os.path.isabs(frame.path) else os.path.join(root, frame.path)
+    try:
+        lines, _ = get_file_cache().read_range(path, max(1, frame.line - radius), 2 * radius + 1)
+    except (OSError, ValueError):
+        return ""
+    start = max(1, frame.line - radius)
+    return "\n".join(
+        f"{'>' if n == frame.line else ' '} {n:4d} | {text.rstrip()}" for n, text in enumerate(lines, start)
+    )
+
+
+def render_failure(failure: Failure, root: str, max_windows: int = 2, radius: int = WINDOW_RADIUS) -> str:
+    """Compact prompt block: exception, frames, then code windows for the innermost frames."""
+    tests = ""
+    if failure.tests:
+        shown = ", ".join(failure.tests[:3]) + (f" (+{len(failure.tests) - 3})" if len(failure.tests) > 3 else "")
+        tests = f"\nTestes afetados ({failure.count}): {shown}"
+    parts = [f"{failure.exc_type}: {failure.message}{tests}"]
+    if failure.frames:
+        parts.append("Frames:\n" + "\n".join(
+            f"  {f.path}:{f.line} in {f.function or '?'}" + (f"  ->  {f.code}" if f.code else "")
+            for f in failure.frames))
+    shown_windows = set()
+    for frame in reversed(failure.frames):
+        if len(shown_windows) >= max_windows:
+            break
+        key = (frame.path, frame.line)
+        window = source_window(root, frame, radius) if key not in shown_windows else ""
+        if window:
+            shown_windows.add(key)
+            parts.append(f"# {frame.path}:{frame.line} in {frame.function or '?'}\n{window}")
+    return "\n\n".join(parts)
@@ -0,0 +1,137 @@
+"""
+📄 FILE CACHE - Cached, line-windowed file reads
+Arquivos pequenos ficam em cache (chave: path + mtime + tamanho); arquivos
+grandes são lidos por janela de linhas via mmap, com um índice de offsets de
+linha em cache, sem carregar o arquivo inteiro na memória.
+"""
+
+import mmap
+import os
+import threading
+from array import array
+from collections import OrderedDict
+from typing import List, Optional, Tuple
+
+MMAP_THRESHOLD = 1024 * 1024  # Files above this are read through mmap windows
+MAX_CACHED_BYTES = 32 * 1024 * 1024
+
+
+class FileCache:
+    """
+    Thread-safe LRU of decoded lines (small files) and line-offset indexes
+    (large files), both keyed on (path, mtime_ns, size) so edits invalidate them.
+    """
+
+    def __init__(self, max_bytes: int = MAX_CACHED_BYTES):
+        self.max_bytes = max_bytes
+        self._lines: "OrderedDict[str, Tuple[tuple, List[str], int]]" = OrderedDict()
+        self._offsets: "OrderedDict[str, Tuple[tuple, array]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _key(path: str) -> tuple:
+        st = os.stat(path)
+        return (st.st_mtime_ns, st.st_size)
+
+    def invalidate(self, path: str):
+        path = os.path.abspath(path)
+        with self._lock:
+            entry = self._lines.pop(path, None)
+            if entry:
+                self._bytes -= entry[2]
+            self._offsets.pop(path, None)
+
+    def clear(self):
+        with self._lock:
+            self._lines.clear()
+            self._offsets.clear()
+            self._bytes = 0
+
+    # --- Small files: whole content, decoded once ---
+
+    def get_lines(self, path: str) -> List[str]:
+        """All lines of a file (with line endings), served from cache when unchanged."""
+        path = os.path.abspath(path)
+        key = self._key(path)
+        with self._lock:
+            entry = self._lines.get(path)
+            if entry and entry[0] == key:
+                self._lines.move_to_end(path)
+                self.hits += 1
+                return entry[1]
+        with open(path, 'r', encoding='utf-8', errors='ignore') as f:
+            lines = f.readlines()
+        size = key[1]
+        with self._lock:
+            self.misses += 1
+            old = self._lines.pop(path, None)
+            if old:
+                self._bytes -= old[2]
+            if size <= self.max_bytes:
+                self._lines[path] = (key, lines, size)
+                self._bytes += size
+                while self._bytes > self.max_bytes and self._lines:
+                    _, (_, _, evicted) = self._lines.popitem(last=False)
+                    self._bytes -= evicted
+        return lines
+
+    # --- Large files: mmap + cached line offsets ---
+
+    def _line_offsets(self, path: str, key: tuple, mm) -> array:
+        with self._lock:
+            entry = self._offsets.get(path)
+            if entry and entry[0] == key:
+                self.hits += 1
+                return entry[1]
+        offsets = array('q', [0])
+        pos = mm.find(b'\n')
+        while pos != -1:
+            offsets.append(pos + 1)
+            pos = mm.find(b'\n', pos + 1)
+        if offsets[-1] != len(mm):
+            offsets.append(len(mm))  # Last line without trailing newline
+        with self._lock:
+            self.misses += 1
+            self._offsets[path] = (key, offsets)
+            while len(self._offsets) > 16:
+                self._offsets.popitem(last=False)
+        return offsets
+
+    def read_range(self, path: str, offset: int = 1, limit: Optional[int] = None) -> Tuple[List[str], int]:
+        """
+        Lines [offset, offset + limit) (1-based) and the file's total line count.
+        Files over MMAP_THRESHOLD are never fully decoded.
+        """
+        path = os.path.abspath(path)
+        offset = max(offset, 1)
+        key = self._key(path)
+        if key[1] <= MMAP_THRESHOLD:
+            lines = self.get_lines(path)
+            end = len(lines) if limit is None else offset - 1 + limit
+            return lines[offset - 1:end], len(lines)
+
+        if key[1] == 0:
+            return [], 0
+        with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            offsets = self._line_offsets(path, key, mm)
+            total = len(offsets) - 1
+            start = min(offset - 1, total)
+            end = total if limit is None else min(start + limit, total)
+            chunk = mm[offsets[start]:offsets[end]]
+        return chunk.decode('utf-8', errors='ignore').splitlines(keepends=True), total
+
+
+_shared_cache: Optional[FileCache] = None
+_shared_lock = threading.Lock()
+
+
+def get_file_cache() -> FileCache:
+    """Process-wide cache shared by ToolRegistry, ContextManager and the symbol index."""
+    global _shared_cache
+    with _shared_lock:
+        if _shared_cache is None:
+            _shared_cache = FileCache()
+        return _shared_cache
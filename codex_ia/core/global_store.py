@@ -1,7 +1,9 @@
 import os
 import logging
-import chromadb
 from pathlib import Path
+from codex_ia.core.lazy import lazy_import
+
+chromadb = lazy_import("chromadb")
 
 class GlobalVectorStore:
     """
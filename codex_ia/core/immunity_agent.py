@@ -5,10 +5,25 @@ import logging
 from watchdog.observers import Observer
 from watchdog.events import FileSystemEventHandler
 import subprocess
+import sys
 import threading
+from .impact import get_impact_runner
+from .snapshot_store import BAD, GOOD, SnapshotStore
+from .symbol_index import DEFAULT_IGNORE_DIRS, TEXT_EXTS
+from .syntax_checker import get_syntax_checker
 
 logger = logging.getLogger(__name__)
 
+
+def _watched(root: str, path: str) -> bool:
+    """Source files worth snapshotting: no virtualenvs, node_modules, build output, DBs or caches."""
+    rel = os.path.relpath(os.path.abspath(path), os.path.abspath(root))
+    parts = rel.split(os.sep)
+    if parts[0] == os.pardir or any(part in DEFAULT_IGNORE_DIRS for part in parts[:-1]):
+        return False
+    return os.path.splitext(path)[1].lower() in TEXT_EXTS
+
+
 class SafetyHandler(FileSystemEventHandler):
     """
     Handles file system events and triggers immunity checks.
@@ -23,8 +38,14 @@ class SafetyHandler(FileSystemEventHandler):
             return
         
         # Ignores
-        if "__pycache__" in event.src_path or ".git" in event.src_path or "tmp" in event.src_path:
+        if "__pycache__" in event.src_path or ".git" in event.src_path or "tmp" in event.src_path \
+                or ".codex_cache" in event.src_path:
             return
+        if not _watched(self.agent.project_root, event.src_path):
+            return
+
+        # Every change is snapshotted, even the ones the debounce skips checking
+        self.agent.snapshots.capture(event.src_path)
 
         # Debounce
         now = time.time()
@@ -39,16 +60,39 @@ class ImmunityAgent:
     """
     Level 12: The Immunity
     Resides in the background. Watches for file changes.
-    If a change causes tests to fail, it AUTOMATICALLY reverts the file.
+    If a change causes tests to fail, it AUTOMATICALLY reverts the file
+    to its last known-good snapshot (uncommitted good edits survive).
     """
+    TEST_TIMEOUT = 10  # Seconds for the stability test run
+
     def __init__(self, project_root: str):
         self.project_root = project_root
         self.observer = Observer()
         self.active = False
-        self._backup_cache = {} # path -> content
+        self.snapshots = SnapshotStore(project_root)  # Content-addressed versions + good/bad verdicts
+        self.impact = get_impact_runner(project_root)
+        self.last_check = None  # Report of the last impacted-test run
+
+    def snapshot_baseline(self) -> int:
+        """
+        Marks the current content of every source file the store has never seen as GOOD.
+        `watchdog` reports changes after the fact, so without this baseline the first bad
+        edit to a file could only go back to git HEAD, losing its uncommitted good edits.
+        """
+        captured = 0
+        for dirpath, dirnames, filenames in os.walk(self.project_root):
+            dirnames[:] = [d for d in dirnames if d not in DEFAULT_IGNORE_DIRS]
+            for filename in filenames:
+                path = os.path.join(dirpath, filename)
+                if _watched(self.project_root, path) and self.snapshots.latest(path) is None:
+                    captured += self.snapshots.capture(path, GOOD) is not None
+        return captured
 
     def activate_watchdog(self):
-        """Starts the background file watcher."""
+        """Snapshots the GOOD baseline, then starts the background file watcher."""
+        baseline = self.snapshot_baseline()
+        if baseline:
+            print(f"[IMMUNITY] [OK] Baseline snapshot of {baseline} source file(s).")
         event_handler = SafetyHandler(self)
         self.observer.schedule(event_handler, self.project_root, recursive=True)
         self.observer.start()
@@ -65,46 +109,76 @@ class ImmunityAgent:
         """
         Runs a quick check. If it fails, revert!
         """
-        # 1. Start backup generation (in memory for speed)
-        # Note: Ideally, we should have backed up BEFORE the change via a pre-hook,
-        # but `watchdog` is post-event. So we rely on Git or a shadow copy if deployed fully.
-        # For this PoC, we assume the user might have broken it, and if we can't revert, we scream.
-        # BUT, to show "Revert" capability, lets assume we are using git stash?
-        # Or better: We run the test, if fail, we `git checkout -- <file>`.
+        # 1. Snapshot the new content; the verdict below marks it good or bad.
+        # `watchdog` is post-event, so the pre-change state is the last version
+        # that passed these checks (git HEAD only when the file has none yet).
+        version = self.snapshots.capture(changed_file_path)
         
         print("[IMMUNITY] [TEST] Running stability check...")
         
         # Simple check: Does it compile/run? 
         # We'll run pytest on the specific file if it's a test, or general tests otherwise.
         
-        cmd = ["python", "-m", "compileall", "-q", changed_file_path]
         if changed_file_path.endswith(".py"):
+            # In-process ast/compile check, cached per content hash (no new interpreter per save)
             try:
-                subprocess.run(cmd, check=True, capture_output=True)
-                print("[IMMUNITY] [OK] Syntax OK.")
-            except subprocess.CalledProcessError:
-                print("[IMMUNITY] [FAIL] SYNTAX ERROR DETECTED! Reverting...")
+                check = get_syntax_checker().check(changed_file_path)
+            except OSError as e:
+                print(f"[IMMUNITY] [WARN] Could not read {changed_file_path}: {e}")
+                return
+            if not check.ok:
+                issue = check.errors[0]
+                print(f"[IMMUNITY] [FAIL] SYNTAX ERROR DETECTED (line {issue.line}: {issue.message})! Reverting...")
                 self._revert_file(changed_file_path)
                 return
+            for issue in check.errors:
+                print(f"[IMMUNITY] [WARN] {issue}")
+            print(f"[IMMUNITY] [OK] Syntax OK ({check.elapsed_ms:.1f} ms{', cached' if check.cached else ''}).")
 
-        # Run project tests (fast subset)
-        # For demo, we assume `python -m pytest` is fast enough
-        try:
-            # Timeout to prevent infinite loops
-            result = subprocess.run(["python", "-m", "pytest", "-q"], cwd=self.project_root, capture_output=True, timeout=10)
-            if result.returncode != 0:
-                print(f"[IMMUNITY] [FAIL] TESTS FAILED! Output:\n{result.stdout.decode()[:200]}...")
-                print("[IMMUNITY] [UNDO] Initiating Protocol: UNDO")
-                self._revert_file(changed_file_path)
-            else:
-                print("[IMMUNITY] [OK] Stability confirmed.")
-                
-        except Exception as e:
-            print(f"[IMMUNITY] [WARN] Check failed: {e}")
+        # Run only the tests that reach the changed file; the full suite follows in the background
+        # Timeout to prevent infinite loops (the whole process group is killed)
+        report = self.impact.run(
+            [changed_file_path], timeout=self.TEST_TIMEOUT,
+            on_full_result=lambda full: self._on_full_suite(changed_file_path, version, full),
+        )
+        self.last_check = report
+        selection, result = report["selection"], report["result"]
+        saved = f", ~{report['time_saved']}s saved" if report["time_saved"] else ""
+        print(f"[IMMUNITY] [TEST] {len(selection.tests)}/{selection.total_tests} test files selected "
+              f"({'full suite' if selection.full else selection.reason}){saved}")
+        if result.error:
+            print(f"[IMMUNITY] [WARN] Check failed: {result.error}")
+        elif result.timed_out:
+            print(f"[IMMUNITY] [WARN] Check failed: tests exceeded {self.TEST_TIMEOUT}s")
+        elif result.returncode != 0:
+            print(f"[IMMUNITY] [FAIL] TESTS FAILED! Output:\n{result.stdout[:200]}...")
+            print("[IMMUNITY] [UNDO] Initiating Protocol: UNDO")
+            self._revert_file(changed_file_path)
+        else:
+            if version:
+                self.snapshots.mark(version, GOOD)
+            print("[IMMUNITY] [OK] Stability confirmed.")
+
+    def _on_full_suite(self, changed_file_path, version, result):
+        """Background full-suite verdict for a change the impacted tests let through."""
+        if result.success:
+            print("[IMMUNITY] [OK] Full suite green.")
+            return
+        if result.error or result.timed_out:
+            print(f"[IMMUNITY] [WARN] Full suite did not finish: {result.error or 'timeout'}")
+            return
+        print(f"[IMMUNITY] [FAIL] FULL SUITE FAILED! Output:\n{result.stdout[:200]}...")
+        if version:
+            self.snapshots.mark(version, BAD)
+        latest = self.snapshots.capture(changed_file_path)
+        if version and latest and latest.hash == version.hash:  # A newer edit gets its own check
+            print("[IMMUNITY] [UNDO] Initiating Protocol: UNDO")
+            self._revert_file(changed_file_path)
 
     def _revert_file(self, file_path):
         """
-        Reverts the file to HEAD using git.
+        Reverts the file to its last known-good snapshot (git HEAD if it has none,
+        i.e. it was created after the watchdog started and never passed a check).
         NOW SECURED BY SAFETY PROTOCOL (Quarantine before destruction).
         """
         from .safety import SafetyProtocol
@@ -117,7 +191,15 @@ class ImmunityAgent:
         if not quarantine_path:
              print(f"[IMMUNITY] [WARN] Quarantine failed. Proceeding with caution...")
         
-        # 2. Revert
+        # 2. Revert to the last version that passed the checks
+        bad = self.snapshots.capture(file_path)
+        if bad:
+            self.snapshots.mark(bad, BAD)
+        good = self.snapshots.last_good(file_path, exclude_hash=bad.hash if bad else None)
+        if good and self.snapshots.restore(file_path, good):
+            print(f"[IMMUNITY] [UNDO] File {os.path.basename(file_path)} restored to snapshot #{good.seq}.")
+            return
+
         try:
             subprocess.run(["git", "checkout", "HEAD", "--", file_path], cwd=self.project_root, check=True, capture_output=True)
             print(f"[IMMUNITY] [UNDO] File {os.path.basename(file_path)} reverted to safe state.")
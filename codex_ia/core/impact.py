@@ -0,0 +1,357 @@
+"""
+🎯 TEST IMPACT - Seleção de testes afetados por uma mudança
+Mapeia cada arquivo de teste para os módulos do projeto que ele alcança
+(grafo de imports transitivo via ast, refinado por dados de coverage com
+contextos por teste quando existem). Numa mudança roda primeiro só os testes
+afetados e deixa a suíte completa rodando em segundo plano.
+"""
+
+import ast
+import logging
+import os
+import sys
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterable, List, Optional, Set
+
+from codex_ia.core.executor import ExecResult, ExecutionHandle, get_executor
+from codex_ia.core.symbol_index import DEFAULT_IGNORE_DIRS
+
+logger = logging.getLogger(__name__)
+
+# Files whose change can affect any test: always run the full suite
+FULL_SUITE_TRIGGERS = {
+    "pytest.ini", "tox.ini", "setup.cfg", "setup.py", "pyproject.toml", "requirements.txt",
+    "requirements-dev.txt", "Pipfile", "Pipfile.lock", "poetry.lock", ".coveragerc",
+}
+# Changes that never affect test outcomes
+INERT_EXTS = {".md", ".rst", ".log", ".png", ".jpg", ".jpeg", ".gif", ".svg", ".ico"}
+NO_TESTS_COLLECTED = 5  # pytest exit code
+
+
+def is_test_file(rel_path: str) -> bool:
+    name = os.path.basename(rel_path)
+    return name.endswith(".py") and (name.startswith("test_") or name.endswith("_test.py"))
+
+
+def module_name(rel_path: str) -> str:
+    """'pkg/sub/mod.py' -> 'pkg.sub.mod'; 'pkg/__init__.py' -> 'pkg'."""
+    parts = rel_path[:-3].split("/")
+    if parts[-1] == "__init__":
+        parts = parts[:-1]
+    return ".".join(parts)
+
+
+def extract_imports(source: str, module: str, is_package: bool = False) -> Set[str]:
+    """Absolute names imported by a module; `from a import b` yields 'a' and 'a.b'."""
+    try:
+        tree = ast.parse(source)
+    except (SyntaxError, ValueError):
+        return set()
+    package = module if is_package else module.rpartition(".")[0]
+    names = set()
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            names.update(alias.name for alias in node.names)
+        elif isinstance(node, ast.ImportFrom):
+            if node.level:
+                base_parts = package.split(".") if package else []
+                base_parts = base_parts[:len(base_parts) - (node.level - 1)]
+                base = ".".join(p for p in base_parts + [node.module or ""] if p)
+            else:
+                base = node.module or ""
+            if base:
+                names.add(base)
+            names.update(f"{base}.{alias.name}" if base else alias.name for alias in node.names if alias.name != "*")
+    return names
+
+
+@dataclass
+class Selection:
+    tests: List[str]             # Test files to run (relative paths)
+    full: bool                   # True = every test is affected
+    reason: str
+    changed: List[str] = field(default_factory=list)
+    total_tests: int = 0
+
+
+class ImpactMap:
+    """
+    Test file -> project modules it reaches, and the reverse. Like SymbolIndex,
+    `refresh()` reparses only files whose mtime/size changed.
+    Coverage (`coverage run --context=test` or `pytest --cov-context=test`)
+    adds the edges imports cannot see (plugins, dynamic imports, subprocesses).
+    """
+
+    def __init__(self, root: str, ignore_dirs=None, coverage_file: Optional[str] = None):
+        self.root = os.path.abspath(root)
+        self.ignore_dirs = set(ignore_dirs or DEFAULT_IGNORE_DIRS)
+        self.coverage_file = coverage_file or os.path.join(self.root, ".coverage")
+        self._files: Dict[str, Dict] = {}      # rel path -> {"key", "imports"}
+        self._reverse: Dict[str, Set[str]] = {}  # source rel path -> test files that reach it
+        self._covered: Dict[str, Set[str]] = {}  # source rel path -> test files (coverage)
+        self._coverage_key = None
+        self._lock = threading.RLock()
+
+    def _walk(self):
+        for dirpath, dirnames, filenames in os.walk(self.root):
+            dirnames[:] = [d for d in dirnames if d not in self.ignore_dirs and not d.startswith('.')]
+            for filename in filenames:
+                if filename.endswith(".py"):
+                    yield os.path.join(dirpath, filename)
+
+    def _rel(self, path: str) -> str:
+        return os.path.relpath(os.path.abspath(os.path.join(self.root, path)), self.root).replace(os.sep, "/")
+
+    def refresh(self):
+        with self._lock:
+            seen, changed = set(), False
+            for abs_path in self._walk():
+                try:
+                    st = os.stat(abs_path)
+                    rel = self._rel(abs_path)
+                    seen.add(rel)
+                    key = (st.st_mtime_ns, st.st_size)
+                    if self._files.get(rel, {}).get("key") == key:
+                        continue
+                    with open(abs_path, "r", encoding="utf-8", errors="replace") as f:
+                        source = f.read()
+                except OSError:
+                    continue
+                self._files[rel] = {"key": key, "imports": extract_imports(
+                    source, module_name(rel), rel.endswith("__init__.py"))}
+                changed = True
+            for rel in set(self._files) - seen:
+                del self._files[rel]
+                changed = True
+            if changed or not self._reverse:
+                self._build_graph()
+            self._load_coverage()
+
+    def _build_graph(self):
+        modules = {module_name(rel): rel for rel in self._files}
+        edges: Dict[str, Set[str]] = {}
+        for rel, entry in self._files.items():
+            # Scripts and tests/ dirs run with their own directory on sys.path
+            local = module_name(rel).rpartition(".")[0]
+            targets = set()
+            for name in entry["imports"]:
+                parts = name.split(".")
+                # Importing 'a.b.c' executes a/__init__.py and a/b/__init__.py too
+                for i in range(1, len(parts) + 1):
+                    prefix = ".".join(parts[:i])
+                    for candidate in (prefix, f"{local}.{prefix}" if local else None):
+                        target = modules.get(candidate) if candidate else None
+                        if target and target != rel:
+                            targets.add(target)
+            edges[rel] = targets
+
+        reverse: Dict[str, Set[str]] = {}
+        for test in (rel for rel in self._files if is_test_file(rel)):
+            reached, stack = {test}, [test]
+            while stack:
+                for dep in edges.get(stack.pop(), ()):
+                    if dep not in reached:
+                        reached.add(dep)
+                        stack.append(dep)
+            for rel in reached:
+                reverse.setdefault(rel, set()).add(test)
+        self._reverse = reverse
+
+    def _load_coverage(self):
+        """Per-test contexts from a coverage data file (optional: needs `coverage`)."""
+        try:
+            st = os.stat(self.coverage_file)
+        except OSError:
+            return
+        key = (st.st_mtime_ns, st.st_size)
+        if key == self._coverage_key:
+            return
+        self._coverage_key = key
+        try:
+            from coverage import CoverageData
+        except ImportError:
+            logger.debug("coverage not installed; using the import graph only")
+            return
+        covered: Dict[str, Set[str]] = {}
+        try:
+            data = CoverageData(basename=self.coverage_file)
+            data.read()
+            for measured in data.measured_files():
+                rel = self._rel(measured)
+                if rel.startswith(".."):
+                    continue
+                for contexts in data.contexts_by_lineno(measured).values():
+                    for context in contexts:
+                        test = context.split("::", 1)[0].split("|", 1)[0].replace(os.sep, "/")
+                        if is_test_file(test):
+                            covered.setdefault(rel, set()).add(self._rel(test))
+        except Exception as e:
+            logger.warning(f"Could not read coverage data {self.coverage_file}: {e}")
+            return
+        self._covered = covered
+
+    # --- Queries ---
+
+    def tests(self) -> List[str]:
+        self.refresh()
+        return self._tests()
+
+    def _tests(self) -> List[str]:
+        with self._lock:
+            return sorted(rel for rel in self._files if is_test_file(rel))
+
+    def tests_for(self, path: str) -> Set[str]:
+        self.refresh()
+        rel = self._rel(path)
+        with self._lock:
+            return set(self._reverse.get(rel, ())) | set(self._covered.get(rel, ()))
+
+    def select(self, changed: Iterable[str]) -> Selection:
+        """Tests affected by `changed` files; falls back to everything when unsure."""
+        self.refresh()
+        changed = [self._rel(p) for p in changed]
+        all_tests = self._tests()
+        if not changed:
+            return Selection(all_tests, True, "no changed files given", changed, len(all_tests))
+
+        selected: Set[str] = set()
+        reasons = []
+        with self._lock:
+            for rel in changed:
+                name = os.path.basename(rel)
+                if rel.startswith(".."):
+                    return Selection(all_tests, True, f"{rel} is outside the project", changed, len(all_tests))
+                if name in FULL_SUITE_TRIGGERS:
+                    return Selection(all_tests, True, f"{rel} affects every test", changed, len(all_tests))
+                if name == "conftest.py":
+                    scope = rel.rsplit("/", 1)[0] + "/" if "/" in rel else ""
+                    scoped = {t for t in all_tests if t.startswith(scope)}
+                    selected |= scoped
+                    reasons.append(f"{rel}: {len(scoped)} tests under its directory")
+                elif os.path.splitext(name)[1] in INERT_EXTS:
+                    reasons.append(f"{rel}: not code")
+                elif not rel.endswith(".py") or rel not in self._files:
+                    return Selection(all_tests, True, f"{rel} is not in the import graph", changed, len(all_tests))
+                elif is_test_file(rel):
+                    selected.add(rel)
+                    reasons.append(f"{rel}: test file")
+                else:
+                    hits = self._reverse.get(rel, set()) | self._covered.get(rel, set())
+                    selected |= hits
+                    reasons.append(f"{rel}: reached by {len(hits)} tests")
+        return Selection(sorted(selected), False, "; ".join(reasons), changed, len(all_tests))
+
+
+class ImpactRunner:
+    """
+    Usage:
+        runner = ImpactRunner(project_root)
+        report = runner.run(["pkg/models.py"], timeout=10, on_full_result=callback)
+    `report["result"]` is the ExecResult of the affected tests; the full suite
+    keeps running in the background and is handed to `on_full_result`.
+    """
+    FULL_TIMEOUT = 900  # Seconds for the background full-suite run
+
+    def __init__(self, root: str, command: Optional[List[str]] = None, impact_map: Optional[ImpactMap] = None):
+        self.root = os.path.abspath(root)
+        self.command = list(command or [sys.executable, "-m", "pytest", "-q"])
+        self.map = impact_map or ImpactMap(self.root)
+        self.last_full: Optional[ExecResult] = None
+        self.stats = {"runs": 0, "tests_selected": 0, "tests_total": 0, "full_runs": 0, "seconds_saved": 0.0}
+        self._full_handle: Optional[ExecutionHandle] = None
+        self._lock = threading.Lock()
+
+    def _full_duration(self) -> Optional[float]:
+        """Last complete full-suite run, the baseline for time saved."""
+        if self.last_full and not (self.last_full.timed_out or self.last_full.cancelled or self.last_full.error):
+            return self.last_full.duration
+        return None
+
+    def run_selected(self, selection: Selection, timeout: Optional[float] = None) -> ExecResult:
+        if not selection.full and not selection.tests:
+            return ExecResult(self.command, 0, "no affected tests\n", "", 0.0)
+        targets = [] if selection.full else selection.tests
+        result = get_executor().run(self.command + targets, cwd=self.root, timeout=timeout)
+        if result.returncode == NO_TESTS_COLLECTED and not result.timed_out:
+            result.returncode = 0
+        return result
+
+    def run_full_async(self, on_full_result: Optional[Callable[[ExecResult], None]] = None,
+                       timeout: Optional[float] = None) -> Optional[ExecutionHandle]:
+        """Restarts the background full run (a newer change makes the running one stale)."""
+        with self._lock:
+            if self._full_handle and not self._full_handle.done():
+                self._full_handle.cancel()
+            try:
+                handle = get_executor().submit(self.command, cwd=self.root,
+                                               timeout=timeout or self.FULL_TIMEOUT, warm=False)
+            except Exception as e:
+                logger.warning(f"Could not start the full test suite: {e}")
+                return None
+            self._full_handle = handle
+
+        def wait():
+            result = handle.result()
+            if result.cancelled:
+                return
+            if result.returncode == NO_TESTS_COLLECTED and not result.timed_out:
+                result.returncode = 0
+            self.last_full = result
+            self.stats["full_runs"] += 1
+            if on_full_result:
+                try:
+                    on_full_result(result)
+                except Exception as e:
+                    logger.warning(f"Full-suite callback failed: {e}")
+
+        threading.Thread(target=wait, daemon=True, name="impact-full-suite").start()
+        return handle
+
+    def run(self, changed: Iterable[str], timeout: Optional[float] = None, full_suite: bool = True,
+            on_full_result: Optional[Callable[[ExecResult], None]] = None) -> Dict:
+        """
+        Affected tests first (blocking), then the full suite in the background.
+        Returns {"selection", "result", "passed", "duration", "time_saved", "full_suite"}.
+        """
+        start = time.perf_counter()
+        selection = self.map.select(changed)
+        select_ms = (time.perf_counter() - start) * 1000
+        result = self.run_selected(selection, timeout=timeout)
+
+        baseline = self._full_duration()
+        saved = max(0.0, baseline - result.duration) if (baseline is not None and not selection.full) else None
+        self.stats["runs"] += 1
+        self.stats["tests_selected"] += len(selection.tests)
+        self.stats["tests_total"] += selection.total_tests
+        self.stats["seconds_saved"] = round(self.stats["seconds_saved"] + (saved or 0.0), 3)
+
+        background = None
+        if selection.full and not (result.timed_out or result.cancelled or result.error):
+            self.last_full = result
+        elif full_suite:
+            background = self.run_full_async(on_full_result)
+        logger.info(f"Test impact: {len(selection.tests)}/{selection.total_tests} tests ({selection.reason})")
+        return {
+            "selection": selection,
+            "result": result,
+            "passed": result.success,
+            "duration": round(result.duration, 3),
+            "select_ms": round(select_ms, 1),
+            "time_saved": round(saved, 3) if saved is not None else None,
+            "full_suite": "running" if background else ("ran" if selection.full else "skipped"),
+        }
+
+
+_runners: Dict[str, ImpactRunner] = {}
+_runners_lock = threading.Lock()
+
+
+def get_impact_runner(root: str) -> ImpactRunner:
+    """Shared runner per project root (keeps the parsed graph and full-suite baseline)."""
+    root = os.path.abspath(root)
+    with _runners_lock:
+        if root not in _runners:
+            _runners[root] = ImpactRunner(root)
+        return _runners[root]
@@ -1,5 +1,6 @@
 import json
-import os
+import sqlite3
+import threading
 from datetime import datetime
 from pathlib import Path
 from typing import Dict, Any, Optional
@@ -8,54 +9,149 @@ class KnowledgeBase:
     """
     Simples base de conhecimento persistente para o Codex-IA.
     Armazena metadados do projeto, resumo de arquivos e relacionamentos.
+
+    Backend SQLite: resumos são lidos sob demanda (uma linha por consulta) e
+    `save()` grava apenas as entradas alteradas desde o último save.
+    Um `.codex_memory.json` legado ao lado do banco é importado uma única vez.
     """
-    
-    def __init__(self, storage_path: str = ".codex_memory.json"):
-        self.storage_path = Path(storage_path)
-        self.data = self._load()
-
-    def _load(self) -> Dict[str, Any]:
-        """Carrega a base de dados do disco."""
-        if not self.storage_path.exists():
-            return {
-                "project_summary": "",
-                "file_index": {},  # path -> {hash, summary, last_updated}
-                "dependencies": {}, # module -> [imported_by]
-                "tech_stack": [],
-                "last_scan": None
-            }
+
+    _META_DEFAULTS = {
+        "project_summary": "",
+        "dependencies": {},  # module -> [imported_by]
+        "tech_stack": [],
+        "last_scan": None
+    }
+
+    def __init__(self, storage_path: str = ".codex_memory.db"):
+        path = Path(storage_path)
+        if path.suffix == ".json":
+            path = path.with_suffix(".db")
+        self.storage_path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.storage_path), check_same_thread=False)
+        self._cache: Dict[str, Optional[Dict[str, Any]]] = {}  # path -> row (None = known missing)
+        self._dirty_files: Dict[str, Dict[str, Any]] = {}
+        self._dirty_meta: Dict[str, Any] = {}
+        self._init_db()
+        self._migrate_legacy_json(self.storage_path.with_suffix(".json"))
+
+    def _init_db(self):
+        """Cria o schema do banco."""
+        with self._lock:
+            self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS file_index (
+                path TEXT PRIMARY KEY,
+                summary TEXT,
+                hash TEXT,
+                last_updated TEXT
+            )
+            """)
+            self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS meta (
+                key TEXT PRIMARY KEY,
+                value TEXT  -- JSON
+            )
+            """)
+            self._conn.commit()
+
+    def _migrate_legacy_json(self, json_path: Path):
+        """Importa o formato monolítico antigo (uma vez)."""
+        if not json_path.exists() or self._get_meta("migrated_from_json"):
+            return
         try:
-            with open(self.storage_path, 'r', encoding='utf-8') as f:
-                return json.load(f)
+            with open(json_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
         except Exception:
-            return {}
+            return
+
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO file_index (path, summary, hash, last_updated) VALUES (?, ?, ?, ?)",
+                [(p, m.get("summary"), m.get("hash"), m.get("last_updated"))
+                 for p, m in data.get("file_index", {}).items()]
+            )
+            for key in self._META_DEFAULTS:
+                if key in data:
+                    self._conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)",
+                                       (key, json.dumps(data[key])))
+            self._conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)",
+                               ("migrated_from_json", json.dumps(str(json_path))))
+            self._conn.commit()
+
+    def _get_meta(self, key: str) -> Any:
+        if key in self._dirty_meta:
+            return self._dirty_meta[key]
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return self._META_DEFAULTS.get(key)
+        return json.loads(row[0])
+
+    def _get_file_row(self, file_path: str) -> Optional[Dict[str, Any]]:
+        if file_path not in self._cache:
+            with self._lock:
+                row = self._conn.execute(
+                    "SELECT summary, hash, last_updated FROM file_index WHERE path = ?", (file_path,)
+                ).fetchone()
+            self._cache[file_path] = (
+                {"summary": row[0], "hash": row[1], "last_updated": row[2]} if row else None
+            )
+        return self._cache[file_path]
 
     def save(self):
-        """Salva a base de dados no disco."""
+        """Salva no disco apenas as entradas alteradas."""
+        if not self._dirty_files and not self._dirty_meta:
+            return
         try:
-            with open(self.storage_path, 'w', encoding='utf-8') as f:
-                json.dump(self.data, f, indent=2)
+            with self._lock:
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO file_index (path, summary, hash, last_updated) VALUES (?, ?, ?, ?)",
+                    [(p, m["summary"], m["hash"], m["last_updated"]) for p, m in self._dirty_files.items()]
+                )
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)",
+                    [(k, json.dumps(v)) for k, v in self._dirty_meta.items()]
+                )
+                self._conn.commit()
+            self._dirty_files.clear()
+            self._dirty_meta.clear()
         except Exception as e:
             print(f"Erro ao salvar KnowledgeBase: {e}")
 
+    def close(self):
+        """Grava pendências e fecha a conexão."""
+        self.save()
+        with self._lock:
+            self._conn.close()
+
     def update_file_summary(self, file_path: str, summary: str, file_hash: str):
-        """Atualiza o resumo e hash de um arquivo."""
-        self.data["file_index"][file_path] = {
+        """Atualiza o resumo e hash de um arquivo (no-op se nada mudou)."""
+        current = self._get_file_row(file_path)
+        if current and current["hash"] == file_hash and current["summary"] == summary:
+            return
+        entry = {
             "summary": summary,
             "hash": file_hash,
             "last_updated": datetime.now().isoformat()
         }
+        self._cache[file_path] = entry
+        self._dirty_files[file_path] = entry
 
     def get_file_summary(self, file_path: str) -> Optional[str]:
         """Retorna o resumo armazenado de um arquivo."""
-        meta = self.data["file_index"].get(file_path)
+        meta = self._get_file_row(file_path)
         return meta.get("summary") if meta else None
 
+    def get_file_hash(self, file_path: str) -> Optional[str]:
+        """Retorna o hash registrado de um arquivo (para detectar mudanças)."""
+        meta = self._get_file_row(file_path)
+        return meta.get("hash") if meta else None
+
     def set_project_summary(self, summary: str):
-        self.data["project_summary"] = summary
-        
+        self._dirty_meta["project_summary"] = summary
+
     def get_project_summary(self) -> str:
-        return self.data.get("project_summary", "")
+        return self._get_meta("project_summary") or ""
 
     def update_scan_time(self):
-        self.data["last_scan"] = datetime.now().isoformat()
+        self._dirty_meta["last_scan"] = datetime.now().isoformat()
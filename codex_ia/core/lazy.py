@@ -0,0 +1,82 @@
+"""
+💤 LAZY LOADING - Heavy dependencies load on first use
+chromadb, torch/sentence-transformers, google-genai e requests só são
+importados quando alguém realmente usa um atributo do módulo.
+"""
+
+import importlib
+import threading
+from types import ModuleType
+from typing import Optional
+
+
+class LazyModule(ModuleType):
+    """
+    Module proxy: `genai = lazy_import("google.genai")` costs nothing at import
+    time; the real module is imported on the first attribute access.
+    """
+
+    def __init__(self, name: str):
+        super().__init__(name)
+        self.__dict__["_lazy_target"] = None
+        self.__dict__["_lazy_lock"] = threading.Lock()
+
+    def _load(self) -> ModuleType:
+        target = self.__dict__["_lazy_target"]
+        if target is None:
+            with self.__dict__["_lazy_lock"]:
+                target = self.__dict__["_lazy_target"]
+                if target is None:
+                    target = importlib.import_module(self.__name__)
+                    self.__dict__["_lazy_target"] = target
+        return target
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+    def __dir__(self):
+        return dir(self._load())
+
+    def __repr__(self):
+        state = "loaded" if self.__dict__["_lazy_target"] is not None else "not loaded"
+        return f"<lazy module '{self.__name__}' ({state})>"
+
+
+def lazy_import(name: str) -> LazyModule:
+    """Returns a proxy for `name`; ImportError surfaces on first use, not here."""
+    return LazyModule(name)
+
+
+def is_loaded(module) -> bool:
+    """True if a lazy proxy already imported its target (always True for real modules)."""
+    if isinstance(module, LazyModule):
+        return module.__dict__["_lazy_target"] is not None
+    return True
+
+
+_env_loaded = False
+_env_lock = threading.Lock()
+
+
+def load_env_once(dotenv_path: Optional[str] = None):
+    """Loads .env once per process (it used to run in every GeminiClient.__init__)."""
+    global _env_loaded
+    if _env_loaded:
+        return
+    with _env_lock:
+        if _env_loaded:
+            return
+        try:
+            from dotenv import load_dotenv
+            load_dotenv(dotenv_path, override=True)
+        except ImportError:
+            pass
+        _env_loaded = True
+
+
+def reload_env(dotenv_path: Optional[str] = None):
+    """Forces .env to be read again (e.g. after the user edited API keys)."""
+    global _env_loaded
+    with _env_lock:
+        _env_loaded = False
+    load_env_once(dotenv_path)
@@ -5,6 +5,7 @@ Memória de longo prazo para projetos de semanas/meses
 
 import json
 import sqlite3
+import threading
 from datetime import datetime
 from pathlib import Path
 from typing import Dict, List, Optional
@@ -18,11 +19,12 @@ class LongTermMemory:
     def __init__(self, db_path: str = ".codex_long_memory.db"):
         self.db_path = Path(db_path)
         self.conn = None
+        self._lock = threading.Lock()  # Summaries are written from a background thread
         self._init_db()
         
     def _init_db(self):
         """Cria schema do banco."""
-        self.conn = sqlite3.connect(str(self.db_path))
+        self.conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
         cursor = self.conn.cursor()
         
         # Tabela de Projetos
@@ -87,6 +89,19 @@ class LongTermMemory:
         )
         """)
         
+        # Tabela de Resumos (conversas antigas condensadas por faixa de IDs)
+        cursor.execute("""
+        CREATE TABLE IF NOT EXISTS conversation_summaries (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            project_id INTEGER,
+            start_id INTEGER,  -- primeiro conversations.id coberto
+            end_id INTEGER,    -- último conversations.id coberto
+            summary TEXT,
+            timestamp TEXT,
+            FOREIGN KEY (project_id) REFERENCES projects(id)
+        )
+        """)
+        
         self.conn.commit()
         print(f"💾 Long-Term Memory inicializada: {self.db_path}")
         
@@ -254,17 +269,18 @@ class LongTermMemory:
         
     # --- Conversation Replay ---
     
-    def save_message(self, project_id: int, role: str, content: str):
-        """Salva mensagem da conversa."""
-        cursor = self.conn.cursor()
+    def save_message(self, project_id: int, role: str, content: str) -> int:
+        """Salva mensagem da conversa. Retorna o ID da mensagem."""
         now = datetime.now().isoformat()
         
-        cursor.execute("""
-        INSERT INTO conversations (project_id, role, content, timestamp)
-        VALUES (?, ?, ?, ?)
-        """, (project_id, role, content, now))
-        
-        self.conn.commit()
+        with self._lock:
+            cursor = self.conn.cursor()
+            cursor.execute("""
+            INSERT INTO conversations (project_id, role, content, timestamp)
+            VALUES (?, ?, ?, ?)
+            """, (project_id, role, content, now))
+            self.conn.commit()
+        return cursor.lastrowid
         
     def get_conversation_history(self, project_id: int, limit: int = 50) -> List[Dict]:
         """Recupera histórico de conversa."""
@@ -285,6 +301,49 @@ class LongTermMemory:
             })
         return list(reversed(history))  # Ordem cronológica
         
+    def get_messages(self, project_id: int, after_id: int = 0, before_id: Optional[int] = None) -> List[Dict]:
+        """Recupera mensagens (com ID) em ordem cronológica dentro de uma faixa de IDs."""
+        query = "SELECT id, role, content, timestamp FROM conversations WHERE project_id = ? AND id > ?"
+        params = [project_id, after_id]
+        if before_id is not None:
+            query += " AND id < ?"
+            params.append(before_id)
+        query += " ORDER BY id ASC"
+        
+        with self._lock:
+            rows = self.conn.execute(query, params).fetchall()
+        return [{"id": r[0], "role": r[1], "content": r[2], "timestamp": r[3]} for r in rows]
+        
+    def get_recent_messages(self, project_id: int, limit: int) -> List[Dict]:
+        """Recupera as últimas `limit` mensagens (com ID), em ordem cronológica."""
+        with self._lock:
+            rows = self.conn.execute("""
+            SELECT id, role, content, timestamp FROM conversations
+            WHERE project_id = ? ORDER BY id DESC LIMIT ?
+            """, (project_id, limit)).fetchall()
+        return [{"id": r[0], "role": r[1], "content": r[2], "timestamp": r[3]} for r in reversed(rows)]
+        
+    # --- Conversation Summaries ---
+    
+    def save_summary(self, project_id: int, start_id: int, end_id: int, summary: str):
+        """Registra o resumo de uma faixa de mensagens."""
+        now = datetime.now().isoformat()
+        with self._lock:
+            self.conn.execute("""
+            INSERT INTO conversation_summaries (project_id, start_id, end_id, summary, timestamp)
+            VALUES (?, ?, ?, ?, ?)
+            """, (project_id, start_id, end_id, summary, now))
+            self.conn.commit()
+        
+    def get_summaries(self, project_id: int) -> List[Dict]:
+        """Recupera os resumos de um projeto em ordem cronológica."""
+        with self._lock:
+            rows = self.conn.execute("""
+            SELECT start_id, end_id, summary, timestamp FROM conversation_summaries
+            WHERE project_id = ? ORDER BY end_id ASC
+            """, (project_id,)).fetchall()
+        return [{"start_id": r[0], "end_id": r[1], "summary": r[2], "timestamp": r[3]} for r in rows]
+        
     def close(self):
         """Fecha conexão."""
         if self.conn:
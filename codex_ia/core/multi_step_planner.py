@@ -7,7 +7,9 @@ import json
 from typing import List, Dict
 from codex_ia.core.llm_client import GeminiClient
 from codex_ia.core.vector_store import CodexVectorStore
-from google.genai import types
+from codex_ia.core.lazy import lazy_import
+
+types = lazy_import("google.genai.types")
 
 class MultiStepPlanner:
     """
@@ -226,51 +228,27 @@ Seja PRÁTICO e EXECUTÁVEL.
             "next_action": "continue"
         }
         
-    def execute_plan(self, plan: Dict) -> Dict:
+    def execute_plan(self, plan: Dict, context: Dict = None, checkpoint_path: str = None,
+                     max_workers: int = 4, on_event=None) -> Dict:
         """
         Executa plano completo com error handling.
+        Passos independentes rodam em paralelo (PlanRuntime); `next_action`
+        "retry" tenta de novo com backoff e "escalate" interrompe o resto.
+        Com `checkpoint_path`, uma nova chamada retoma de onde parou.
         
         Returns:
             {
                 "completed_steps": int,
                 "failed_steps": int,
                 "results": List[Dict],
-                "final_status": "success" | "partial" | "failed"
+                "final_status": "success" | "partial" | "failed",
+                "timings": {step_id: seconds}
             }
         """
-        results = []
-        completed = 0
-        failed = 0
-        
-        for step in plan['steps']:
-            # Verifica dependências
-            for dep_id in step.get('dependencies', []):
-                dep_result = next((r for r in results if r['step_id'] == dep_id), None)
-                if not dep_result or not dep_result['success']:
-                    print(f"⚠️  Dependência {dep_id} falhou, pulando passo {step['id']}")
-                    failed += 1
-                    continue
-                    
-            result = self.execute_step(step)
-            result['step_id'] = step['id']
-            results.append(result)
-            
-            if result['success']:
-                completed += 1
-            else:
-                failed += 1
-                if result['next_action'] == 'escalate':
-                    print(f"🚨 Erro crítico no passo {step['id']}, parando execução")
-                    break
-                    
-        final_status = "success" if failed == 0 else ("partial" if completed > 0 else "failed")
-        
-        return {
-            "completed_steps": completed,
-            "failed_steps": failed,
-            "results": results,
-            "final_status": final_status
-        }
+        from codex_ia.core.plan_runtime import PlanRuntime
+        runtime = PlanRuntime(self.execute_step, max_workers=max_workers,
+                              checkpoint_path=checkpoint_path, on_event=on_event)
+        return runtime.run(plan, context)
 
 
 # --- DEMO ---
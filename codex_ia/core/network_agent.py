@@ -2,6 +2,8 @@ import json
 import os
 import logging
 import datetime
+import hashlib
+import time
 from typing import Dict, Any, List, Optional
 from dataclasses import dataclass, asdict
 
@@ -16,13 +18,94 @@ class MemoryEntry:
     source_project: str
     confidence_score: float = 1.0
 
+def _entry_key(entry: Dict) -> str:
+    """Stable id for an Exocortex entry (entries have no explicit id)."""
+    raw = f"{entry.get('timestamp', '')}|{entry.get('content', '')}"
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()[:16]
+
+class WisdomIndex:
+    """
+    Semantic recall over Exocortex entries.
+    Embeds experience content with the local embedding model and keeps an
+    ANN index that is updated incrementally on every commit.
+    Vectors are cached in a sidecar file so restarts don't re-embed everything.
+    """
+    def __init__(self, vectors_file: str):
+        from codex_ia.core.embeddings import get_embedder, VectorIndex
+
+        self.vectors_file = vectors_file
+        self.embedder = get_embedder()
+        self.index = VectorIndex()
+        self._vectors: Dict[str, List[float]] = {}
+        self._dirty = False
+
+    def _load_vectors(self):
+        if not os.path.exists(self.vectors_file):
+            return
+        try:
+            with open(self.vectors_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            # Vectors from a different backend live in another space: drop them
+            if data.get("backend") == self.embedder.backend:
+                self._vectors = data.get("vectors", {})
+        except Exception as e:
+            logger.warning(f"[MEMORY] Ignoring corrupt wisdom vectors: {e}")
+
+    def build(self, entries: List[Dict]):
+        """Indexes all entries, embedding only the ones without a cached vector."""
+        self.embedder.load()  # Resolve backend before reading the cache
+        self._load_vectors()
+
+        missing = [e for e in entries if _entry_key(e) not in self._vectors]
+        if missing:
+            vectors = self.embedder.embed([e.get("content", "") for e in missing])
+            for entry, vec in zip(missing, vectors):
+                self._vectors[_entry_key(entry)] = vec
+            self._dirty = True
+
+        for entry in entries:
+            key = _entry_key(entry)
+            self.index.add(key, self._vectors[key])
+        self.save()
+
+    def add(self, entry: Dict):
+        key = _entry_key(entry)
+        if key not in self._vectors:
+            self._vectors[key] = self.embedder.embed([entry.get("content", "")])[0]
+            self._dirty = True
+        self.index.add(key, self._vectors[key])
+
+    def search(self, query: str, k: int) -> Dict[str, float]:
+        """Returns {entry_key: cosine_similarity} for the k nearest entries."""
+        vec = self.embedder.embed_one(query)
+        return dict(self.index.search(vec, k=k))
+
+    def save(self):
+        if not self._dirty:
+            return
+        try:
+            with open(self.vectors_file, 'w', encoding='utf-8') as f:
+                json.dump({
+                    "backend": self.embedder.backend,
+                    "vectors": {k: [round(x, 5) for x in v] for k, v in self._vectors.items()}
+                }, f)
+            self._dirty = False
+        except Exception as e:
+            logger.error(f"[MEMORY] Failed to save wisdom vectors: {e}")
+
 class CodexMemory:
     """
     The Hippocampus of Codex.
     Manages Short-Term (Session) and Long-Term (Disk) memory.
     """
+    # Hybrid score = cosine similarity + TAG_WEIGHT * fraction of query tags matched
+    TAG_WEIGHT = 0.5
+    MIN_SCORE = 0.25
+
     def __init__(self, memory_file: str):
         self.memory_file = memory_file
+        self._wisdom_index: Optional[WisdomIndex] = None  # Built on first semantic retrieval
+        self.last_retrieval_ms = 0.0
         self.short_term: List[MemoryEntry] = [] # Cleared on restart/mission end
         self.long_term: Dict[str, List[Dict]] = {
             "patterns": [],
@@ -68,17 +151,49 @@ class CodexMemory:
     def commit_to_long_term(self, entry: MemoryEntry):
         """Moves an entry to permanent storage."""
         target_list = self.long_term.get(f"{entry.type}s", self.long_term["experiences"])
-        target_list.append(asdict(entry))
+        record = asdict(entry)
+        target_list.append(record)
         self.save()
 
-    def retrieve(self, query_tags: List[str], limit: int = 5) -> List[Dict]:
+        # Keep the semantic index incremental (no rebuild per store)
+        if self._wisdom_index is not None:
+            try:
+                self._wisdom_index.add(record)
+                self._wisdom_index.save()
+            except Exception as e:
+                logger.error(f"[MEMORY] Failed to index new entry: {e}")
+
+    def _all_entries(self) -> List[Dict]:
+        return self.long_term["patterns"] + self.long_term["anti_patterns"] + self.long_term["experiences"]
+
+    def _get_wisdom_index(self) -> Optional[WisdomIndex]:
+        if self._wisdom_index is None:
+            try:
+                index = WisdomIndex(os.path.splitext(self.memory_file)[0] + ".vectors.json")
+                index.build(self._all_entries())
+                self._wisdom_index = index
+            except Exception as e:
+                logger.error(f"[MEMORY] Semantic recall unavailable: {e}")
+                return None
+        return self._wisdom_index
+
+    def retrieve(self, query_tags: List[str], limit: int = 5, query_text: Optional[str] = None) -> List[Dict]:
         """
-        Retrieves relevant wisdom based on tags.
-        Simple intersection match for now.
+        Retrieves relevant wisdom.
+        Without query_text: tag intersection match (legacy behaviour).
+        With query_text: hybrid tag + vector scoring over the semantic index,
+        so lessons with different wording are still recalled.
         """
+        start = time.perf_counter()
+        all_entries = self._all_entries()
+
+        similarities: Dict[str, float] = {}
+        if query_text:
+            index = self._get_wisdom_index()
+            if index is not None:
+                similarities = index.search(query_text, k=max(limit * 4, 20))
+
         candidates = []
-        all_entries = self.long_term["patterns"] + self.long_term["anti_patterns"] + self.long_term["experiences"]
-        
         for entry in all_entries:
             # Calculate match score
             score = 0
@@ -86,12 +201,20 @@ class CodexMemory:
             for tag in query_tags:
                 if any(tag.lower() in t.lower() for t in entry_tags):
                     score += 1
-            
-            if score > 0:
+
+            if query_text and similarities:
+                tag_score = score / len(query_tags) if query_tags else 0.0
+                vec_score = max(similarities.get(_entry_key(entry), 0.0), 0.0)
+                hybrid = vec_score + self.TAG_WEIGHT * tag_score
+                # Tag hits are kept even below MIN_SCORE (the legacy path returned them)
+                if hybrid >= self.MIN_SCORE or score > 0:
+                    candidates.append((hybrid, entry))
+            elif score > 0:
                 candidates.append((score, entry))
-                
+
         # Sort by score descending
         candidates.sort(key=lambda x: x[0], reverse=True)
+        self.last_retrieval_ms = (time.perf_counter() - start) * 1000
         return [c[1] for c in candidates[:limit]]
 
 class NetworkAgent:
@@ -125,11 +248,12 @@ class NetworkAgent:
         self.memory.commit_to_long_term(entry)
         return f"[NETWORK] Wisdom stored: {entry_type} for tags {tags}"
 
-    def retrieve_wisdom(self, context_keywords: List[str]) -> str:
+    def retrieve_wisdom(self, context_keywords: List[str], query: Optional[str] = None) -> str:
         """
         Fetches relevant advice for the current situation.
+        Pass `query` (e.g. the mission text) to enable semantic recall.
         """
-        hits = self.memory.retrieve(context_keywords)
+        hits = self.memory.retrieve(context_keywords, query_text=query)
         if not hits:
             return "No specific prior wisdom found for this context."
             
@@ -0,0 +1,382 @@
+"""
+🌙 NIGHT SHIFT - Fila de missões priorizada, persistente e retomável
+Um único passe lê cada arquivo uma vez e calcula todas as métricas
+(core/complexity.py); a prioridade combina hotspots de complexidade,
+duplicação, churn do git e testes falhando. Os jobs ficam
+numa fila SQLite (sobrevive a quedas), vários squads rascunham em paralelo em
+arquivos diferentes (aplicar é um de cada vez, na mesma árvore) e cada noite
+respeita um orçamento de tokens e de tempo.
+"""
+
+import json
+import logging
+import os
+import queue
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Generator, Iterable, List, Optional
+
+from codex_ia.core.complexity import (ComplexityAnalyzer, ComplexityReport, DuplicateCluster, Hotspot,
+                                      churn_weight, git_churn)
+from codex_ia.core.conversation_memory import estimate_tokens
+
+logger = logging.getLogger(__name__)
+
+PENDING, RUNNING, DONE, FAILED = "pending", "running", "done", "failed"
+MAX_LINES = 300  # Larger Python files are worth splitting even without a hotspot
+
+
+def failing_tests(root: str) -> Dict[str, int]:
+    """Failing test count per test file, from pytest's last-failed cache."""
+    path = os.path.join(root, ".pytest_cache", "v", "cache", "lastfailed")
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            lastfailed = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    failing: Dict[str, int] = {}
+    for nodeid in lastfailed:
+        rel = nodeid.split("::", 1)[0]
+        failing[rel] = failing.get(rel, 0) + 1
+    return failing
+
+
+def opportunities(report: ComplexityReport, failing: Optional[Dict[str, int]] = None) -> List[Dict[str, Any]]:
+    """Prioritized improvement jobs (one per file and type) from the complexity report."""
+    failing, churn = failing or {}, report.churn
+    found = []
+
+    def add(path: str, kind: str, description: str, priority: float, **extra):
+        found.append(dict({"type": kind, "file": path, "description": description,
+                           "priority": round(priority, 2)}, **extra))
+
+    hotspots: Dict[str, List[Hotspot]] = {}
+    for h in report.hotspots:
+        hotspots.setdefault(h.path, []).append(h)
+    duplicates: Dict[str, List[DuplicateCluster]] = {}
+    for cluster in report.duplicates:
+        duplicates.setdefault(cluster.members[0][0], []).append(cluster)
+
+    for path, stats in report.files.items():
+        weight = churn_weight(churn.get(path, 0))
+        if failing.get(path):
+            add(path, "FAILING_TESTS", f"{failing[path]} test(s) failing in the last run.",
+                (100 + 10 * failing[path]) * weight)
+        if stats.syntax_error:
+            add(path, "BROKEN", "File does not parse.", 90 * weight)
+        if path in hotspots:
+            top = hotspots[path][:3]
+            targets = "; ".join(f"`{h.qualname}` (line {h.line}: complexity {h.complexity}, nesting {h.nesting}, "
+                                f"{h.length} lines)" for h in top)
+            add(path, "COMPLEXITY", f"Reduce the complexity of {targets}.", sum(h.score for h in top),
+                functions=[h.qualname for h in top])
+        elif path.endswith(".py") and stats.lines > MAX_LINES:
+            add(path, "COMPLEXITY", f"File is too large ({stats.lines} lines > {MAX_LINES}), consider splitting.",
+                (10 + (stats.lines - MAX_LINES) / 50) * weight)
+        if path in duplicates:
+            clusters = duplicates[path][:2]
+            where = "; ".join(", ".join(f"{p}:{line} `{q}`" for p, q, line in c.members) for c in clusters)
+            add(path, "DUPLICATION", f"Extract the duplicated logic shared by {where}.",
+                sum(c.score for c in clusters))
+        if stats.todos:
+            add(path, "TECH_DEBT", f"Found {stats.todos} TODO/FIXME comments requiring attention.",
+                (10 + 2 * stats.todos) * weight)
+    return sorted(found, key=lambda o: -o["priority"])
+
+
+def scan_project(root: str, files: Iterable[str], analyzer: Optional[ComplexityAnalyzer] = None) -> List[Dict[str, Any]]:
+    """Ranked jobs for `files` (relative to `root`): one read per changed file, cached otherwise."""
+    analyzer = analyzer or ComplexityAnalyzer(root)
+    report = analyzer.analyze(files, git_churn(root))
+    return opportunities(report, failing_tests(root))
+
+
+class JobQueue:
+    """
+    SQLite-backed job queue (one row per file+type). Jobs left RUNNING by a
+    crashed shift go back to PENDING on `recover()`; shifts checkpoint their
+    token and time usage so a resumed night continues the same budget.
+    """
+    REQUEUE_AFTER = 7 * 24 * 3600  # Finished jobs may be re-queued by a later scan after this
+    NIGHT_WINDOW = 12 * 3600  # Runs started within this window share one shift (and its budgets)
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self._lock = threading.Lock()
+        with self._lock, self.conn:
+            self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS jobs (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                file TEXT NOT NULL,
+                type TEXT NOT NULL,
+                description TEXT,
+                priority REAL DEFAULT 0,
+                status TEXT DEFAULT 'pending',
+                attempts INTEGER DEFAULT 0,
+                result TEXT,
+                tokens INTEGER DEFAULT 0,
+                created REAL,
+                updated REAL,
+                UNIQUE (file, type)
+            )""")
+            self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS shifts (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                started REAL,
+                finished REAL,
+                tokens INTEGER DEFAULT 0,
+                seconds REAL DEFAULT 0,
+                missions INTEGER DEFAULT 0,
+                status TEXT DEFAULT 'running'
+            )""")
+            self.conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_queue ON jobs (status, priority)")
+
+    # --- Jobs ---
+
+    def push(self, opps: Iterable[Dict[str, Any]]) -> int:
+        """Adds/refreshes jobs; running ones are untouched, recent done/failed ones stay finished."""
+        now = time.time()
+        count = 0
+        with self._lock, self.conn:
+            for opp in opps:
+                self.conn.execute("""
+                INSERT INTO jobs (file, type, description, priority, status, created, updated)
+                VALUES (?, ?, ?, ?, 'pending', ?, ?)
+                ON CONFLICT (file, type) DO UPDATE SET
+                    description = excluded.description,
+                    priority = excluded.priority,
+                    status = CASE WHEN status IN ('done', 'failed') AND updated < ? THEN 'pending' ELSE status END,
+                    attempts = CASE WHEN status IN ('done', 'failed') AND updated < ? THEN 0 ELSE attempts END,
+                    updated = CASE WHEN status = 'pending' THEN excluded.updated ELSE updated END
+                """, (opp["file"], opp["type"], opp.get("description", ""), opp.get("priority", 0), now, now,
+                      now - self.REQUEUE_AFTER, now - self.REQUEUE_AFTER))
+                count += 1
+        return count
+
+    def claim(self, busy_files: Iterable[str] = ()) -> Optional[Dict[str, Any]]:
+        """Highest-priority pending job whose file is not being worked on (marked RUNNING)."""
+        busy = list(busy_files)
+        marks = ",".join("?" * len(busy))
+        where = f"AND file NOT IN ({marks})" if busy else ""
+        with self._lock, self.conn:
+            row = self.conn.execute(
+                f"SELECT * FROM jobs WHERE status = 'pending' {where} ORDER BY priority DESC, id LIMIT 1", busy
+            ).fetchone()
+            if row is None:
+                return None
+            self.conn.execute("UPDATE jobs SET status = 'running', attempts = attempts + 1, updated = ? WHERE id = ?",
+                              (time.time(), row["id"]))
+        job = dict(row)
+        job["status"], job["attempts"] = RUNNING, job["attempts"] + 1
+        return job
+
+    def finish(self, job_id: int, status: str, result: str = "", tokens: int = 0):
+        with self._lock, self.conn:
+            self.conn.execute("UPDATE jobs SET status = ?, result = ?, tokens = tokens + ?, updated = ? WHERE id = ?",
+                              (status, result[:2000], tokens, time.time(), job_id))
+
+    def release(self, job_id: int):
+        """Back to PENDING without counting as done (e.g. the budget ran out mid-claim)."""
+        with self._lock, self.conn:
+            self.conn.execute("UPDATE jobs SET status = 'pending', attempts = MAX(0, attempts - 1) WHERE id = ?",
+                              (job_id,))
+
+    def recover(self) -> int:
+        """Jobs interrupted by a crash become PENDING again."""
+        with self._lock, self.conn:
+            return self.conn.execute("UPDATE jobs SET status = 'pending' WHERE status = 'running'").rowcount
+
+    def jobs(self, status: Optional[str] = None) -> List[Dict[str, Any]]:
+        with self._lock:
+            if status:
+                rows = self.conn.execute("SELECT * FROM jobs WHERE status = ? ORDER BY priority DESC, id",
+                                         (status,)).fetchall()
+            else:
+                rows = self.conn.execute("SELECT * FROM jobs ORDER BY priority DESC, id").fetchall()
+        return [dict(r) for r in rows]
+
+    def counts(self) -> Dict[str, int]:
+        with self._lock:
+            rows = self.conn.execute("SELECT status, COUNT(*) AS n FROM jobs GROUP BY status").fetchall()
+        return {r["status"]: r["n"] for r in rows}
+
+    # --- Shifts (budget checkpoints) ---
+
+    def open_shift(self, resume: bool = True, window: Optional[float] = None) -> Dict[str, Any]:
+        """Tonight's shift (the latest one started within `window`) when resuming, else a new one."""
+        window = self.NIGHT_WINDOW if window is None else window
+        with self._lock, self.conn:
+            row = None
+            if resume:
+                row = self.conn.execute("SELECT * FROM shifts WHERE started > ? ORDER BY id DESC LIMIT 1",
+                                        (time.time() - window,)).fetchone()
+            if row is None:
+                cursor = self.conn.execute("INSERT INTO shifts (started) VALUES (?)", (time.time(),))
+                row = self.conn.execute("SELECT * FROM shifts WHERE id = ?", (cursor.lastrowid,)).fetchone()
+            self.conn.execute("UPDATE shifts SET status = 'running' WHERE id = ?", (row["id"],))
+        return dict(row)
+
+    def add_usage(self, shift_id: int, tokens: int = 0, seconds: float = 0.0, missions: int = 0):
+        with self._lock, self.conn:
+            self.conn.execute("UPDATE shifts SET tokens = tokens + ?, seconds = seconds + ?, missions = missions + ? "
+                              "WHERE id = ?", (tokens, seconds, missions, shift_id))
+
+    def shift(self, shift_id: int) -> Dict[str, Any]:
+        with self._lock:
+            return dict(self.conn.execute("SELECT * FROM shifts WHERE id = ?", (shift_id,)).fetchone())
+
+    def close_shift(self, shift_id: int, status: str = "finished"):
+        with self._lock, self.conn:
+            self.conn.execute("UPDATE shifts SET status = ?, finished = ? WHERE id = ?", (status, time.time(), shift_id))
+
+    def close(self):
+        self.conn.close()
+
+
+def mission_tokens(report: Dict[str, Any]) -> int:
+    """Estimated tokens a squad mission consumed (prompt inputs + generated text)."""
+    return sum(estimate_tokens(str(report.get(k) or ""))
+               for k in ("mission", "wisdom", "research", "plan", "code", "tests", "verification_out"))
+
+
+class NightShift:
+    """
+    Usage:
+        shift = NightShift(root, squad_factory=lambda: SquadLeader(root))
+        shift.queue.push(scan_project(root, files))
+        for message in shift.run(max_missions=5, verification_cmd="pytest -q"):
+            print(message)
+    Budgets are checked before each claim: the shift stops dispatching once
+    `token_budget` or `time_budget` (wall seconds) is spent. Both are per night:
+    runs resumed within `JobQueue.NIGHT_WINDOW` keep counting on the same shift.
+    Missions still running count at their estimated cost (the shift's average,
+    MISSION_TOKENS before the first one ends), so parallel squads overshoot the
+    token budget by at most that estimate's error.
+    Squads that apply their patches share the working tree, so with `apply=True`
+    missions run one at a time; `workers` only parallelizes draft-only shifts.
+    """
+    WORKERS = 2
+    TOKEN_BUDGET = 200_000
+    TIME_BUDGET = 4 * 3600
+    MISSION_TOKENS = 5_000  # Reserved per running mission until the shift has its own average
+
+    def __init__(self, root: str, squad_factory: Callable[[], Any], db_path: Optional[str] = None,
+                 workers: Optional[int] = None, token_budget: Optional[int] = None,
+                 time_budget: Optional[float] = None):
+        self.root = os.path.abspath(root)
+        self.squad_factory = squad_factory
+        self.queue = JobQueue(db_path or os.path.join(self.root, ".codex_cache", "night_shift.db"))
+        self.workers = max(1, workers or self.WORKERS)
+        self.token_budget = token_budget or self.TOKEN_BUDGET
+        self.time_budget = time_budget or self.TIME_BUDGET
+
+    def _estimate(self, usage: Dict[str, Any]) -> int:
+        return usage["tokens"] // usage["missions"] if usage["missions"] else self.MISSION_TOKENS
+
+    def _over_budget(self, shift_id: int, running: int = 0) -> Optional[str]:
+        usage = self.queue.shift(shift_id)
+        if usage["tokens"] + running * self._estimate(usage) >= self.token_budget:
+            return f"token budget ({usage['tokens']}/{self.token_budget})"
+        if usage["seconds"] >= self.time_budget:
+            return f"time budget ({self.time_budget:.0f}s)"
+        return None
+
+    def run(self, max_missions: int = 3, verification_cmd: str = "", resume: bool = True,
+            apply: bool = True) -> Generator[str, None, None]:
+        workers = 1 if apply else self.workers
+        recovered = self.queue.recover() if resume else 0
+        shift = self.queue.open_shift(resume)
+        shift_id = shift["id"]
+        if recovered:
+            yield f"♻️ Resumed {recovered} interrupted mission(s)."
+        if shift["missions"]:
+            yield (f"♻️ Continuing tonight's shift #{shift_id}: {shift['missions']} missions, "
+                   f"{shift['tokens']} tokens, {shift['seconds']:.0f}s used so far.")
+
+        messages: "queue.Queue[str]" = queue.Queue()
+        busy: Dict[int, str] = {}  # job id -> file
+        lock = threading.Lock()
+        dispatched = 0
+        stop_reason: Optional[str] = None
+        local = threading.local()
+        tick = time.monotonic()
+
+        def squad():
+            if getattr(local, "squad", None) is None:
+                local.squad = self.squad_factory()
+            return local.squad
+
+        def work(job):
+            mission = f"Fix the {job['type']} in {job['file']}. {job['description']}"
+            messages.put(f"🚀 Dispatching Squad [{job['type']} · p{job['priority']:.0f}]: '{mission}'")
+            mission_start = time.monotonic()
+            try:
+                report = squad().assign_mission(mission, apply=apply, autopilot=apply and bool(verification_cmd),
+                                                verification_cmd=verification_cmd)
+                status = report.get("autopilot_status") or report.get("apply_status") or "Done"
+                ok = not str(status).startswith("❌")
+                tokens = mission_tokens(report)
+            except Exception as e:
+                logger.error(f"Night Shift mission on {job['file']} failed: {e}")
+                status, ok, tokens = f"❌ {e}", False, estimate_tokens(mission)
+            self.queue.finish(job["id"], DONE if ok else FAILED, str(status), tokens)
+            self.queue.add_usage(shift_id, tokens, 0, 1)
+            messages.put(f"📋 {job['file']}: {status} ({tokens} tokens, {time.monotonic() - mission_start:.1f}s)")
+            with lock:
+                busy.pop(job["id"], None)
+
+        def checkpoint_time():
+            nonlocal tick
+            now = time.monotonic()
+            self.queue.add_usage(shift_id, 0, now - tick, 0)
+            tick = now
+
+        pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="night_shift")
+        try:
+            while True:
+                checkpoint_time()
+                with lock:
+                    free = workers - len(busy)
+                while free > 0 and dispatched < max_missions and stop_reason is None:
+                    with lock:
+                        running = len(busy)
+                    stop_reason = self._over_budget(shift_id)
+                    if stop_reason or self._over_budget(shift_id, running):
+                        break  # Spent, or spoken for by the running missions until they report
+                    with lock:
+                        job = self.queue.claim(busy.values())
+                        if job is None:
+                            break
+                        busy[job["id"]] = job["file"]
+                    dispatched += 1
+                    free -= 1
+                    yield f"🎯 Targeting: {job['file']} ({job['type']})"
+                    pool.submit(work, job)
+                while not messages.empty():
+                    yield messages.get()
+                with lock:
+                    idle = not busy
+                if idle and messages.empty():
+                    break
+                try:
+                    yield messages.get(timeout=0.2)
+                except queue.Empty:
+                    pass
+        finally:
+            pool.shutdown(wait=True)
+            checkpoint_time()
+            self.queue.close_shift(shift_id)
+        while not messages.empty():
+            yield messages.get()
+
+        if stop_reason:
+            yield f"🛑 Night Shift stopped: {stop_reason} spent."
+        elif dispatched >= max_missions:
+            yield "🛑 Max missions reached for this shift."
+        counts = self.queue.counts()
+        yield f"📊 Queue: {counts.get(DONE, 0)} done, {counts.get(FAILED, 0)} failed, {counts.get(PENDING, 0)} pending."
@@ -0,0 +1,302 @@
+"""
+🩹 PATCHES - Multi-file search/replace patches
+O LLM devolve só os trechos que mudam (blocos SEARCH/REPLACE com cabeçalho
+FILE:), em vez de reescrever arquivos inteiros. O patch é validado em memória
+e aplicado de forma atômica: ou todos os arquivos mudam, ou nenhum.
+
+Formato:
+    FILE: pkg/module.py
+    <<<<<<< SEARCH
+    linhas atuais (exatas)
+    =======
+    linhas novas
+    >>>>>>> REPLACE
+
+SEARCH vazio cria o arquivo (ou acrescenta ao final de um arquivo existente).
+"""
+
+import logging
+import os
+import re
+import tempfile
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+from codex_ia.core.safety import SafetyProtocol
+
+logger = logging.getLogger(__name__)
+
+PATCH_FORMAT_INSTRUCTIONS = """Return your changes ONLY as search/replace blocks, one per edit:
+
+FILE: relative/path/to/file.py
+<<<<<<< SEARCH
+exact existing lines to replace (copy them verbatim, keep it short but unique)
+=======
+the new lines
+>>>>>>> REPLACE
+
+- Repeat the FILE header before every block; several blocks may target the same file.
+- To create a new file, leave the SEARCH part empty and put the whole file in REPLACE.
+- Never resend unchanged code."""
+
+_FILE_RE = re.compile(r'^\s*(?:FILE|File|file|\*\*FILE\*\*)\s*:\s*`?([^`\s]+)`?\s*$')
+_SEARCH, _DIVIDER, _REPLACE = "<<<<<<< SEARCH", "=======", ">>>>>>> REPLACE"
+
+
+class PatchError(Exception):
+    pass
+
+
+@dataclass
+class Hunk:
+    path: str
+    search: str
+    replace: str
+    index: int = 0  # Position in the original patch text (for feedback)
+
+    def render(self) -> str:
+        return f"FILE: {self.path}\n{_SEARCH}\n{self.search}{_DIVIDER}\n{self.replace}{_REPLACE}\n"
+
+
+@dataclass
+class PatchResult:
+    applied: bool
+    files: List[str] = field(default_factory=list)
+    failed: List[Tuple[Hunk, str]] = field(default_factory=list)  # (hunk, reason)
+    valid: List[Hunk] = field(default_factory=list)  # Hunks that validated (kept for a retry)
+    backups: Dict[str, str] = field(default_factory=dict)
+    error: str = ""
+
+    def summary(self) -> str:
+        if self.applied:
+            return f"✅ Patched {len(self.files)} file(s): {', '.join(self.files)}"
+        reasons = "; ".join(f"{h.path} #{h.index + 1}: {reason}" for h, reason in self.failed)
+        return f"❌ Patch rejected ({self.error or reasons})"
+
+
+def parse_patch(text: str) -> List[Hunk]:
+    """Extracts SEARCH/REPLACE hunks; code fences and prose around them are ignored."""
+    hunks: List[Hunk] = []
+    path: Optional[str] = None
+    lines = text.splitlines(keepends=True)
+    i = 0
+    while i < len(lines):
+        line = lines[i]
+        match = _FILE_RE.match(line)
+        if match:
+            path = match.group(1).strip().strip("'\"")
+        elif line.strip() == _SEARCH:
+            if not path:
+                raise PatchError(f"SEARCH block at line {i + 1} has no FILE header")
+            search, replace = [], []
+            i += 1
+            while i < len(lines) and lines[i].strip() != _DIVIDER:
+                search.append(lines[i])
+                i += 1
+            i += 1
+            while i < len(lines) and lines[i].strip() != _REPLACE:
+                replace.append(lines[i])
+                i += 1
+            if i >= len(lines):
+                raise PatchError(f"Unterminated block for {path}")
+            hunks.append(Hunk(path, "".join(search), "".join(replace), len(hunks)))
+        i += 1
+    return hunks
+
+
+def _locate(content: str, search: str) -> Tuple[int, int, str]:
+    """(start, end, reason) of the single match of `search`; tolerates trailing-whitespace drift."""
+    count = content.count(search)
+    if count == 1:
+        start = content.index(search)
+        return start, start + len(search), ""
+    if count > 1:
+        return -1, -1, f"SEARCH text matches {count} places, add more context"
+
+    # Fallback: compare line by line ignoring trailing whitespace
+    wanted = [l.rstrip() for l in search.splitlines()]
+    lines = content.splitlines(keepends=True)
+    matches = [
+        i for i in range(len(lines) - len(wanted) + 1)
+        if [l.rstrip() for l in lines[i:i + len(wanted)]] == wanted
+    ] if wanted else []
+    if len(matches) == 1:
+        start = sum(len(l) for l in lines[:matches[0]])
+        end = start + sum(len(l) for l in lines[matches[0]:matches[0] + len(wanted)])
+        return start, end, ""
+    if len(matches) > 1:
+        return -1, -1, f"SEARCH text matches {len(matches)} places, add more context"
+    return -1, -1, "SEARCH text not found in the current file"
+
+
+def _resolve(root: str, rel_path: str) -> str:
+    full = os.path.abspath(os.path.join(root, rel_path))
+    if os.path.commonpath([full, os.path.abspath(root)]) != os.path.abspath(root):
+        raise PatchError(f"Path escapes the project root: {rel_path}")
+    return full
+
+
+def validate_patch(root: str, hunks: List[Hunk]) -> Tuple[Dict[str, Tuple[Optional[str], str]], List[Tuple[Hunk, str]]]:
+    """
+    Applies the hunks in memory, in order.
+    Returns ({rel_path: (original or None, new_content)}, failures).
+    """
+    files: Dict[str, Tuple[Optional[str], str]] = {}
+    failures: List[Tuple[Hunk, str]] = []
+    for hunk in hunks:
+        try:
+            full = _resolve(root, hunk.path)
+        except PatchError as e:
+            failures.append((hunk, str(e)))
+            continue
+        if hunk.path not in files:
+            original = None
+            if os.path.exists(full):
+                with open(full, "r", encoding="utf-8") as f:
+                    original = f.read()
+            files[hunk.path] = (original, original or "")
+        original, current = files[hunk.path]
+
+        if not hunk.search.strip():
+            if current and not current.endswith("\n"):
+                current += "\n"
+            files[hunk.path] = (original, current + hunk.replace)
+            continue
+        start, end, reason = _locate(current, hunk.search)
+        if reason:
+            failures.append((hunk, reason))
+            continue
+        files[hunk.path] = (original, current[:start] + hunk.replace + current[end:])
+    return files, failures
+
+
+def hunk_spans(root: str, hunks: List[Hunk]) -> Tuple[Dict[str, List[Tuple[int, int]]], List[Tuple[Hunk, str]]]:
+    """
+    Character span each hunk replaces in the current files ({rel_path: [(start, end)]}),
+    plus the hunks that do not match. An empty SEARCH (append) claims the end of the file.
+    """
+    spans: Dict[str, List[Tuple[int, int]]] = {}
+    failures: List[Tuple[Hunk, str]] = []
+    contents: Dict[str, str] = {}
+    for hunk in hunks:
+        if hunk.path not in contents:
+            try:
+                with open(_resolve(root, hunk.path), "r", encoding="utf-8") as f:
+                    contents[hunk.path] = f.read()
+            except PatchError as e:
+                failures.append((hunk, str(e)))
+                continue
+            except OSError:
+                contents[hunk.path] = ""
+        content = contents[hunk.path]
+        if not hunk.search.strip():
+            spans.setdefault(hunk.path, []).append((len(content), len(content)))
+            continue
+        start, end, reason = _locate(content, hunk.search)
+        if reason:
+            failures.append((hunk, reason))
+        else:
+            spans.setdefault(hunk.path, []).append((start, end))
+    return spans, failures
+
+
+def spans_overlap(a: Dict[str, List[Tuple[int, int]]], b: Dict[str, List[Tuple[int, int]]]) -> bool:
+    """True if two sets of hunk spans touch the same region of a file (adjacent edits count)."""
+    for path, ranges in a.items():
+        for start, end in ranges:
+            if any(start <= o_end and o_start <= end for o_start, o_end in b.get(path, ())):
+                return True
+    return False
+
+
+def _umask() -> int:
+    mask = os.umask(0)  # The only portable way to read it is to set it
+    os.umask(mask)
+    return mask
+
+
+def _atomic_write(path: str, content: str):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path) or ".", prefix=".codex_patch_")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(content)
+        if os.path.exists(path):
+            os.chmod(tmp, os.stat(path).st_mode & 0o7777)
+        else:  # mkstemp creates 0600; a new file should follow the umask like open() would
+            os.chmod(tmp, 0o666 & ~_umask())
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+
+def apply_patch(root: str, patch, safety: Optional[SafetyProtocol] = None, backup: bool = True) -> PatchResult:
+    """
+    Validates then writes every touched file; nothing is written unless all hunks apply.
+    A write error midway rolls back the files already written.
+    `patch` is the raw LLM text or a list of Hunks; `backup=False` skips the
+    SafetyProtocol copies (scratch worktrees).
+    """
+    try:
+        hunks = parse_patch(patch) if isinstance(patch, str) else list(patch)
+    except PatchError as e:
+        return PatchResult(False, error=str(e))
+    if not hunks:
+        return PatchResult(False, error="no SEARCH/REPLACE blocks found")
+
+    files, failures = validate_patch(root, hunks)
+    failed_ids = {id(h) for h, _ in failures}
+    valid = [h for h in hunks if id(h) not in failed_ids]
+    if failures:
+        return PatchResult(False, failed=failures, valid=valid)
+
+    safety = safety or (SafetyProtocol() if backup else None)
+    result = PatchResult(True, valid=valid)
+    written: List[Tuple[str, Optional[str]]] = []
+    try:
+        for rel, (original, new) in files.items():
+            if original == new:
+                continue
+            full = _resolve(root, rel)
+            if original is not None and safety:
+                result.backups[rel] = safety.create_backup(full)
+            _atomic_write(full, new)
+            written.append((full, original))
+            result.files.append(rel)
+    except Exception as e:
+        logger.error(f"Patch write failed, rolling back {len(written)} file(s): {e}")
+        for full, original in reversed(written):
+            if original is None:
+                os.remove(full)
+            else:
+                _atomic_write(full, original)
+        return PatchResult(False, valid=valid, error=f"write failed and was rolled back: {e}")
+    return result
+
+
+def failure_feedback(root: str, result: PatchResult, context_lines: int = 6) -> str:
+    """
+    Retry prompt listing only the rejected hunks, each with the closest region
+    of the current file, so the model resends just those hunks.
+    """
+    if result.error and not result.failed:
+        return f"Your patch could not be used: {result.error}.\n{PATCH_FORMAT_INSTRUCTIONS}"
+    parts = [f"{len(result.failed)} block(s) of your patch did not apply. "
+             f"The other {len(result.valid)} block(s) are kept; resend ONLY corrected versions of these:"]
+    for hunk, reason in result.failed:
+        parts.append(f"\n--- {hunk.path} (block #{hunk.index + 1}): {reason}\n{hunk.render()}")
+        try:
+            with open(_resolve(root, hunk.path), "r", encoding="utf-8") as f:
+                lines = f.read().splitlines()
+        except (OSError, PatchError):
+            parts.append("(file does not exist: use an empty SEARCH to create it)")
+            continue
+        first = next((l.strip() for l in hunk.search.splitlines() if l.strip()), "")
+        anchor = next((i for i, l in enumerate(lines) if first and first in l), None)
+        if anchor is not None:
+            lo, hi = max(anchor - context_lines, 0), min(anchor + context_lines + 1, len(lines))
+            window = "\n".join(f"{n + 1}: {lines[n]}" for n in range(lo, hi))
+            parts.append(f"Current lines {lo + 1}-{hi} of {hunk.path}:\n{window}")
+    return "\n".join(parts)
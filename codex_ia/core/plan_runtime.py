@@ -0,0 +1,166 @@
+"""
+🗺️ PLAN RUNTIME - Parallel, resumable execution of MultiStepPlanner plans
+Respeita as `dependencies` de cada passo (DAG via TaskGraph), roda passos
+independentes em paralelo, aplica `next_action` (retry com backoff / escalate
+interrompe o resto) e grava checkpoints em JSON para retomar após uma queda.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from codex_ia.core.task_graph import EventCallback, TaskGraph
+
+logger = logging.getLogger(__name__)
+
+StepExecutor = Callable[[Dict, Optional[Dict]], Dict]
+
+
+class StepFailed(Exception):
+    """Raised inside the graph so dependents of a failed step are skipped."""
+
+    def __init__(self, result: Dict):
+        super().__init__("; ".join(result.get("errors") or []) or "step failed")
+        self.result = result
+
+
+def plan_fingerprint(plan: Dict) -> str:
+    """Checkpoints only apply to the exact same list of steps."""
+    raw = json.dumps(plan.get("steps", []), sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()[:16]
+
+
+class PlanRuntime:
+    """
+    Usage:
+        runtime = PlanRuntime(planner.execute_step, checkpoint_path=".codex_plan.json")
+        report = runtime.run(plan)   # call again after a crash to resume
+    `execute_step(step, context)` returns {"success", "output", "errors", "next_action"}.
+    """
+
+    def __init__(self, execute_step: StepExecutor, max_workers: int = 4, max_retries: int = 2,
+                 retry_delay: float = 0.5, checkpoint_path: Optional[str] = None,
+                 on_event: Optional[EventCallback] = None):
+        self.execute_step = execute_step
+        self.max_workers = max_workers
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+        self.checkpoint_path = checkpoint_path
+        self.on_event = on_event
+
+    # --- Checkpoints ---
+
+    def load_checkpoint(self, plan: Dict) -> Dict[str, Dict]:
+        """Successful step results from a previous run of the same plan."""
+        if not self.checkpoint_path or not os.path.exists(self.checkpoint_path):
+            return {}
+        try:
+            with open(self.checkpoint_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable checkpoint {self.checkpoint_path}: {e}")
+            return {}
+        if data.get("fingerprint") != plan_fingerprint(plan):
+            return {}
+        return {sid: r for sid, r in data.get("steps", {}).items() if r.get("success")}
+
+    def _save_checkpoint(self, plan: Dict, step_results: Dict[str, Dict]):
+        if not self.checkpoint_path:
+            return
+        data = {
+            "goal": plan.get("goal"),
+            "fingerprint": plan_fingerprint(plan),
+            "updated_at": time.time(),
+            "steps": step_results,
+        }
+        tmp = f"{self.checkpoint_path}.tmp"
+        try:
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(data, f, ensure_ascii=False, indent=2, default=str)
+            os.replace(tmp, self.checkpoint_path)
+        except OSError as e:
+            logger.warning(f"Checkpoint write failed: {e}")
+
+    # --- Execution ---
+
+    def _run_step(self, step: Dict, context: Optional[Dict], done: Dict[str, Any]) -> Dict:
+        deps = {str(d): (done.get(str(d)) or {}).get("output") for d in step.get("dependencies", [])}
+        step_context = dict(context or {}, dependency_outputs=deps) if deps else context
+        attempts = 0
+        while True:
+            attempts += 1
+            try:
+                result = dict(self.execute_step(step, step_context) or {})
+            except Exception as e:
+                result = {"success": False, "output": "", "errors": [str(e)], "next_action": "retry"}
+            result.setdefault("errors", [])
+            result.setdefault("next_action", "continue")
+            result["attempts"] = attempts
+            if result.get("success"):
+                return result
+            if result["next_action"] == "retry" and attempts <= self.max_retries:
+                time.sleep(self.retry_delay * (2 ** (attempts - 1)))
+                continue
+            raise StepFailed(result)
+
+    def run(self, plan: Dict, context: Optional[Dict] = None, resume: bool = True) -> Dict:
+        steps = {str(s["id"]): s for s in plan.get("steps", [])}
+        resumed = self.load_checkpoint(plan) if resume else {}
+        resumed = {sid: r for sid, r in resumed.items() if sid in steps}
+        step_results: Dict[str, Dict] = dict(resumed)
+        escalated: List[str] = []
+
+        def on_event(event, name, payload):
+            if event == "done":
+                step_results[name] = dict(payload, step_id=steps[name]["id"], duration=round(graph.timings.get(name, 0.0), 3))
+                self._save_checkpoint(plan, step_results)
+            elif event == "error":
+                result = payload.result if isinstance(payload, StepFailed) else {
+                    "success": False, "output": "", "errors": [str(payload)], "next_action": "escalate"}
+                step_results[name] = dict(result, step_id=steps[name]["id"], duration=round(graph.timings.get(name, 0.0), 3))
+                self._save_checkpoint(plan, step_results)
+                if result.get("next_action") == "escalate":
+                    print(f"🚨 Erro crítico no passo {name}, parando execução")
+                    escalated.append(name)
+                    graph.cancel()
+            if self.on_event:
+                self.on_event(event, name, payload)
+
+        graph = TaskGraph(max_workers=self.max_workers, on_event=on_event)
+        for sid, step in steps.items():
+            if sid in resumed:
+                continue
+            deps = [str(d) for d in step.get("dependencies", [])]
+            unknown = [d for d in deps if d not in steps]
+            if unknown:
+                logger.warning(f"Step {sid} depends on unknown steps {unknown}; ignoring them")
+            graph.add(sid, lambda done, step=step: self._run_step(step, context, done),
+                      deps=[d for d in deps if d in steps])
+
+        try:
+            graph.run(initial={sid: r for sid, r in resumed.items()})
+        except ValueError as e:  # Dependency cycle
+            return {"completed_steps": 0, "failed_steps": len(steps), "skipped_steps": 0, "results": [],
+                    "final_status": "failed", "error": str(e), "timings": {}, "resumed": []}
+
+        for sid in graph.skipped:
+            step_results.setdefault(sid, {"success": False, "output": "", "step_id": steps[sid]["id"],
+                                          "errors": ["skipped: dependency failed or plan escalated"],
+                                          "next_action": "skipped"})
+        completed = sum(1 for r in step_results.values() if r.get("success"))
+        failed = len(steps) - completed
+        ordered = [step_results[sid] for sid in steps if sid in step_results]
+        return {
+            "completed_steps": completed,
+            "failed_steps": failed,
+            "skipped_steps": len(graph.skipped),
+            "results": ordered,
+            "final_status": "success" if failed == 0 else ("partial" if completed > 0 else "failed"),
+            "escalated": escalated,
+            "resumed": sorted(resumed, key=lambda sid: list(steps).index(sid)),
+            "timings": {sid: round(sec, 3) for sid, sec in graph.timings.items()},
+            "wall_time": round(graph.wall_time, 3),
+        }
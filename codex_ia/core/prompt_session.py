@@ -0,0 +1,176 @@
+"""
+📨 PROMPT SESSION - Incremental prompts for the ReAct loop
+Em vez de reenviar system prompt + contexto + histórico inteiro a cada passo,
+o loop mantém uma lista de mensagens: o Gemini recebe só os turnos novos numa
+chat session dedicada, provedores OpenAI-compatíveis recebem a lista com o
+prefixo inalterado (prefix caching automático) e cada passo contabiliza tokens.
+"""
+
+import json
+import logging
+import uuid
+from typing import Dict, List, Optional
+
+from codex_ia.core.conversation_memory import estimate_tokens
+from codex_ia.core.tool_protocol import TOOL_CALLS_MARKER, format_observations
+
+logger = logging.getLogger(__name__)
+
+
+def flatten_messages(messages: List[Dict]) -> str:
+    """Single-prompt rendering of the message list (text-only providers, failover)."""
+    lines = []
+    for msg in messages:
+        role = msg["role"]
+        if role == "system":
+            lines.append(msg["content"] + "\n")
+        elif role == "user":
+            lines.append(f"USER: {msg['content']}")
+        elif role == "assistant":
+            text = msg.get("content") or ""
+            if msg.get("tool_calls"):
+                text += f"\n{TOOL_CALLS_MARKER}: " + json.dumps(
+                    [{"name": c["name"], "args": c["args"]} for c in msg["tool_calls"]], ensure_ascii=False
+                )
+            lines.append(f"AGENT: {text}")
+        elif role == "tool":
+            lines.append(f"SYSTEM: 👀 OBSERVATION [{msg['name']}]:\n{msg['content']}")
+    return "\n".join(lines) + "\n"
+
+
+class PromptSession:
+    """
+    Message list for one CodexAgent.chat call. `send()` picks the brain through
+    the router and uses, in order of preference:
+    1. `open_session`/`send_delta` (Gemini): only messages the session hasn't seen;
+    2. `send_messages` (OpenAI-compatible): the full list, stable prefix first;
+    3. `router.send_message`: the flattened transcript (legacy path, keeps failover).
+    """
+
+    def __init__(self, router, system: str, tool_schemas: Optional[List[Dict]] = None,
+                 use_fallback: bool = True, task_type: str = 'general'):
+        self.router = router
+        self.tool_schemas = tool_schemas
+        self.use_fallback = use_fallback
+        self.task_type = task_type
+        self.messages: List[Dict] = [{"role": "system", "content": system}]
+        self.totals = {"full_prompt_tokens": 0, "new_tokens": 0, "cached_tokens": 0, "saved_tokens": 0}
+        self._sessions: Dict[str, list] = {}  # brain -> [chat session, messages already sent]
+        self._last_brain: Optional[str] = None
+
+    # --- Building the conversation ---
+
+    def add_user(self, content: str):
+        self.messages.append({"role": "user", "content": content})
+
+    def add_assistant(self, text: str, tool_calls: Optional[List] = None, brain: Optional[str] = None):
+        """Records the model turn; `tool_calls` only for native function calls."""
+        msg = {"role": "assistant", "content": text, "brain": brain}
+        if tool_calls:
+            msg["tool_calls"] = [{"id": c.id, "name": c.name, "args": c.args} for c in tool_calls]
+        self.messages.append(msg)
+
+    def add_tool_results(self, results: List, native: bool):
+        """Native calls get one tool message per result; text-protocol calls one observation turn."""
+        if native:
+            for r in results:
+                self.messages.append({
+                    "role": "tool", "tool_call_id": r.call.id, "name": r.call.name, "content": r.output
+                })
+        else:
+            self.add_user(format_observations(results))
+
+    def transcript(self) -> str:
+        return flatten_messages(self.messages)
+
+    # --- Sending ---
+
+    def _native_consistent(self, brain_name: str) -> bool:
+        """True if every native tool call in the list came from `brain_name`."""
+        return all(
+            m.get("brain") == brain_name
+            for m in self.messages if m["role"] == "assistant" and m.get("tool_calls")
+        )
+
+    def _collapsed(self) -> List[Dict]:
+        """System + whole conversation as one user turn (for a brain joining mid-loop)."""
+        return [{"role": "user", "content": flatten_messages(self.messages[1:])}]
+
+    def _send_session(self, name: str, brain) -> Dict:
+        entry = self._sessions.get(name)
+        joined_mid_loop = self._last_brain not in (None, name)
+        opened = entry is None or joined_mid_loop
+        if opened:
+            entry = [brain.open_session(self.messages[0]["content"], self.tool_schemas), 1]
+            self._sessions[name] = entry
+            delta = self._collapsed() if joined_mid_loop else self.messages[1:]
+        else:
+            delta = [m for m in self.messages[entry[1]:] if m["role"] != "assistant"]
+        reply = brain.send_delta(entry[0], delta)
+        entry[1] = len(self.messages)
+        reply["new_tokens"] = sum(estimate_tokens(m["content"]) for m in delta)
+        if opened:  # The first send also carries the system prompt
+            reply["new_tokens"] += estimate_tokens(self.messages[0]["content"])
+        return reply
+
+    def _send_stateless(self, name: str, brain) -> Dict:
+        messages = self.messages if self._native_consistent(name) else self.messages[:1] + self._collapsed()
+        clean = [{k: v for k, v in m.items() if k != "brain"} for m in messages]
+        reply = brain.send_messages(clean, self.tool_schemas)
+        if reply is not None:
+            reply["new_tokens"] = estimate_tokens(flatten_messages(messages))
+        return reply
+
+    def send(self) -> Dict:
+        """
+        One round-trip. Returns {"text", "tool_calls", "brain", "native", "tokens"};
+        `native` is True when the provider returned function calls, which carry
+        an "id" so results can be matched on the next turn.
+        """
+        full = estimate_tokens(self.transcript())
+        reply, name = None, None
+
+        if hasattr(self.router, "pick_brain"):
+            name, brain = self.router.pick_brain(self.use_fallback)
+            try:
+                if brain is not None and hasattr(brain, "open_session"):
+                    reply = self._send_session(name, brain)
+                elif brain is not None and hasattr(brain, "send_messages"):
+                    reply = self._send_stateless(name, brain)
+            except Exception as e:
+                logger.warning(f"⚠️ Incremental send failed on {name}: {e}")
+                if self.router.is_rate_limited(e):
+                    self.router.put_to_sleep(name)
+                self._sessions.pop(name, None)
+                reply = None
+
+        if reply is None:
+            text = self.router.send_message(self.transcript(), use_fallback=self.use_fallback, task_type=self.task_type)
+            reply = {"text": text, "tool_calls": [], "usage": {}, "new_tokens": full}
+            name = None
+
+        for call in reply["tool_calls"]:
+            call["id"] = call.get("id") or uuid.uuid4().hex[:8]
+        self._last_brain = name or "router"  # Sessions must resync after a legacy send
+
+        usage = reply.get("usage") or {}
+        provider_prompt = usage.get("prompt_tokens", 0)
+        cached = usage.get("cached_tokens", 0)
+        uncached = provider_prompt - cached if provider_prompt else reply["new_tokens"]
+        tokens = {
+            "full_prompt_tokens": full,  # What re-sending the whole prompt would cost
+            "new_tokens": reply["new_tokens"],
+            "provider_prompt_tokens": provider_prompt,
+            "cached_tokens": cached,
+            "saved_tokens": max(full - uncached, 0),
+        }
+        for key in self.totals:
+            self.totals[key] += tokens[key]
+
+        return {
+            "text": reply["text"] or "",
+            "tool_calls": reply["tool_calls"],
+            "brain": name,
+            "native": bool(reply["tool_calls"]),
+            "tokens": tokens,
+        }
@@ -0,0 +1,121 @@
+"""
+🧪 PYTEST STREAM - Plugin pytest que grava um evento JSON por teste
+Carregado com `-p codex_ia.core.pytest_stream`. Cada resultado é escrito (e
+flushado) em CODEX_TEST_EVENTS assim que o teste termina, para quem estiver
+lendo o arquivo reagir antes do fim da suíte. Falhas levam a exceção e os
+frames do projeto já estruturados. CODEX_TEST_SHARD aponta para um arquivo
+com os nodeids que este processo deve rodar.
+"""
+
+import json
+import os
+
+import pytest
+
+from codex_ia.core.pytest_stream_env import EVENTS_ENV, SHARD_ENV
+
+MAX_CAPTURE = 2000  # Chars of captured stdout/stderr kept per test
+MAX_FRAMES = 6  # Innermost project frames kept per failure
+MAX_MESSAGE = 1000
+
+_stream = None
+_pending = {}  # nodeid -> phases seen so far
+
+
+def _emit(event):
+    if _stream:
+        _stream.write(json.dumps(event, ensure_ascii=False, default=str) + "\n")
+        _stream.flush()
+
+
+def pytest_configure(config):
+    global _stream
+    path = os.environ.get(EVENTS_ENV)
+    if path:
+        _stream = open(path, "a", encoding="utf-8")
+
+
+def pytest_unconfigure(config):
+    global _stream
+    if _stream:
+        _stream.close()
+        _stream = None
+
+
+def _frames(excinfo, rootdir: str):
+    """Innermost frames inside the project (falls back to the last frame)."""
+    frames = []
+    for entry in excinfo.traceback:
+        path = str(entry.path)
+        frames.append({
+            "path": path,
+            "line": entry.lineno + 1,
+            "function": entry.name,
+            "code": str(entry.statement).strip().splitlines()[0] if entry.statement else "",
+            "project": path.startswith(rootdir + os.sep) and "site-packages" not in path,
+        })
+    project = [f for f in frames if f["project"]]
+    return (project or frames[-1:])[-MAX_FRAMES:]
+
+
+@pytest.hookimpl(hookwrapper=True)
+def pytest_runtest_makereport(item, call):
+    outcome = yield
+    report = outcome.get_result()
+    excinfo = call.excinfo
+    if excinfo is None or report.skipped:
+        return
+    try:
+        rootdir = str(item.config.rootpath)
+        report.codex_failure = {
+            "exc_type": excinfo.typename,
+            "message": str(excinfo.value)[:MAX_MESSAGE],
+            "frames": _frames(excinfo, rootdir),
+        }
+    except Exception:
+        pass  # Never break the run over the structured extras
+
+
+def pytest_collection_modifyitems(session, config, items):
+    path = os.environ.get(SHARD_ENV)
+    if not path:
+        return
+    with open(path, "r", encoding="utf-8") as f:
+        wanted = {line.strip() for line in f if line.strip()}
+    deselected = [item for item in items if item.nodeid not in wanted]
+    if deselected:
+        config.hook.pytest_deselected(items=deselected)
+        items[:] = [item for item in items if item.nodeid in wanted]
+
+
+def pytest_collection_finish(session):
+    for item in session.items:
+        _emit({"event": "collected", "nodeid": item.nodeid})
+
+
+def pytest_collectreport(report):
+    if report.failed:
+        _emit({"event": "result", "nodeid": report.nodeid or "<collection>", "outcome": "error",
+               "when": "collect", "duration": 0.0, "longrepr": str(report.longrepr)})
+
+
+def pytest_runtest_logreport(report):
+    state = _pending.setdefault(report.nodeid, {"duration": 0.0, "outcome": "passed", "when": "call",
+                                                "longrepr": "", "capture": ""})
+    state["duration"] += report.duration
+    if report.failed or report.skipped:
+        if state["outcome"] == "passed":
+            if report.skipped:
+                state["outcome"] = "xfailed" if hasattr(report, "wasxfail") else "skipped"
+            else:
+                state["outcome"] = "failed" if report.when == "call" else "error"
+            state["when"] = report.when
+            state["longrepr"] = str(report.longrepr) if report.longrepr else ""
+            state.update(getattr(report, "codex_failure", {}))
+        capture = (report.capstdout + report.capstderr)[-MAX_CAPTURE:]
+        if capture:
+            state["capture"] = capture
+    if report.when == "teardown":
+        _pending.pop(report.nodeid, None)
+        _emit(dict(state, event="result", nodeid=report.nodeid, duration=round(state["duration"], 4),
+                   location=list(report.location)))
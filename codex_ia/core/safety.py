@@ -1,11 +1,15 @@
 import os
 import shutil
 import time
+import hashlib
+import itertools
 import logging
 from typing import Optional, List
 
 logger = logging.getLogger(__name__)
 
+_sequence = itertools.count()
+
 class SafetyProtocol:
     """
     Enforces safety guidelines for AI agents.
@@ -21,6 +25,12 @@ class SafetyProtocol:
         os.makedirs(self.QUARANTINE_DIR, exist_ok=True)
         os.makedirs(self.BACKUP_DIR, exist_ok=True)
 
+    @staticmethod
+    def _stamped_name(file_path: str, suffix: str) -> str:
+        """`name.<path digest>.<ns timestamp>-<seq>.suffix`: same-named files never collide."""
+        digest = hashlib.sha1(os.path.abspath(file_path).encode("utf-8")).hexdigest()[:8]
+        return f"{os.path.basename(file_path)}.{digest}.{time.time_ns()}-{next(_sequence)}.{suffix}"
+
     def create_backup(self, file_path: str) -> str:
         """
         Creates a backup of a file before modification.
@@ -29,9 +39,7 @@ class SafetyProtocol:
         if not os.path.exists(file_path):
             return None
             
-        timestamp = int(time.time())
-        filename = os.path.basename(file_path)
-        backup_path = os.path.join(self.BACKUP_DIR, f"{filename}.{timestamp}.bak")
+        backup_path = os.path.join(self.BACKUP_DIR, self._stamped_name(file_path, "bak"))
         
         try:
             shutil.copy2(file_path, backup_path)
@@ -48,9 +56,7 @@ class SafetyProtocol:
         if not os.path.exists(file_path):
             return None
             
-        timestamp = int(time.time())
-        filename = os.path.basename(file_path)
-        quarantine_path = os.path.join(self.QUARANTINE_DIR, f"{filename}.{timestamp}.quarantine")
+        quarantine_path = os.path.join(self.QUARANTINE_DIR, self._stamped_name(file_path, "quarantine"))
         
         try:
             # Copy to quarantine (don't move, let the caller delete/revert if they want)
@@ -0,0 +1,299 @@
+"""
+⚡ SHARD RUNNER - Execução paralela da suíte pytest em N processos
+Coleta os testes, distribui entre os workers pelo tempo histórico de cada um
+(LPT: o mais lento primeiro, sempre no shard mais leve), junta tudo num
+relatório estruturado por teste e transmite cada falha assim que ela acontece
+(via plugin pytest_stream), sem esperar os outros shards.
+"""
+
+import heapq
+import json
+import logging
+import os
+import shutil
+import sys
+import tempfile
+import time
+from dataclasses import asdict, dataclass, field
+from typing import Callable, Dict, List, Optional, Tuple
+
+from codex_ia.core.executor import clip, get_executor
+from codex_ia.core.pytest_stream_env import EVENTS_ENV, SHARD_ENV
+
+logger = logging.getLogger(__name__)
+
+PLUGIN = "codex_ia.core.pytest_stream"
+# Directory that makes `codex_ia` importable inside the pytest subprocesses
+_PACKAGE_PARENT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+FAILED_OUTCOMES = ("failed", "error")
+
+
+@dataclass
+class CaseResult:
+    nodeid: str
+    outcome: str  # passed | failed | error | skipped | xfailed
+    duration: float = 0.0
+    longrepr: str = ""
+    capture: str = ""
+    when: str = "call"
+    shard: int = -1
+    location: List = field(default_factory=list)
+    exc_type: str = ""
+    message: str = ""
+    frames: List[Dict] = field(default_factory=list)  # {"path", "line", "function", "code", "project"}
+
+    @property
+    def failed(self) -> bool:
+        return self.outcome in FAILED_OUTCOMES
+
+
+@dataclass
+class SuiteReport:
+    results: List[CaseResult]
+    shards: List[Dict]  # {"index", "tests", "estimate", "duration", "returncode", "timed_out"}
+    wall_time: float = 0.0
+    collect_time: float = 0.0
+    error: str = ""  # Collection/startup problem that prevented running
+
+    @property
+    def failures(self) -> List[CaseResult]:
+        return [r for r in self.results if r.failed]
+
+    @property
+    def passed(self) -> bool:
+        return not self.error and not self.failures
+
+    def counts(self) -> Dict[str, int]:
+        counts: Dict[str, int] = {}
+        for r in self.results:
+            counts[r.outcome] = counts.get(r.outcome, 0) + 1
+        return counts
+
+    def summary(self) -> str:
+        counts = ", ".join(f"{n} {outcome}" for outcome, n in sorted(self.counts().items())) or "no tests"
+        return f"{counts} in {self.wall_time:.2f}s ({len(self.shards)} shards)"
+
+    def output(self, limit: int = 20000) -> str:
+        """pytest-like text: failure tracebacks, then the summary line."""
+        parts = [f"___ {r.nodeid} [{r.outcome}] ___\n{r.longrepr}\n" for r in self.failures]
+        if self.error:
+            parts.append(self.error)
+        parts.append(self.summary())
+        return clip("\n".join(parts), limit)
+
+    def to_dict(self) -> Dict:
+        return {"passed": self.passed, "summary": self.summary(), "wall_time": round(self.wall_time, 3),
+                "results": [asdict(r) for r in self.results], "shards": self.shards, "error": self.error}
+
+
+class ShardedRunner:
+    """
+    Usage:
+        runner = ShardedRunner(project_root, workers=4)
+        report = runner.run(on_failure=lambda case: start_analysis(case))
+    Durations are remembered in `.codex_cache/test_durations.json` to balance the next run.
+    """
+    DEFAULT_DURATION = 0.2  # Estimate for tests never seen before
+    POLL_INTERVAL = 0.05
+    DIRECT_MAX_FILES = 4  # Explicit selections up to this many test files skip collection and sharding
+
+    def __init__(self, root: str, workers: Optional[int] = None, args: Optional[List[str]] = None,
+                 timeout: float = 60, durations_path: Optional[str] = None, python: str = sys.executable):
+        self.root = os.path.abspath(root)
+        self.workers = max(1, workers or min(os.cpu_count() or 2, 4))
+        self.args = list(args or [])  # Extra pytest args / paths to restrict collection
+        self.timeout = timeout
+        self.durations_path = durations_path or os.path.join(self.root, ".codex_cache", "test_durations.json")
+        self.python = python
+
+    # --- Durations history ---
+
+    def load_durations(self) -> Dict[str, float]:
+        try:
+            with open(self.durations_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def save_durations(self, results: List[CaseResult]):
+        durations = self.load_durations()
+        for r in results:
+            if r.when not in ("collect", "shard"):
+                old = durations.get(r.nodeid)
+                durations[r.nodeid] = round(r.duration if old is None else 0.5 * old + 0.5 * r.duration, 4)
+        try:
+            os.makedirs(os.path.dirname(self.durations_path), exist_ok=True)
+            tmp = f"{self.durations_path}.tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(durations, f, indent=0, sort_keys=True)
+            os.replace(tmp, self.durations_path)
+        except OSError as e:
+            logger.debug(f"Could not save test durations: {e}")
+
+    # --- Planning ---
+
+    def _env(self, events_path: str, shard_path: Optional[str] = None) -> Dict[str, str]:
+        pythonpath = os.pathsep.join(p for p in (_PACKAGE_PARENT, os.environ.get("PYTHONPATH")) if p)
+        env = {"PYTHONPATH": pythonpath, EVENTS_ENV: events_path}
+        if shard_path:
+            env[SHARD_ENV] = shard_path
+        return env
+
+    def _command(self, *extra: str) -> List[str]:
+        return [self.python, "-m", "pytest", "-p", PLUGIN, *extra, *self.args]
+
+    def _direct(self) -> bool:
+        """One plain pytest run is cheaper than collect + shards: a single worker or a few named test files."""
+        if self.workers == 1:
+            return True
+        targets = [a for a in self.args if not a.startswith("-")]
+        return 0 < len(targets) <= self.DIRECT_MAX_FILES and all(
+            os.path.isfile(os.path.join(self.root, t.split("::", 1)[0])) for t in targets)
+
+    def collect(self, workdir: str) -> Tuple[List[str], List[Dict], str]:
+        """Collected nodeids, collection errors and pytest's output if it failed."""
+        events_path = os.path.join(workdir, "collect.jsonl")
+        result = get_executor().run(self._command("--collect-only", "-q", "--continue-on-collection-errors"),
+                                    cwd=self.root, timeout=self.timeout, env=self._env(events_path))
+        events = _read_events(events_path, 0)[0]
+        nodeids = [e["nodeid"] for e in events if e.get("event") == "collected"]
+        errors = [e for e in events if e.get("event") == "result"]
+        failure = ""
+        if result.error or result.timed_out or (not nodeids and result.returncode not in (0, 5)):
+            failure = result.error or clip(result.output, 4000) or "pytest collection timed out"
+        return nodeids, errors, failure
+
+    def plan(self, nodeids: List[str], durations: Optional[Dict[str, float]] = None) -> List[Dict]:
+        """LPT schedule: longest known test first, always onto the least loaded shard."""
+        durations = self.load_durations() if durations is None else durations
+        known = sorted(durations[n] for n in nodeids if n in durations)
+        fallback = known[len(known) // 2] if known else self.DEFAULT_DURATION
+        estimates = {n: durations.get(n, fallback) for n in nodeids}
+        count = max(1, min(self.workers, len(nodeids)))
+        heap = [(0.0, i) for i in range(count)]
+        shards = [{"index": i, "tests": [], "estimate": 0.0} for i in range(count)]
+        for nodeid in sorted(nodeids, key=lambda n: -estimates[n]):
+            load, i = heapq.heappop(heap)
+            shards[i]["tests"].append(nodeid)
+            shards[i]["estimate"] = round(load + estimates[nodeid], 4)
+            heapq.heappush(heap, (load + estimates[nodeid], i))
+        return [s for s in shards if s["tests"]]
+
+    # --- Execution ---
+
+    def run(self, on_result: Optional[Callable[[CaseResult], None]] = None,
+            on_failure: Optional[Callable[[CaseResult], None]] = None,
+            nodeids: Optional[List[str]] = None) -> SuiteReport:
+        """
+        Runs every collected test (or `nodeids`) across the shards; callbacks fire as results arrive.
+        A small explicit selection (see `_direct`) runs in one pytest process with no collection pass.
+        """
+        start = time.perf_counter()
+        workdir = tempfile.mkdtemp(prefix="codex_shards_")
+        results: Dict[str, CaseResult] = {}
+
+        def record(event: Dict, shard: int):
+            if event.get("event") != "result":
+                return
+            case = CaseResult(
+                nodeid=event["nodeid"], outcome=event.get("outcome", "error"),
+                duration=float(event.get("duration") or 0.0), longrepr=event.get("longrepr", ""),
+                capture=event.get("capture", ""), when=event.get("when", "call"), shard=shard,
+                location=event.get("location") or [], exc_type=event.get("exc_type", ""),
+                message=event.get("message", ""), frames=event.get("frames") or [],
+            )
+            if case.nodeid in results:  # Collection errors repeat in every shard
+                return
+            results[case.nodeid] = case
+            for callback in (on_result, on_failure if case.failed else None):
+                if callback:
+                    try:
+                        callback(case)
+                    except Exception as e:
+                        logger.warning(f"Test result callback failed: {e}")
+
+        try:
+            direct = nodeids is None and self._direct()
+            if direct:
+                shards = [{"index": 0, "tests": [], "estimate": 0.0}]
+            elif nodeids is None:
+                nodeids, collect_errors, failure = self.collect(workdir)
+                for event in collect_errors:
+                    record(event, -1)
+                if failure:
+                    return SuiteReport(list(results.values()), [], time.perf_counter() - start,
+                                       time.perf_counter() - start, error=failure)
+            collect_time = time.perf_counter() - start
+            if not direct:
+                shards = self.plan(nodeids)
+
+            running = []
+            for shard in shards:
+                shard_path = None if direct else os.path.join(workdir, f"shard{shard['index']}.txt")
+                events_path = os.path.join(workdir, f"shard{shard['index']}.jsonl")
+                if shard_path:
+                    with open(shard_path, "w", encoding="utf-8") as f:
+                        f.write("\n".join(shard["tests"]) + "\n")
+                open(events_path, "w").close()
+                proc = get_executor().submit(
+                    self._command("-q", "--continue-on-collection-errors", "-p", "no:cacheprovider"),
+                    cwd=self.root, timeout=self.timeout, env=self._env(events_path, shard_path))
+                running.append({"shard": shard, "handle": proc, "events": events_path, "offset": 0})
+
+            # Stream results while the shards run
+            pending = list(running)
+            while pending:
+                for item in list(pending):
+                    finished = item["handle"].done()
+                    events, item["offset"] = _read_events(item["events"], item["offset"])
+                    for event in events:
+                        if direct and event.get("event") == "collected":
+                            item["shard"]["tests"].append(event["nodeid"])
+                        record(event, item["shard"]["index"])
+                    if finished:
+                        pending.remove(item)
+                if pending:
+                    time.sleep(self.POLL_INTERVAL)
+
+            for item in running:
+                shard, outcome = item["shard"], item["handle"].result()
+                shard.update(duration=round(outcome.duration, 3), returncode=outcome.returncode,
+                             timed_out=outcome.timed_out)
+                if direct:
+                    nodeids = shard["tests"]
+                    if not nodeids and not results and outcome.returncode not in (0, 5):
+                        error = outcome.error or clip(outcome.output, 4000) or "pytest timed out"
+                        return SuiteReport([], shards, time.perf_counter() - start, collect_time, error=error)
+                missing = [n for n in shard["tests"] if n not in results]
+                if missing:  # Crashed, killed or timed out before reporting these
+                    reason = f"timed out after {self.timeout}s" if outcome.timed_out else \
+                        f"exited with {outcome.returncode} before reporting"
+                    tail = clip(outcome.output, 2000)
+                    for nodeid in missing:
+                        record({"event": "result", "nodeid": nodeid, "outcome": "error", "when": "shard",
+                                "longrepr": f"Shard {shard['index']} {reason}\n{tail}"}, shard["index"])
+
+            ordered = [results[n] for n in nodeids if n in results]
+            ordered += [r for n, r in results.items() if n not in set(nodeids)]
+            self.save_durations(ordered)
+            return SuiteReport(ordered, shards, time.perf_counter() - start, collect_time)
+        finally:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+
+def _read_events(path: str, offset: int) -> Tuple[List[Dict], int]:
+    """Complete JSON lines written after `offset` (a partial last line is left for the next poll)."""
+    try:
+        with open(path, "rb") as f:
+            f.seek(offset)
+            data = f.read()
+    except OSError:
+        return [], offset
+    end = data.rfind(b"\n") + 1
+    events = []
+    for line in data[:end].splitlines():
+        try:
+            events.append(json.loads(line))
+        except ValueError:
+            continue
+    return events, offset + end
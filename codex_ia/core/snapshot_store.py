@@ -0,0 +1,269 @@
+"""
+📸 SNAPSHOT STORE - Versões de arquivos endereçadas por conteúdo
+Cada mudança vira um blob zlib nomeado pelo sha256 (conteúdo repetido não
+ocupa espaço de novo) e uma entrada no log de versões do arquivo, marcada
+como boa/ruim pelas verificações. Restaurar a última versão boa é uma leitura
+de blob; a retenção limita versões por arquivo e o espaço total em disco.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+import zlib
+from dataclasses import asdict, dataclass
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+GOOD, BAD, UNKNOWN = "good", "bad", "unknown"
+
+
+@dataclass
+class Version:
+    seq: int
+    path: str  # Relative to the store's root
+    hash: str
+    size: int
+    stored: int  # Compressed blob size
+    time: float
+    status: str = UNKNOWN
+
+
+class SnapshotStore:
+    """
+    Usage:
+        store = SnapshotStore(project_root)
+        version = store.capture("app.py")        # On every change event
+        store.mark(version, GOOD)                # After the checks pass
+        store.restore("app.py", store.last_good("app.py"))
+    Layout: <store_dir>/blobs/ab/<sha256> and <store_dir>/versions.jsonl.
+    """
+    MAX_VERSIONS_PER_FILE = 50
+    MAX_BYTES = 200 * 1024 * 1024  # Compressed blobs
+    MAX_FILE_BYTES = 20 * 1024 * 1024  # Larger files are not snapshotted
+
+    def __init__(self, root: str, store_dir: Optional[str] = None, max_versions: Optional[int] = None,
+                 max_bytes: Optional[int] = None):
+        self.root = os.path.abspath(root)
+        self.store_dir = store_dir or os.path.join(self.root, ".codex_cache", "snapshots")
+        self.blob_dir = os.path.join(self.store_dir, "blobs")
+        self.log_path = os.path.join(self.store_dir, "versions.jsonl")
+        self.max_versions = max_versions or self.MAX_VERSIONS_PER_FILE
+        self.max_bytes = max_bytes or self.MAX_BYTES
+        self._versions: Dict[str, List[Version]] = {}  # path -> versions, oldest first
+        self._by_seq: Dict[int, Version] = {}
+        self._good: Dict[str, Version] = {}  # path -> latest good version (O(1) revert target)
+        self._blob_refs: Dict[str, int] = {}  # hash -> versions referencing it
+        self._blob_sizes: Dict[str, int] = {}
+        self._bytes = 0
+        self._seq = 0
+        self._lock = threading.RLock()
+        os.makedirs(self.blob_dir, exist_ok=True)
+        self._load()
+
+    # --- Log ---
+
+    def _load(self):
+        try:
+            with open(self.log_path, "r", encoding="utf-8") as f:
+                lines = f.readlines()
+        except OSError:
+            return
+        for line in lines:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue  # Torn last line after a crash
+            if record.get("op") == "add":
+                record.pop("op")
+                self._index(Version(**record))
+            elif record.get("op") == "mark" and record.get("seq") in self._by_seq:
+                self._set_status(self._by_seq[record["seq"]], record["status"])
+
+    def _append(self, record: Dict):
+        with open(self.log_path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+    def _index(self, version: Version):
+        self._versions.setdefault(version.path, []).append(version)
+        self._by_seq[version.seq] = version
+        if version.hash not in self._blob_refs:
+            self._bytes += version.stored
+        self._blob_refs[version.hash] = self._blob_refs.get(version.hash, 0) + 1
+        self._blob_sizes[version.hash] = version.stored
+        self._seq = max(self._seq, version.seq)
+        if version.status == GOOD:
+            self._good[version.path] = version
+
+    def _set_status(self, version: Version, status: str):
+        version.status = status
+        good = self._good.get(version.path)
+        if status == GOOD and (good is None or version.seq >= good.seq):
+            self._good[version.path] = version
+        elif status != GOOD and good is version:
+            earlier = [v for v in self._versions.get(version.path, []) if v.status == GOOD]
+            if earlier:
+                self._good[version.path] = earlier[-1]
+            else:
+                self._good.pop(version.path, None)
+
+    # --- Blobs ---
+
+    def _blob_path(self, digest: str) -> str:
+        return os.path.join(self.blob_dir, digest[:2], digest)
+
+    def _write_blob(self, digest: str, data: bytes) -> int:
+        path = self._blob_path(digest)
+        if os.path.exists(path):
+            return os.path.getsize(path)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        packed = zlib.compress(data, 6)
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(packed)
+        os.replace(tmp, path)
+        return len(packed)
+
+    def read(self, version: Version) -> bytes:
+        with open(self._blob_path(version.hash), "rb") as f:
+            return zlib.decompress(f.read())
+
+    # --- API ---
+
+    def _rel(self, path: str) -> str:
+        return os.path.relpath(os.path.abspath(os.path.join(self.root, path)), self.root).replace(os.sep, "/")
+
+    def capture(self, path: str, status: str = UNKNOWN) -> Optional[Version]:
+        """Snapshots the file's current content (no-op if it matches the latest version)."""
+        rel = self._rel(path)
+        full = os.path.join(self.root, rel)
+        try:
+            if os.path.getsize(full) > self.MAX_FILE_BYTES:
+                return None
+            with open(full, "rb") as f:
+                data = f.read()
+        except OSError:
+            return None
+        digest = hashlib.sha256(data).hexdigest()
+        with self._lock:
+            history = self._versions.get(rel, [])
+            if history and history[-1].hash == digest:
+                if status != UNKNOWN and history[-1].status != status:
+                    self.mark(history[-1], status)
+                return history[-1]
+            if status == UNKNOWN:
+                # Content seen before keeps its verdict (e.g. a restored good version)
+                status = next((v.status for v in reversed(history) if v.hash == digest), UNKNOWN)
+            try:
+                stored = self._write_blob(digest, data)
+            except OSError as e:
+                logger.warning(f"Snapshot of {rel} failed: {e}")
+                return None
+            self._seq += 1
+            version = Version(self._seq, rel, digest, len(data), stored, time.time(), status)
+            self._append(dict(asdict(version), op="add"))
+            self._index(version)
+            # Prune with slack so the log is not rewritten on every capture
+            if len(self._versions[rel]) > self.max_versions + max(1, self.max_versions // 4) \
+                    or self._bytes > self.max_bytes:
+                self.prune()
+            return version
+
+    def mark(self, version: Version, status: str):
+        with self._lock:
+            if version.status == status:
+                return
+            self._set_status(version, status)
+            self._append({"op": "mark", "seq": version.seq, "status": status})
+
+    def history(self, path: str) -> List[Version]:
+        with self._lock:
+            return list(self._versions.get(self._rel(path), []))
+
+    def latest(self, path: str) -> Optional[Version]:
+        with self._lock:
+            history = self._versions.get(self._rel(path))
+            return history[-1] if history else None
+
+    def last_good(self, path: str, exclude_hash: Optional[str] = None) -> Optional[Version]:
+        """Most recent version that passed the checks (skipping content `exclude_hash`)."""
+        with self._lock:
+            rel = self._rel(path)
+            good = self._good.get(rel)
+            if good is None or good.hash != exclude_hash:
+                return good
+            return next((v for v in reversed(self._versions.get(rel, []))
+                         if v.status == GOOD and v.hash != exclude_hash), None)
+
+    def restore(self, path: str, version: Version) -> bool:
+        """Writes `version` back atomically; the current content is snapshotted first."""
+        rel = self._rel(path)
+        full = os.path.join(self.root, rel)
+        try:
+            data = self.read(version)
+        except (OSError, zlib.error) as e:
+            logger.error(f"Snapshot blob {version.hash[:12]} unreadable: {e}")
+            return False
+        self.capture(rel)  # Never lose the state we are replacing
+        tmp = f"{full}.codex_restore.tmp"
+        try:
+            with open(tmp, "wb") as f:
+                f.write(data)
+            if os.path.exists(full):
+                os.chmod(tmp, os.stat(full).st_mode)
+            os.replace(tmp, full)
+        except OSError as e:
+            logger.error(f"Restore of {rel} failed: {e}")
+            return False
+        self.capture(rel, version.status)
+        return True
+
+    # --- Retention ---
+
+    def disk_usage(self) -> int:
+        return self._bytes
+
+    def prune(self):
+        """Keeps the newest `max_versions` per file plus its latest good one, then fits 90% of `max_bytes`."""
+        with self._lock:
+            keep: Dict[str, List[Version]] = {}
+            for rel, history in self._versions.items():
+                kept = history[-self.max_versions:]
+                good = self._good.get(rel)
+                if good is not None and good not in kept:
+                    kept = [good] + kept[1:]
+                keep[rel] = kept
+
+            # Over budget: drop the globally oldest versions, latest-good ones last
+            refs: Dict[str, int] = {}
+            for v in (v for vs in keep.values() for v in vs):
+                refs[v.hash] = refs.get(v.hash, 0) + 1
+            used = sum(self._blob_sizes[h] for h in refs)
+            good = {id(v) for v in self._good.values()}
+            for victim in sorted((v for vs in keep.values() for v in vs), key=lambda v: (id(v) in good, v.seq)):
+                if used <= self.max_bytes * 0.9:
+                    break
+                keep[victim.path].remove(victim)
+                refs[victim.hash] -= 1
+                if not refs[victim.hash]:
+                    used -= self._blob_sizes[victim.hash]
+
+            self._versions, self._by_seq, self._good = {}, {}, {}
+            self._blob_refs, old_sizes = {}, self._blob_sizes
+            self._blob_sizes, self._bytes = {}, 0
+            records = []
+            for version in sorted((v for vs in keep.values() for v in vs), key=lambda v: v.seq):
+                self._index(version)
+                records.append(dict(asdict(version), op="add"))
+            for digest in set(old_sizes) - set(self._blob_refs):
+                try:
+                    os.remove(self._blob_path(digest))
+                except OSError:
+                    pass
+            tmp = f"{self.log_path}.tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                f.writelines(json.dumps(r, ensure_ascii=False) + "\n" for r in records)
+            os.replace(tmp, self.log_path)
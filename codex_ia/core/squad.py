@@ -1,8 +1,18 @@
-from typing import Dict, Any, List
+from typing import Any, Callable, Dict, List, Optional
 import logging
+import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from codex_ia.core.context import ContextManager
+from codex_ia.core.executor import clip
 from codex_ia.core.llm_client import GeminiClient
 from codex_ia.core.network_agent import NetworkAgent
+from codex_ia.core.patches import PATCH_FORMAT_INSTRUCTIONS, Hunk, PatchError, PatchResult, apply_patch, failure_feedback, parse_patch
+from codex_ia.core.safety import SafetyProtocol
+from codex_ia.core.task_graph import EventCallback, TaskGraph
+from codex_ia.core.worktree import Worktree
 
 class BaseAgent:
     def __init__(self, role: str, system_prompt: str, client: Any = None):
@@ -37,6 +47,7 @@ class EngineerAgent(BaseAgent):
             system_prompt="You are responsible for applying code changes to the file system. You receive code and file paths, and your job is to write them. You must confirm the file path is correct.",
             client=client
         )
+        self.safety = SafetyProtocol()
 
     def apply_changes(self, root_path: str, file_path: str, code: str) -> str:
         """
@@ -53,6 +64,23 @@ class EngineerAgent(BaseAgent):
         except Exception as e:
             return f"❌ Failed to write to {full_path}: {e}"
 
+    def apply_patch(self, root_path: str, patch_text: str, pending_hunks: List[Hunk] = None,
+                    target_hint: Callable[[], str] = None) -> PatchResult:
+        """
+        Applies SEARCH/REPLACE blocks (plus blocks kept from a rejected attempt) all-or-nothing.
+        A reply without blocks falls back to writing the whole code block to `target_hint()`.
+        """
+        try:
+            hunks = parse_patch(patch_text)
+        except PatchError as e:
+            return PatchResult(False, valid=list(pending_hunks or []), error=str(e))
+        if not hunks and target_hint is not None:
+            code = patch_text.replace("```python", "").replace("```", "").strip()
+            target = target_hint()
+            status = self.apply_changes(root_path, target, code)
+            return PatchResult(status.startswith("✅"), files=[target], error="" if status.startswith("✅") else status)
+        return apply_patch(root_path, list(pending_hunks or []) + hunks, safety=self.safety)
+
 class ExecutorAgent(BaseAgent):
     def __init__(self, client: Any = None):
         super().__init__(
@@ -61,24 +89,26 @@ class ExecutorAgent(BaseAgent):
             client=client
         )
 
-    def run_command(self, command: str, work_dir: str) -> Dict[str, Any]:
-        import subprocess
-        try:
-            result = subprocess.run(
-                command, 
-                shell=True, 
-                cwd=work_dir, 
-                capture_output=True, 
-                text=True,
-                timeout=60
-            )
-            return {
-                "success": result.returncode == 0,
-                "stdout": result.stdout,
-                "stderr": result.stderr
-            }
-        except Exception as e:
-            return {"success": False, "stderr": str(e), "stdout": ""}
+    def run_command(self, command: str, work_dir: str, timeout: float = 60) -> Dict[str, Any]:
+        from codex_ia.core.executor import get_executor
+        return self.to_report(get_executor().run(command, cwd=work_dir, timeout=timeout), timeout)
+
+    def submit_command(self, command: str, work_dir: str, timeout: float = 60):
+        """Non-blocking run_command: returns an ExecutionHandle (cancel()/result())."""
+        from codex_ia.core.executor import get_executor
+        return get_executor().submit(command, cwd=work_dir, timeout=timeout)
+
+    @staticmethod
+    def to_report(result, timeout: float) -> Dict[str, Any]:
+        stderr = result.stderr
+        if result.timed_out:
+            stderr += f"\n[TIMEOUT] Command killed after {timeout}s"
+        return {
+            "success": result.success,
+            "stdout": result.stdout,
+            "stderr": result.error or stderr,
+            "duration": result.duration,
+        }
 
 class ResearcherAgent(BaseAgent):
     def __init__(self, client: Any = None):
@@ -95,22 +125,36 @@ class ResearcherAgent(BaseAgent):
         # We need to access the client's underlying method with web_search=True
         return self.client.send_message(query, web_search=True)
 
+def _fork_client(client: Any) -> Any:
+    """Gives a sub-agent its own chat session when the client supports it (see GeminiClient.fork)."""
+    return client.fork() if hasattr(client, "fork") else client
+
 class SquadLeader:
     """
     [LEVEL 8] The Squad Leader.
     Orchestrates specialized agents to complete a feature request.
     [LEVEL 13 UPGRADE] Integrated with NetworkAgent for Feedback Loops.
+    Missions run as a TaskGraph: independent stages (wisdom/research,
+    tests/apply+verify) overlap instead of running in sequence. The coder answers
+    with multi-file SEARCH/REPLACE patches that are applied atomically (core/patches.py).
     """
+    MAX_PARALLEL_STAGES = 4
+    CANDIDATE_TEMPERATURES = (0.2, 0.6, 0.9, 0.4)
+    VERIFY_TIMEOUT = 60
+    MAX_CONTEXT_FILES = 3
+    CONTEXT_CHARS = 20000
+
     def __init__(self, root_path: str = ".", llm_client: Any = None):
         self.root_path = root_path
         self.context_mgr = ContextManager(root_path)
         self.client = llm_client if llm_client else GeminiClient()
         
-        self.coder = CoderAgent(client=self.client)
-        self.tester = TesterAgent(client=self.client)
-        self.engineer = EngineerAgent(client=self.client)
-        self.executor = ExecutorAgent(client=self.client)
-        self.researcher = ResearcherAgent(client=self.client)
+        # Each agent gets its own session so concurrent stages don't interleave one chat history
+        self.coder = CoderAgent(client=_fork_client(self.client))
+        self.tester = TesterAgent(client=_fork_client(self.client))
+        self.engineer = EngineerAgent(client=_fork_client(self.client))
+        self.executor = ExecutorAgent(client=_fork_client(self.client))
+        self.researcher = ResearcherAgent(client=_fork_client(self.client))
         
         # Connect to Exocortex
         self.network = NetworkAgent()
@@ -120,102 +164,274 @@ class SquadLeader:
         self.root_path = new_path
         self.context_mgr = ContextManager(new_path)
 
-    def assign_mission(self, mission: str, apply: bool = False, autopilot: bool = False, verification_cmd: str = "", web_search: bool = False) -> Dict[str, str]:
+    def _plan_file_context(self, plan: str) -> str:
+        """Current content of existing files named in the plan (the coder needs it for SEARCH blocks)."""
+        parts = []
+        for rel in dict.fromkeys(re.findall(r"[\w./-]+\.\w+", plan)):
+            full = os.path.join(self.root_path, os.path.normpath(rel))
+            if rel.startswith("..") or not os.path.isfile(full):
+                continue
+            try:
+                with open(full, "r", encoding="utf-8") as f:
+                    parts.append(f"FILE: {rel}\n{f.read()[:self.CONTEXT_CHARS]}")
+            except (OSError, UnicodeDecodeError):
+                continue
+            if len(parts) >= self.MAX_CONTEXT_FILES:
+                break
+        return "\n\n".join(parts)
+
+    def _code_prompt(self, r: Dict[str, Any], feedback: str, standalone: bool = False) -> str:
+        """Coder prompt; `standalone` repeats plan + files for fresh sessions (race candidates)."""
+        prompt = ""
+        if feedback:
+            prompt = f"PREVIOUS ATTEMPT FAILED.\nFeedback/Error:\n{feedback}\n\nSend ONLY the blocks needed to fix this."
+        if not feedback or standalone:
+            prompt = f"Implement this based on the plan:\n{r['plan']}" + (f"\n\n{prompt}" if prompt else "")
+            file_context = self._plan_file_context(r['plan'])
+            if file_context:
+                prompt += f"\n\nCURRENT FILES:\n{file_context}"
+        prompt += f"\n\n{PATCH_FORMAT_INSTRUCTIONS}"
+        if r.get('research'):
+            prompt += f"\n\nUse this research to guide implementation:\n{r['research']}"
+        return prompt
+
+    def _candidate_clients(self, n: int) -> List[tuple]:
+        """[(label, client)]: distinct awake providers first (BrainRouter), then temperature variants."""
+        bases = []
+        neurons = getattr(self.client, "neurons", None)
+        if neurons:
+            asleep = getattr(self.client, "sleeping_brains", {})
+            bases = [(name, c) for name, c in neurons.items() if name not in asleep and name != "ollama"]
+        if not bases:
+            bases = [("main", self.client)]
+        clients = []
+        for i in range(n):
+            name, base = bases[i % len(bases)]
+            client = _fork_client(base)
+            label = name
+            if hasattr(client, "temperature"):
+                client.temperature = self.CANDIDATE_TEMPERATURES[(i // len(bases)) % len(self.CANDIDATE_TEMPERATURES)]
+                label = f"{name}@{client.temperature}"
+            clients.append((label, client))
+        return clients
+
+    def _race_candidates(self, prompt: str, verify_cmd: str, pending_hunks: List[Hunk], n: int) -> Dict[str, Any]:
+        """
+        Asks N coders concurrently; each candidate is patched into its own worktree and
+        verified in parallel. The first green candidate is applied to the real tree and
+        the others are cancelled.
+        """
+        stop = threading.Event()
+        handles, lock = [], threading.Lock()
+
+        def attempt(label, client):
+            start = time.perf_counter()
+            outcome = {"label": label, "code": "", "applied": False, "passed": False, "error": "", "verify": None}
+            try:
+                outcome["code"] = CoderAgent(client=client).chat(prompt).strip()
+                if stop.is_set():
+                    outcome["error"] = "cancelled"
+                    return outcome
+                with Worktree(self.root_path) as path:
+                    patch = apply_patch(path, list(pending_hunks) + parse_patch(outcome["code"]), backup=False)
+                    outcome["applied"] = patch.applied
+                    if not patch.applied:
+                        outcome["error"] = patch.summary()
+                        return outcome
+                    handle = self.executor.submit_command(verify_cmd, path, timeout=self.VERIFY_TIMEOUT)
+                    with lock:
+                        handles.append(handle)
+                    if stop.is_set():
+                        handle.cancel()
+                    result = handle.result()
+                    outcome["verify"] = ExecutorAgent.to_report(result, self.VERIFY_TIMEOUT)
+                    outcome["passed"] = result.success
+                    if not result.success:
+                        outcome["error"] = "cancelled" if result.cancelled else clip(outcome["verify"]["stderr"] or outcome["verify"]["stdout"], 800)
+            except Exception as e:
+                outcome["error"] = str(e)
+            finally:
+                outcome["duration"] = round(time.perf_counter() - start, 3)
+            return outcome
+
+        pool = ThreadPoolExecutor(max_workers=n)
+        futures = [pool.submit(attempt, label, client) for label, client in self._candidate_clients(n)]
+        outcomes, winner = [], None
+        for future in as_completed(futures):
+            outcome = future.result()
+            outcomes.append(outcome)
+            if outcome["passed"]:
+                winner = outcome
+                stop.set()
+                with lock:
+                    for handle in handles:
+                        handle.cancel()
+                break
+        pool.shutdown(wait=False)  # Losers finish in the background and clean up their worktrees
+
+        summary = [{k: o[k] for k in ("label", "applied", "passed", "duration", "error")} for o in outcomes]
+        if winner:
+            patch = self.engineer.apply_patch(self.root_path, winner["code"], pending_hunks)
+            return {"code": winner["code"], "patch": patch, "verify": winner["verify"],
+                    "winner": winner["label"], "candidates": summary}
+        failures = "\n".join(f"- {o['label']}: {o['error']}" for o in outcomes)
+        best = next((o for o in outcomes if o["applied"]), outcomes[0] if outcomes else {"code": ""})
+        return {"code": best["code"], "patch": PatchResult(False, error=f"no candidate passed verification:\n{failures}"),
+                "verify": best.get("verify"), "winner": None, "candidates": summary}
+
+    def _add_attempt_stages(self, graph: TaskGraph, feedback: str, apply: bool, verify_cmd: str,
+                            pending_hunks: List[Hunk], candidates: int = 1):
+        """code -> {tests, apply -> verify}; `pending_hunks` are valid blocks kept from a rejected patch."""
+
+        def apply_stage(r):
+            return self.engineer.apply_patch(self.root_path, r["code"], pending_hunks,
+                                             target_hint=lambda: self._infer_target_file(r["plan"]))
+
+        if candidates > 1 and apply and verify_cmd:
+            # Best-of-N: the race stage produces code/apply/verify for the rest of the graph
+            graph.add("race", lambda r: self._race_candidates(self._code_prompt(r, feedback, standalone=True),
+                                                              verify_cmd, pending_hunks, candidates), deps=["plan"])
+            graph.add("code", lambda r: r["race"]["code"], deps=["race"])
+            graph.add("tests", lambda r: self.tester.chat(f"Write tests for this change:\n{r['code']}"), deps=["code"])
+            graph.add("apply", lambda r: r["race"]["patch"], deps=["race"])
+            graph.add("verify", lambda r: r["race"]["verify"], deps=["race"])
+            return
+
+        graph.add("code", lambda r: self.coder.chat(self._code_prompt(r, feedback)).strip(), deps=["plan"])
+        # Unit test generation is for documentation/reference: it overlaps with apply + verify
+        graph.add("tests", lambda r: self.tester.chat(f"Write tests for this change:\n{r['code']}"), deps=["code"])
+        if apply:
+            graph.add("apply", apply_stage, deps=["code"])
+            if verify_cmd:
+                graph.add("verify", lambda r: self.executor.run_command(verify_cmd, self.root_path), deps=["apply"],
+                          condition=lambda r: r["apply"] is not None and r["apply"].applied)
+
+    def _infer_target_file(self, plan: str) -> str:
+        """Legacy path: asks for the file name when the coder answered with a bare code block."""
+        prompt = f"Based on this plan: {plan}\nWhat is the relative file path to write this code to? Return ONLY the filepath (e.g., 'core/utils.py')."
+        return self.client.send_message(prompt).strip()
+
+    def assign_mission(self, mission: str, apply: bool = False, autopilot: bool = False, verification_cmd: str = "",
+                       web_search: bool = False, on_event: Optional[EventCallback] = None,
+                       candidates: int = 1) -> Dict[str, Any]:
         """
         Executes a mission by coordinating Coder, Tester, and Engineer.
         Supports Autopilot (Write -> Verify -> Fix user loop).
         Supports Web Search (Researcher -> Coder).
         Supports Recursive Memory (NetworkAgent).
+        `on_event(event, stage, payload)` streams partial results as stages finish;
+        report['timings'] has the per-stage breakdown.
+        `candidates > 1` (with apply + autopilot + verification_cmd) races N coders per
+        attempt, each verified in an isolated worktree; the first green one is applied.
         """
         report = {}
         report['mission'] = mission
         report['target_dir'] = self.root_path
-        
-        # 0. Retrieval Phase (Exocortex)
-        # We derive some tags from the mission string (naive approach)
+        timings: Dict[str, float] = {}
+        mission_start = time.perf_counter()
+
+        # Tags from the mission string + semantic recall on the full mission text
         tags = [w for w in mission.split() if len(w) > 4]
-        wisdom = self.network.retrieve_wisdom(tags)
-        report['wisdom'] = wisdom
-        
-        research_context = ""
+        verify_cmd = verification_cmd if autopilot else ""
+
+        def plan(r):
+            plan_prompt = f"MISSION: {mission}\n"
+            if r['wisdom']:
+                plan_prompt += f"\nMEMORY INJECTION (PREVIOUS LESSONS):\n{r['wisdom']}\n"
+            if r['research']:
+                plan_prompt += f"RESEARCH CONTEXT:\n{r['research']}\n"
+            plan_prompt += "Break this down into technical requirements for the Coder. If the mission implies editing a specific file, mention it clearly."
+            return self.client.send_message(plan_prompt)
+
+        # First attempt: (wisdom || research) -> plan -> (code || target_file) -> (tests || apply -> verify)
+        graph = TaskGraph(max_workers=self.MAX_PARALLEL_STAGES, on_event=on_event)
+        graph.add("wisdom", lambda r: self.network.retrieve_wisdom(tags, query=mission))
+        graph.add("research", lambda r: self.researcher.research(f"Research necessary info for: {mission}"),
+                  condition=lambda r: web_search)
+        graph.add("plan", plan, deps=["wisdom", "research"])
+        self._add_attempt_stages(graph, "", apply, verify_cmd, [], candidates)
+        results = graph.run()
+        timings.update(graph.timings)
+
+        for name in ("wisdom", "research", "plan"):
+            if name in graph.errors:
+                raise RuntimeError(f"Mission stage '{name}' failed: {graph.errors[name]}") from graph.errors[name]
+
+        report['wisdom'] = results['wisdom']
         if web_search:
-            # 0.5 Research Phase
-            research_query = f"Research necessary info for: {mission}"
-            research_context = self.researcher.research(research_query)
-            report['research'] = research_context
-        
-        # 1. Plan
-        plan_prompt = f"MISSION: {mission}\n"
-        
-        if wisdom:
-            plan_prompt += f"\nMEMORY INJECTION (PREVIOUS LESSONS):\n{wisdom}\n"
-            
-        if research_context:
-            plan_prompt += f"RESEARCH CONTEXT:\n{research_context}\n"
-            
-        plan_prompt += "Break this down into technical requirements for the Coder. If the mission implies editing a specific file, mention it clearly."
-        plan = self.client.send_message(plan_prompt)
-        report['plan'] = plan
-        
+            report['research'] = results['research']
+        report['plan'] = results['plan']
+
         max_retries = 3 if autopilot else 1
-        current_attempt = 0
-        current_feedback = ""
         final_success = False
-        
-        while current_attempt < max_retries:
-            current_attempt += 1
-            
-            # 2. Code
-            if current_feedback:
-                code_prompt = f"PREVIOUS ATTEMPT FAILED.\nFeedback/Error:\n{current_feedback}\n\nFix the code based on this feedback. Return ONLY the code."
-            else:
-                code_prompt = f"Implement this based on the plan:\n{plan}\n\nIMPORTANT: Return ONLY the code block. If multiple files, use standard separation. For this v1, focus on the main file content."
-            
-            if research_context:
-                code_prompt += f"\n\nUse this research to guide implementation:\n{research_context}"
-                
-            code = self.coder.chat(code_prompt)
-            clean_code = code.replace("```python", "").replace("```", "").strip()
-            report['code'] = clean_code
-            
-            # 3. Test (Unit Test Generation - just for documentation/reference)
-            tests = self.tester.chat(f"Write tests for this code:\n{clean_code}")
-            report['tests'] = tests
-            
-            # 4. Apply (The Engineer)
-            if apply:
-                filename_prompt = f"Based on this plan: {plan}\nWhat is the relative file path to write this code to? Return ONLY the filepath (e.g., 'core/utils.py')."
-                target_file = self.client.send_message(filename_prompt).strip()
-                result = self.engineer.apply_changes(self.root_path, target_file, clean_code)
-                report['apply_status'] = result
-            else:
+        current_attempt = 1
+
+        while True:
+            for stage, error in graph.errors.items():
+                report.setdefault('errors', {})[f"{stage}#{current_attempt}" if current_attempt > 1 else stage] = str(error)
+            report['code'] = results.get('code') or ""
+            report['tests'] = results.get('tests') or ""
+            if results.get('race'):
+                report.setdefault('candidates', []).extend(results['race']['candidates'])
+                report['winner'] = results['race']['winner']
+
+            if not apply:
+                # If dry run, wait for manual verify
                 report['apply_status'] = "Dry Run"
-                # If dry run, wait for manual verify or just break
                 break
 
-            # 5. Autopilot Verification
-            if autopilot and verification_cmd:
-                exec_result = self.executor.run_command(verification_cmd, self.root_path)
+            patch = results.get('apply')
+            pending_hunks: List[Hunk] = []
+            if patch is None:
+                report['apply_status'] = f"❌ Apply skipped: {report.get('errors')}"
+                feedback = f"The previous answer could not be processed: {report.get('errors')}"
+            elif not patch.applied:
+                # Nothing was written: keep the valid blocks, ask only for the rejected ones
+                report['apply_status'] = patch.summary()
+                pending_hunks = patch.valid
+                feedback = failure_feedback(self.root_path, patch)
+            else:
+                report['apply_status'] = patch.summary()
+                report['files_changed'] = patch.files
+                if not verify_cmd:
+                    # No verification command means we assume one-shot success for now
+                    final_success = True
+                    break
+                exec_result = results.get('verify') or {"success": False, "stdout": "", "stderr": "Verification did not run."}
                 report['verification_out'] = exec_result['stdout'] + "\n" + exec_result['stderr']
-                
                 if exec_result['success']:
                     report['autopilot_status'] = "✅ Verification Passed"
                     final_success = True
-                    break # Success!
-                else:
-                    report['autopilot_status'] = f"❌ Attempt {current_attempt} Failed"
-                    current_feedback = f"Command '{verification_cmd}' failed.\nSTDERR:\n{exec_result['stderr']}\nSTDOUT:\n{exec_result['stdout']}"
-                    # Loop continues...
-            else:
-                # No verification command means we assume one-shot success for now
-                final_success = True
+                    break
+                feedback = f"Command '{verification_cmd}' failed.\nSTDERR:\n{exec_result['stderr']}\nSTDOUT:\n{exec_result['stdout']}"
+
+            if autopilot:
+                report['autopilot_status'] = f"❌ Attempt {current_attempt} Failed"
+            if current_attempt >= max_retries:
                 break
+
+            # Retry: same plan, only code -> (tests || apply -> verify) with the changed blocks
+            current_attempt += 1
+            graph = TaskGraph(max_workers=self.MAX_PARALLEL_STAGES, on_event=on_event)
+            self._add_attempt_stages(graph, feedback, apply, verify_cmd, pending_hunks, candidates)
+            results = graph.run({"plan": report['plan'], "research": results.get('research')})
+            for stage, seconds in graph.timings.items():
+                timings[f"{stage}#{current_attempt}"] = seconds
+
+        sequential = sum(timings.values())
+        wall_time = time.perf_counter() - mission_start
+        report['timings'] = {
+            "stages": {name: round(sec, 3) for name, sec in timings.items()},
+            "wall_time": round(wall_time, 3),
+            "sequential_time": round(sequential, 3),
+            "overlap_saved": round(max(sequential - wall_time, 0.0), 3),
+        }
         
-        # 6. Store Experience (Feedback Loop)
+        # Store Experience (Feedback Loop)
         if autopilot:
             self.network.store_experience(
                 context=mission,
-                action=plan,
+                action=report['plan'],
                 outcome=report.get('autopilot_status', 'Unknown'),
                 success=final_success,
                 tags=tags
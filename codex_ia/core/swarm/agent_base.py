@@ -5,6 +5,10 @@ import datetime
 
 class SwarmAgent:
     """Base class for all Swarm Agents (Architect, Dev, QA)."""
+    # Bus wiring: topic pattern -> prompt template, and the topic replies go to
+    SUBSCRIBES = {"mission.start": "{content}"}
+    PUBLISHES = None  # None -> "agent.<name>.reply"
+
     def __init__(self, name, role, color="white"):
         self.id = str(uuid.uuid4())
         self.name = name
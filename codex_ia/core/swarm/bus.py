@@ -0,0 +1,180 @@
+"""
+📡 SWARM BUS - Async pub/sub message bus for the Swarm
+Tópicos com curingas (fnmatch), caixas de entrada limitadas por agente
+(backpressure: quem publica espera, por tempo limitado, quando a caixa está
+cheia) e um log de eventos reproduzível: os mais recentes em memória, o
+histórico completo opcionalmente persistido em JSONL.
+"""
+
+import asyncio
+import datetime
+import fnmatch
+import itertools
+import json
+import logging
+import threading
+from collections import deque
+from dataclasses import asdict, dataclass, field
+from typing import Any, Callable, Deque, Dict, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+PUT_TIMEOUT = 5.0  # Seconds a publisher waits on a full mailbox before dropping the message
+LOG_SIZE = 1000  # Envelopes kept in memory; log_path has the full history
+
+
+@dataclass
+class Envelope:
+    seq: int
+    topic: str
+    sender: str
+    content: Any
+    target: Optional[str] = None  # Direct message: only this agent's mailbox
+    timestamp: str = ""
+    meta: Dict[str, Any] = field(default_factory=dict)
+
+    def legacy(self) -> str:
+        """The old `message_bus` string format."""
+        return f"[{self.sender} -> {self.target or 'ALL'}]: {self.content}"
+
+
+@dataclass
+class Mailbox:
+    name: str
+    topics: List[str]
+    queue: asyncio.Queue
+    delivered: int = 0
+    dropped: int = 0
+    high_water: int = 0
+
+    def matches(self, envelope: Envelope) -> bool:
+        if envelope.target:
+            return envelope.target == self.name
+        return any(fnmatch.fnmatchcase(envelope.topic, t) for t in self.topics)
+
+
+class MessageBus:
+    """
+    Usage (inside an event loop):
+        bus = MessageBus(mailbox_size=50)
+        inbox = bus.subscribe("Alan", ["plan.*"])
+        await bus.publish("plan.ready", "DaVinci", plan)
+        envelope = await inbox.get()
+    Every message goes to `log` (the last `log_size`) and to `log_path` (all of
+    them), so `replay()` / `load()` can rebuild a run. A publisher waits at most
+    `put_timeout` for room in a full mailbox, then the message is dropped for
+    that mailbox and counted: agents that feed each other in a cycle cannot
+    deadlock on full mailboxes.
+    """
+
+    def __init__(self, mailbox_size: int = 100, log_path: Optional[str] = None,
+                 put_timeout: Optional[float] = PUT_TIMEOUT, log_size: Optional[int] = LOG_SIZE):
+        self.mailbox_size = mailbox_size
+        self.log_path = log_path
+        self.put_timeout = put_timeout  # None = block until there is room (only safe without cycles)
+        self.log: Deque[Envelope] = deque(maxlen=log_size)
+        self.recorded = 0
+        self.mailboxes: Dict[str, Mailbox] = {}
+        self._observers: List[Callable[[Envelope], None]] = []
+        self._seq = itertools.count(1)
+        self._lock = threading.Lock()
+
+    # --- Subscriptions ---
+
+    def subscribe(self, name: str, topics: Iterable[str]) -> asyncio.Queue:
+        mailbox = Mailbox(name, list(topics), asyncio.Queue(maxsize=self.mailbox_size))
+        self.mailboxes[name] = mailbox
+        return mailbox.queue
+
+    def unsubscribe(self, name: str):
+        self.mailboxes.pop(name, None)
+
+    def observe(self, callback: Callable[[Envelope], None]):
+        """Called synchronously for every recorded message (UI streaming, metrics)."""
+        self._observers.append(callback)
+
+    def unobserve(self, callback: Callable[[Envelope], None]):
+        if callback in self._observers:
+            self._observers.remove(callback)
+
+    # --- Publishing ---
+
+    def record(self, topic: str, sender: str, content: Any, target: Optional[str] = None, **meta) -> Envelope:
+        """Appends to the event log without delivering (used by the synchronous API too)."""
+        with self._lock:
+            envelope = Envelope(next(self._seq), topic, sender, content, target,
+                                datetime.datetime.now().isoformat(), meta)
+            self.log.append(envelope)
+            self.recorded += 1
+            if self.log_path:
+                try:
+                    with open(self.log_path, "a", encoding="utf-8") as f:
+                        f.write(json.dumps(asdict(envelope), ensure_ascii=False, default=str) + "\n")
+                except OSError as e:
+                    logger.warning(f"Bus log write failed: {e}")
+        for callback in self._observers:
+            try:
+                callback(envelope)
+            except Exception as e:
+                logger.debug(f"Bus observer failed: {e}")
+        return envelope
+
+    async def publish(self, topic: str, sender: str, content: Any, target: Optional[str] = None, **meta) -> Envelope:
+        """Records and delivers; waits (backpressure, up to put_timeout) while a matching mailbox is full."""
+        envelope = self.record(topic, sender, content, target, **meta)
+        await self.deliver(envelope)
+        return envelope
+
+    async def deliver(self, envelope: Envelope) -> int:
+        """Puts `envelope` in every matching mailbox; returns how many accepted it."""
+        delivered = 0
+        for mailbox in list(self.mailboxes.values()):
+            if mailbox.name == envelope.sender or not mailbox.matches(envelope):
+                continue
+            try:
+                if self.put_timeout is None:
+                    await mailbox.queue.put(envelope)
+                else:
+                    await asyncio.wait_for(mailbox.queue.put(envelope), self.put_timeout)
+            except asyncio.TimeoutError:
+                mailbox.dropped += 1
+                logger.warning(f"Mailbox '{mailbox.name}' full, dropped #{envelope.seq} ({envelope.topic})")
+                continue
+            mailbox.delivered += 1
+            mailbox.high_water = max(mailbox.high_water, mailbox.queue.qsize())
+            delivered += 1
+        return delivered
+
+    # --- Replay / observability ---
+
+    def replay(self, since: int = 0, topics: Optional[Iterable[str]] = None) -> List[Envelope]:
+        """Messages still in `log` with seq > since, optionally filtered by topic patterns."""
+        topics = list(topics or [])
+        return [
+            e for e in self.log
+            if e.seq > since and (not topics or any(fnmatch.fnmatchcase(e.topic, t) for t in topics))
+        ]
+
+    @classmethod
+    def load(cls, log_path: str, **kwargs) -> "MessageBus":
+        """Bus whose log is read back from a JSONL file (replay a past run; the whole file is kept)."""
+        kwargs.setdefault("log_size", None)
+        bus = cls(log_path=None, **kwargs)
+        with open(log_path, "r", encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    bus.log.append(Envelope(**json.loads(line)))
+        bus.recorded = len(bus.log)
+        bus._seq = itertools.count((bus.log[-1].seq if bus.log else 0) + 1)
+        bus.log_path = log_path
+        return bus
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "messages": self.recorded,
+            "mailboxes": {
+                name: {"depth": m.queue.qsize(), "delivered": m.delivered, "dropped": m.dropped,
+                       "high_water": m.high_water, "topics": m.topics}
+                for name, m in self.mailboxes.items()
+            },
+        }
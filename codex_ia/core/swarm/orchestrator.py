@@ -1,66 +1,160 @@
 
+import asyncio
+import fnmatch
+import queue
 import threading
 import time
 from .agent_base import SwarmAgent
+from .bus import Envelope, MessageBus
+
+MISSION_TOPIC = "mission.start"
+ERROR_TOPIC = "agent.error"
+STATUS_TOPIC = "agent.status"  # Logged only, never delivered
+_DONE = object()
 
 class SwarmOrchestrator:
-    """Manages the lifecycle and communication of the Swarm."""
-    def __init__(self):
+    """
+    Manages the lifecycle and communication of the Swarm.
+    Agents are wired by topics (SwarmAgent.SUBSCRIBES / PUBLISHES) on an async
+    MessageBus: every agent has its own bounded mailbox and runs concurrently;
+    a mission ends when no message is queued or being processed.
+    """
+    MAILBOX_SIZE = 16
+    MAX_MESSAGES = 200  # Per mission: guards against agents feeding each other forever
+    MISSION_TIMEOUT = 600
+
+    def __init__(self, log_path: str = None):
         self.agents = {}
-        self.message_bus = []
+        self.topics = {}  # agent name -> {topic pattern: prompt template}
+        self.bus = MessageBus(mailbox_size=self.MAILBOX_SIZE, log_path=log_path)
+        self.agent_stats = {}
         self.is_active = False
 
-    def register_agent(self, agent: SwarmAgent):
+    @property
+    def message_bus(self):
+        """Legacy view of the event log as '[sender -> target]: content' strings."""
+        return [e.legacy() for e in self.bus.log]
+
+    def register_agent(self, agent: SwarmAgent, topics: dict = None):
         self.agents[agent.name] = agent
+        self.topics[agent.name] = dict(topics if topics is not None else agent.SUBSCRIBES)
         print(f"🐝 Agent Registered: {agent.name} ({agent.role})")
 
     def broadcast(self, sender, content):
         """Sends a message to all agents."""
-        self.message_bus.append(f"[{sender} -> ALL]: {content}")
+        self.bus.record("broadcast", sender, content)
         results = {}
         for name, agent in self.agents.items():
             if name != sender:
-                results[name] = agent.receive_message(sender, content)
+                try:
+                    results[name] = agent.receive_message(sender, content)
+                except Exception as e:
+                    results[name] = f"❌ {name} failed: {e}"
         return results
 
     def direct_message(self, sender, target, content):
         """Sends a message to a specific agent."""
-        self.message_bus.append(f"[{sender} -> {target}]: {content}")
+        self.bus.record(f"agent.{target}", sender, content, target=target)
         if target in self.agents:
             return self.agents[target].receive_message(sender, content)
         return None
 
+    # --- Async mission runtime ---
+
+    async def _agent_loop(self, agent: SwarmAgent, inbox: asyncio.Queue, tracker: dict):
+        stats = self.agent_stats.setdefault(agent.name, {"processed": 0, "busy_seconds": 0.0, "errors": 0})
+        while True:
+            envelope: Envelope = await inbox.get()
+            try:
+                template = next((t for pattern, t in self.topics[agent.name].items()
+                                 if fnmatch.fnmatchcase(envelope.topic, pattern)), None) or "{content}"
+                self.bus.record(STATUS_TOPIC, "SYSTEM", f"⚙️ Agent [{agent.name}] is processing '{envelope.topic}'...")
+                start = time.perf_counter()
+                try:
+                    # Agents make blocking LLM calls: run them off the loop so agents overlap
+                    reply = await asyncio.to_thread(agent.receive_message, envelope.sender,
+                                                    template.format(content=envelope.content))
+                    topic = agent.PUBLISHES or f"agent.{agent.name}.reply"
+                except Exception as e:
+                    stats["errors"] += 1
+                    reply, topic = f"{agent.name} failed: {e}", ERROR_TOPIC
+                stats["processed"] += 1
+                stats["busy_seconds"] += time.perf_counter() - start
+
+                if tracker["published"] >= self.MAX_MESSAGES:
+                    self.bus.record(ERROR_TOPIC, "SYSTEM", f"Message limit ({self.MAX_MESSAGES}) reached, dropping output of {agent.name}")
+                elif reply:
+                    tracker["published"] += 1
+                    await self._publish(tracker, topic, agent.name, reply, reply_to=envelope.seq)
+            finally:
+                tracker["in_flight"] -= 1
+                if tracker["in_flight"] == 0:
+                    tracker["idle"].set()
+
+    async def _publish(self, tracker: dict, topic: str, sender: str, content, **meta):
+        """Publishes, counting the deliveries as in flight (messages dropped on a full mailbox are not)."""
+        expected = self._count_targets(topic, sender)
+        tracker["in_flight"] += expected  # Before delivery: receivers may finish before publish returns
+        envelope = self.bus.record(topic, sender, content, mission=tracker["mission"], **meta)
+        dropped = expected - await self.bus.deliver(envelope)
+        if dropped:
+            tracker["in_flight"] -= dropped
+            if tracker["in_flight"] == 0:
+                tracker["idle"].set()
+
+    def _count_targets(self, topic: str, sender: str) -> int:
+        probe = Envelope(0, topic, sender, None)
+        return sum(1 for m in self.bus.mailboxes.values() if m.name != sender and m.matches(probe))
+
+    async def _run_mission(self, mission_goal):
+        mission_id = f"m{int(time.time() * 1000)}"
+        tracker = {"in_flight": 0, "published": 0, "idle": asyncio.Event(), "mission": mission_id}
+        tasks = []
+        for name, agent in self.agents.items():
+            inbox = self.bus.subscribe(name, self.topics[name])
+            tasks.append(asyncio.create_task(self._agent_loop(agent, inbox, tracker)))
+        try:
+            if self._count_targets(MISSION_TOPIC, "USER") == 0:
+                self.bus.record(ERROR_TOPIC, "SYSTEM", f"No agent subscribes to '{MISSION_TOPIC}'")
+                return
+            await self._publish(tracker, MISSION_TOPIC, "USER", mission_goal)
+            await asyncio.wait_for(tracker["idle"].wait(), self.MISSION_TIMEOUT)
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
     def start_mission_iterative(self, mission_goal):
-        """Initiates a collaborative workflow, yielding real-time updates."""
+        """Initiates a collaborative workflow, yielding (sender, content) as messages flow on the bus."""
+        updates = queue.Queue()
+
+        def observer(envelope: Envelope):
+            if envelope.topic == ERROR_TOPIC:
+                updates.put(("ERROR", envelope.content))
+            elif envelope.topic != MISSION_TOPIC:
+                updates.put((envelope.sender, envelope.content))
+
+        def runner():
+            try:
+                asyncio.run(self._run_mission(mission_goal))
+            except Exception as e:
+                updates.put(("ERROR", f"Mission Failed: {str(e) or type(e).__name__}"))
+            finally:
+                updates.put(_DONE)
+
         try:
             yield "SYSTEM", f"🚀 Mission Started: {mission_goal}"
             self.is_active = True
-            
-            # 1. Architect analyzes first
-            if "Architect" in self.agents:
-                yield "SYSTEM", "🧠 Agent [Architect] is analyzing requirements..."
-                # Simulate thinking time or just let the API call take its time
-                plan = self.agents["Architect"].receive_message("USER", f"Mission: {mission_goal}. Create a plan.")
-                yield "Architect", plan
-                
-                # 2. Architect instructs Developer
-                if "Developer" in self.agents and plan:
-                    yield "SYSTEM", "💻 Agent [Developer] is writing code..."
-                    code_result = self.agents["Developer"].receive_message("Architect", f"Execute this plan: {plan}")
-                    yield "Developer", code_result
-                    
-                    # 3. QA tests the result
-                    if "QA" in self.agents and code_result:
-                        yield "SYSTEM", "🛡️ Agent [QA] is verifying integrity..."
-                        report = self.agents["QA"].receive_message("Developer", f"Test this code: {code_result}")
-                        yield "QA", report
-            
+            self.bus.observe(observer)
+            threading.Thread(target=runner, daemon=True, name="swarm-mission").start()
+            while True:
+                item = updates.get()
+                if item is _DONE:
+                    break
+                yield item
             yield "SYSTEM", "✅ Mission Complete"
-        
-        except Exception as e:
-            yield "ERROR", f"Mission Failed: {str(e)}"
-        
         finally:
+            self.bus.unobserve(observer)
             self.is_active = False
 
     def start_mission(self, mission_goal):
@@ -70,3 +164,7 @@ class SwarmOrchestrator:
         for sender, content in self.start_mission_iterative(mission_goal):
             results.append(f"{sender}: {content}")
         return "\n".join(results)
+
+    def stats(self):
+        """Mailbox depth/high-water marks and per-agent load, for observability."""
+        return dict(self.bus.stats(), agents=self.agent_stats)
@@ -0,0 +1,266 @@
+"""
+🔎 SYMBOL INDEX - Incremental symbol + text index of a project
+Definições Python (classes, funções, métodos) extraídas via ast e um índice
+de tokens por arquivo para pré-filtrar buscas grep-style. Só arquivos cujo
+mtime/tamanho mudou são reindexados.
+"""
+
+import ast
+import fnmatch
+import os
+import re
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+from codex_ia.core.file_cache import FileCache, get_file_cache
+
+DEFAULT_IGNORE_DIRS = {
+    '.git', 'venv', '.venv', '__pycache__', '.idea', '.vscode', 'node_modules',
+    'dist', 'build', '.codex_memory', '.codex_cache', '.pytest_cache', '.mypy_cache',
+}
+TEXT_EXTS = {
+    '.py', '.js', '.ts', '.tsx', '.jsx', '.html', '.css', '.json', '.md', '.txt', '.toml',
+    '.cfg', '.ini', '.yml', '.yaml', '.sh', '.sql', '.rs', '.go', '.java', '.c', '.h', '.cpp',
+}
+_TOKEN_RE = re.compile(r'[A-Za-z_][A-Za-z0-9_]*')
+
+
+def _signature(node) -> str:
+    """`name(args)` for a def, `name(bases)` for a class."""
+    if isinstance(node, ast.ClassDef):
+        bases = ", ".join(ast.unparse(b) for b in node.bases)
+        return f"class {node.name}({bases})" if bases else f"class {node.name}"
+    prefix = "async def" if isinstance(node, ast.AsyncFunctionDef) else "def"
+    returns = f" -> {ast.unparse(node.returns)}" if node.returns else ""
+    return f"{prefix} {node.name}({ast.unparse(node.args)}){returns}"
+
+
+def _calls(node) -> List[str]:
+    """Names called in the node's own body (`f()`, `obj.f()` -> "f"); nested defs excluded."""
+    names = set()
+    stack = list(ast.iter_child_nodes(node))
+    while stack:
+        child = stack.pop()
+        if isinstance(child, (ast.ClassDef, ast.FunctionDef, ast.AsyncFunctionDef, ast.Lambda)):
+            continue
+        if isinstance(child, ast.Call):
+            if isinstance(child.func, ast.Name):
+                names.add(child.func.id)
+            elif isinstance(child.func, ast.Attribute):
+                names.add(child.func.attr)
+        stack.extend(ast.iter_child_nodes(child))
+    return sorted(names)
+
+
+def _doc(node) -> str:
+    doc = ast.get_docstring(node) or ""
+    return doc.strip().splitlines()[0] if doc.strip() else ""
+
+
+def extract_symbols(source: str) -> List[Dict]:
+    """Top-level and nested definitions of a Python module (empty on syntax errors).
+    Each symbol carries its first docstring line and the names it calls (call edges)."""
+    return parse_module(source)[1]
+
+
+def parse_module(source: str) -> Tuple[str, List[Dict]]:
+    """(first docstring line of the module, extract_symbols) from a single parse."""
+    try:
+        tree = ast.parse(source)
+    except (SyntaxError, ValueError):
+        return "", []
+    symbols = []
+
+    def visit(node, parents):
+        for child in ast.iter_child_nodes(node):
+            if isinstance(child, (ast.ClassDef, ast.FunctionDef, ast.AsyncFunctionDef)):
+                kind = "class" if isinstance(child, ast.ClassDef) else (
+                    "method" if parents and parents[-1][1] == "class" else "function")
+                qualname = ".".join([p[0] for p in parents] + [child.name])
+                symbols.append({
+                    "name": child.name,
+                    "qualname": qualname,
+                    "kind": kind,
+                    "lineno": child.lineno,
+                    "end_lineno": getattr(child, "end_lineno", child.lineno),
+                    "signature": _signature(child),
+                    "doc": _doc(child),
+                    "calls": _calls(child),
+                })
+                visit(child, parents + [(child.name, "class" if kind == "class" else "function")])
+
+    visit(tree, [])
+    return _doc(tree), symbols
+
+
+class SymbolIndex:
+    """
+    Per-project index. Every query calls `refresh()`, which re-stats the tree at
+    most every REFRESH_INTERVAL seconds and reparses only changed files;
+    ToolRegistry calls `invalidate(path)` after its own writes.
+    """
+    REFRESH_INTERVAL = 2.0
+    MAX_FILE_BYTES = 2 * 1024 * 1024
+
+    def __init__(self, root: str, ignore_dirs=None, file_cache: Optional[FileCache] = None):
+        self.root = os.path.abspath(root)
+        self.ignore_dirs = set(ignore_dirs or DEFAULT_IGNORE_DIRS)
+        self.file_cache = file_cache or get_file_cache()
+        self._files: Dict[str, Dict] = {}  # rel path -> {"key", "tokens", "symbols"}
+        self._lock = threading.RLock()
+        self._last_refresh = 0.0
+        self.last_refresh_ms = 0.0
+        self.reindexed = 0  # Files (re)parsed by the last refresh
+
+    # --- Maintenance ---
+
+    def _walk(self):
+        for dirpath, dirnames, filenames in os.walk(self.root):
+            dirnames[:] = [d for d in dirnames if d not in self.ignore_dirs and not d.startswith('.')]
+            for filename in filenames:
+                if os.path.splitext(filename)[1] in TEXT_EXTS:
+                    yield os.path.join(dirpath, filename)
+
+    def _index_file(self, abs_path: str, key: tuple) -> Dict:
+        lines = self.file_cache.get_lines(abs_path)
+        source = "".join(lines)
+        doc, symbols = parse_module(source) if abs_path.endswith(".py") else ("", [])
+        return {
+            "key": key,
+            "tokens": frozenset(_TOKEN_RE.findall(source)),
+            "symbols": symbols,
+            "doc": doc,
+        }
+
+    def refresh(self, force: bool = False):
+        with self._lock:
+            if not force and time.time() - self._last_refresh < self.REFRESH_INTERVAL:
+                return
+            start = time.perf_counter()
+            seen = set()
+            reindexed = 0
+            for abs_path in self._walk():
+                try:
+                    st = os.stat(abs_path)
+                except OSError:
+                    continue
+                if st.st_size > self.MAX_FILE_BYTES:
+                    continue
+                rel = os.path.relpath(abs_path, self.root).replace(os.sep, "/")
+                seen.add(rel)
+                key = (st.st_mtime_ns, st.st_size)
+                entry = self._files.get(rel)
+                if entry is None or entry["key"] != key:
+                    try:
+                        self._files[rel] = self._index_file(abs_path, key)
+                        reindexed += 1
+                    except OSError:
+                        continue
+            for rel in set(self._files) - seen:
+                del self._files[rel]
+            self.reindexed = reindexed
+            self._last_refresh = time.time()
+            self.last_refresh_ms = (time.perf_counter() - start) * 1000
+
+    def invalidate(self, path: Optional[str] = None):
+        """Forces the next query to re-stat the tree (and reparse `path`)."""
+        with self._lock:
+            if path:
+                rel = os.path.relpath(os.path.abspath(path), self.root).replace(os.sep, "/")
+                self._files.pop(rel, None)
+            self._last_refresh = 0.0
+
+    # --- Queries ---
+
+    def files(self) -> List[str]:
+        self.refresh()
+        with self._lock:
+            return sorted(self._files)
+
+    def symbols(self, rel_path: str) -> List[Dict]:
+        self.refresh()
+        with self._lock:
+            entry = self._files.get(rel_path)
+            return list(entry["symbols"]) if entry else []
+
+    def find_symbol(self, name: str, kind: Optional[str] = None) -> List[Dict]:
+        """Definitions whose name or qualified name matches `name` exactly."""
+        self.refresh()
+        results = []
+        with self._lock:
+            for rel, entry in sorted(self._files.items()):
+                if name not in entry["tokens"] and name.split(".")[-1] not in entry["tokens"]:
+                    continue
+                for sym in entry["symbols"]:
+                    if (sym["name"] == name or sym["qualname"] == name) and (kind is None or sym["kind"] == kind):
+                        results.append(dict(sym, path=rel))
+        return results
+
+    def module_doc(self, rel_path: str) -> str:
+        """First line of the module docstring."""
+        self.refresh()
+        with self._lock:
+            entry = self._files.get(rel_path)
+            return entry.get("doc", "") if entry else ""
+
+    def callers(self, name: str) -> List[Dict]:
+        """Definitions whose body calls `name` (reverse call edges)."""
+        self.refresh()
+        short = name.split(".")[-1]
+        results = []
+        with self._lock:
+            for rel, entry in sorted(self._files.items()):
+                if short not in entry["tokens"]:
+                    continue
+                results.extend(dict(sym, path=rel) for sym in entry["symbols"] if short in sym.get("calls", ()))
+        return results
+
+    @staticmethod
+    def _required_tokens(literal: str) -> List[str]:
+        """Identifier tokens that must appear whole in any file containing `literal`."""
+        return [
+            m.group() for m in _TOKEN_RE.finditer(literal)
+            if m.start() > 0 and m.end() < len(literal)
+        ]
+
+    def search(self, pattern: str, regex: bool = False, case_sensitive: bool = True,
+               path_glob: Optional[str] = None, max_results: int = 50) -> List[Dict]:
+        """grep-style search: [{"path", "line", "text"}]; literal queries skip files via the token index."""
+        self.refresh()
+        flags = 0 if case_sensitive else re.IGNORECASE
+        matcher = re.compile(pattern if regex else re.escape(pattern), flags)
+        required = [] if (regex or not case_sensitive) else self._required_tokens(pattern)
+
+        with self._lock:
+            candidates = [
+                rel for rel, entry in sorted(self._files.items())
+                if all(t in entry["tokens"] for t in required)
+                and (not path_glob or fnmatch.fnmatch(rel, path_glob))
+            ]
+
+        results = []
+        for rel in candidates:
+            try:
+                lines = self.file_cache.get_lines(os.path.join(self.root, rel))
+            except OSError:
+                continue
+            for lineno, line in enumerate(lines, 1):
+                if matcher.search(line):
+                    results.append({"path": rel, "line": lineno, "text": line.rstrip("\n")})
+                    if len(results) >= max_results:
+                        return results
+        return results
+
+
+_indexes: Dict[str, SymbolIndex] = {}
+_indexes_lock = threading.Lock()
+
+
+def get_symbol_index(root: str) -> SymbolIndex:
+    """Shared index per project root."""
+    root = os.path.abspath(root)
+    with _indexes_lock:
+        if root not in _indexes:
+            _indexes[root] = SymbolIndex(root)
+        return _indexes[root]
@@ -0,0 +1,258 @@
+"""
+🩺 SYNTAX CHECKER - Verificação de sintaxe/lint em processo, com cache
+`ast` + `compile` no próprio processo (sem subir um interpretador por save),
+resultados em cache por hash do conteúdo e um passe estático estilo pyflakes
+(usa o pyflakes de verdade se estiver instalado). Só vale chamar o LLM quando
+o diff desde a última versão aceita toca algo sinalizado.
+"""
+
+import ast
+import builtins
+import difflib
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Set, Tuple
+
+try:
+    from pyflakes import checker as pyflakes_checker
+except ImportError:
+    pyflakes_checker = None
+
+ERROR, WARNING = "error", "warning"
+# Names every module (or class body) has without binding them
+IMPLICIT_NAMES = {
+    "__file__", "__name__", "__doc__", "__builtins__", "__spec__", "__loader__", "__package__",
+    "__path__", "__annotations__", "__dict__", "__module__", "__qualname__", "__class__", "__debug__",
+}
+# pyflakes message classes that are real errors (the rest are warnings)
+PYFLAKES_ERRORS = {"UndefinedName", "UndefinedLocal", "UndefinedExport", "ReturnOutsideFunction",
+                   "YieldOutsideFunction", "ContinueOutsideLoop", "BreakOutsideLoop"}
+
+
+@dataclass(frozen=True)
+class Issue:
+    line: int
+    col: int
+    kind: str  # syntax | undefined-name | unused-import | redefinition | pyflakes class name
+    message: str
+    severity: str = WARNING
+
+    def key(self) -> Tuple[str, str]:
+        """Identity that survives the issue moving to another line."""
+        return (self.kind, self.message)
+
+    def __str__(self):
+        return f"{self.line}:{self.col} [{self.kind}] {self.message}"
+
+
+@dataclass
+class CheckResult:
+    path: str
+    digest: str
+    issues: List[Issue] = field(default_factory=list)
+    elapsed_ms: float = 0.0
+    cached: bool = False
+
+    @property
+    def ok(self) -> bool:
+        """No syntax error (the file compiles)."""
+        return not any(i.kind == "syntax" for i in self.issues)
+
+    @property
+    def clean(self) -> bool:
+        return not self.issues
+
+    @property
+    def errors(self) -> List[Issue]:
+        return [i for i in self.issues if i.severity == ERROR]
+
+
+def _static_pass(tree: ast.Module, is_package_init: bool = False) -> List[Issue]:
+    """Small pyflakes subset: undefined names, unused module imports, shadowed defs."""
+    bound: Set[str] = set(dir(builtins)) | IMPLICIT_NAMES
+    loads: Dict[str, Tuple[int, int]] = {}
+    imports: Dict[str, Tuple[int, int]] = {}
+    star_import = False
+    exported: Set[str] = set()
+
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Name):
+            if isinstance(node.ctx, ast.Load):
+                loads.setdefault(node.id, (node.lineno, node.col_offset))
+            else:
+                bound.add(node.id)
+        elif isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+            bound.add(node.name)
+        elif isinstance(node, ast.arg):
+            bound.add(node.arg)
+        elif isinstance(node, (ast.Import, ast.ImportFrom)):
+            for alias in node.names:
+                if alias.name == "*":
+                    star_import = True
+                    continue
+                name = alias.asname or alias.name.split(".")[0]
+                bound.add(name)
+                if node.col_offset == 0:
+                    imports.setdefault(name, (node.lineno, node.col_offset))
+        elif isinstance(node, ast.ExceptHandler) and node.name:
+            bound.add(node.name)
+        elif isinstance(node, (ast.Global, ast.Nonlocal)):
+            bound.update(node.names)
+        elif isinstance(node, ast.alias):
+            continue
+        elif type(node).__name__ in ("MatchAs", "MatchStar") and getattr(node, "name", None):
+            bound.add(node.name)
+        elif type(node).__name__ == "MatchMapping" and getattr(node, "rest", None):
+            bound.add(node.rest)
+        elif isinstance(node, ast.Assign) and any(isinstance(t, ast.Name) and t.id == "__all__" for t in node.targets):
+            if isinstance(node.value, (ast.List, ast.Tuple)):
+                exported.update(e.value for e in node.value.elts if isinstance(e, ast.Constant) and isinstance(e.value, str))
+
+    issues = []
+    if not star_import:
+        for name, (line, col) in loads.items():
+            if name not in bound:
+                issues.append(Issue(line, col, "undefined-name", f"undefined name '{name}'", ERROR))
+    if not is_package_init:
+        for name, (line, col) in imports.items():
+            if name not in loads and name not in exported:
+                issues.append(Issue(line, col, "unused-import", f"'{name}' imported but unused"))
+
+    for body_owner in ast.walk(tree):
+        body = getattr(body_owner, "body", None)
+        if not isinstance(body, list):
+            continue
+        seen: Dict[str, int] = {}
+        for stmt in body:
+            if isinstance(stmt, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+                if stmt.name in seen and not stmt.decorator_list:
+                    issues.append(Issue(stmt.lineno, stmt.col_offset, "redefinition",
+                                        f"redefinition of '{stmt.name}' from line {seen[stmt.name]}"))
+                seen[stmt.name] = stmt.lineno
+    return sorted(issues, key=lambda i: (i.line, i.col))
+
+
+def _pyflakes_pass(tree: ast.Module, path: str) -> List[Issue]:
+    found = pyflakes_checker.Checker(tree, filename=path)
+    return sorted(
+        (Issue(m.lineno, getattr(m, "col", 0), type(m).__name__, m.message % m.message_args,
+               ERROR if type(m).__name__ in PYFLAKES_ERRORS else WARNING) for m in found.messages),
+        key=lambda i: (i.line, i.col))
+
+
+def analyze_source(source: str, path: str = "<string>") -> List[Issue]:
+    """Syntax check (ast + compile) and, if it compiles, the static pass."""
+    try:
+        tree = ast.parse(source, filename=path)
+        compile(tree, path, "exec", dont_inherit=True)
+    except SyntaxError as e:
+        return [Issue(e.lineno or 1, (e.offset or 1) - 1, "syntax", e.msg or "invalid syntax", ERROR)]
+    except ValueError as e:  # e.g. null bytes
+        return [Issue(1, 0, "syntax", str(e), ERROR)]
+    if pyflakes_checker is not None:
+        return _pyflakes_pass(tree, path)
+    return _static_pass(tree, os.path.basename(path) == "__init__.py")
+
+
+def changed_lines(old: List[str], new: List[str]) -> Set[int]:
+    """1-based lines of `new` that were inserted/replaced (or border a deletion)."""
+    changed = set()
+    for tag, _, _, j1, j2 in difflib.SequenceMatcher(None, old, new, autojunk=False).get_opcodes():
+        if tag in ("replace", "insert"):
+            changed.update(range(j1 + 1, j2 + 1))
+        elif tag == "delete":
+            changed.update({max(1, j1), j1 + 1})
+    return changed
+
+
+class SyntaxChecker:
+    """
+    Long-lived, thread-safe checker. `check()` answers from an LRU keyed on the
+    content hash; `flagged_changes()` tells whether a change is worth an LLM
+    review compared with the last version passed to `accept()` (clean versions
+    are accepted automatically).
+    """
+    MAX_CACHED = 2048
+
+    def __init__(self, max_cached: int = MAX_CACHED):
+        self.max_cached = max_cached
+        self._cache: "OrderedDict[str, List[Issue]]" = OrderedDict()
+        self._current: Dict[str, Tuple[CheckResult, List[str]]] = {}  # path -> last checked version
+        self._baseline: Dict[str, Tuple[CheckResult, List[str]]] = {}  # path -> last accepted version
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def check(self, path: str, content: Optional[str] = None) -> CheckResult:
+        start = time.perf_counter()
+        path = os.path.abspath(path)
+        if content is None:
+            with open(path, "r", encoding="utf-8", errors="replace") as f:
+                content = f.read()
+        digest = hashlib.sha1(content.encode("utf-8", errors="replace")).hexdigest()
+        with self._lock:
+            issues = self._cache.get(digest)
+            if issues is not None:
+                self._cache.move_to_end(digest)
+                self.hits += 1
+        cached = issues is not None
+        if not cached:
+            issues = analyze_source(content, path)
+            with self._lock:
+                self.misses += 1
+                self._cache[digest] = issues
+                while len(self._cache) > self.max_cached:
+                    self._cache.popitem(last=False)
+        result = CheckResult(path, digest, list(issues), (time.perf_counter() - start) * 1000, cached)
+        lines = content.splitlines()
+        with self._lock:
+            self._current[path] = (result, lines)
+            if result.clean:
+                self._baseline[path] = (result, lines)
+        return result
+
+    def accept(self, path: str):
+        """The last checked version becomes the reference (e.g. after an LLM reviewed it)."""
+        path = os.path.abspath(path)
+        with self._lock:
+            if path in self._current:
+                self._baseline[path] = self._current[path]
+
+    def flagged_changes(self, path: str) -> List[Issue]:
+        """Issues of the last checked version that are new or sit on lines changed since the baseline."""
+        path = os.path.abspath(path)
+        with self._lock:
+            current = self._current.get(path)
+            baseline = self._baseline.get(path)
+        if current is None:
+            return []
+        result, lines = current
+        if baseline is None:
+            return list(result.issues)
+        old_result, old_lines = baseline
+        if old_result.digest == result.digest:
+            return []
+        known = {i.key() for i in old_result.issues}
+        touched = changed_lines(old_lines, lines)
+        return [i for i in result.issues if i.key() not in known or i.line in touched]
+
+    def stats(self) -> Dict:
+        return {"cached": len(self._cache), "hits": self.hits, "misses": self.misses,
+                "pyflakes": pyflakes_checker is not None}
+
+
+_checker: Optional[SyntaxChecker] = None
+_checker_lock = threading.Lock()
+
+
+def get_syntax_checker() -> SyntaxChecker:
+    """Process-wide checker shared by the ImmunityAgent and the Sentinel review."""
+    global _checker
+    with _checker_lock:
+        if _checker is None:
+            _checker = SyntaxChecker()
+        return _checker
@@ -0,0 +1,154 @@
+"""
+🕸️ TASK GRAPH - Small DAG runner for agent pipelines
+Cada estágio declara suas dependências; estágios independentes rodam em
+paralelo numa thread pool. Eventos (start/done/error/skipped) permitem
+transmitir resultados parciais e cada estágio tem seu tempo registrado.
+"""
+
+import logging
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+EventCallback = Callable[[str, str, Any], None]  # (event, stage, payload)
+
+
+@dataclass
+class Stage:
+    name: str
+    func: Callable[[Dict[str, Any]], Any]  # Receives the results of everything finished so far
+    deps: List[str] = field(default_factory=list)
+    condition: Optional[Callable[[Dict[str, Any]], bool]] = None  # False -> skipped
+    required: bool = True  # A failed required stage skips its dependents
+
+
+class TaskGraph:
+    """
+    Usage:
+        graph = TaskGraph(on_event=print)
+        graph.add("a", fa)
+        graph.add("b", fb, deps=["a"])
+        results = graph.run()
+    After run(): `timings` (seconds per stage), `errors` (stage -> exception),
+    `skipped` and `wall_time`.
+    """
+
+    def __init__(self, max_workers: int = 4, on_event: Optional[EventCallback] = None):
+        self.max_workers = max_workers
+        self.on_event = on_event
+        self.stages: Dict[str, Stage] = {}
+        self.timings: Dict[str, float] = {}
+        self.started_at: Dict[str, float] = {}
+        self.errors: Dict[str, BaseException] = {}
+        self.skipped: List[str] = []
+        self.wall_time = 0.0
+        self._lock = threading.Lock()
+        self._cancelled = threading.Event()
+
+    def add(self, name: str, func: Callable, deps: Iterable[str] = (), condition=None,
+            required: bool = True) -> "TaskGraph":
+        self.stages[name] = Stage(name, func, list(deps), condition, required)
+        return self
+
+    def cancel(self):
+        """Stages not started yet are skipped; running ones finish normally."""
+        self._cancelled.set()
+
+    def _emit(self, event: str, name: str, payload: Any = None):
+        if self.on_event:
+            try:
+                self.on_event(event, name, payload)
+            except Exception as e:
+                logger.debug(f"on_event callback failed: {e}")
+
+    def _validate(self, initial: Dict):
+        for stage in self.stages.values():
+            for dep in stage.deps:
+                if dep not in self.stages and dep not in initial:
+                    raise ValueError(f"Stage '{stage.name}' depends on unknown stage '{dep}'")
+        # Cycle check (Kahn)
+        indegree = {n: sum(d in self.stages for d in s.deps) for n, s in self.stages.items()}
+        ready = [n for n, d in indegree.items() if d == 0]
+        seen = 0
+        while ready:
+            current = ready.pop()
+            seen += 1
+            for name, stage in self.stages.items():
+                if current in stage.deps:
+                    indegree[name] -= 1
+                    if indegree[name] == 0:
+                        ready.append(name)
+        if seen != len(self.stages):
+            raise ValueError("Task graph has a cycle")
+
+    def _run_stage(self, stage: Stage, results: Dict[str, Any]):
+        start = time.perf_counter()
+        with self._lock:
+            self.started_at[stage.name] = start
+        self._emit("start", stage.name)
+        try:
+            return stage.func(results)
+        finally:
+            with self._lock:
+                self.timings[stage.name] = time.perf_counter() - start
+
+    def run(self, initial: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Runs every stage once its dependencies are done; returns all results."""
+        results: Dict[str, Any] = dict(initial or {})
+        self._validate(results)
+        pending = dict(self.stages)
+        finished = set(results)
+        failed = set()
+        run_start = time.perf_counter()
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            running = {}
+            while pending or running:
+                for name, stage in list(pending.items()):
+                    if not all(dep in finished for dep in stage.deps):
+                        continue
+                    del pending[name]
+                    blocked = [d for d in stage.deps if d in failed and self.stages[d].required]
+                    cancelled = self._cancelled.is_set()
+                    if blocked or cancelled or (stage.condition and not stage.condition(results)):
+                        results[name] = None
+                        finished.add(name)
+                        self.skipped.append(name)
+                        if blocked or cancelled:
+                            failed.add(name)
+                        self._emit("skipped", name, blocked or ("cancelled" if cancelled else None))
+                        continue
+                    running[pool.submit(self._run_stage, stage, dict(results))] = name
+
+                if not running:
+                    continue  # Skips may have unblocked more stages
+                done, _ = wait(list(running), return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = running.pop(future)
+                    try:
+                        results[name] = future.result()
+                        self._emit("done", name, results[name])
+                    except Exception as e:
+                        logger.warning(f"Stage '{name}' failed: {e}")
+                        results[name] = None
+                        self.errors[name] = e
+                        failed.add(name)
+                        self._emit("error", name, e)
+                    finished.add(name)
+
+        self.wall_time = time.perf_counter() - run_start
+        return results
+
+    def report(self) -> Dict[str, Any]:
+        """Per-stage seconds plus wall time vs. the sequential sum (time saved by overlap)."""
+        sequential = sum(self.timings.values())
+        return {
+            "stages": {name: round(sec, 3) for name, sec in self.timings.items()},
+            "wall_time": round(self.wall_time, 3),
+            "sequential_time": round(sequential, 3),
+            "overlap_saved": round(max(sequential - self.wall_time, 0.0), 3),
+        }
@@ -0,0 +1,219 @@
+"""
+🛠️ TOOL PROTOCOL - Structured tool calls + parallel execution
+O agente pede ferramentas em JSON (ou via function calling nativo do provedor),
+várias por passo; chamadas independentes rodam em paralelo e cada passo gera
+um trace com o tempo de parede das ferramentas.
+"""
+
+import ast
+import inspect
+import json
+import logging
+import re
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Tools that change the workspace: they act as ordering barriers between parallel batches
+MUTATING_TOOLS = {"write_file", "replace_text", "run_cmd"}
+
+TOOL_CALLS_MARKER = "🛠️ TOOL_CALLS"
+_LEGACY_RE = re.compile(r'🛠️ TOOL:\s*(\w+)\((.*)\)\s*$', re.MULTILINE)
+_FENCE_RE = re.compile(r'```(?:json)?\s*(.*?)```', re.DOTALL)
+
+
+@dataclass
+class ToolCall:
+    name: str
+    args: Dict[str, Any] = field(default_factory=dict)
+    id: str = field(default_factory=lambda: uuid.uuid4().hex[:8])
+
+
+@dataclass
+class ToolResult:
+    call: ToolCall
+    output: str
+    ok: bool
+    elapsed_ms: float
+
+
+def describe_tools(schemas: List[Dict]) -> str:
+    """Prompt section teaching the JSON tool-call format (for providers without native calling)."""
+    lines = []
+    for schema in schemas:
+        params = ", ".join(
+            f"{name}: {spec.get('type', 'string')}" + ("" if name in schema["parameters"].get("required", []) else "?")
+            for name, spec in schema["parameters"]["properties"].items()
+        )
+        lines.append(f"- {schema['name']}({params}): {schema['description']}")
+    return (
+        "FERRAMENTAS DISPONÍVEIS:\n" + "\n".join(lines) + "\n\n"
+        "Para usar ferramentas, responda com o marcador e um bloco JSON (pode pedir VÁRIAS de uma vez; "
+        "leituras independentes rodam em paralelo):\n"
+        f"{TOOL_CALLS_MARKER}:\n"
+        "```json\n"
+        '[{"name": "read_file", "args": {"path": "a.py"}}, {"name": "read_file", "args": {"path": "b.py"}}]\n'
+        "```\n"
+        "Quando não precisar de ferramentas, responda normalmente (sem o marcador)."
+    )
+
+
+def _calls_from_json(data) -> List[ToolCall]:
+    if isinstance(data, dict):
+        data = data.get("tool_calls", [data])
+    if not isinstance(data, list):
+        return []
+    calls = []
+    for item in data:
+        if not isinstance(item, dict) or not isinstance(item.get("name"), str):
+            return []
+        args = item.get("args", item.get("arguments", {}))
+        if isinstance(args, str):
+            try:
+                args = json.loads(args)
+            except ValueError:
+                return []
+        if not isinstance(args, dict):
+            return []
+        calls.append(ToolCall(item["name"], args))
+    return calls
+
+
+def _legacy_args(raw: str, func: Optional[Callable]) -> Dict[str, Any]:
+    """Parses the old `name(args)` syntax, mapping positional literals onto the tool signature."""
+    params = list(inspect.signature(func).parameters) if func else []
+    try:
+        node = ast.parse(f"f({raw})", mode="eval").body
+        positional = [ast.literal_eval(a) for a in node.args]
+        args = {kw.arg: ast.literal_eval(kw.value) for kw in node.keywords}
+    except (SyntaxError, ValueError):
+        # Unquoted single argument, e.g. read_file(src/app.py)
+        positional, args = [raw.strip().strip('"\'')], {}
+    for name, value in zip(params, positional):
+        args.setdefault(name, value)
+    if not params and positional:
+        args["arg"] = positional[0]
+    return args
+
+
+def parse_tool_calls(text: str, tool_map: Dict[str, Callable]) -> List[ToolCall]:
+    """
+    Extracts tool calls from a model reply. Accepts, in order:
+    1. `🛠️ TOOL_CALLS:` followed by a JSON list/object (fenced or raw);
+    2. a fenced JSON block shaped like tool calls;
+    3. the legacy `🛠️ TOOL: name(args)` lines (several allowed).
+    """
+    if not text:
+        return []
+
+    marker = text.find(TOOL_CALLS_MARKER)
+    if marker != -1:
+        tail = text[marker + len(TOOL_CALLS_MARKER):]
+        fence = _FENCE_RE.search(tail)
+        candidates = [fence.group(1)] if fence else []
+        start = min((i for i in (tail.find("["), tail.find("{")) if i != -1), default=-1)
+        if start != -1:
+            candidates.append(tail[start:])
+        for candidate in candidates:
+            try:
+                data, _ = json.JSONDecoder().raw_decode(candidate.strip())
+            except ValueError:
+                continue
+            calls = _calls_from_json(data)
+            if calls:
+                return calls
+
+    for block in _FENCE_RE.findall(text):
+        try:
+            calls = _calls_from_json(json.loads(block))
+        except ValueError:
+            continue
+        if calls and all(c.name in tool_map for c in calls):
+            return calls
+
+    return [
+        ToolCall(name, _legacy_args(raw, tool_map.get(name)))
+        for name, raw in _LEGACY_RE.findall(text)
+    ]
+
+
+class ToolExecutor:
+    """
+    Runs a step's tool calls. Consecutive read-only calls run concurrently;
+    a mutating call (MUTATING_TOOLS) waits for everything before it, so the
+    model's ordering of reads and writes is preserved.
+    """
+
+    def __init__(self, tool_map: Dict[str, Callable], max_workers: int = 4):
+        self.tool_map = tool_map
+        self.max_workers = max_workers
+
+    def _run_one(self, call: ToolCall) -> ToolResult:
+        start = time.perf_counter()
+        func = self.tool_map.get(call.name)
+        if func is None:
+            output, ok = f"Ferramenta '{call.name}' desconhecida.", False
+        else:
+            try:
+                output, ok = str(func(**call.args)), True
+            except TypeError as e:
+                output, ok = f"Argumentos inválidos para {call.name}: {e}", False
+            except Exception as e:
+                output, ok = f"Erro ao executar ferramenta: {e}", False
+        return ToolResult(call, output, ok, (time.perf_counter() - start) * 1000)
+
+    def execute(self, calls: List[ToolCall]) -> List[ToolResult]:
+        """Returns results in the same order as `calls`."""
+        results: List[Optional[ToolResult]] = [None] * len(calls)
+        batch: List[int] = []
+
+        def flush(pool):
+            if len(batch) == 1:
+                results[batch[0]] = self._run_one(calls[batch[0]])
+            elif batch:
+                for i, result in zip(batch, pool.map(self._run_one, [calls[i] for i in batch])):
+                    results[i] = result
+            batch.clear()
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            for i, call in enumerate(calls):
+                if call.name in MUTATING_TOOLS:
+                    flush(pool)
+                    results[i] = self._run_one(call)
+                else:
+                    batch.append(i)
+            flush(pool)
+        return results
+
+
+def format_observations(results: List[ToolResult], max_chars: int = 4000) -> str:
+    """Observation block fed back to the model, one section per call."""
+    parts = []
+    for r in results:
+        args = json.dumps(r.call.args, ensure_ascii=False)
+        output = r.output if len(r.output) <= max_chars else r.output[:max_chars] + "\n... [truncado]"
+        status = "" if r.ok else " [ERRO]"
+        parts.append(f"👀 OBSERVATION [{r.call.name}({args})]{status}:\n{output}")
+    return "\n\n".join(parts)
+
+
+def step_trace(step: int, llm_ms: float, brain: Optional[str], native: bool,
+               results: List[ToolResult], tool_wall_ms: float, tokens: Optional[Dict] = None) -> Dict:
+    """One entry of CodexAgent.last_trace."""
+    return {
+        "step": step,
+        "brain": brain,
+        "native_tools": native,
+        "llm_ms": round(llm_ms, 1),
+        "tool_wall_ms": round(tool_wall_ms, 1),
+        "tool_sum_ms": round(sum(r.elapsed_ms for r in results), 1),
+        "tools": [
+            {"name": r.call.name, "args": r.call.args, "ok": r.ok, "ms": round(r.elapsed_ms, 1)}
+            for r in results
+        ],
+        "tokens": tokens or {},
+    }
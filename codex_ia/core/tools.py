@@ -1,14 +1,36 @@
 import os
-import subprocess
 import glob
+import inspect
 from pathlib import Path
+from codex_ia.core.executor import clip, get_executor
+from codex_ia.core.file_cache import get_file_cache
+from codex_ia.core.symbol_index import get_symbol_index
 
 class ToolRegistry:
     """
     The Toolkit for the Autonomous Agent.
     """
+    FULL_READ_LIMIT = 50000  # Bytes returned whole; bigger files are windowed
+    DEFAULT_WINDOW = 400  # Lines per window when no limit is given
+    CMD_TIMEOUT = 10  # Seconds per run_cmd (killed with its whole process group)
+
     def __init__(self, root_path):
         self.root = Path(root_path).resolve()
+        self.file_cache = get_file_cache()
+        self._symbol_index = None
+
+    @property
+    def symbol_index(self):
+        """Shared symbol/text index of the project, built on first search."""
+        if self._symbol_index is None:
+            self._symbol_index = get_symbol_index(str(self.root))
+        return self._symbol_index
+
+    def _changed(self, target):
+        """Keeps caches coherent after our own writes."""
+        self.file_cache.invalidate(str(target))
+        if self._symbol_index is not None:
+            self._symbol_index.invalidate(str(target))
 
     def list_dir(self, path="."):
         """Lists files in a directory."""
@@ -29,8 +51,8 @@ class ToolRegistry:
         except Exception as e:
             return f"Error listing dir: {e}"
 
-    def read_file(self, path):
-        """Reads a file's content."""
+    def read_file(self, path, offset=1, limit=0):
+        """Reads a file (or a window of lines: offset is 1-based, limit=0 means whole/default window)."""
         try:
             target = (self.root / path).resolve()
             if not str(target).startswith(str(self.root)):
@@ -38,14 +60,46 @@ class ToolRegistry:
             
             if not target.exists():
                 return f"Error: File '{path}' not found."
-            
-            if target.stat().st_size > 50000:
-                return "Error: File too large to read securely."
-                
-            return target.read_text(encoding='utf-8', errors='ignore')
+
+            offset, limit = int(offset or 1), int(limit or 0)
+            if offset == 1 and not limit and target.stat().st_size <= self.FULL_READ_LIMIT:
+                return "".join(self.file_cache.get_lines(str(target)))
+
+            lines, total = self.file_cache.read_range(str(target), offset, limit or self.DEFAULT_WINDOW)
+            last = offset + len(lines) - 1
+            header = f"[{path}: linhas {offset}-{last} de {total}"
+            if last < total:
+                header += f"; continue com offset={last + 1}"
+            return header + "]\n" + "".join(lines)
         except Exception as e:
             return f"Error reading file: {e}"
 
+    def search_code(self, pattern, path_glob="", regex=False, max_results=50):
+        """Searches the project like grep (literal by default); returns path:line: text."""
+        try:
+            use_regex = regex is True or str(regex).lower() in ("1", "true", "yes")
+            hits = self.symbol_index.search(
+                pattern, regex=use_regex, path_glob=path_glob or None, max_results=int(max_results)
+            )
+            if not hits:
+                return f"No matches for '{pattern}'."
+            return "\n".join(f"{h['path']}:{h['line']}: {h['text'].strip()[:200]}" for h in hits)
+        except Exception as e:
+            return f"Error searching: {e}"
+
+    def find_symbol(self, name):
+        """Finds where a class/function/method is defined (path:line and signature)."""
+        try:
+            hits = self.symbol_index.find_symbol(name)
+            if not hits:
+                return f"Symbol '{name}' not found."
+            return "\n".join(
+                f"{h['path']}:{h['lineno']}-{h['end_lineno']}: {h['signature']} [{h['kind']} {h['qualname']}]"
+                for h in hits
+            )
+        except Exception as e:
+            return f"Error finding symbol: {e}"
+
     def write_file(self, path, content):
         """Writes content to a file."""
         try:
@@ -55,6 +109,7 @@ class ToolRegistry:
                 
             target.parent.mkdir(parents=True, exist_ok=True)
             target.write_text(content, encoding='utf-8')
+            self._changed(target)
             return f"Success: Wrote to {path}"
         except Exception as e:
             return f"Error writing file: {e}"
@@ -66,20 +121,15 @@ class ToolRegistry:
         if any(b in cmd for b in blocked):
             return "Error: Command blocked for security."
             
-        try:
-            result = subprocess.run(
-                cmd, 
-                cwd=self.root, 
-                shell=True, 
-                capture_output=True, 
-                text=True, 
-                timeout=10
-            )
-            stdout = result.stdout[:1000] # Truncate
-            stderr = result.stderr[:1000]
-            return f"EXIT: {result.returncode}\nSTDOUT:\n{stdout}\nSTDERR:\n{stderr}"
-        except Exception as e:
-            return f"Error running command: {e}"
+        result = get_executor().run(cmd, cwd=str(self.root), timeout=self.CMD_TIMEOUT)
+        if self._symbol_index is not None:
+            self._symbol_index.invalidate()  # The command may have touched files
+        if result.error:
+            return f"Error running command: {result.error}"
+        status = "TIMEOUT" if result.timed_out else result.returncode
+        stdout = clip(result.stdout, 1000) # Truncate (head + tail)
+        stderr = clip(result.stderr, 1000)
+        return f"EXIT: {status}\nSTDOUT:\n{stdout}\nSTDERR:\n{stderr}"
 
     def replace_text(self, path, old_text, new_text):
         """Replaces precise text in a file."""
@@ -102,6 +152,7 @@ class ToolRegistry:
             
             new_content = content.replace(old_text, new_text)
             target.write_text(new_content, encoding='utf-8')
+            self._changed(target)
             return f"Success: Modified {path}"
         except Exception as e:
             return f"Error editing file: {e}"
@@ -111,7 +162,35 @@ class ToolRegistry:
         return {
             "list_dir": self.list_dir,
             "read_file": self.read_file,
+            "search_code": self.search_code,
+            "find_symbol": self.find_symbol,
             "write_file": self.write_file,
             "replace_text": self.replace_text,
             "run_cmd": self.run_cmd
         }
+
+    def get_tool_schemas(self):
+        """
+        JSON-schema description of every tool (used for native function calling
+        and for the JSON tool-call section of the prompt).
+        """
+        schemas = []
+        for name, func in self.get_tool_map().items():
+            properties, required = {}, []
+            for param in inspect.signature(func).parameters.values():
+                default = param.default
+                if isinstance(default, bool):
+                    json_type = "boolean"
+                elif isinstance(default, int):
+                    json_type = "integer"
+                else:
+                    json_type = "string"
+                properties[param.name] = {"type": json_type}
+                if default is inspect.Parameter.empty:
+                    required.append(param.name)
+            schemas.append({
+                "name": name,
+                "description": (func.__doc__ or name).strip().splitlines()[0],
+                "parameters": {"type": "object", "properties": properties, "required": required},
+            })
+        return schemas
@@ -1,9 +1,10 @@
 
 import os
-import chromadb
-from chromadb.utils import embedding_functions
 from typing import List, Dict
 import logging
+from codex_ia.core.lazy import lazy_import
+
+chromadb = lazy_import("chromadb")
 
 class CodexVectorStore:
     """
@@ -0,0 +1,113 @@
+"""
+🌳 WORKTREE - Isolated copies of a project for parallel verification
+Cada candidato de correção é aplicado e testado na sua própria cópia do
+projeto. Em repositórios git usa `git worktree` (+ as mudanças ainda não
+commitadas); fora do git, faz uma cópia leve com links para pastas pesadas.
+"""
+
+import logging
+import os
+import shutil
+import subprocess
+import tempfile
+from typing import Optional
+
+from codex_ia.core.symbol_index import DEFAULT_IGNORE_DIRS
+
+logger = logging.getLogger(__name__)
+
+# Big dependency folders are linked, not copied (verification usually needs them)
+LINKED_DIRS = {'node_modules', 'venv', '.venv', 'env'}
+GIT_TIMEOUT = 60
+
+
+def _git(args, cwd: str, input_bytes: Optional[bytes] = None) -> subprocess.CompletedProcess:
+    return subprocess.run(["git", *args], cwd=cwd, input=input_bytes, capture_output=True, timeout=GIT_TIMEOUT)
+
+
+class Worktree:
+    """
+    Usage:
+        with Worktree(root) as path:
+            ...  # edit/run inside `path`; the copy is removed on exit
+    `mode` is "git" or "copy".
+    """
+
+    def __init__(self, root: str, prefix: str = "codex_wt_"):
+        self.root = os.path.abspath(root)
+        self.prefix = prefix
+        self.path: Optional[str] = None  # Project root inside the copy
+        self.mode: Optional[str] = None
+        self._base: Optional[str] = None  # Temp dir to delete
+        self._toplevel: Optional[str] = None
+
+    def create(self) -> str:
+        self._base = tempfile.mkdtemp(prefix=self.prefix)
+        try:
+            self._create_git()
+        except Exception as e:
+            logger.debug(f"git worktree unavailable ({e}), copying instead")
+            self.remove()
+            self._base = tempfile.mkdtemp(prefix=self.prefix)
+            self._create_copy()
+            self.mode = "copy"
+        return self.path
+
+    def _create_git(self):
+        top = _git(["rev-parse", "--show-toplevel"], self.root)
+        if top.returncode != 0 or _git(["rev-parse", "--verify", "HEAD"], self.root).returncode != 0:
+            raise RuntimeError("not a git repository with commits")
+        self._toplevel = top.stdout.decode().strip()
+        checkout = os.path.join(self._base, "tree")
+        added = _git(["worktree", "add", "--detach", checkout, "HEAD"], self._toplevel)
+        if added.returncode != 0:
+            raise RuntimeError(added.stderr.decode(errors="replace"))
+        self.mode = "git"
+        self.path = os.path.join(checkout, os.path.relpath(self.root, self._toplevel))
+
+        # Bring over uncommitted edits (tracked) and untracked files of the working tree
+        diff = _git(["diff", "HEAD", "--binary"], self._toplevel).stdout
+        if diff.strip():
+            applied = _git(["apply", "--binary", "--whitespace=nowarn"], checkout, input_bytes=diff)
+            if applied.returncode != 0:
+                raise RuntimeError(f"could not replay local changes: {applied.stderr.decode(errors='replace')}")
+        untracked = _git(["ls-files", "--others", "--exclude-standard", "-z"], self._toplevel).stdout
+        for rel in filter(None, untracked.decode(errors="replace").split("\0")):
+            src, dst = os.path.join(self._toplevel, rel), os.path.join(checkout, rel)
+            if os.path.isfile(src):
+                os.makedirs(os.path.dirname(dst), exist_ok=True)
+                shutil.copy2(src, dst)
+        self._link_heavy_dirs()
+
+    def _create_copy(self):
+        self.path = os.path.join(self._base, os.path.basename(self.root) or "project")
+        skip = (DEFAULT_IGNORE_DIRS | LINKED_DIRS)
+        shutil.copytree(self.root, self.path, symlinks=True,
+                        ignore=lambda d, names: [n for n in names if n in skip])
+        self._link_heavy_dirs()
+
+    def _link_heavy_dirs(self):
+        for name in LINKED_DIRS:
+            src, dst = os.path.join(self.root, name), os.path.join(self.path, name)
+            if os.path.isdir(src) and not os.path.exists(dst):
+                try:
+                    os.symlink(src, dst, target_is_directory=True)
+                except OSError:
+                    pass
+
+    def remove(self):
+        if self.mode == "git" and self._toplevel:
+            _git(["worktree", "remove", "--force", os.path.join(self._base, "tree")], self._toplevel)
+        if self._base:
+            shutil.rmtree(self._base, ignore_errors=True)
+        if self.mode == "git" and self._toplevel:
+            _git(["worktree", "prune"], self._toplevel)
+        self._base = None
+        self.mode = None
+
+    def __enter__(self) -> str:
+        return self.create()
+
+    def __exit__(self, *exc):
+        self.remove()
+        return False
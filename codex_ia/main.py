@@ -4,12 +4,10 @@ from rich.console import Console
 from rich.markdown import Markdown
 from codex_ia.core.context import ContextManager
 from codex_ia.core.llm_client import GeminiClient
-from codex_ia.core.immunity_agent import ImmunityAgent
-from codex_ia.core.ascension_agent import AscensionAgent
-from dotenv import load_dotenv
+from codex_ia.core.lazy import load_env_once
 import os
 
-load_dotenv(override=True)
+load_env_once()
 
 app = typer.Typer()
 console = Console()
@@ -109,6 +107,7 @@ def immunity(path: str = "."):
     console.print(f"[bold red]Iniciando Protocolo de Imunidade em: {path}[/bold red]")
     console.print("[dim]Pressione Ctrl+C para parar.[/dim]")
     
+    from codex_ia.core.immunity_agent import ImmunityAgent
     agent = ImmunityAgent(path)
     agent.activate_watchdog()
     
@@ -128,6 +127,8 @@ def ascension():
     # Verify Safety Locks first? The Agent handles it.
     console.print("[bold magenta]Iniciando Agente de Ascensão...[/bold magenta]")
     
+    from codex_ia.core.ascension_agent import AscensionAgent
+    from rich.panel import Panel
     agent = AscensionAgent(".")
     structure = agent.introspect()
     
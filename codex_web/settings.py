@@ -83,6 +83,22 @@ STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
+# Shared cache (agent registry generation).
+# locmem is per-process; use 'file' or 'redis' to share state across gunicorn workers.
+CODEX_CACHE_BACKEND = os.environ.get('CODEX_CACHE_BACKEND', 'locmem')
+_CACHE_BACKENDS = {
+    'locmem': ('django.core.cache.backends.locmem.LocMemCache', 'codex-ia'),
+    'file': ('django.core.cache.backends.filebased.FileBasedCache', str(BASE_DIR / '.codex_cache')),
+    'redis': ('django.core.cache.backends.redis.RedisCache', 'redis://127.0.0.1:6379/1'),
+}
+_cache_backend, _cache_location = _CACHE_BACKENDS.get(CODEX_CACHE_BACKEND, _CACHE_BACKENDS['locmem'])
+CACHES = {
+    'default': {
+        'BACKEND': _cache_backend,
+        'LOCATION': os.environ.get('CODEX_CACHE_LOCATION', _cache_location),
+    }
+}
+
 # Gemini API Key
 GEMINI_API_KEY = os.environ.get('GEMINI_API_KEY', '')
 
@@ -0,0 +1,167 @@
+"""
+Process-level registry of Codex agents and shared resources.
+
+Each gunicorn worker keeps a small pool of CodexAgents per project dir and one
+shared BrainRouter instead of rebuilding them on every request. The
+invalidation generation lives in Django's cache framework, so with a file or
+redis cache every worker sees the same value.
+"""
+import hashlib
+import logging
+import os
+import threading
+from contextlib import contextmanager
+
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Environment values that change which brains/models get built
+CONFIG_ENV_KEYS = (
+    "GEMINI_API_KEY", "GENAI_API_KEY", "GEMINI_MODEL",
+    "GROQ_API_KEY", "OPENAI_API_KEY", "XAI_API_KEY", "DEEPSEEK_API_KEY",
+    "MISTRAL_API_KEY", "COHERE_API_KEY", "HUGGINGFACE_API_KEY", "PERPLEXITY_API_KEY",
+    "OLLAMA_MODEL", "OLLAMA_MODEL_CODE", "OLLAMA_MODEL_REASONING",
+)
+
+GENERATION_KEY = "codex:registry:generation"
+# Agents per project dir and worker: concurrent requests each lease their own
+AGENTS_PER_PROJECT = int(os.getenv("CODEX_AGENTS_PER_PROJECT", "4"))
+
+
+def config_fingerprint() -> str:
+    """Hash of the provider configuration (keys are never stored in clear)."""
+    raw = "|".join(f"{k}={os.getenv(k, '')}" for k in CONFIG_ENV_KEYS)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def _default_agent_factory(project_dir):
+    from codex_ia.core.agent import CodexAgent
+    return CodexAgent(project_dir=project_dir)
+
+
+def _default_router_factory():
+    from codex_ia.core.brain_router import BrainRouter
+    return BrainRouter()
+
+
+class AgentRegistry:
+    """
+    Lifecycle:
+    - warm(): build resources ahead of the first request (worker boot).
+    - get_agent()/get_router(): reuse per project dir / per process.
+    - agent_session(): lease an agent from the project's pool for one request.
+    - invalidate(): drop everything here and, through the shared cache, in every worker.
+    Resources are also rebuilt automatically when the config fingerprint changes.
+    """
+
+    def __init__(self, agent_factory=None, router_factory=None, pool_size: int = AGENTS_PER_PROJECT):
+        self.agent_factory = agent_factory or _default_agent_factory
+        self.router_factory = router_factory or _default_router_factory
+        self.pool_size = max(pool_size, 1)
+        self._lock = threading.RLock()
+        self._released = threading.Condition(self._lock)
+        self._agents = {}  # project dir -> first agent (warm-up, get_agent)
+        self._idle = {}  # project dir -> agents not leased right now
+        self._leased = {}  # project dir -> agents currently leased
+        self._router = None
+        self._fingerprint = None
+        self._generation = None
+
+    def _shared_generation(self) -> int:
+        generation = cache.get(GENERATION_KEY)
+        if generation is None:
+            cache.add(GENERATION_KEY, 0, timeout=None)
+            generation = cache.get(GENERATION_KEY, 0)
+        return generation
+
+    def _ensure_fresh(self):
+        """Drops cached resources if the config or the shared generation changed."""
+        fingerprint = config_fingerprint()
+        generation = self._shared_generation()
+        if fingerprint != self._fingerprint or generation != self._generation:
+            if self._fingerprint is not None:
+                logger.info("Codex registry: configuration changed, rebuilding agents")
+            self._agents.clear()
+            self._idle.clear()  # Leased agents of the old generation are dropped on release
+            self._router = None
+            self._fingerprint = fingerprint
+            self._generation = generation
+
+    def get_agent(self, project_dir: str = PROJECT_DIR):
+        """Returns the cached CodexAgent for project_dir (None if it can't be built)."""
+        key = os.path.abspath(project_dir)
+        with self._lock:
+            self._ensure_fresh()
+            if key not in self._agents:
+                try:
+                    self._agents[key] = self.agent_factory(key)
+                except Exception as e:
+                    logger.error(f"Error initializing agent: {e}")
+                    return None
+                self._idle.setdefault(key, []).append(self._agents[key])
+            return self._agents[key]
+
+    @contextmanager
+    def agent_session(self, project_dir: str = PROJECT_DIR):
+        """
+        Leases an agent from the project's pool for one request. Agents keep
+        per-conversation state, so each is used by one request at a time; up to
+        pool_size requests per project run concurrently, the rest wait for a release.
+        """
+        key = os.path.abspath(project_dir)
+        self.get_agent(key)  # Seeds the pool with the shared agent
+        with self._released:
+            while True:
+                self._ensure_fresh()
+                idle = self._idle.setdefault(key, [])
+                if idle or len(idle) + self._leased.get(key, 0) < self.pool_size:
+                    break
+                self._released.wait()
+            agent = idle.pop() if idle else None
+            self._leased[key] = self._leased.get(key, 0) + 1
+            generation = (self._fingerprint, self._generation)
+        try:
+            if agent is None:
+                try:
+                    agent = self.agent_factory(key)
+                except Exception as e:
+                    logger.error(f"Error initializing agent: {e}")
+            yield agent
+        finally:
+            with self._released:
+                self._leased[key] -= 1
+                if agent is not None and generation == (self._fingerprint, self._generation):
+                    self._idle.setdefault(key, []).append(agent)
+                self._released.notify()
+
+    def get_router(self):
+        """Returns the process-wide BrainRouter."""
+        with self._lock:
+            self._ensure_fresh()
+            if self._router is None:
+                self._router = self.router_factory()
+            return self._router
+
+    def warm(self, project_dirs=None):
+        """Builds the router and agents ahead of the first request."""
+        for project_dir in project_dirs or [PROJECT_DIR]:
+            self.get_agent(project_dir)
+        self.get_router()
+        logger.info("Codex registry warmed")
+
+    def invalidate(self):
+        """Drops cached resources in this process and signals the other workers."""
+        from codex_ia.core.lazy import reload_env
+        reload_env()  # Pick up edited API keys in .env
+        try:
+            cache.incr(GENERATION_KEY)
+        except ValueError:
+            cache.set(GENERATION_KEY, 1, timeout=None)
+        with self._lock:
+            self._ensure_fresh()
+
+
+registry = AgentRegistry()
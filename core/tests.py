@@ -1,3 +1,84 @@
-from django.test import TestCase
+import os
+from unittest import mock
 
-# Create your tests here.
+from django.test import TestCase, override_settings
+
+from .registry import AgentRegistry, GENERATION_KEY
+
+
+class _FakeAgent:
+    def __init__(self, project_dir):
+        self.project_dir = project_dir
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class AgentRegistryTests(TestCase):
+    def setUp(self):
+        from django.core.cache import cache
+        cache.delete(GENERATION_KEY)
+        self.built = []
+        self.registry = AgentRegistry(agent_factory=self._build, router_factory=object)
+
+    def _build(self, project_dir):
+        self.built.append(project_dir)
+        return _FakeAgent(project_dir)
+
+    def test_agent_reused_per_project_dir(self):
+        first = self.registry.get_agent("/tmp/project-a")
+        second = self.registry.get_agent("/tmp/project-a")
+        other = self.registry.get_agent("/tmp/project-b")
+        self.assertIs(first, second)
+        self.assertIsNot(first, other)
+        self.assertEqual(len(self.built), 2)
+
+    def test_router_is_process_wide(self):
+        self.assertIs(self.registry.get_router(), self.registry.get_router())
+
+    def test_invalidate_signals_other_registries(self):
+        worker_b = AgentRegistry(agent_factory=self._build, router_factory=object)
+        agent_b = worker_b.get_agent("/tmp/project-a")
+        self.registry.invalidate()
+        self.assertIsNot(worker_b.get_agent("/tmp/project-a"), agent_b)
+
+    def test_config_change_rebuilds(self):
+        agent = self.registry.get_agent("/tmp/project-a")
+        with mock.patch.dict(os.environ, {"GEMINI_MODEL": "rotated-model-for-test"}):
+            self.assertIsNot(self.registry.get_agent("/tmp/project-a"), agent)
+
+    def test_sessions_lease_distinct_agents(self):
+        registry = AgentRegistry(agent_factory=self._build, router_factory=object, pool_size=2)
+        with registry.agent_session("/tmp/project-a") as first:
+            with registry.agent_session("/tmp/project-a") as second:
+                self.assertIsNot(first, second)
+        with registry.agent_session("/tmp/project-a") as again:
+            self.assertIn(again, (first, second))
+        self.assertEqual(len(self.built), 2)
+
+    def test_full_pool_waits_for_a_release(self):
+        import threading
+        registry = AgentRegistry(agent_factory=self._build, router_factory=object, pool_size=1)
+        leased = []
+        with registry.agent_session("/tmp/project-a") as first:
+            waiter = threading.Thread(
+                target=lambda: leased.append(registry.agent_session("/tmp/project-a").__enter__()))
+            waiter.start()
+            waiter.join(0.2)
+            self.assertTrue(waiter.is_alive())
+        waiter.join(2)
+        self.assertEqual(leased, [first])
+
+
+class RegistryInvalidateViewTests(TestCase):
+    def test_requires_staff(self):
+        from django.contrib.auth.models import User
+        from django.urls import reverse
+        url = reverse('core:api_registry_invalidate')
+        self.assertEqual(self.client.post(url).status_code, 403)
+        User.objects.create_user("dev", password="pw")
+        self.client.login(username="dev", password="pw")
+        self.assertEqual(self.client.post(url).status_code, 403)
+        User.objects.create_user("ops", password="pw", is_staff=True)
+        self.client.login(username="ops", password="pw")
+        with mock.patch("core.views.registry.invalidate") as invalidate:
+            self.assertEqual(self.client.post(url).status_code, 200)
+        invalidate.assert_called_once()
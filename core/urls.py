@@ -19,4 +19,5 @@ urlpatterns = [
     path('api/night-shift/', views.api_night_shift, name='api_night_shift'),
     path('api/hunter/', views.api_hunter, name='api_hunter'),
     path('api/council/', views.api_council, name='api_council'),
+    path('api/registry/invalidate/', views.api_registry_invalidate, name='api_registry_invalidate'),
 ]
@@ -9,15 +9,7 @@ from django.views.decorators.http import require_POST
 # Add parent directory to path for codex_ia imports
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-def get_codex_agent():
-    """Initialize and return the Codex Agent."""
-    try:
-        from codex_ia.core.agent import CodexAgent
-        project_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-        return CodexAgent(project_dir=project_dir)
-    except Exception as e:
-        print(f"Error initializing agent: {e}")
-        return None
+from .registry import registry
 
 
 # ============== PAGE VIEWS ==============
@@ -84,18 +76,18 @@ def api_chat(request):
         if not message:
             return JsonResponse({'error': 'Message is required'}, status=400)
         
-        agent = get_codex_agent()
-        if agent:
-            # Modo Único = sem fallback (apenas Gemini)
-            # Modo Paralelo usa endpoint diferente
-            use_fallback = (mode != 'single')
-            response = agent.chat(message, use_fallback=use_fallback)
-            return JsonResponse({'response': response})
-        else:
-            # Fallback if agent not available
-            return JsonResponse({
-                'response': f"🤖 Codex-IA recebeu: '{message}'\n\n*Nota: Agente não inicializado. Configure GEMINI_API_KEY no .env*"
-            })
+        with registry.agent_session() as agent:
+            if agent:
+                # Modo Único = sem fallback (apenas Gemini)
+                # Modo Paralelo usa endpoint diferente
+                use_fallback = (mode != 'single')
+                response = agent.chat(message, use_fallback=use_fallback)
+                return JsonResponse({'response': response})
+        
+        # Fallback if agent not available
+        return JsonResponse({
+            'response': f"🤖 Codex-IA recebeu: '{message}'\n\n*Nota: Agente não inicializado. Configure GEMINI_API_KEY no .env*"
+        })
             
     except Exception as e:
         return JsonResponse({'error': str(e)}, status=500)
@@ -184,8 +176,7 @@ def api_parallel_chat(request):
             return JsonResponse({'error': 'Message is required'}, status=400)
         
         try:
-            from codex_ia.core.brain_router import BrainRouter
-            router = BrainRouter()
+            router = registry.get_router()
             result = router.parallel_execution(message, max_workers=max_workers)
             return JsonResponse(result)
         except Exception as e:
@@ -226,6 +217,15 @@ def api_generate_image(request):
         return JsonResponse({'error': str(e)}, status=500)
 
 
+@require_POST
+def api_registry_invalidate(request):
+    """Drops cached agents/routers in every worker (e.g. after editing .env). Staff only."""
+    if not (request.user.is_authenticated and request.user.is_staff):
+        return JsonResponse({'error': 'Staff only'}, status=403)
+    registry.invalidate()
+    return JsonResponse({'status': 'invalidated'})
+
+
 @csrf_exempt
 @require_POST
 def api_council(request):
@@ -237,9 +237,12 @@ def api_council(request):
         if not topic:
             return JsonResponse({'error': 'Topic is required'}, status=400)
         
-        agent = get_codex_agent()
-        if agent and hasattr(agent, 'llm_client'):
-            result = agent.llm_client.council_meeting(topic)
+        try:
+            router = registry.get_router()
+        except Exception:
+            router = None
+        if router:
+            result = router.council_meeting(topic)
             return JsonResponse({'result': result})
         else:
             return JsonResponse({
@@ -0,0 +1,15 @@
+"""
+Gunicorn settings for the Codex-IA web tier (loaded automatically from the working dir).
+"""
+import os
+
+
+def post_worker_init(worker):
+    """Warm the agent registry at worker boot so the first request is not a cold start."""
+    if os.environ.get("CODEX_WARM_AGENTS", "1") != "1":
+        return
+    try:
+        from core.registry import registry
+        registry.warm()
+    except Exception as e:
+        worker.log.warning(f"Codex registry warmup failed: {e}")
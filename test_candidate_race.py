@@ -0,0 +1,106 @@
+import os
+import shutil
+import subprocess
+import tempfile
+import time
+
+from codex_ia.core.squad import SquadLeader
+from codex_ia.core.worktree import Worktree
+
+print("--- Testing best-of-N candidates in isolated worktrees ---")
+
+tmp = tempfile.mkdtemp()
+with open(os.path.join(tmp, "calc.py"), "w", encoding="utf-8") as f:
+    f.write("def add(a, b):\n    return a - b\n")
+
+# --- Test 1: Copy worktree (no git) is isolated from the real tree ---
+with Worktree(tmp) as path:
+    with open(os.path.join(path, "calc.py"), "a", encoding="utf-8") as f:
+        f.write("# scratch\n")
+print(f"[1] Copy worktree at {path}")
+if "# scratch" in open(os.path.join(tmp, "calc.py")).read() or os.path.exists(path):
+    print("X Copy worktree leaked into the project or was not removed!")
+    exit(1)
+
+# --- Test 2: git worktree carries uncommitted + untracked changes ---
+git = lambda *args: subprocess.run(["git", *args], cwd=tmp, capture_output=True, check=True)
+git("init", "-q")
+git("-c", "user.email=t@t", "-c", "user.name=t", "add", "calc.py")
+git("-c", "user.email=t@t", "-c", "user.name=t", "commit", "-q", "-m", "init")
+with open(os.path.join(tmp, "calc.py"), "a", encoding="utf-8") as f:
+    f.write("# uncommitted\n")
+with open(os.path.join(tmp, "notes.txt"), "w", encoding="utf-8") as f:
+    f.write("untracked\n")
+tree = Worktree(tmp)
+path = tree.create()
+print(f"[2] mode={tree.mode}")
+ok = tree.mode == "git" and "# uncommitted" in open(os.path.join(path, "calc.py")).read() \
+    and os.path.exists(os.path.join(path, "notes.txt"))
+tree.remove()
+if not ok:
+    print("X git worktree did not reproduce the working tree!")
+    exit(1)
+if b"codex_wt_" in subprocess.run(["git", "worktree", "list"], cwd=tmp, capture_output=True).stdout:
+    print("X git worktree was not cleaned up!")
+    exit(1)
+
+
+class CandidateClient:
+    """Low temperature answers fast but wrong; higher temperatures are slower and right."""
+
+    def __init__(self):
+        self.temperature = 0.4
+
+    def fork(self):
+        return CandidateClient()
+
+    def send_message(self, message, web_search=False):
+        if "ROLE: Senior Python Developer" in message:
+            if self.temperature < 0.5:
+                time.sleep(0.1)
+                new = "    return a * b\n"
+            else:
+                time.sleep(0.4 if self.temperature < 0.8 else 1.5)
+                new = "    return a + b\n"
+            return f"FILE: calc.py\n<<<<<<< SEARCH\n    return a - b\n=======\n{new}>>>>>>> REPLACE"
+        if "ROLE: QA Engineer" in message:
+            return "def test_add(): pass"
+        return "PLAN: fix add() in calc.py"
+
+
+class FakeNetwork:
+    def retrieve_wisdom(self, tags, query=None):
+        return ""
+
+    def store_experience(self, **kwargs):
+        pass
+
+
+leader = SquadLeader(tmp, llm_client=CandidateClient())
+leader.network = FakeNetwork()
+
+# --- Test 3: First passing candidate wins; losers never touch the real tree ---
+start = time.perf_counter()
+report = leader.assign_mission("Fix the add function", apply=True, autopilot=True, candidates=3,
+                               verification_cmd="python -c \"import calc; assert calc.add(2, 3) == 5\"")
+elapsed = time.perf_counter() - start
+print(f"[3] {report['autopilot_status']} winner={report['winner']} in {elapsed:.2f}s")
+for c in report["candidates"]:
+    print(f"    {c['label']}: applied={c['applied']} passed={c['passed']} {c['duration']}s {c['error'][:60]!r}")
+content = open(os.path.join(tmp, "calc.py")).read()
+if report["autopilot_status"] != "✅ Verification Passed" or "return a + b" not in content:
+    print("X Winning candidate was not applied!")
+    exit(1)
+if report["winner"] != "main@0.6" or elapsed > 1.4:
+    print("X Did not take the first passing candidate (should not wait for the slowest)!")
+    exit(1)
+
+time.sleep(1.5)  # Let the cancelled loser finish and clean up
+leftovers = subprocess.run(["git", "worktree", "list"], cwd=tmp, capture_output=True).stdout.decode()
+if "codex_wt_" in leftovers:
+    print("X Loser worktrees were left behind!")
+    exit(1)
+print("[4] No worktrees left behind")
+
+shutil.rmtree(tmp, ignore_errors=True)
+print("--- [SUCCESS] Candidate race verified ---")
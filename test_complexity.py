@@ -0,0 +1,114 @@
+import os
+import shutil
+import subprocess
+import tempfile
+
+from codex_ia.core import complexity as cx
+from codex_ia.core.complexity import ComplexityAnalyzer, analyze_source
+
+print("--- Testing the complexity / hotspot analyzer ---")
+
+tmp = tempfile.mkdtemp()
+
+# --- Test 1: Per-function cyclomatic complexity and nesting ---
+SOURCE = """
+def tangled(a, b):
+    if a and b:
+        for i in range(3):
+            if i:
+                pass
+    elif b:
+        return [x for x in a if x]
+    try:
+        pass
+    except ValueError:
+        pass
+
+    def helper():
+        if a:
+            return 1
+    return helper
+
+class Box:
+    def simple(self):
+        return 1
+"""
+stats = analyze_source(SOURCE, "m.py")
+found = {f.qualname: (f.complexity, f.nesting) for f in stats.functions}
+print(f"[1] {found}")
+if found != {"tangled": (9, 3), "tangled.helper": (2, 1), "Box.simple": (1, 0)}:
+    print("X Wrong complexity/nesting!")
+    exit(1)
+
+# --- Test 2: Duplicate clusters survive renames ---
+BODY = """
+def {name}({arg}, limit):
+    total = 0
+    for item in {arg}:
+        if item.get("price", 0) > limit:
+            total += item["price"] * 2
+        elif item.get("discount"):
+            total -= item["discount"]
+        else:
+            total += 1
+    return {{"total": total, "count": len({arg}), "limit": limit}}
+"""
+CLEAN = "def other(x):\n    return sorted(set(x), key=lambda v: (len(str(v)), v))[:10] + [1, 2, 3, 4, 5, 6, 7]\n"
+files = {
+    "billing.py": BODY.format(name="sum_orders", arg="orders"),
+    "cart.py": BODY.format(name="cart_total", arg="lines") + "\n" + CLEAN,
+}
+subprocess.run(["git", "init", "-q"], cwd=tmp)
+for rel, content in files.items():
+    with open(os.path.join(tmp, rel), "w") as f:
+        f.write(content)
+report = ComplexityAnalyzer(tmp).analyze(churn={})
+clusters = [[q for _, q, _ in c.members] for c in report.duplicates]
+print(f"[2] Clusters: {clusters}")
+if clusters != [["sum_orders", "cart_total"]]:
+    print("X Renamed duplicate not clustered (or false positive)!")
+    exit(1)
+
+# --- Test 3: Churn ranks equally complex code ---
+deep = "def {name}(x):\n" + "".join(f"    if x == {i}:\n        x += {i}\n" for i in range(12)) + "    return x\n"
+for rel, name in (("hot.py", "hot"), ("cold.py", "cold")):
+    with open(os.path.join(tmp, rel), "w") as f:
+        f.write(deep.format(name=name))
+env = dict(os.environ, GIT_AUTHOR_NAME="t", GIT_AUTHOR_EMAIL="t@t", GIT_COMMITTER_NAME="t", GIT_COMMITTER_EMAIL="t@t")
+subprocess.run(["git", "add", "."], cwd=tmp, env=env)
+subprocess.run(["git", "commit", "-qm", "init"], cwd=tmp, env=env)
+for i in range(5):
+    with open(os.path.join(tmp, "hot.py"), "a") as f:
+        f.write(f"# change {i}\n")
+    subprocess.run(["git", "commit", "-qam", f"c{i}"], cwd=tmp, env=env)
+report = ComplexityAnalyzer(tmp).analyze()
+print(f"[3] Hotspots: {[(h.qualname, h.complexity, h.churn, h.score) for h in report.hotspots]}")
+if [h.qualname for h in report.hotspots] != ["hot", "cold"] or report.hotspots[0].churn != 6:
+    print("X Churn did not rank the hotspots!")
+    exit(1)
+
+# --- Test 4: Incremental cache ---
+again = ComplexityAnalyzer(tmp).analyze(churn={})
+with open(os.path.join(tmp, "cold.py"), "a") as f:
+    f.write("# touched\n")
+touched = ComplexityAnalyzer(tmp).analyze(churn={})
+print(f"[4] Re-analyzed: {again.analyzed} unchanged, {touched.analyzed} after touching one file")
+if again.analyzed != 0 or touched.analyzed != 1:
+    print("X Cache is not incremental!")
+    exit(1)
+
+# --- Test 5: Process pool gives the same report ---
+cx.PARALLEL_MIN_FILES = 1
+for i in range(8):
+    with open(os.path.join(tmp, f"gen_{i}.py"), "w") as f:
+        f.write(deep.format(name=f"gen_{i}"))
+parallel = ComplexityAnalyzer(tmp, cache_path=os.path.join(tmp, "p.json"), workers=2).analyze(churn={})
+serial = ComplexityAnalyzer(tmp, cache_path=os.path.join(tmp, "s.json"), workers=1).analyze(churn={})
+print(f"[5] Parallel {len(parallel.hotspots)} hotspots / serial {len(serial.hotspots)}")
+if [h.qualname for h in parallel.hotspots] != [h.qualname for h in serial.hotspots] or len(parallel.hotspots) != 10:
+    print("X Parallel analysis differs!")
+    exit(1)
+print(parallel.summary(3))
+
+shutil.rmtree(tmp, ignore_errors=True)
+print("--- [SUCCESS] Complexity analyzer verified ---")
@@ -0,0 +1,157 @@
+import os
+import shutil
+import tempfile
+import threading
+import time
+
+from codex_ia.core.auto_debugger import AutoDebugger
+from codex_ia.core.safety import SafetyProtocol
+
+print("--- Testing batched AutoDebugger analysis ---")
+
+tmp = tempfile.mkdtemp()
+home = tempfile.mkdtemp()  # Patch backups stay out of the real ~/.codex_backups
+SafetyProtocol.BACKUP_DIR = os.path.join(home, "backups")
+SafetyProtocol.QUARANTINE_DIR = os.path.join(home, "quarantine")
+BUGGY = ("def parse(kind):\n    if kind:\n        raise ValueError(f\"bad {kind}\")\n    return kind\n\n\n"
+         "def half(n):\n    return n / 0\n")
+FILES = {
+    "calc.py": BUGGY,
+    "config.py": "STRICT = True\n",
+    "test_calc.py": "import pytest\nfrom calc import half, parse\n\n\n"
+                    "@pytest.mark.parametrize('kind', ['apple', 'pear'])\ndef test_parse(kind):\n"
+                    "    assert parse(kind) == kind\n\n\ndef test_half():\n    assert half(4) == 2\n",
+}
+for rel, content in FILES.items():
+    with open(os.path.join(tmp, rel), "w", encoding="utf-8") as f:
+        f.write(content)
+
+PATCHES = {
+    "ValueError": "FILE: calc.py\n<<<<<<< SEARCH\n        raise ValueError(f\"bad {kind}\")\n=======\n"
+                  "        return kind\n>>>>>>> REPLACE\n"
+                  "FILE: config.py\n<<<<<<< SEARCH\nSTRICT = True\n=======\nSTRICT = False\n>>>>>>> REPLACE\n",
+    "ZeroDivisionError": "FILE: calc.py\n<<<<<<< SEARCH\n    return n / 0\n=======\n    return n / 2\n>>>>>>> REPLACE\n",
+}
+
+
+class FakeRouter:
+    """Slow provider that answers with a JSON diagnosis plus SEARCH/REPLACE blocks."""
+    def __init__(self, delay=0.3, patches=None):
+        self.delay = delay
+        self.patches = patches or PATCHES
+        self.prompts = []
+        self.lock = threading.Lock()
+
+    def send_message(self, prompt, task_type="general"):
+        with self.lock:
+            self.prompts.append(prompt)
+        time.sleep(self.delay)
+        kind = "ValueError" if "Tipo: ValueError" in prompt else "ZeroDivisionError"
+        return f'{{"diagnosis": "{kind} in calc", "root_cause": "bug", "fix_strategy": "patch"}}\n\n{self.patches[kind]}'
+
+
+# --- Test 1: Errors collapse into one group per root cause ---
+router = FakeRouter()
+debugger = AutoDebugger(tmp, router=router)
+errors = debugger.run_tests("python -m pytest -q test_calc.py")["errors"]
+groups = debugger.group_errors(errors)
+print(f"[1] {len(errors)} unique errors -> {len(groups)} root causes: "
+      f"{[[e['message'] for e in g] for g in groups.values()]}")
+if len(errors) != 3 or len(groups) != 2 or sorted(len(g) for g in groups.values()) != [1, 2]:
+    print("X Errors were not grouped by exception type + raising frame!")
+    exit(1)
+
+# --- Test 2: Groups are analysed concurrently, one prompt each ---
+start = time.perf_counter()
+analyses = debugger.analyze_errors(errors)
+elapsed = time.perf_counter() - start
+value_prompt = next(p for p in router.prompts if "Tipo: ValueError" in p)
+print(f"[2] {len(router.prompts)} prompts in {elapsed:.2f}s (each {router.delay}s), "
+      f"lead counts {[lead['count'] for lead, _ in analyses]}")
+if len(router.prompts) != 2 or elapsed > 2 * router.delay * 0.9:
+    print("X Root causes were not analysed once each, in parallel!")
+    exit(1)
+if "bad apple" not in value_prompt or "bad pear" not in value_prompt or "<<<<<<< SEARCH" not in analyses[0][1]["code_patch"]:
+    print("X Group prompt should carry every variation and the answer a patch!")
+    exit(1)
+
+# --- Test 3: Only applied fixes are cached, keyed on the frame and patched files ---
+def restore(**files):
+    for rel, content in files.items():
+        with open(os.path.join(tmp, rel), "w", encoding="utf-8") as f:
+            f.write(content)
+
+
+router.prompts.clear()
+analyses = debugger.analyze_errors(errors)
+if len(router.prompts) != 2 or debugger.stats["cached"]:
+    print("X A fix was cached before anyone applied it!")
+    exit(1)
+records, _ = debugger.apply_fixes(analyses)
+restore(**{"calc.py": BUGGY})  # The fixes get undone; config.py (patched by one of them) keeps its edit
+router.prompts.clear()
+debugger.analyze_errors(errors)
+partial = len(router.prompts)
+restore(**{"config.py": FILES["config.py"]})
+router.prompts.clear()
+cached = debugger.analyze_errors(errors)
+print(f"[3] applied {[r['applied'] for r in records]}; undone: {partial} prompt(s) while config.py "
+      f"differed, then {len(router.prompts)}, stats {debugger.stats}")
+if not all(r["applied"] for r in records) or partial != 1 or router.prompts \
+        or not all(a["cached"] for _, a in cached):
+    print("X Applied fixes were not cached by the files they read and patch!")
+    exit(1)
+
+rejected = [(lead, dict(a, code_patch=a["code_patch"].replace("n / 0", "n / 9"))) for lead, a in cached]
+records, _ = debugger.apply_fixes(rejected[1:])  # ZeroDivisionError's SEARCH no longer matches
+debugger.analyze_errors(errors)
+if records[0]["applied"] or len(router.prompts) != 1 or "Tipo: ZeroDivisionError" not in router.prompts[0]:
+    print("X A cached fix whose patch was rejected was served again!")
+    exit(1)
+
+# --- Test 4: Overlapping fixes: the first applies, the other waits for the next run ---
+with open(os.path.join(tmp, "calc.py"), "w", encoding="utf-8") as f:
+    f.write(BUGGY)
+clash = {"diagnosis": "", "root_cause": "", "fix_strategy": "",
+         "code_patch": PATCHES["ZeroDivisionError"].replace("n / 2", "n // 2")}
+records, changed = debugger.apply_fixes([(errors[0], {"code_patch": PATCHES["ZeroDivisionError"]}),
+                                         (errors[1], clash)])
+print(f"[4] applied {[r['applied'] for r in records]}, reasons {[r['reason'] for r in records]}")
+with open(os.path.join(tmp, "calc.py"), encoding="utf-8") as f:
+    patched = f.read()
+if [r["applied"] for r in records] != [True, False] or "conflita" not in records[1]["reason"] \
+        or "n / 2" not in patched or changed != [os.path.join(tmp, "calc.py")]:
+    print("X Conflicting fixes were not serialised!")
+    exit(1)
+
+# --- Test 5: The loop fixes every root cause in one pass, then confirms ---
+restore(**FILES)
+shutil.rmtree(os.path.join(tmp, ".pytest_cache"), ignore_errors=True)
+router = FakeRouter(delay=0.05)
+debugger = AutoDebugger(tmp, router=router)
+result = debugger.auto_fix_loop(max_iterations=3)
+print(f"[5] success={result['success']} iterations={result['iterations']} prompts={len(router.prompts)} "
+      f"fixes={[(r['error']['type'], r['applied']) for r in result['fixes_applied']]}")
+if not result["success"] or result["iterations"] != 2 or len(router.prompts) != 2 \
+        or not all(r["applied"] for r in result["fixes_applied"]):
+    print("X Both root causes should be fixed in a single iteration!")
+    exit(1)
+
+# --- Test 6: A fix whose root cause keeps failing is evicted ---
+restore(**FILES)
+useless = dict(PATCHES, ZeroDivisionError=PATCHES["ZeroDivisionError"].replace("n / 2", "n / (1 - 1)"))
+router = FakeRouter(delay=0.05, patches=useless)
+debugger = AutoDebugger(tmp, router=router)
+result = debugger.auto_fix_loop(max_iterations=2)
+restore(**FILES)
+router.prompts.clear()
+debugger.analyze_errors(errors)
+print(f"[6] loop: {result['final_status']}; re-analysis prompts "
+      f"{[p.split('Tipo: ')[1].split()[0] for p in router.prompts]}")
+if result["success"] or len(router.prompts) != 1 or "Tipo: ZeroDivisionError" not in router.prompts[0]:
+    print("X A fix that did not work stayed cached (or a working one was dropped)!")
+    exit(1)
+
+shutil.rmtree(tmp, ignore_errors=True)
+shutil.rmtree(home, ignore_errors=True)
+print("--- [SUCCESS] Batched AutoDebugger verified ---")
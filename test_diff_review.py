@@ -0,0 +1,110 @@
+import os
+import shutil
+import tempfile
+
+from codex_ia.core.agent import CodexAgent
+from codex_ia.core.diff_review import DiffReviewer
+from codex_ia.core.safety import SafetyProtocol
+
+print("--- Testing diff-scoped Sentinel review ---")
+
+tmp = tempfile.mkdtemp()
+home = tempfile.mkdtemp()
+# CodexAgent's Exocortex memory and backups stay out of the developer's home directory
+SafetyProtocol.BACKUP_DIR = os.path.join(home, "backups")
+SafetyProtocol.QUARANTINE_DIR = os.path.join(home, "quarantine")
+os.environ["HOME"] = home
+path = os.path.join(tmp, "big.py")
+ORIGINAL = "".join(f"def f{i}(x):\n    y = x + {i}\n    return y\n\n\n" for i in range(200))
+
+
+class FakeOllama:
+    def __init__(self):
+        self.prompts = []
+        self.reply = "CLEAN"
+
+    def send_message(self, prompt):
+        self.prompts.append(prompt)
+        return self.reply
+
+
+asked = []
+
+
+def ask(unit):
+    asked.append(unit)
+    return "[BUG] y is never used" if "unused" in unit.code else "CLEAN"
+
+
+reviewer = DiffReviewer(min_interval=0, use_git=False)
+reviewer.review(path, ORIGINAL, ask)  # First sight: the whole (new) file
+
+# --- Test 1: A one-line edit sends only its enclosing function ---
+edited = ORIGINAL.replace("y = x + 120\n", "y = x + 120  # unused\n")
+asked.clear()
+findings = reviewer.review(path, edited, ask)
+unit = asked[0] if asked else None
+print(f"[1] {len(asked)} unit(s): {unit.scope if unit else None} lines {unit.start}-{unit.end} "
+      f"({len(unit.code)} of {len(edited)} chars) -> {findings}")
+if len(asked) != 1 or unit.scope != "def f120" or unit.end - unit.start > 3 or findings != ["[BUG] y is never used"]:
+    print("X Review was not limited to the changed function!")
+    exit(1)
+print("    " + "\n    ".join(unit.render().splitlines()))
+
+# --- Test 2: Verdicts are cached per hunk (undo + redo costs nothing) ---
+reviewer.review(path, ORIGINAL, ask)
+asked.clear()
+findings = reviewer.review(path, edited, ask)
+print(f"[2] Redo -> {len(asked)} LLM calls, findings {findings}, stats {reviewer.stats}")
+if asked or findings != ["[BUG] y is never used"]:
+    print("X Cached hunk verdict was not reused!")
+    exit(1)
+
+# --- Test 3: Failed reviews cache nothing and keep the baseline ---
+def broken(unit):
+    raise RuntimeError("ollama down")
+
+
+two_edits = edited.replace("y = x + 7\n", "y = x * 7\n").replace("y = x + 190\n", "y = x - 190\n")
+try:
+    reviewer.review(path, two_edits, broken)
+except RuntimeError:
+    pass
+asked.clear()
+reviewer.review(path, two_edits, ask)
+print(f"[3] After a failed review: {[u.scope for u in asked]}")
+if sorted(u.scope for u in asked) != ["def f190", "def f7"]:
+    print("X Edits from the failed review were lost!")
+    exit(1)
+
+# --- Test 4: Rate limit per file ---
+limited = DiffReviewer(min_interval=60, use_git=False)
+limited.review(path, ORIGINAL, ask)
+print(f"[4] Due right after a review: {limited.due(path)}, other file: {limited.due(path + 'x')}")
+if limited.due(path) or not limited.due(path + "x"):
+    print("X Rate limit not applied per file!")
+    exit(1)
+
+# --- Test 5: Sentinel only sends the lint-flagged hunk of a Python file ---
+agent = CodexAgent(tmp)
+agent.diff_reviewer = DiffReviewer(min_interval=0, use_git=False)
+ollama = FakeOllama()
+agent.llm_client.neurons["ollama"] = ollama
+with open(path, "w", encoding="utf-8") as f:
+    f.write(ORIGINAL)
+clean = agent.analyze_file_change(path, ORIGINAL)
+typo = ORIGINAL.replace("return y\n\n\ndef f42", "return yy\n\n\ndef f42")
+ollama.reply = "[BUG] 'yy' não existe. Sugestão: return y"
+report = agent.analyze_file_change(path, typo)
+print(f"[5] clean -> {clean!r} ({len(ollama.prompts)} prompts), typo -> {report!r}")
+if clean is not None or len(ollama.prompts) != 1 or "yy" not in report \
+        or "def f41" not in ollama.prompts[0] or "def f100" in ollama.prompts[0]:
+    print("X Sentinel did not review just the flagged hunk!")
+    exit(1)
+if agent.analyze_file_change(path, "def f(:\n").startswith("[SYNTAX]") is not True or len(ollama.prompts) != 1:
+    print("X Syntax errors should be reported without the LLM!")
+    exit(1)
+
+shutil.rmtree(tmp, ignore_errors=True)
+shutil.rmtree(home, ignore_errors=True)
+print("--- [SUCCESS] Diff-scoped review verified ---")
@@ -0,0 +1,84 @@
+import sys
+import tempfile
+import time
+
+from codex_ia.core.executor import ExecutionService, ResourceLimits
+
+print("--- Testing ExecutionService (streaming, limits, pool) ---")
+
+tmp = tempfile.mkdtemp()
+service = ExecutionService(max_concurrency=2, warm_pool_size=1, buffer_sizes={"head": 1024, "tail": 1024})
+
+# --- Test 1: Streaming capture into bounded ring buffers ---
+chunks = []
+result = service.run(
+    [sys.executable, "-c", "import sys\nfor i in range(20000): print('row', i)\nprint('FAIL at the end', file=sys.stderr)"],
+    cwd=tmp, on_output=lambda stream, text: chunks.append(stream), warm=False
+)
+print(f"[1] exit={result.returncode} dropped={result.dropped_bytes} bytes, streamed chunks={len(chunks)}")
+if not result.success or "row 0" not in result.stdout or "row 19999" not in result.stdout:
+    print("X Head/tail of the output were not kept!")
+    exit(1)
+if result.dropped_bytes == 0 or len(result.stdout) > 4096 or "FAIL at the end" not in result.stderr:
+    print("X Output was not bounded by the ring buffer!")
+    exit(1)
+
+# --- Test 2: Timeout kills the whole process group ---
+start = time.perf_counter()
+result = service.run("sleep 5 & sleep 5; wait", cwd=tmp, timeout=0.5)
+elapsed = time.perf_counter() - start
+print(f"[2] timed_out={result.timed_out} after {elapsed:.2f}s")
+if not result.timed_out or elapsed > 3:
+    print("X Timeout did not kill the command group!")
+    exit(1)
+
+# --- Test 3: Concurrency limit ---
+start = time.perf_counter()
+handles = [service.submit("sleep 0.4", cwd=tmp) for _ in range(4)]
+for h in handles:
+    h.result()
+elapsed = time.perf_counter() - start
+print(f"[3] 4 x sleep 0.4 with 2 slots: {elapsed:.2f}s")
+if elapsed < 0.75:
+    print("X More commands ran at once than the concurrency limit!")
+    exit(1)
+
+# --- Test 4: Cancellation ---
+handle = service.submit("sleep 5", cwd=tmp)
+time.sleep(0.2)
+handle.cancel()
+result = handle.result(timeout=3)
+print(f"[4] cancelled={result.cancelled} success={result.success}")
+if not result.cancelled or result.success:
+    print("X Cancel did not stop the command!")
+    exit(1)
+
+# --- Test 5: Memory limit ---
+result = service.run([sys.executable, "-c", "x = bytearray(800 * 1024 * 1024)"], cwd=tmp,
+                     limits=ResourceLimits(memory_mb=300, cpu_seconds=10))
+print(f"[5] 800MB allocation under a 300MB limit -> exit {result.returncode}")
+if result.success or "MemoryError" not in result.stderr:
+    print("X Memory limit was not enforced!")
+    exit(1)
+reserve = "import mmap; mmap.mmap(-1, 8 << 30, flags=mmap.MAP_PRIVATE | mmap.MAP_ANONYMOUS, prot=mmap.PROT_READ)"
+result = service.run([sys.executable, "-c", reserve], cwd=tmp, limits=ResourceLimits(memory_mb=300, cpu_seconds=10))
+print(f"    8GB address-space reservation (JVM/Go style) under the same limit -> exit {result.returncode}")
+if not result.success:
+    print("X The memory limit should cap data, not reserved address space!")
+    exit(1)
+
+# --- Test 6: Warm interpreter pool ---
+service.pool.warm()
+deadline = time.time() + 10
+while not service.pool._idle and time.time() < deadline:
+    time.sleep(0.05)
+time.sleep(1.0)  # Let the worker finish booting/preloading
+cold = service.run([sys.executable, "-c", "import compileall"], cwd=tmp, warm=False)
+warm = service.run(f'"{sys.executable}" -c "import sys; print(sys.argv[1:]); sys.exit(3)" arg1', cwd=tmp)
+print(f"[6] cold {cold.duration * 1000:.0f} ms vs warm {warm.duration * 1000:.0f} ms -> {warm.stdout.strip()} exit={warm.returncode}")
+if not warm.warm or warm.returncode != 3 or "['arg1']" not in warm.stdout:
+    print("X Warm worker did not run the job faithfully!")
+    exit(1)
+
+service.shutdown()
+print("--- [SUCCESS] ExecutionService verified ---")
@@ -0,0 +1,72 @@
+import os
+import shutil
+import tempfile
+
+from codex_ia.core.auto_debugger import AutoDebugger
+from codex_ia.core.executor import get_executor
+from codex_ia.core.failures import from_results, parse_text, render_failure
+from codex_ia.core.shard_runner import ShardedRunner
+
+print("--- Testing structured failure parsing ---")
+
+tmp = tempfile.mkdtemp()
+filler = "".join(f"CONSTANT_{i} = {i}\n" for i in range(300))
+FILES = {
+    "shop.py": filler + "\n\ndef total(prices):\n    return sum(p['price'] for p in prices)\n",
+    "test_shop.py": "import pytest\nfrom shop import total\n\n"
+                    "@pytest.mark.parametrize('n', range(5))\ndef test_total(n):\n    assert total([{'cost': n}]) == n\n\n"
+                    "def test_empty():\n    assert total([]) == 1\n\ndef test_ok():\n    assert total([]) == 0\n",
+    "test_unit.py": "import unittest\nfrom shop import total\n\n"
+                    "class T(unittest.TestCase):\n    def test_bad(self):\n        total([{'cost': 1}])\n",
+}
+for rel, content in FILES.items():
+    with open(os.path.join(tmp, rel), "w", encoding="utf-8") as f:
+        f.write(content)
+
+# --- Test 1: Structured results dedupe into one failure per signature ---
+report = ShardedRunner(tmp, workers=2, args=["test_shop.py"]).run()
+failures = from_results(report.results, tmp)
+print(f"[1] {len(report.failures)} failing tests -> {len(failures)} unique failures")
+for f in failures:
+    print(f"    {f.signature} x{f.count} {f.exc_type}: {f.message[:40]!r} at "
+          f"{[(fr.path, fr.line, fr.function) for fr in f.frames]}")
+key_error = next((f for f in failures if f.exc_type == "KeyError"), None)
+if len(report.failures) != 6 or len(failures) != 2 or not key_error or key_error.count != 5:
+    print("X Failures were not deduplicated by signature!")
+    exit(1)
+if [fr.path for fr in key_error.frames] != ["test_shop.py", "shop.py", "shop.py"] \
+        or key_error.location.line != 304:
+    print("X Frames should be the project frames only, innermost last!")
+    exit(1)
+
+# --- Test 2: Prompt context is a small source window, not the whole file ---
+block = render_failure(key_error, tmp)
+print(f"[2] Prompt block ({len(block)} chars vs {sum(len(r.longrepr) for r in report.failures)} chars of tracebacks):")
+print("    " + "\n    ".join(block.splitlines()[:12]))
+if ">  304 | " not in block or "CONSTANT_10 " in block or len(block) > 1500:
+    print("X Prompt context should be the minimal window around the failing frame!")
+    exit(1)
+
+# --- Test 3: Plain tracebacks (unittest) use the same model ---
+result = get_executor().run(["python", "-m", "unittest", "test_unit"], cwd=tmp, timeout=30)
+parsed = parse_text(result.output, tmp)
+print(f"[3] unittest -> {[(f.exc_type, f.location.path, f.location.line) for f in parsed]}")
+if len(parsed) != 1 or parsed[0].exc_type != "KeyError" or parsed[0].location.path != "shop.py":
+    print("X Plain traceback not parsed!")
+    exit(1)
+
+# --- Test 4: AutoDebugger errors are compact (no raw output attached) ---
+debugger = AutoDebugger(tmp)
+result = debugger.run_tests("python -m pytest -q test_shop.py")
+errors = result["errors"]
+print(f"[4] AutoDebugger errors: {[(e['type'], os.path.basename(e['file']), e['line'], e['count']) for e in errors]}")
+if len(errors) != 2 or any("raw_output" in e for e in errors) or not os.path.isabs(errors[0]["file"]):
+    print("X AutoDebugger errors are not the compact failure model!")
+    exit(1)
+errors = debugger._parse_errors(get_executor().run(["python", "-m", "unittest", "test_unit"], cwd=tmp).output)
+if len(errors) != 1 or errors[0]["line"] != 304:
+    print("X Text fallback in AutoDebugger failed!")
+    exit(1)
+
+shutil.rmtree(tmp, ignore_errors=True)
+print("--- [SUCCESS] Structured failures verified ---")
@@ -0,0 +1,77 @@
+import os
+import shutil
+import tempfile
+import time
+
+from codex_ia.core.context import ContextManager
+from codex_ia.core.tools import ToolRegistry
+
+print("--- Testing cached / windowed reads and code search ---")
+
+tmp = tempfile.mkdtemp()
+with open(os.path.join(tmp, "service.py"), "w", encoding="utf-8") as f:
+    f.write(
+        "class PaymentService:\n"
+        "    def charge(self, amount: int) -> bool:\n"
+        "        return amount > 0\n\n"
+        "def refund_payment(order_id):\n"
+        "    return PaymentService().charge(-1)\n"
+    )
+# ~3MB log: above both the old 50KB refusal and the mmap threshold
+with open(os.path.join(tmp, "big.txt"), "w", encoding="utf-8") as f:
+    for i in range(1, 120001):
+        f.write(f"line {i:06d} payload payload payload\n")
+
+tools = ToolRegistry(tmp)
+tools.file_cache.clear()
+
+# --- Test 1: Large files are readable by window ---
+out = tools.read_file("big.txt", offset=100000, limit=3)
+print(f"[1] {out.splitlines()[0]} -> {out.splitlines()[1]}")
+if "line 100000" not in out or "line 100003" in out or "de 120000" not in out:
+    print("X Ranged read of a large file failed!")
+    exit(1)
+start = time.perf_counter()
+tools.read_file("big.txt", offset=5, limit=2)
+if (time.perf_counter() - start) > 0.05:
+    print("X Second window read did not reuse the line-offset index!")
+    exit(1)
+
+# --- Test 2: Small files come from the cache until they change ---
+tools.read_file("service.py")
+hits = tools.file_cache.hits
+tools.read_file("service.py")
+print(f"[2] Cache hits: {hits} -> {tools.file_cache.hits}")
+if tools.file_cache.hits != hits + 1:
+    print("X Unchanged file was read from disk again!")
+    exit(1)
+
+# --- Test 3: grep-style search and symbol lookup ---
+hits = tools.search_code("PaymentService().charge")
+print(f"[3] search_code: {hits}")
+if "service.py:6:" not in hits:
+    print("X Literal search failed!")
+    exit(1)
+regex_hits = tools.search_code(r"def \w+_payment", regex=True)
+symbol = tools.find_symbol("charge")
+print(f"    regex: {regex_hits}\n    find_symbol: {symbol}")
+if "service.py:5:" not in regex_hits or "service.py:2-3: def charge(self, amount: int) -> bool" not in symbol:
+    print("X Regex search / symbol lookup failed!")
+    exit(1)
+
+# --- Test 4: Our own writes invalidate cache + index ---
+tools.replace_text("service.py", "def refund_payment(order_id):", "def refund_order(order_id):")
+if "refund_order" not in tools.read_file("service.py") or "Symbol 'refund_order' not found" in tools.find_symbol("refund_order"):
+    print("X Caches were not invalidated after an edit!")
+    exit(1)
+print("[4] Edit visible to read_file and find_symbol")
+
+# --- Test 5: Numbered context window ---
+ctx = ContextManager(tmp).get_file_context("big.txt", start_line=10, end_line=11)
+print(f"[5] {ctx.splitlines()[0]}")
+if "10: line 000010" not in ctx or "12: " in ctx:
+    print("X get_file_context window failed!")
+    exit(1)
+
+shutil.rmtree(tmp, ignore_errors=True)
+print("--- [SUCCESS] File tools verified ---")
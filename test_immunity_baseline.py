@@ -0,0 +1,58 @@
+import os
+import shutil
+import subprocess
+import tempfile
+
+from codex_ia.core.immunity_agent import ImmunityAgent
+from codex_ia.core.safety import SafetyProtocol
+
+print("--- Testing the Immunity baseline snapshot ---")
+
+tmp = tempfile.mkdtemp()
+home = tempfile.mkdtemp()  # Quarantine copies stay out of the real home directory
+SafetyProtocol.BACKUP_DIR = os.path.join(home, "backups")
+SafetyProtocol.QUARANTINE_DIR = os.path.join(home, "quarantine")
+
+
+def write(rel, content):
+    with open(os.path.join(tmp, rel), "w", encoding="utf-8") as f:
+        f.write(content)
+
+
+def git(*args):
+    subprocess.run(["git", "-c", "user.name=codex", "-c", "user.email=codex@localhost", *args],
+                   cwd=tmp, check=True, capture_output=True)
+
+
+write("app.py", "VALUE = 1\n")
+git("init", "-q")
+git("add", "app.py")
+git("commit", "-q", "-m", "initial")
+write("app.py", "VALUE = 2  # uncommitted, good\n")
+os.makedirs(os.path.join(tmp, "node_modules"))
+write("node_modules/lib.js", "module.exports = 1\n")
+
+# --- Test 1: Starting the watchdog snapshots the never-seen source files as GOOD ---
+agent = ImmunityAgent(tmp)
+agent.activate_watchdog()
+agent.stop()
+good = agent.snapshots.last_good(os.path.join(tmp, "app.py"))
+print(f"[1] Baseline: app.py -> #{good.seq if good else '-'} ({good.status if good else '-'}), "
+      f"node_modules versions: {len(agent.snapshots.history('node_modules/lib.js'))}")
+if good is None or agent.snapshots.history("node_modules/lib.js"):
+    print("X Baseline missing, or it snapshotted ignored folders!")
+    exit(1)
+
+# --- Test 2: The first bad edit goes back to the uncommitted edits, not to HEAD ---
+write("app.py", "VALUE = (\n")
+agent.verify_stability(os.path.join(tmp, "app.py"))
+with open(os.path.join(tmp, "app.py"), encoding="utf-8") as f:
+    restored = f.read()
+print(f"[2] After a syntax error: {restored!r}")
+if restored != "VALUE = 2  # uncommitted, good\n":
+    print("X The first bad edit was reverted to git HEAD!")
+    exit(1)
+
+shutil.rmtree(tmp, ignore_errors=True)
+shutil.rmtree(home, ignore_errors=True)
+print("--- [SUCCESS] Immunity baseline verified ---")
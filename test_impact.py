@@ -0,0 +1,111 @@
+import os
+import re
+import shutil
+import sys
+import tempfile
+import threading
+import time
+
+from codex_ia.core.auto_debugger import AutoDebugger
+from codex_ia.core.impact import ImpactMap, ImpactRunner, extract_imports
+
+print("--- Testing impacted-test selection ---")
+
+tmp = tempfile.mkdtemp()
+FILES = {
+    "pkg/__init__.py": "",
+    "pkg/a.py": "def one():\n    return 1\n",
+    "pkg/b.py": "from .a import one\n\ndef two():\n    return one() + 1\n",
+    "pkg/c.py": "def three():\n    return 3\n",
+    "tests/conftest.py": "",
+    "tests/helpers.py": "from pkg.c import three\n",
+    "tests/test_a.py": "from pkg.a import one\n\ndef test_one():\n    assert one() == 1\n",
+    "tests/test_b.py": "from pkg import b\n\ndef test_two():\n    assert b.two() == 2\n",
+    "tests/test_c.py": "import time\nimport helpers\n\ndef test_three():\n    time.sleep(1.0)\n    assert helpers.three() == 3\n",
+    "README.md": "# demo\n",
+}
+for rel, content in FILES.items():
+    os.makedirs(os.path.dirname(os.path.join(tmp, rel)), exist_ok=True)
+    with open(os.path.join(tmp, rel), "w", encoding="utf-8") as f:
+        f.write(content)
+
+# --- Test 1: Import graph selection (transitive, relative, script-style imports) ---
+imports = extract_imports(FILES["pkg/b.py"], "pkg.b")
+impact = ImpactMap(tmp)
+cases = {
+    "pkg/a.py": (["tests/test_a.py", "tests/test_b.py"], False),
+    "pkg/c.py": (["tests/test_c.py"], False),
+    "tests/test_b.py": (["tests/test_b.py"], False),
+    "README.md": ([], False),
+    "pyproject.toml": (None, True),
+}
+print(f"[1] pkg/b.py imports {sorted(imports)}")
+for changed, (expected, full) in cases.items():
+    sel = impact.select([changed])
+    print(f"    {changed:<16} -> {sel.tests if not sel.full else 'FULL'} ({sel.reason})")
+    if sel.full != full or (expected is not None and sel.tests != expected):
+        print("X Wrong test selection!")
+        exit(1)
+if "pkg.a" not in imports or len(impact.select(["tests/conftest.py"]).tests) != 3:
+    print("X Relative imports / conftest scope not handled!")
+    exit(1)
+
+# --- Test 2: Incremental refresh picks up new edges ---
+time.sleep(0.01)
+with open(os.path.join(tmp, "pkg/c.py"), "w", encoding="utf-8") as f:
+    f.write("from pkg.a import one\n\ndef three():\n    return one() + 2\n")
+sel = impact.select(["pkg/a.py"])
+print(f"[2] After pkg/c.py imports pkg.a: {sel.tests}")
+if "tests/test_c.py" not in sel.tests:
+    print("X Edited import was not picked up!")
+    exit(1)
+with open(os.path.join(tmp, "pkg/c.py"), "w", encoding="utf-8") as f:
+    f.write(FILES["pkg/c.py"])
+
+# --- Test 3: Affected tests first, full suite in the background, time saved reported ---
+runner = ImpactRunner(tmp, command=[sys.executable, "-m", "pytest", "-v"], impact_map=impact)
+full_done = threading.Event()
+full_results = []
+on_full = lambda r: (full_results.append(r), full_done.set())
+
+report = runner.run(["pkg/b.py"], timeout=30, on_full_result=on_full)
+executed = sorted(re.findall(r"^(tests/\S+::\w+) PASSED", report["result"].output, re.M))
+print(f"[3] Selected {report['selection'].tests} passed={report['passed']} executed={executed}, "
+      f"full suite {report['full_suite']}")
+if not report["passed"] or report["full_suite"] != "running" or report["selection"].tests != ["tests/test_b.py"] \
+        or executed != ["tests/test_b.py::test_two"]:
+    print("X Affected tests should run alone, fast, with the full suite in the background!")
+    exit(1)
+if not full_done.wait(30) or not full_results[0].success:
+    print("X Background full suite did not complete!")
+    exit(1)
+
+report = runner.run(["pkg/a.py"], timeout=30, full_suite=False)
+print(f"    Full suite took {runner.last_full.duration:.2f}s; next run saved ~{report['time_saved']}s, "
+      f"stats={runner.stats}")
+if not report["time_saved"] or report["time_saved"] <= 0.5:
+    print("X Time saved was not reported!")
+    exit(1)
+
+# --- Test 4: A change with no affected tests runs nothing ---
+report = runner.run(["README.md"], full_suite=False)
+print(f"[4] README.md -> {report['selection'].tests} passed={report['passed']}")
+if report["selection"].tests or not report["passed"]:
+    print("X Inert change should select no tests!")
+    exit(1)
+
+# --- Test 5: AutoDebugger re-runs only the affected tests after a fix ---
+with open(os.path.join(tmp, "pkg/a.py"), "w", encoding="utf-8") as f:
+    f.write("def one():\n    return 0\n")
+debugger = AutoDebugger(tmp)
+result = debugger.run_tests("python -m pytest -q", changed=[os.path.join(tmp, "pkg/a.py")])
+executed = sorted(r["nodeid"] for r in result["results"])
+print(f"[5] AutoDebugger: passed={result['passed']} selection={result['selection']['tests']} "
+      f"executed={executed} in {len(result['shards'])} pytest run(s)")
+if result["passed"] or result["selection"]["tests"] != ["tests/test_a.py", "tests/test_b.py"] \
+        or executed != ["tests/test_a.py::test_one", "tests/test_b.py::test_two"] or len(result["shards"]) != 1:
+    print("X AutoDebugger did not restrict the run to affected tests!")
+    exit(1)
+
+shutil.rmtree(tmp, ignore_errors=True)
+print("--- [SUCCESS] Test impact verified ---")
@@ -0,0 +1,85 @@
+import os
+import shutil
+import tempfile
+import time
+
+from codex_ia.core.ascension_agent import AscensionAgent
+from codex_ia.core.context import ContextManager
+from codex_ia.core.conversation_memory import estimate_tokens
+from codex_ia.core.symbol_index import get_symbol_index
+
+print("--- Testing query-scoped introspection ---")
+
+tmp = tempfile.mkdtemp()
+FILES = {
+    "billing.py": '"""Invoices and billing."""\nfrom tax import compute_tax\n\n\nclass Invoice:\n'
+                  '    """A customer invoice."""\n\n    def total(self, amount):\n        return amount + compute_tax(amount)\n',
+    "tax.py": 'def compute_tax(amount: float) -> float:\n    """Brazilian tax rules."""\n    return amount * 0.1\n',
+    "render.py": "".join(f"def widget_{i}(canvas):\n    return canvas.draw({i})\n\n\n" for i in range(300)),
+}
+for rel, content in FILES.items():
+    with open(os.path.join(tmp, rel), "w", encoding="utf-8") as f:
+        f.write(content)
+
+# --- Test 1: Relevant modules, signatures and call edges only ---
+ctx = ContextManager(tmp)
+out = ctx.get_context_for_query("invoice tax", token_budget=400, use_vectors=False)
+print("[1] " + out.replace("\n", "\n    "))
+if "billing.py" not in out or "tax.py" not in out or "render.py" in out:
+    print("X Wrong modules selected!")
+    exit(1)
+if "def compute_tax(amount: float) -> float" not in out or "called by: Invoice.total (billing.py)" not in out \
+        or "methods: total" not in out:
+    print("X Signatures / call edges missing!")
+    exit(1)
+
+# --- Test 2: Token budget holds on a real package ---
+ctx = ContextManager("codex_ia")
+for budget in (300, 1500):
+    out = ctx.get_context_for_query("core", token_budget=budget, use_vectors=False)
+    body = out.split("\n", 1)[1] if "\n" in out else ""
+    print(f"[2] budget {budget}: ~{estimate_tokens(body)} tokens, {out.splitlines()[0]}")
+    if estimate_tokens(body) > budget * 1.1:
+        print("X Token budget exceeded!")
+        exit(1)
+
+# --- Test 3: analyze_self gets a small prompt instead of crashing ---
+class FakeClient:
+    prompt = ""
+
+    def send_message(self, prompt):
+        FakeClient.prompt = prompt
+        return "critique"
+
+
+class FakeNetwork:
+    def retrieve_wisdom(self, tags):
+        return ""
+
+
+agent = AscensionAgent.__new__(AscensionAgent)
+agent.codex_root, agent.client, agent.network = "codex_ia", FakeClient(), FakeNetwork()
+agent.context_mgr = ContextManager("codex_ia")
+start = time.perf_counter()
+result = agent.analyze_self("snapshot store revert")
+print(f"[3] analyze_self -> {result!r}, prompt ~{estimate_tokens(FakeClient.prompt)} tokens "
+      f"in {time.perf_counter() - start:.2f}s")
+if result != "critique" or "snapshot_store.py" not in FakeClient.prompt \
+        or estimate_tokens(FakeClient.prompt) > AscensionAgent.INTROSPECTION_BUDGET + 300:
+    print("X Self-analysis prompt is not query-scoped!")
+    exit(1)
+
+# --- Test 4: introspect reuses the cached index ---
+structure = agent.introspect()
+index = get_symbol_index("codex_ia")
+index.invalidate()
+start = time.perf_counter()
+again = agent.introspect()
+print(f"[4] introspect: {len(structure.splitlines())} entries, re-run reparsed {index.reindexed} files "
+      f"in {(time.perf_counter() - start) * 1000:.0f} ms")
+if again != structure or index.reindexed != 0 or "    core/" not in structure or "ascension_agent.py" not in structure:
+    print("X introspect did not use the incremental index!")
+    exit(1)
+
+shutil.rmtree(tmp, ignore_errors=True)
+print("--- [SUCCESS] Introspection verified ---")
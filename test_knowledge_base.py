@@ -0,0 +1,55 @@
+from codex_ia.core.knowledge_base import KnowledgeBase
+import json
+import os
+import tempfile
+import shutil
+
+print("--- Testing KnowledgeBase (SQLite, lazy + dirty writes) ---")
+
+tmp = tempfile.mkdtemp()
+
+# Legacy monolithic file next to the new database
+legacy = os.path.join(tmp, ".codex_memory.json")
+with open(legacy, "w", encoding="utf-8") as f:
+    json.dump({
+        "project_summary": "Legacy project",
+        "file_index": {"old.py": {"summary": "Old module", "hash": "abc", "last_updated": "2026-01-01"}}
+    }, f)
+
+# --- Test 1: Migration ---
+kb = KnowledgeBase(os.path.join(tmp, ".codex_memory.db"))
+print(f"[1] Migrated summary: {kb.get_file_summary('old.py')}")
+if kb.get_file_summary("old.py") != "Old module" or kb.get_project_summary() != "Legacy project":
+    print("X Legacy JSON was not migrated!")
+    exit(1)
+
+# --- Test 2: Only dirty entries are written ---
+for i in range(500):
+    kb.update_file_summary(f"mod_{i}.py", f"Module {i}", f"h{i}")
+kb.save()
+
+changes_before = kb._conn.total_changes
+for i in range(500):
+    kb.update_file_summary(f"mod_{i}.py", f"Module {i}", f"h{i}")  # unchanged
+kb.update_file_summary("mod_7.py", "Module 7 (edited)", "h7b")
+kb.save()
+written = kb._conn.total_changes - changes_before
+print(f"[2] Rows written on second save: {written}")
+if written != 1:
+    print("X Save rewrote unchanged entries!")
+    exit(1)
+kb.close()
+
+# --- Test 3: Lazy reload ---
+kb = KnowledgeBase(os.path.join(tmp, ".codex_memory.db"))
+if kb._cache:
+    print("X Entries were loaded eagerly!")
+    exit(1)
+print(f"[3] Lazy read: {kb.get_file_summary('mod_7.py')}")
+if kb.get_file_summary("mod_7.py") != "Module 7 (edited)":
+    print("X Wrong summary after reload!")
+    exit(1)
+kb.close()
+
+shutil.rmtree(tmp, ignore_errors=True)
+print("\n--- [SUCCESS] KnowledgeBase Verified ---")
@@ -0,0 +1,46 @@
+import subprocess
+import sys
+
+from codex_ia.core.lazy import lazy_import, is_loaded
+
+print("--- Testing lazy imports (fast startup) ---")
+
+HEAVY = ("chromadb", "torch", "sentence_transformers", "google.genai", "google.generativeai", "requests")
+
+# --- Test 1: Proxy defers the import until first attribute access ---
+proxy = lazy_import("json")
+if is_loaded(proxy):
+    print("X Proxy imported its target eagerly!")
+    exit(1)
+if proxy.dumps({"a": 1}) != '{"a": 1}' or not is_loaded(proxy):
+    print("X Proxy did not load the real module on first use!")
+    exit(1)
+print(f"[1] {proxy!r}")
+
+missing = lazy_import("codex_module_that_does_not_exist")
+try:
+    missing.anything
+    print("X Missing module did not raise on use!")
+    exit(1)
+except ImportError:
+    print("[2] Missing dependency surfaces on first use, not at import")
+
+# --- Test 2: Importing the agent and building it stays light (fresh interpreter) ---
+probe = (
+    "import sys, tempfile\n"
+    "import codex_ia\n"
+    "import codex_ia.core.agent as a\n"
+    "a.CodexAgent(tempfile.mkdtemp())\n"
+    f"print(','.join(m for m in {HEAVY!r} if m in sys.modules))\n"
+)
+proc = subprocess.run([sys.executable, "-c", probe], capture_output=True, text=True)
+if proc.returncode != 0:
+    print(f"X Probe failed: {proc.stderr.strip().splitlines()[-1:]}")
+    exit(1)
+loaded = proc.stdout.strip().splitlines()[-1] if proc.stdout.strip() else ""
+print(f"[3] Heavy modules after CodexAgent(): {loaded or 'none'}")
+if loaded:
+    print("X Heavy dependencies are loaded at startup!")
+    exit(1)
+
+print("--- [SUCCESS] Lazy imports verified ---")
@@ -0,0 +1,137 @@
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+
+from codex_ia.core import complexity as cx
+from codex_ia.core.night_shift import DONE, PENDING, JobQueue, NightShift, scan_project
+
+print("--- Testing the Night Shift job queue ---")
+
+tmp = tempfile.mkdtemp()
+branchy = "def big(x):\n" + "".join(f"    if x == {i}:\n        x += 1\n" for i in range(90)) + "    return x\n"
+FILES = {
+    "todo.py": "# TODO: tidy\nVALUE = 1\n",
+    "complex.py": branchy,
+    "clean.py": "VALUE = 2\n",
+    "test_api.py": "def test_a():\n    assert False\n",
+    "notes.md": "FIXME later\n",
+}
+for rel, content in FILES.items():
+    with open(os.path.join(tmp, rel), "w", encoding="utf-8") as f:
+        f.write(content)
+os.makedirs(os.path.join(tmp, ".pytest_cache", "v", "cache"))
+with open(os.path.join(tmp, ".pytest_cache", "v", "cache", "lastfailed"), "w") as f:
+    json.dump({"test_api.py::test_a": True}, f)
+
+# --- Test 1: One read per file computes every metric ---
+reads = []
+real_open = open
+
+
+def counting_open(path, *args, **kwargs):
+    reads.append(path)
+    return real_open(path, *args, **kwargs)
+
+
+cx.open = counting_open
+opps = scan_project(tmp, sorted(FILES))
+del cx.open
+reads = [r for r in reads if os.path.basename(str(r)) in FILES]  # Not the analyzer's own cache file
+print(f"[1] {len(reads)} reads for {len(FILES)} files -> {[(o['file'], o['type'], o['priority']) for o in opps]}")
+if sorted(map(os.path.basename, reads)) != sorted(FILES):
+    print("X Files were read more than once!")
+    exit(1)
+m = cx.ComplexityAnalyzer(tmp).stats(["complex.py"])[0]["complex.py"]
+if m.branches != 90 or m.functions[0].length != 182 or m.lines != 182:
+    print(f"X Wrong metrics: {m}")
+    exit(1)
+
+# --- Test 2: Failing tests > complexity > debt ---
+ranked = [(o["file"], o["type"]) for o in opps]
+if ranked[:2] != [("test_api.py", "FAILING_TESTS"), ("complex.py", "COMPLEXITY")] \
+        or ("clean.py", "TECH_DEBT") in ranked or ("notes.md", "TECH_DEBT") not in ranked:
+    print("X Jobs are not ranked by priority!")
+    exit(1)
+
+
+class FakeSquad:
+    active = 0
+    peak = 0
+    applied = []
+    lock = threading.Lock()
+
+    def assign_mission(self, mission, apply=False, autopilot=False, verification_cmd=""):
+        with FakeSquad.lock:
+            FakeSquad.applied.append(apply)
+            FakeSquad.active += 1
+            FakeSquad.peak = max(FakeSquad.peak, FakeSquad.active)
+        time.sleep(0.5)
+        with FakeSquad.lock:
+            FakeSquad.active -= 1
+        return {"mission": mission, "plan": "x" * 4000, "autopilot_status": "✅ Verification Passed"}
+
+
+# --- Test 3: Parallel draft workers, highest priority first ---
+db = os.path.join(tmp, "queue.db")
+shift = NightShift(tmp, FakeSquad, db_path=db, workers=2)
+shift.queue.push(opps)
+start = time.perf_counter()
+log = list(shift.run(max_missions=4, apply=False))
+elapsed = time.perf_counter() - start
+targets = [line.split("Targeting: ")[1] for line in log if "Targeting" in line]
+print(f"[3] {len(targets)} missions in {elapsed:.2f}s (peak {FakeSquad.peak} squads): {targets}")
+if len(targets) != 4 or FakeSquad.peak != 2 or elapsed > 1.6 or targets[0] != "test_api.py (FAILING_TESTS)" \
+        or any(FakeSquad.applied):
+    print("X Missions did not run in parallel by priority!")
+    exit(1)
+
+# --- Test 4: Token budget stops dispatching; the night's usage persists ---
+shift = NightShift(tmp, FakeSquad, db_path=os.path.join(tmp, "budget.db"), workers=1, token_budget=1500)
+shift.queue.push(opps)
+log = list(shift.run(max_missions=10))
+print(f"[4] {log[-2]} | {log[-1]}")
+if "token budget" not in log[-2] or shift.queue.counts().get(DONE) != 2:
+    print("X Token budget not enforced!")
+    exit(1)
+again = list(NightShift(tmp, FakeSquad, db_path=os.path.join(tmp, "budget.db"), token_budget=1500).run(10))
+if "token budget" not in " ".join(again) or any("Targeting" in line for line in again):
+    print("X A resumed shift the same night should keep the spent budget!")
+    exit(1)
+
+# --- Test 5: Squads that apply share the tree, so they run one at a time ---
+FakeSquad.peak, FakeSquad.applied = 0, []
+shift = NightShift(tmp, FakeSquad, db_path=os.path.join(tmp, "apply.db"), workers=2)
+shift.queue.push(opps[:2])
+list(shift.run(max_missions=2))
+print(f"[5] apply=True with 2 workers: peak {FakeSquad.peak} squad(s), applied={FakeSquad.applied}")
+if FakeSquad.peak != 1 or FakeSquad.applied != [True, True]:
+    print("X Applying squads ran concurrently on the same tree!")
+    exit(1)
+
+# --- Test 6: Running missions reserve their estimated tokens ---
+FakeSquad.peak = 0
+shift = NightShift(tmp, FakeSquad, db_path=os.path.join(tmp, "reserve.db"), workers=2, token_budget=1500)
+shift.queue.push(opps)
+log = list(shift.run(max_missions=10, apply=False))
+print(f"[6] {log[-2]} | peak {FakeSquad.peak} squad(s), {shift.queue.counts().get(DONE)} done")
+if "token budget" not in log[-2] or FakeSquad.peak != 1 or shift.queue.counts().get(DONE) != 2:
+    print("X Parallel squads overshot the token budget!")
+    exit(1)
+
+# --- Test 7: Crash recovery ---
+queue = JobQueue(os.path.join(tmp, "crash.db"))
+queue.push(opps)
+crashed = queue.claim()  # Claimed by a process that then died
+queue.close()
+shift = NightShift(tmp, FakeSquad, db_path=os.path.join(tmp, "crash.db"), workers=2)
+log = list(shift.run(max_missions=10))
+print(f"[7] {log[0]} -> {log[-1]}")
+if "Resumed 1" not in log[0] or shift.queue.counts().get(PENDING) or shift.queue.counts().get(DONE) != len(opps):
+    print("X Interrupted job was not resumed!")
+    exit(1)
+
+shutil.rmtree(tmp, ignore_errors=True)
+print("--- [SUCCESS] Night Shift verified ---")
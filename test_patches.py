@@ -0,0 +1,138 @@
+import os
+import shutil
+import tempfile
+
+from codex_ia.core.patches import Hunk, apply_patch, failure_feedback, parse_patch
+from codex_ia.core.safety import SafetyProtocol
+from codex_ia.core.squad import EngineerAgent
+
+print("--- Testing multi-file search/replace patches ---")
+
+tmp = tempfile.mkdtemp()
+# Backups go to the temp dir, not the real ~/.codex_backups
+SafetyProtocol.BACKUP_DIR = os.path.join(tmp, ".backups")
+SafetyProtocol.QUARANTINE_DIR = os.path.join(tmp, ".quarantine")
+os.makedirs(os.path.join(tmp, "pkg"))
+big = "".join(f"def f{i}():\n    return {i}\n\n" for i in range(2000))  # ~40KB module
+with open(os.path.join(tmp, "pkg", "big.py"), "w", encoding="utf-8") as f:
+    f.write(big)
+with open(os.path.join(tmp, "pkg", "util.py"), "w", encoding="utf-8") as f:
+    f.write("def helper(x):  \n    return x\n")
+
+patch = """Here is the change:
+```
+FILE: pkg/big.py
+<<<<<<< SEARCH
+def f1500():
+    return 1500
+=======
+def f1500():
+    return helper(1500)
+>>>>>>> REPLACE
+
+FILE: pkg/big.py
+<<<<<<< SEARCH
+def f0():
+=======
+from pkg.util import helper
+
+
+def f0():
+>>>>>>> REPLACE
+
+FILE: pkg/util.py
+<<<<<<< SEARCH
+def helper(x):
+    return x
+=======
+def helper(x):
+    return x * 2
+>>>>>>> REPLACE
+
+FILE: pkg/new_module.py
+<<<<<<< SEARCH
+=======
+CREATED = True
+>>>>>>> REPLACE
+```"""
+
+# --- Test 1: Parsing ---
+hunks = parse_patch(patch)
+print(f"[1] Parsed {len(hunks)} hunks: {[h.path for h in hunks]}")
+if len(hunks) != 4 or hunks[3].search != "":
+    print("X Patch parsing failed!")
+    exit(1)
+print(f"    Patch is {len(patch)} chars vs {len(big)} chars to resend the whole file")
+
+# --- Test 2: Atomic multi-file apply (trailing whitespace drift tolerated) ---
+result = apply_patch(tmp, patch)
+print(f"[2] {result.summary()}")
+content = open(os.path.join(tmp, "pkg", "big.py"), encoding="utf-8").read()
+if not result.applied or "return helper(1500)" not in content or not content.startswith("from pkg.util"):
+    print("X Patch was not applied!")
+    exit(1)
+if "x * 2" not in open(os.path.join(tmp, "pkg", "util.py")).read() or not os.path.exists(os.path.join(tmp, "pkg", "new_module.py")):
+    print("X Second file / new file missing!")
+    exit(1)
+if set(result.backups) != {"pkg/big.py", "pkg/util.py"}:
+    print("X Existing files were not backed up!")
+    exit(1)
+umask = os.umask(0o022)
+os.umask(umask)
+mode = os.stat(os.path.join(tmp, "pkg", "new_module.py")).st_mode & 0o777
+if mode != 0o666 & ~umask:
+    print(f"X New file got mode {oct(mode)} instead of following the umask!")
+    exit(1)
+
+# --- Test 3: One bad hunk -> nothing is written ---
+before = open(os.path.join(tmp, "pkg", "util.py")).read()
+bad = """FILE: pkg/util.py
+<<<<<<< SEARCH
+    return x * 2
+=======
+    return x * 3
+>>>>>>> REPLACE
+FILE: pkg/big.py
+<<<<<<< SEARCH
+def does_not_exist():
+=======
+def nope():
+>>>>>>> REPLACE
+FILE: ../escape.py
+<<<<<<< SEARCH
+=======
+x = 1
+>>>>>>> REPLACE
+"""
+result = apply_patch(tmp, bad)
+print(f"[3] {result.summary()}")
+if result.applied or open(os.path.join(tmp, "pkg", "util.py")).read() != before or len(result.failed) != 2:
+    print("X Rejected patch modified files!")
+    exit(1)
+if os.path.exists(os.path.join(os.path.dirname(tmp), "escape.py")):
+    print("X Patch escaped the project root!")
+    exit(1)
+
+# --- Test 4: Retry feedback only carries the failing hunks; valid ones are kept ---
+feedback = failure_feedback(tmp, result)
+print(f"[4] Feedback ({len(feedback)} chars) keeps {len(result.valid)} valid hunk(s)")
+if "does_not_exist" not in feedback or "x * 3" in feedback:
+    print("X Feedback should only list the rejected hunks!")
+    exit(1)
+fix = "FILE: pkg/big.py\n<<<<<<< SEARCH\ndef f3():\n=======\ndef f3_renamed():\n>>>>>>> REPLACE\n"
+engineer = EngineerAgent(client=object())
+retry = engineer.apply_patch(tmp, fix, pending_hunks=result.valid)
+if not retry.applied or "x * 3" not in open(os.path.join(tmp, "pkg", "util.py")).read():
+    print("X Retry did not merge kept hunks with the new ones!")
+    exit(1)
+print(f"    Retry: {retry.summary()}")
+
+# --- Test 5: Ambiguous SEARCH is rejected ---
+result = apply_patch(tmp, [Hunk("pkg/big.py", "    return 1", "    return 8")])
+if result.applied or "matches" not in result.failed[0][1]:
+    print("X Ambiguous SEARCH should be rejected!")
+    exit(1)
+print(f"[5] {result.failed[0][1]}")
+
+shutil.rmtree(tmp, ignore_errors=True)
+print("--- [SUCCESS] Patches verified ---")
@@ -0,0 +1,84 @@
+import os
+import tempfile
+import threading
+import time
+
+from codex_ia.core.plan_runtime import PlanRuntime
+
+print("--- Testing parallel plan runtime ---")
+
+plan = {
+    "goal": "ship dashboard",
+    "steps": [
+        {"id": 1, "action": "research", "description": "libs", "dependencies": []},
+        {"id": 2, "action": "research", "description": "api", "dependencies": []},
+        {"id": 3, "action": "code", "description": "backend", "dependencies": [1, 2]},
+        {"id": 4, "action": "code", "description": "frontend", "dependencies": [1]},
+        {"id": 5, "action": "test", "description": "e2e", "dependencies": [3, 4]},
+    ],
+}
+calls = {}
+lock = threading.Lock()
+flaky = {"remaining": 1}
+crash_on = {"id": None}
+
+
+def execute_step(step, context=None):
+    with lock:
+        calls[step["id"]] = calls.get(step["id"], 0) + 1
+    time.sleep(0.2)
+    if step["id"] == crash_on["id"]:
+        raise KeyboardInterrupt  # Simulated crash of the whole process
+    if step["id"] == 4 and flaky["remaining"]:
+        flaky["remaining"] -= 1
+        return {"success": False, "output": "", "errors": ["timeout"], "next_action": "retry"}
+    deps = (context or {}).get("dependency_outputs", {})
+    return {"success": True, "output": f"step{step['id']}<{','.join(sorted(deps))}>", "errors": [], "next_action": "continue"}
+
+
+# --- Test 1: Independent steps run concurrently; retry honours next_action ---
+runtime = PlanRuntime(execute_step, max_workers=4, retry_delay=0.05)
+report = runtime.run(plan)
+print(f"[1] {report['final_status']} in {report['wall_time']}s timings={report['timings']}")
+if report["final_status"] != "success" or calls[4] != 2:
+    print("X Plan failed or the retry did not happen!")
+    exit(1)
+# Sequential would be 6 x 0.2s; critical path is 1 -> 4(retry) -> 5 ~ 0.85s
+if report["wall_time"] > 1.0:
+    print("X Independent steps did not overlap!")
+    exit(1)
+if report["results"][2]["output"] != "step3<1,2>":
+    print("X Dependency outputs were not passed to the step!")
+    exit(1)
+
+# --- Test 2: Escalation stops the remaining steps ---
+def escalating(step, context=None):
+    time.sleep(0.05)
+    if step["id"] == 1:
+        return {"success": False, "output": "", "errors": ["no knowledge"], "next_action": "escalate"}
+    return {"success": True, "output": "ok", "errors": [], "next_action": "continue"}
+
+report = PlanRuntime(escalating).run(plan)
+print(f"[2] {report['final_status']} escalated={report['escalated']} skipped={report['skipped_steps']}")
+if report["escalated"] != ["1"] or report["results"][4]["next_action"] != "skipped":
+    print("X Escalation did not stop dependent work!")
+    exit(1)
+
+# --- Test 3: Crash mid-plan, then resume from the checkpoint ---
+checkpoint = os.path.join(tempfile.mkdtemp(), "plan.json")
+calls.clear()
+flaky["remaining"] = 0
+crash_on["id"] = 5
+try:
+    PlanRuntime(execute_step, checkpoint_path=checkpoint).run(plan)
+except KeyboardInterrupt:
+    pass
+crash_on["id"] = None
+calls.clear()
+report = PlanRuntime(execute_step, checkpoint_path=checkpoint).run(plan)
+print(f"[3] After crash: resumed={report['resumed']} re-executed={sorted(calls)} -> {report['final_status']}")
+if report["resumed"] != ["1", "2", "3", "4"] or sorted(calls) != [5] or report["final_status"] != "success":
+    print("X Resume did not skip completed steps!")
+    exit(1)
+
+print("--- [SUCCESS] Plan runtime verified ---")
@@ -0,0 +1,100 @@
+import os
+import shutil
+import tempfile
+
+from codex_ia.core.agent import CodexAgent
+
+print("--- Testing incremental prompts (message list + deltas) ---")
+
+tmp = tempfile.mkdtemp()
+for name in ("a.py", "b.py"):
+    with open(os.path.join(tmp, name), "w", encoding="utf-8") as f:
+        f.write(f"VALUE = '{name}'\n" * 40)
+
+
+class SessionBrain:
+    """Gemini-like brain: one chat session per loop, receives only new turns."""
+    def __init__(self):
+        self.sessions = []
+        self.deltas = []
+        self.turn = 0
+
+    def open_session(self, system_instruction, tool_schemas=None):
+        self.sessions.append(system_instruction)
+        return object()
+
+    def send_delta(self, session, messages):
+        self.deltas.append(messages)
+        self.turn += 1
+        if self.turn == 1:
+            calls = [{"id": "c1", "name": "read_file", "args": {"path": "a.py"}},
+                     {"id": "c2", "name": "read_file", "args": {"path": "b.py"}}]
+            return {"text": "", "tool_calls": calls, "usage": {"prompt_tokens": 900, "cached_tokens": 0}}
+        return {"text": "Pronto.", "tool_calls": [], "usage": {"prompt_tokens": 1300, "cached_tokens": 800}}
+
+
+class FakeRouter:
+    def __init__(self, brain):
+        self.brain = brain
+        self.sleeping = []
+
+    def pick_brain(self, use_fallback=True):
+        return "gemini", self.brain
+
+    def is_rate_limited(self, response):
+        return "429" in str(response)
+
+    def put_to_sleep(self, name, seconds=300):
+        self.sleeping.append(name)
+
+    def send_message(self, message, **kwargs):
+        return "fallback"
+
+
+agent = CodexAgent(tmp)
+brain = SessionBrain()
+agent.llm_client = FakeRouter(brain)
+answer = agent.chat("Compare a.py e b.py")
+
+# --- Test 1: One session, system prompt sent once ---
+print(f"[1] Answer: {answer} | sessions opened: {len(brain.sessions)} | round-trips: {len(brain.deltas)}")
+if answer != "Pronto." or len(brain.sessions) != 1 or len(brain.deltas) != 2:
+    print("X Loop did not reuse a single session!")
+    exit(1)
+
+# --- Test 2: Second step only carries the tool results ---
+second = brain.deltas[1]
+print(f"[2] Step 2 delta roles: {[m['role'] for m in second]}")
+if [m["role"] for m in second] != ["tool", "tool"] or any("SYSTEM: Você é" in m["content"] for m in second):
+    print("X Step 2 re-sent more than the new turns!")
+    exit(1)
+if second[0]["tool_call_id"] != "c1" or "VALUE = 'a.py'" not in second[0]["content"]:
+    print("X Native tool results are not matched to their calls!")
+    exit(1)
+
+# --- Test 3: Token accounting ---
+tokens = [t["tokens"] for t in agent.last_trace]
+print(f"[3] Per-step tokens: {tokens}")
+print(f"    Totals: {agent.last_token_report}")
+if tokens[1]["new_tokens"] >= tokens[1]["full_prompt_tokens"] or tokens[1]["cached_tokens"] != 800:
+    print("X Per-step accounting does not reflect the delta/cache!")
+    exit(1)
+if agent.last_token_report["saved_tokens"] <= 0:
+    print("X No savings reported!")
+    exit(1)
+
+# --- Test 4: Provider failure falls back to the flattened prompt ---
+class FailingBrain(SessionBrain):
+    def send_delta(self, session, messages):
+        raise RuntimeError("429 Resource exhausted")
+
+router = FakeRouter(FailingBrain())
+agent.llm_client = router
+answer = agent.chat("Oi")
+print(f"[4] Fallback answer: {answer} | sleeping: {router.sleeping}")
+if answer != "fallback" or router.sleeping != ["gemini"]:
+    print("X Failure did not fall back to the legacy path!")
+    exit(1)
+
+shutil.rmtree(tmp, ignore_errors=True)
+print("--- [SUCCESS] Incremental prompts verified ---")
@@ -0,0 +1,88 @@
+import os
+import shutil
+import tempfile
+import time
+
+from codex_ia.core.auto_debugger import AutoDebugger
+from codex_ia.core.shard_runner import ShardedRunner
+
+print("--- Testing sharded test execution ---")
+
+tmp = tempfile.mkdtemp()
+FILES = {
+    "calc.py": "def add(a, b):\n    return a - b\n",
+    "test_slow.py": "".join(f"import time\n\ndef test_slow_{i}():\n    time.sleep(1.0)\n" for i in range(4)),
+    "test_fast.py": "".join(f"def test_fast_{i}():\n    assert {i} == {i}\n" for i in range(8)),
+    "test_calc.py": "from calc import add\n\ndef test_add():\n    assert add(2, 3) == 5\n",
+}
+for rel, content in FILES.items():
+    with open(os.path.join(tmp, rel), "w", encoding="utf-8") as f:
+        f.write(content)
+
+# --- Test 1: LPT balances by historical duration ---
+runner = ShardedRunner(tmp, workers=4)
+history = {f"test_slow.py::test_slow_{i}": 1.0 for i in range(4)}
+history.update({f"test_fast.py::test_fast_{i}": 0.01 for i in range(8)})
+shards = runner.plan(list(history), history)
+loads = [s["estimate"] for s in shards]
+print(f"[1] Shard estimates: {loads}")
+if len(shards) != 4 or max(loads) - min(loads) > 0.1 or any(
+        sum("slow" in t for t in s["tests"]) != 1 for s in shards):
+    print("X Slow tests were not spread across shards!")
+    exit(1)
+
+# --- Test 2: Parallel run, merged report, failures streamed early ---
+streamed = []
+start = time.perf_counter()
+report = runner.run(on_failure=lambda case: streamed.append((case, time.perf_counter() - start)))
+print(f"[2] {report.summary()} (collect {report.collect_time:.2f}s)")
+for shard in report.shards:
+    print(f"    shard {shard['index']}: {len(shard['tests'])} tests, est {shard['estimate']}s, ran {shard['duration']}s")
+by_id = {r.nodeid: r for r in report.results}
+if len(report.results) != 13 or report.passed or report.counts().get("passed") != 12:
+    print("X Merged report is wrong!")
+    exit(1)
+failure = by_id["test_calc.py::test_add"]
+if failure.outcome != "failed" or "assert" not in failure.longrepr or by_id["test_slow.py::test_slow_0"].duration < 0.9:
+    print("X Per-test outcome / traceback / duration missing!")
+    exit(1)
+serial = sum(r.duration for r in report.results)
+if report.wall_time > serial * 0.8:
+    print(f"X Shards did not run in parallel ({report.wall_time:.2f}s vs {serial:.2f}s of tests)!")
+    exit(1)
+if not streamed or streamed[0][1] >= report.wall_time - 0.3:
+    print("X Failure was not streamed before the run finished!")
+    exit(1)
+print(f"    Failure streamed at {streamed[0][1]:.2f}s of {report.wall_time:.2f}s")
+
+# --- Test 3: Durations are remembered for the next schedule ---
+learned = runner.load_durations()
+shards = runner.plan(list(by_id))
+print(f"[3] Learned {len(learned)} durations; next plan: {[s['estimate'] for s in shards]}")
+if learned.get("test_slow.py::test_slow_1", 0) < 0.9 or any(
+        sum("slow" in t for t in s["tests"]) != 1 for s in shards):
+    print("X Historical durations were not used!")
+    exit(1)
+
+# --- Test 4: A killed shard reports its unfinished tests as errors ---
+short = ShardedRunner(tmp, workers=1, timeout=2.5, args=["test_slow.py"])
+report = short.run()
+errors = [r for r in report.results if r.outcome == "error"]
+print(f"[4] Timed-out shard: {report.summary()}; {errors[0].longrepr.splitlines()[0] if errors else '-'}")
+if not errors or "timed out" not in errors[0].longrepr:
+    print("X Unfinished tests of a killed shard were lost!")
+    exit(1)
+
+# --- Test 5: AutoDebugger runs pytest through the shards ---
+debugger = AutoDebugger(tmp)
+debugger.TEST_WORKERS = 2
+result = debugger.run_tests("python -m pytest -q")
+print(f"[5] AutoDebugger: passed={result['passed']} tests={len(result['results'])} "
+      f"shards={len(result['shards'])} in {result['duration']}s")
+if result["passed"] or len(result["results"]) != 13 or len(result["shards"]) != 2 \
+        or "test_calc.py::test_add" not in result["output"]:
+    print("X AutoDebugger did not use the sharded report!")
+    exit(1)
+
+shutil.rmtree(tmp, ignore_errors=True)
+print("--- [SUCCESS] Sharded runner verified ---")
@@ -0,0 +1,92 @@
+import os
+import shutil
+import tempfile
+
+from codex_ia.core.safety import SafetyProtocol
+from codex_ia.core.snapshot_store import BAD, GOOD, SnapshotStore
+
+print("--- Testing the content-addressed snapshot store ---")
+
+tmp = tempfile.mkdtemp()
+
+
+def write(rel, content):
+    path = os.path.join(tmp, rel)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(content)
+    return path
+
+
+def blobs(store):
+    return sum(len(files) for _, _, files in os.walk(store.blob_dir))
+
+
+store = SnapshotStore(tmp)
+
+# --- Test 1: Identical content is stored once ---
+a = store.capture(write("a/util.py", "X = 1\n"))
+b = store.capture(write("b/util.py", "X = 1\n"))
+again = store.capture(os.path.join(tmp, "a/util.py"))
+print(f"[1] a#{a.seq} b#{b.seq} same hash={a.hash == b.hash}, recapture -> #{again.seq}, blobs={blobs(store)}")
+if a.hash != b.hash or again.seq != a.seq or blobs(store) != 1:
+    print("X Content was not deduplicated!")
+    exit(1)
+
+# --- Test 2: Revert goes to the last known-good version, keeping uncommitted good edits ---
+store.mark(a, GOOD)
+good_edit = store.capture(write("a/util.py", "X = 1\nY = 2  # uncommitted but good\n"))
+store.mark(good_edit, GOOD)
+broken = store.capture(write("a/util.py", "X = = 1\n"))
+store.mark(broken, BAD)
+target = store.last_good("a/util.py", exclude_hash=broken.hash)
+ok = store.restore("a/util.py", target)
+content = open(os.path.join(tmp, "a/util.py")).read()
+print(f"[2] Restored #{target.seq} -> {content!r}")
+if not ok or "uncommitted but good" not in content:
+    print("X Did not restore the last good version!")
+    exit(1)
+if store.latest("a/util.py").status != GOOD:
+    print("X Restored content should keep its good verdict!")
+    exit(1)
+
+# --- Test 3: The log survives a restart ---
+reloaded = SnapshotStore(tmp)
+statuses = [(v.seq, v.status) for v in reloaded.history("a/util.py")]
+print(f"[3] Reloaded history: {statuses}")
+if statuses != [(v.seq, v.status) for v in store.history("a/util.py")] \
+        or reloaded.last_good("a/util.py").hash != good_edit.hash:
+    print("X Version log / verdicts were not persisted!")
+    exit(1)
+
+# --- Test 4: Retention bounds versions and disk use, keeping the latest good ---
+small = SnapshotStore(tmp, store_dir=os.path.join(tmp, "small_store"), max_versions=5)
+first = small.capture(write("hot.py", "v = 0\n"))
+small.mark(first, GOOD)
+for i in range(1, 30):
+    small.capture(write("hot.py", f"v = {i}\n" + "#" * 200 * i))
+history = small.history("hot.py")
+print(f"[4] {len(history)} versions kept of 30, {blobs(small)} blobs, {small.disk_usage()} bytes")
+if len(history) > 6 or history[0].seq != first.seq or blobs(small) != len(history):
+    print("X Retention did not keep the newest versions + last good, or leaked blobs!")
+    exit(1)
+capped = SnapshotStore(tmp, store_dir=os.path.join(tmp, "capped"), max_bytes=4000)
+for i in range(40):
+    capped.capture(write(f"f{i}.py", os.urandom(400).hex()))
+print(f"    Byte cap: {capped.disk_usage()} bytes in {blobs(capped)} blobs")
+if capped.disk_usage() > 4000 or blobs(capped) != len({v.hash for f in range(40) for v in capped.history(f"f{f}.py")}):
+    print("X Disk budget not enforced!")
+    exit(1)
+
+# --- Test 5: SafetyProtocol backups of same-named files no longer collide ---
+SafetyProtocol.BACKUP_DIR = os.path.join(tmp, "backups")
+SafetyProtocol.QUARANTINE_DIR = os.path.join(tmp, "quarantine")
+safety = SafetyProtocol()
+paths = [safety.create_backup(os.path.join(tmp, p)) for p in ("a/util.py", "b/util.py", "a/util.py")]
+print(f"[5] Backups: {[os.path.basename(p) for p in paths]}")
+if len(set(paths)) != 3:
+    print("X Backup names collided!")
+    exit(1)
+
+shutil.rmtree(tmp, ignore_errors=True)
+print("--- [SUCCESS] Snapshot store verified ---")
@@ -0,0 +1,112 @@
+import os
+import shutil
+import tempfile
+import threading
+import time
+
+from codex_ia.core.safety import SafetyProtocol
+from codex_ia.core.squad import SquadLeader
+from codex_ia.core.task_graph import TaskGraph
+
+print("--- Testing DAG mission executor ---")
+
+# --- Test 1: Independent stages overlap, dependents wait ---
+graph = TaskGraph(max_workers=4)
+graph.add("a", lambda r: time.sleep(0.3) or 1)
+graph.add("b", lambda r: time.sleep(0.3) or 2)
+graph.add("c", lambda r: r["a"] + r["b"], deps=["a", "b"])
+graph.add("d", lambda r: 1 / 0, deps=["a"])
+graph.add("e", lambda r: "never", deps=["d"])
+results = graph.run()
+report = graph.report()
+print(f"[1] {results} wall={report['wall_time']}s sequential={report['sequential_time']}s")
+if results["c"] != 3 or report["wall_time"] > 0.5:
+    print("X Independent stages did not run concurrently!")
+    exit(1)
+if "d" not in graph.errors or "e" not in graph.skipped:
+    print("X Failure did not skip the dependent stage!")
+    exit(1)
+
+
+class FakeClient:
+    """Slow LLM stand-in; every fork() has its own 'session' history."""
+    DELAY = 0.3
+
+    def __init__(self):
+        self.history = []
+
+    def fork(self):
+        return FakeClient()
+
+    def send_message(self, message, web_search=False):
+        time.sleep(self.DELAY)
+        self.history.append(message)
+        if "ROLE: QA Engineer" in message:
+            return "def test_feature(): assert True"
+        if "ROLE: Senior Python Developer" in message:
+            return "FILE: pkg/feature.py\n<<<<<<< SEARCH\n=======\nVALUE = 42\n>>>>>>> REPLACE"
+        if "Research" in message:
+            return "docs say: use 42"
+        return "PLAN: write pkg/feature.py"
+
+
+class FakeNetwork:
+    def retrieve_wisdom(self, tags, query=None):
+        time.sleep(FakeClient.DELAY)
+        return "lesson: keep it simple"
+
+    def store_experience(self, **kwargs):
+        self.stored = kwargs
+
+
+tmp = tempfile.mkdtemp()
+home = tempfile.mkdtemp()
+# Keep backups and the Exocortex memory out of the developer's home directory
+SafetyProtocol.BACKUP_DIR = os.path.join(home, "backups")
+SafetyProtocol.QUARANTINE_DIR = os.path.join(home, "quarantine")
+os.environ["HOME"] = home
+leader = SquadLeader(tmp, llm_client=FakeClient())
+leader.network = FakeNetwork()
+events = []
+lock = threading.Lock()
+
+def on_event(event, stage, payload):
+    with lock:
+        events.append((event, stage))
+
+# --- Test 2: Full mission with overlapping stages + per-stage timings ---
+report = leader.assign_mission("Create feature module", apply=True, autopilot=True,
+                               verification_cmd="python -c \"import pkg.feature as f; assert f.VALUE == 42\"",
+                               web_search=True, on_event=on_event)
+timings = report["timings"]
+print(f"[2] {report['autopilot_status']} | stages={timings['stages']}")
+print(f"    wall={timings['wall_time']}s sequential={timings['sequential_time']}s saved={timings['overlap_saved']}s")
+if report["autopilot_status"] != "✅ Verification Passed" or "42" not in open(f"{tmp}/pkg/feature.py").read():
+    print("X Mission did not apply and verify the code!")
+    exit(1)
+if not {"wisdom", "research", "plan", "code", "tests", "apply", "verify"} <= set(timings["stages"]):
+    print("X Missing stage timings!")
+    exit(1)
+# wisdom || research and tests || (apply -> verify) each overlap
+if timings["overlap_saved"] < 0.25:
+    print("X Stages did not overlap!")
+    exit(1)
+
+# --- Test 3: Partial results were streamed, in dependency order ---
+done_order = [stage for event, stage in events if event == "done"]
+print(f"[3] Streamed: {done_order}")
+if done_order.index("plan") > done_order.index("code") or done_order.index("apply") > done_order.index("verify"):
+    print("X Events do not respect the dependency order!")
+    exit(1)
+
+# --- Test 4: Autopilot retry reuses the plan and only reruns the attempt stages ---
+report = leader.assign_mission("Broken feature", apply=True, autopilot=True, verification_cmd="python -c \"raise SystemExit(1)\"")
+retry_stages = [s for s in report["timings"]["stages"] if "#" in s]
+print(f"[4] {report['autopilot_status']} | retry stages: {retry_stages}")
+if report["autopilot_status"] != "❌ Attempt 3 Failed" or any(s.startswith("plan") for s in retry_stages):
+    print("X Retries did not reuse the plan!")
+    exit(1)
+
+shutil.rmtree(tmp, ignore_errors=True)
+shutil.rmtree(home, ignore_errors=True)
+print("--- [SUCCESS] DAG mission executor verified ---")
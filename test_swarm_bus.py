@@ -0,0 +1,107 @@
+import asyncio
+import os
+import tempfile
+import time
+
+from codex_ia.core.swarm.agent_base import SwarmAgent
+from codex_ia.core.swarm.bus import MessageBus
+from codex_ia.core.swarm.orchestrator import SwarmOrchestrator
+
+print("--- Testing async Swarm message bus ---")
+
+
+# --- Test 1: Bounded mailbox applies backpressure to the publisher ---
+async def backpressure():
+    bus = MessageBus(mailbox_size=1)
+    inbox = bus.subscribe("slow", ["work.*"])
+    received = []
+
+    async def consumer():
+        for _ in range(3):
+            await asyncio.sleep(0.1)
+            received.append((await inbox.get()).content)
+
+    task = asyncio.create_task(consumer())
+    start = time.perf_counter()
+    for i in range(3):
+        await bus.publish("work.item", "producer", i)
+    elapsed = time.perf_counter() - start
+    await task
+    return elapsed, received, bus.stats()["mailboxes"]["slow"]
+
+elapsed, received, stats = asyncio.run(backpressure())
+print(f"[1] Publisher waited {elapsed:.2f}s, received={received}, high_water={stats['high_water']}")
+if received != [0, 1, 2] or elapsed < 0.15 or stats["high_water"] > 1:
+    print("X Mailbox did not bound the queue / apply backpressure!")
+    exit(1)
+
+
+class Worker(SwarmAgent):
+    """Sleeps like an LLM call; wired purely by topics."""
+
+    def __init__(self, name, role, subscribes, publishes, delay=0.3):
+        super().__init__(name, role)
+        self.SUBSCRIBES = subscribes
+        self.PUBLISHES = publishes
+        self.delay = delay
+
+    def process_message(self, message):
+        time.sleep(self.delay)
+        return f"{self.name} handled <{message['content'][:40]}>"
+
+
+log_path = os.path.join(tempfile.mkdtemp(), "swarm_log.jsonl")
+swarm = SwarmOrchestrator(log_path=log_path)
+swarm.register_agent(Worker("DaVinci", "Architect", {"mission.start": "Plan: {content}"}, "plan.ready"))
+for name in ("Alan", "Ada", "Linus"):
+    swarm.register_agent(Worker(name, "Developer", {"plan.ready": "Build: {content}"}, "code.ready"))
+swarm.register_agent(Worker("Grace", "QA", {"code.ready": "Test: {content}"}, "qa.report", delay=0.1))
+
+# --- Test 2: More than three agents run concurrently and the mission ends on quiescence ---
+start = time.perf_counter()
+updates = list(swarm.start_mission_iterative("build a todo app"))
+elapsed = time.perf_counter() - start
+senders = [s for s, _ in updates if s != "SYSTEM"]
+print(f"[2] {len(updates)} updates in {elapsed:.2f}s from {sorted(set(senders))}")
+if senders.count("Grace") != 3 or senders.count("DaVinci") != 1 or updates[-1][1] != "✅ Mission Complete":
+    print("X Topic routing failed!")
+    exit(1)
+# Sequential: 0.3 + 3*0.3 + 3*0.1 = 1.5s; concurrent developers: ~0.3 + 0.3 + 0.3
+if elapsed > 1.2:
+    print("X Developers did not process concurrently!")
+    exit(1)
+
+# --- Test 3: Observability + legacy view ---
+stats = swarm.stats()
+print(f"[3] messages={stats['messages']} Grace={stats['mailboxes']['Grace']} agents={ {k: v['processed'] for k, v in stats['agents'].items()} }")
+if stats["agents"]["Grace"]["processed"] != 3 or not any("DaVinci -> ALL" in m for m in swarm.message_bus):
+    print("X Stats / message_bus compatibility broken!")
+    exit(1)
+
+# --- Test 4: Replay from the persisted event log ---
+replayed = MessageBus.load(log_path)
+plans = replayed.replay(topics=["plan.*"])
+codes = replayed.replay(topics=["code.ready"])
+print(f"[4] Replayed {len(replayed.log)} events: {len(plans)} plan, {len(codes)} code")
+if len(plans) != 1 or len(codes) != 3 or codes[0].meta.get("reply_to") != plans[0].seq:
+    print("X Event log is not replayable!")
+    exit(1)
+
+# --- Test 5: A full mailbox drops (and counts) after put_timeout instead of blocking forever ---
+async def stuck_consumer():
+    bus = MessageBus(mailbox_size=1, put_timeout=0.1, log_size=3)
+    bus.subscribe("stuck", ["work.*"])
+    start = time.perf_counter()
+    for i in range(5):
+        await bus.publish("work.item", "producer", i)
+    return time.perf_counter() - start, bus
+
+elapsed, bus = asyncio.run(stuck_consumer())
+stats = bus.stats()
+print(f"[5] 5 messages to a stuck mailbox in {elapsed:.2f}s: dropped={stats['mailboxes']['stuck']['dropped']}, "
+      f"log keeps {len(bus.log)} of {stats['messages']}")
+if stats["mailboxes"]["stuck"]["dropped"] != 4 or elapsed > 2 or len(bus.log) != 3 or stats["messages"] != 5:
+    print("X Full mailboxes must drop after the timeout and the in-memory log must stay bounded!")
+    exit(1)
+
+print("--- [SUCCESS] Swarm bus verified ---")
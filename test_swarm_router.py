@@ -0,0 +1,122 @@
+import os
+import threading
+import time
+
+os.environ["CODEX_GEMINI_CONCURRENCY"] = "1"
+os.environ["CODEX_GROQ_CONCURRENCY"] = "1"
+
+from codex_ia.core import brain_router
+from codex_ia.core.brain_router import BrainRouter, get_shared_router
+from codex_ia.core.swarm.orchestrator import SwarmOrchestrator
+from codex_ia.core.swarm.specialists import ArchitectAgent, DeveloperAgent, QAAgent
+
+print("--- Testing swarm specialists on the shared BrainRouter ---")
+
+
+class FakeBrain:
+    """Provider stand-in that records its peak concurrency."""
+
+    def __init__(self, name, delay=0.2, reply=None):
+        self.name, self.delay, self.reply = name, delay, reply
+        self.model = f"{name}-default"
+        self.active = self.peak = self.calls = 0
+        self.lock = threading.Lock()
+
+    def send_message(self, message, web_search=False, image_path=None, task_type="general"):
+        with self.lock:
+            self.active += 1
+            self.calls += 1
+            self.peak = max(self.peak, self.active)
+        time.sleep(self.delay)
+        with self.lock:
+            self.active -= 1
+        return self.reply or f"[{self.name}:{self.model}] {message[:30]}"
+
+
+router = BrainRouter()
+router.neurons = {"gemini": FakeBrain("gemini"), "groq": FakeBrain("groq"), "ollama": FakeBrain("ollama")}
+brain_router._shared_router = router
+
+# --- Test 1: Per-provider limits, load spills to the next provider ---
+start = time.perf_counter()
+threads = [threading.Thread(target=router.send_message, args=(f"q{i}",)) for i in range(4)]
+[t.start() for t in threads]
+[t.join() for t in threads]
+elapsed = time.perf_counter() - start
+g, q, o = (router.neurons[n] for n in ("gemini", "groq", "ollama"))
+print(f"[1] 4 requests in {elapsed:.2f}s: gemini={g.calls} (peak {g.peak}), groq={q.calls} (peak {q.peak}), ollama={o.calls}")
+if g.peak > 1 or q.peak > 1 or q.calls != 2 or o.calls != 0 or elapsed > 0.55:
+    print("X Concurrency limits / spillover not honoured!")
+    exit(1)
+
+# --- Test 2: Per-agent profiles share clients, sleep state and slots ---
+dev = DeveloperAgent()
+arch = ArchitectAgent()
+if get_shared_router() is not router or dev.router.sleeping_brains is not router.sleeping_brains \
+        or dev.router._slots is not router._slots:
+    print("X Profiles do not share the router state!")
+    exit(1)
+custom = router.profile(priority=["groq"], models={"gemini": "gemini-1.5-pro"})
+print(f"[2] dev priority={dev.router.priority} arch priority={arch.router.priority} "
+      f"custom gemini model={custom.neurons['gemini'].model} (shared: {router.neurons['gemini'].model})")
+if custom.priority != ["groq"] or custom.neurons["gemini"].model != "gemini-1.5-pro" \
+        or router.neurons["gemini"].model != "gemini-default" or "groq" not in custom.send_message("hi"):
+    print("X Profile priority / model override failed!")
+    exit(1)
+
+# --- Test 3: Real fallback to Ollama when cloud providers fail ---
+router.neurons["gemini"].reply = "Error sending message to Gemini: 500"
+router.neurons["groq"].reply = "Error: groq 503"
+answer = QAAgent().ask("check this code")
+print(f"[3] QA answer: {answer}")
+if not answer.startswith("[ollama"):
+    print("X Did not fall back to local Ollama!")
+    exit(1)
+
+router.neurons["ollama"].reply = "⚠️ Ollama não detectado localmente."
+try:
+    QAAgent().ask("check this code")
+    print("X Failure was hidden behind a canned answer!")
+    exit(1)
+except RuntimeError as e:
+    print(f"    All down -> {str(e)[:60]}...")
+
+# --- Test 4: Specialists in the swarm go through the router ---
+for name in ("gemini", "groq", "ollama"):
+    router.neurons[name].reply = None
+swarm = SwarmOrchestrator()
+for agent in (ArchitectAgent(), DeveloperAgent(), QAAgent()):
+    swarm.register_agent(agent)
+updates = [u for u in swarm.start_mission_iterative("todo app") if u[0] != "SYSTEM"]
+print(f"[4] {[(s, c[:20]) for s, c in updates]}")
+if [s for s, _ in updates] != ["DaVinci", "Alan", "Grace"]:
+    print("X Swarm specialists did not answer through the router!")
+    exit(1)
+
+# --- Test 5: Saturated providers wait on release, then give up as "busy" ---
+brain_router.CLAIM_TIMEOUT = 0.3
+held = [router._claim() for _ in range(2)]  # gemini and groq (1 slot each), ollama is never spilled to
+start = time.perf_counter()
+busy = router.send_message("q")
+waited = time.perf_counter() - start
+threading.Timer(0.05, router._release, args=(held[0][1],)).start()
+start = time.perf_counter()
+name, slot = router._claim()
+woke = time.perf_counter() - start
+print(f"[5] busy after {waited:.2f}s -> {busy[:40]}... | woke on release after {woke:.2f}s ({name})")
+router._release(slot)
+router._release(held[1][1])
+if not busy.startswith("😴") or waited < 0.25 or name != "gemini" or woke > 0.25:
+    print("X Claim did not honour the deadline / release notification!")
+    exit(1)
+try:
+    held = [router._claim() for _ in range(2)]
+    QAAgent().ask("check this code")
+    print("X Busy failure was hidden behind a canned answer!")
+    exit(1)
+except RuntimeError:
+    pass
+finally:
+    [router._release(slot) for _, slot in held]
+
+print("--- [SUCCESS] Swarm router verified ---")
@@ -0,0 +1,69 @@
+import os
+import shutil
+import tempfile
+import time
+
+from codex_ia.core.executor import get_executor
+from codex_ia.core.syntax_checker import SyntaxChecker, analyze_source
+
+print("--- Testing the in-process syntax checker ---")
+
+tmp = tempfile.mkdtemp()
+path = os.path.join(tmp, "service.py")
+CLEAN = "import os\n\n\ndef home():\n    return os.path.expanduser('~')\n\n\ndef answer():\n    return 42\n"
+
+# --- Test 1: Syntax errors and lint findings, with line numbers ---
+issues = analyze_source("def f(:\n    pass\n", path)
+print(f"[1] Broken: {[str(i) for i in issues]}")
+if len(issues) != 1 or issues[0].kind != "syntax" or issues[0].line != 1:
+    print("X Syntax error not reported!")
+    exit(1)
+issues = analyze_source("import json\n\ndef f():\n    return Tru\n", path)
+print(f"    Lint: {[str(i) for i in issues]}")
+if not any("Tru" in i.message and i.line == 4 for i in issues) or not any("json" in i.message for i in issues):
+    print("X Undefined name / unused import not reported!")
+    exit(1)
+if analyze_source(CLEAN, path):
+    print("X Clean code was flagged!")
+    exit(1)
+
+# --- Test 2: Warm in-process checks beat a compileall subprocess by far ---
+with open(path, "w", encoding="utf-8") as f:
+    f.write(CLEAN * 40)
+checker = SyntaxChecker()
+first = checker.check(path)
+second = checker.check(path)
+start = time.perf_counter()
+get_executor().run(["python", "-m", "compileall", "-q", path], cwd=tmp, timeout=30)
+subprocess_ms = (time.perf_counter() - start) * 1000
+print(f"[2] Cold {first.elapsed_ms:.2f} ms, cached {second.elapsed_ms:.3f} ms (hit={second.cached}), "
+      f"compileall subprocess {subprocess_ms:.0f} ms")
+if not second.cached or second.elapsed_ms > first.elapsed_ms or first.elapsed_ms > subprocess_ms:
+    print("X Checker is not cached / not faster than a subprocess!")
+    exit(1)
+
+# --- Test 3: Escalation only when the diff touches something flagged ---
+checker = SyntaxChecker()
+checker.check(path, CLEAN)
+print(f"[3] Clean version -> escalate {checker.flagged_changes(path)}")
+broken = CLEAN.replace("return 42", "return answr")
+checker.check(path, broken)
+flagged = checker.flagged_changes(path)
+print(f"    Typo introduced -> escalate {[str(i) for i in flagged]}")
+if len(flagged) != 1 or flagged[0].line != 9:
+    print("X A new flag on a changed line must escalate!")
+    exit(1)
+checker.accept(path)  # Reviewed once
+unrelated = broken.replace("expanduser('~')", "expanduser('~user')")
+checker.check(path, unrelated)
+print(f"    Unrelated edit after review -> escalate {checker.flagged_changes(path)}")
+if checker.flagged_changes(path):
+    print("X An edit that does not touch a flagged line should not escalate!")
+    exit(1)
+checker.check(path, unrelated.replace("return answr", "return answr + 1"))
+if len(checker.flagged_changes(path)) != 1:
+    print("X Editing the flagged line should escalate again!")
+    exit(1)
+
+shutil.rmtree(tmp, ignore_errors=True)
+print("--- [SUCCESS] Syntax checker verified ---")
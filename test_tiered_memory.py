@@ -0,0 +1,49 @@
+from codex_ia.core.conversation_memory import TieredMemory, estimate_tokens
+import os
+import tempfile
+import shutil
+
+print("--- Testing Tiered Conversation Memory ---")
+
+tmp = tempfile.mkdtemp()
+db = os.path.join(tmp, "memory.db")
+
+# Deterministic summarizer (the default one uses the local Ollama model)
+def short_summary(transcript):
+    return f"- {len(transcript.splitlines())} turnos resumidos"
+
+memory = TieredMemory.for_project(db, "demo", summarizer=short_summary, background=False)
+memory.SUMMARY_WINDOW = 2  # Older blocks fall into the retrieval-only tier
+
+memory.add_turn("user", "Vamos usar PostgreSQL com o ORM do Django para o módulo de faturas.")
+memory.add_turn("assistant", "Combinado: PostgreSQL + Django ORM para faturas.")
+raw_tokens = 0
+for i in range(60):
+    text = f"Turno {i}: ajuste no componente de interface número {i} " + "detalhe " * 40
+    raw_tokens += estimate_tokens(text)
+    memory.add_turn("user" if i % 2 == 0 else "assistant", text)
+
+# --- Test 1: Old blocks were summarized ---
+summaries = memory.memory.get_summaries(memory.project_id)
+print(f"[1] Summaries stored: {len(summaries)}")
+if not summaries:
+    print("X No summaries were produced!")
+    exit(1)
+
+# --- Test 2: History respects the budget ---
+history = memory.build_history(token_budget=800, query="qual banco de dados escolhemos para as faturas?")
+stats = memory.last_build_stats
+print(f"[2] Budget stats: {stats} (raw history ~{raw_tokens} tokens)")
+if stats["total"] > 800:
+    print("X History exceeded the token budget!")
+    exit(1)
+
+# --- Test 3: The oldest decision is reachable via retrieval ---
+print(f"[3] Retrieved tier present: {'MEMÓRIA RECUPERADA' in history}")
+if "PostgreSQL" not in history:
+    print("X Old decision was not retrieved!")
+    exit(1)
+
+memory.memory.close()
+shutil.rmtree(tmp, ignore_errors=True)
+print("\n--- [SUCCESS] Tiered Memory Verified ---")
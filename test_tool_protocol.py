@@ -0,0 +1,89 @@
+import os
+import shutil
+import tempfile
+import time
+
+from codex_ia.core.agent import CodexAgent
+from codex_ia.core.tool_protocol import ToolCall, ToolExecutor, parse_tool_calls
+
+print("--- Testing structured tool calls + parallel execution ---")
+
+tmp = tempfile.mkdtemp()
+for name in ("a.py", "b.py", "c.py"):
+    with open(os.path.join(tmp, name), "w", encoding="utf-8") as f:
+        f.write(f"# module {name}\nVALUE = '{name}'\n")
+
+agent = CodexAgent(tmp)
+
+# --- Test 1: Legacy syntax with several arguments ---
+calls = parse_tool_calls('💭 ok\n🛠️ TOOL: replace_text("a.py", "VALUE", "NEW_VALUE")', agent.tool_map)
+print(f"[1] Legacy parse: {calls[0].name} {calls[0].args}")
+if calls[0].args != {"path": "a.py", "old_text": "VALUE", "new_text": "NEW_VALUE"}:
+    print("X Multi-argument legacy call was not split correctly!")
+    exit(1)
+
+# --- Test 2: JSON protocol, several calls in one reply ---
+reply = '🛠️ TOOL_CALLS:\n```json\n[{"name": "read_file", "args": {"path": "a.py"}}, {"name": "read_file", "args": {"path": "b.py"}}]\n```'
+calls = parse_tool_calls(reply, agent.tool_map)
+print(f"[2] JSON parse: {[(c.name, c.args['path']) for c in calls]}")
+if len(calls) != 2:
+    print("X JSON tool calls not parsed!")
+    exit(1)
+
+# --- Test 3: Independent calls run concurrently, writes keep their order ---
+order = []
+
+def slow_read(path):
+    time.sleep(0.2)
+    order.append(("read", path))
+    return path
+
+def write_file(path, content):
+    order.append(("write", path))
+    return "ok"
+
+executor = ToolExecutor({"slow_read": slow_read, "write_file": write_file})
+start = time.perf_counter()
+results = executor.execute([ToolCall("slow_read", {"path": p}) for p in "abcd"] +
+                           [ToolCall("write_file", {"path": "x", "content": ""}),
+                            ToolCall("slow_read", {"path": "e"})])
+wall = time.perf_counter() - start
+print(f"[3] 5 reads (0.2s each) + 1 write in {wall:.2f}s")
+if wall > 0.8:
+    print("X Independent tool calls were not executed concurrently!")
+    exit(1)
+if order.index(("write", "x")) != 4 or order[-1] != ("read", "e"):
+    print(f"X Mutating call did not act as a barrier: {order}")
+    exit(1)
+if [r.call.args["path"] for r in results] != list("abcd") + ["x", "e"]:
+    print("X Results are not in call order!")
+    exit(1)
+
+# --- Test 4: Full ReAct loop with a scripted brain ---
+class ScriptedBrain:
+    def __init__(self, replies):
+        self.replies = list(replies)
+        self.prompts = []
+
+    def send_message(self, message, **kwargs):
+        self.prompts.append(message)
+        return self.replies.pop(0)
+
+brain = ScriptedBrain([
+    '💭 Preciso ler os três arquivos.\n🛠️ TOOL_CALLS: [{"name": "read_file", "args": {"path": "a.py"}}, '
+    '{"name": "read_file", "args": {"path": "b.py"}}, {"name": "read_file", "args": {"path": "c.py"}}]',
+    "Os três módulos definem VALUE.",
+])
+agent.llm_client = brain
+answer = agent.chat("O que os módulos definem?")
+print(f"[4] Answer: {answer}")
+print(f"    Trace: {[(t['step'], [x['name'] for x in t['tools']], t['tool_wall_ms']) for t in agent.last_trace]}")
+if answer != "Os três módulos definem VALUE." or len(brain.prompts) != 2:
+    print("X Agent did not finish in two round-trips!")
+    exit(1)
+if "VALUE = 'c.py'" not in brain.prompts[1] or len(agent.last_trace[0]["tools"]) != 3:
+    print("X Observations of all tool calls were not fed back!")
+    exit(1)
+
+shutil.rmtree(tmp, ignore_errors=True)
+print("--- [SUCCESS] Tool protocol verified ---")
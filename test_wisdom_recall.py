@@ -0,0 +1,70 @@
+from codex_ia.core.embeddings import LocalEmbedder, _hash_embed
+from codex_ia.core.network_agent import NetworkAgent
+import tempfile
+import shutil
+
+print("--- Testing Level 11.5: Semantic Recall (Exocortex) ---")
+
+# Isolated memory bank so we don't touch ~/.codex_network_memory.json
+home = tempfile.mkdtemp()
+net = NetworkAgent(user_home=home)
+
+net.store_experience(
+    context="Deployment of the Django app to the VM",
+    action="Pinned gunicorn workers and collected static files",
+    outcome="Deploy succeeded",
+    success=True,
+    tags=["django", "gunicorn"]
+)
+net.store_experience(
+    context="Parsing CSV exports",
+    action="Used csv.DictReader",
+    outcome="Worked",
+    success=True,
+    tags=["csv"]
+)
+
+# --- Test 1: Tag-only recall keeps the legacy behaviour ---
+print("\n[1] Tag recall...")
+if "No specific prior wisdom" in net.retrieve_wisdom(["deploying"]):
+    print(" > OK: substring tags still do not match different wording.")
+
+# --- Test 2: Semantic recall finds the lesson with different wording ---
+print("\n[2] Semantic recall...")
+wisdom = net.retrieve_wisdom(["deploying"], query="deploying django with gunicorn")
+print(wisdom)
+if "Deployment of the Django app" not in wisdom:
+    print("X Semantic recall missed the deployment lesson!")
+    exit(1)
+
+# --- Test 3: Index stays incremental ---
+print("\n[3] Incremental indexing...")
+index = net.memory._wisdom_index
+before = len(index.index)
+net.store_experience("Redis cache warmup", "Preloaded keys", "Latency dropped", True, ["redis"])
+if len(index.index) != before + 1:
+    print("X New experience was not added to the index!")
+    exit(1)
+
+net.retrieve_wisdom([], query="warming the redis cache")
+print(f" > Retrieval took {net.memory.last_retrieval_ms:.2f} ms ({index.index.backend} index)")
+
+# --- Test 4: Tag hits survive a semantic query that does not resemble them ---
+print("\n[4] Tag hits with a query...")
+wisdom = net.retrieve_wisdom(["csv"], query="zebra migration patterns")
+if "Parsing CSV exports" not in wisdom:
+    print("X Tag-only match was dropped by the semantic threshold!")
+    exit(1)
+
+# --- Test 5: Featureless text never embeds to an all-zero vector; caches are per embedder ---
+if not any(_hash_embed("!!!")):
+    print("X Empty embedding would be NaN under cosine distance!")
+    exit(1)
+first, second = LocalEmbedder(), LocalEmbedder()
+first.embed_one("deploy")
+if "deploy" in second._cache or "deploy" not in first._cache:
+    print("X Embedding cache is shared between instances!")
+    exit(1)
+
+shutil.rmtree(home, ignore_errors=True)
+print("\n--- [SUCCESS] Semantic Recall Verified ---")